@@ -3,26 +3,18 @@ Advanced Trading Analyzer - Maximum Free Analysis Power
 Analyzes 1000+ stocks with comprehensive free data sources and advanced ML
 """
 
-import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
 import time
 import warnings
 warnings.filterwarnings('ignore')
 
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, ExtraTreesRegressor
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
-from sklearn.preprocessing import StandardScaler, RobustScaler
-from sklearn.metrics import r2_score, mean_squared_error
-from sklearn.linear_model import Ridge, Lasso, ElasticNet
-from sklearn.svm import SVR
-from sklearn.neural_network import MLPRegressor
-import xgboost as xgb
 from advanced_data_fetcher import AdvancedDataFetcher
+from price_panel import build_price_panel, align_right
+from volume_profile import volume_profile
+from result_memo import ResultMemo, code_fingerprint
+from lazy_imports import lazy_module, lazy_attr, module_available
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import multiprocessing
 import functools
@@ -31,20 +23,33 @@ import pickle
 import os
 import random
 
+# UI / data / ML libraries load on first use (training and Streamlit rendering only)
+st = lazy_module('streamlit')
+yf = lazy_module('yfinance')
+xgb = lazy_module('xgboost')
+
+RandomForestRegressor = lazy_attr('sklearn.ensemble', 'RandomForestRegressor')
+GradientBoostingRegressor = lazy_attr('sklearn.ensemble', 'GradientBoostingRegressor')
+ExtraTreesRegressor = lazy_attr('sklearn.ensemble', 'ExtraTreesRegressor')
+train_test_split = lazy_attr('sklearn.model_selection', 'train_test_split')
+StandardScaler = lazy_attr('sklearn.preprocessing', 'StandardScaler')
+r2_score = lazy_attr('sklearn.metrics', 'r2_score')
+Ridge = lazy_attr('sklearn.linear_model', 'Ridge')
+Lasso = lazy_attr('sklearn.linear_model', 'Lasso')
+ElasticNet = lazy_attr('sklearn.linear_model', 'ElasticNet')
+SVR = lazy_attr('sklearn.svm', 'SVR')
+MLPRegressor = lazy_attr('sklearn.neural_network', 'MLPRegressor')
+
 # Try to import advanced ML libraries
-try:
-    import lightgbm as lgb
-    LIGHTGBM_AVAILABLE = True
-except ImportError:
-    LIGHTGBM_AVAILABLE = False
+LIGHTGBM_AVAILABLE = module_available('lightgbm')
+if LIGHTGBM_AVAILABLE:
+    lgb = lazy_module('lightgbm')
 
-try:
-    from sklearn.cluster import KMeans
-    from sklearn.decomposition import PCA
-    from sklearn.manifold import TSNE
-    ADVANCED_ML_AVAILABLE = True
-except ImportError:
-    ADVANCED_ML_AVAILABLE = False
+ADVANCED_ML_AVAILABLE = module_available('sklearn')
+if ADVANCED_ML_AVAILABLE:
+    KMeans = lazy_attr('sklearn.cluster', 'KMeans')
+    PCA = lazy_attr('sklearn.decomposition', 'PCA')
+    TSNE = lazy_attr('sklearn.manifold', 'TSNE')
 
 class AdvancedTradingAnalyzer:
     """Advanced trading analyzer with maximum free analysis power"""
@@ -80,10 +85,20 @@ class AdvancedTradingAnalyzer:
         os.makedirs(self.cache_dir, exist_ok=True)
         self._indicator_cache = {}
         self._analysis_cache = {}
+        self.result_memo = ResultMemo(cache_dir=self.cache_dir)
+        self._memo_version = code_fingerprint(
+            os.path.join(os.path.dirname(__file__), 'advanced_analyzer.py'),
+            os.path.join(os.path.dirname(__file__), 'advanced_data_fetcher.py'),
+            config={'data_mode': data_mode},
+        )
         
         # Determine optimal worker count (OPTIMIZED for speed)
         self.cpu_count = multiprocessing.cpu_count()
         self.max_workers = min(self.cpu_count * 4, 64)  # Increased to 64 for better throughput
+        # 'thread', 'process' (workers over a shared-memory price panel, see
+        # process_analysis) or 'auto' (process when there are 4+ cores)
+        self.analysis_mode = 'auto'
+        self.process_workers = None
         
         print(f"🚀 Optimizer: Using {self.max_workers} workers (CPU cores: {self.cpu_count})")
         print("🛡️ Data integrity validation: ENABLED (synthetic data blocked)")
@@ -313,35 +328,25 @@ class AdvancedTradingAnalyzer:
         return unique_universe
     
     def _get_data_hash(self, symbol, df):
-        """Generate hash for caching based on symbol and data"""
+        """Content hash of the analysis inputs: full history, market context and code version"""
         try:
-            # Create hash from symbol + last few data points + data length
-            data_str = f"{symbol}_{len(df)}_{df['Close'].iloc[-1]:.4f}_{df['Volume'].iloc[-1]}"
-            return hashlib.md5(data_str.encode()).hexdigest()
+            context = {
+                'date': datetime.now().strftime('%Y-%m-%d'),
+                'breadth': getattr(self, '_breadth_context', {}),
+                'models': sorted(self.models.keys()),
+            }
+            return self.result_memo.make_key('analysis', symbol, hist=df, context=context,
+                                             version=self._memo_version)
         except:
             return f"{symbol}_{int(time.time())}"
     
     def _load_cached_analysis(self, cache_key):
-        """Load cached analysis result"""
-        try:
-            cache_file = os.path.join(self.cache_dir, f"{cache_key}.pkl")
-            if os.path.exists(cache_file):
-                # Check if cache is less than 1 hour old
-                if time.time() - os.path.getmtime(cache_file) < 3600:
-                    with open(cache_file, 'rb') as f:
-                        return pickle.load(f)
-        except:
-            pass
-        return None
+        """Load cached analysis result (news/info are fetched live, so keep the 1 hour limit)"""
+        return self.result_memo.get(cache_key, max_age=3600)
     
-    def _save_cached_analysis(self, cache_key, result):
-        """Save analysis result to cache"""
-        try:
-            cache_file = os.path.join(self.cache_dir, f"{cache_key}.pkl")
-            with open(cache_file, 'wb') as f:
-                pickle.dump(result, f)
-        except:
-            pass
+    def _save_cached_analysis(self, cache_key, result, symbol=''):
+        """Save analysis result to the result memo"""
+        self.result_memo.put(cache_key, result, namespace='analysis', symbol=symbol)
     
     @functools.lru_cache(maxsize=200)
     def _cached_technical_score(self, symbol, data_hash):
@@ -353,8 +358,7 @@ class AdvancedTradingAnalyzer:
         try:
             # Check cache first
             if preloaded_hist is not None:
-                data_hash = self._get_data_hash(symbol, preloaded_hist)
-                cache_key = f"analysis_{symbol}_{data_hash}"
+                cache_key = self._get_data_hash(symbol, preloaded_hist)
                 cached_result = self._load_cached_analysis(cache_key)
                 if cached_result:
                     print(f"📋 Cache hit: {symbol}")
@@ -568,7 +572,7 @@ class AdvancedTradingAnalyzer:
             
             # Save to cache if we have preloaded data
             if preloaded_hist is not None:
-                self._save_cached_analysis(cache_key, result)
+                self._save_cached_analysis(cache_key, result, symbol)
                 print(f"💾 Cached: {symbol}")
             
             return result
@@ -717,66 +721,13 @@ class AdvancedTradingAnalyzer:
                     'failures': []
                 }
 
-            results = []
-            print(f"🚀 Starting optimized analysis of {len(valid_symbols)} stocks...")
-            print(f"⚡ Performance mode: {self.max_workers} workers, caching enabled")
-            
-            # Enhanced task function with better error handling
-            def enhanced_task(sym_data):
-                sym, idx, total = sym_data
-                try:
-                    pre_hist = hist_map.get(sym) if isinstance(hist_map, dict) else None
-                    result = self.analyze_stock_comprehensive(sym, preloaded_hist=pre_hist)
-                    if result:
-                        print(f"✅ {sym} ({idx+1}/{total}) - Score: {result.get('overall_score', 0):.1f}")
-                    return result
-                except Exception as e:
-                    print(f"❌ {sym} ({idx+1}/{total}) - Error: {str(e)[:50]}")
-                    return None
-
-            # Prepare tasks with progress info
-            tasks = [(sym, i, len(valid_symbols)) for i, sym in enumerate(valid_symbols)]
-            
-            # Use optimized worker count
-            optimal_workers = min(self.max_workers, len(valid_symbols))
-            print(f"🔧 Using {optimal_workers} parallel workers")
-            
-            # Process in batches to avoid memory issues (OPTIMIZED: larger batches)
-            batch_size = max(100, optimal_workers * 4)  # Larger batches for better performance
-            
             start_time = time.time()
-            processed = 0
-            
-            for batch_start in range(0, len(tasks), batch_size):
-                batch_tasks = tasks[batch_start:batch_start + batch_size]
-                
-                with ThreadPoolExecutor(max_workers=optimal_workers) as executor:
-                    futures = {executor.submit(enhanced_task, task): task for task in batch_tasks}
-                    
-                    for fut in as_completed(futures):
-                        try:
-                            res = fut.result()
-                            if res:
-                                results.append(res)
-                            processed += 1
-                            
-                            # Progress update every 25 stocks (reduce console spam)
-                            if processed % 25 == 0:
-                                elapsed = time.time() - start_time
-                                rate = processed / elapsed
-                                eta = (len(valid_symbols) - processed) / rate if rate > 0 else 0
-                                print(f"📊 Progress: {processed}/{len(valid_symbols)} ({processed/len(valid_symbols)*100:.1f}%) - Rate: {rate:.1f}/sec - ETA: {eta/60:.1f}min")
-                                
-                        except Exception as e:
-                            processed += 1
-                            continue
-                
-                # Small delay between batches to prevent resource exhaustion
-                if batch_start + batch_size < len(tasks):
-                    time.sleep(0.1)
+            results = self._run_process_analysis(hist_map, valid_symbols) if self.use_process_pool(len(valid_symbols)) else None
+            if results is None:
+                results = self._run_thread_analysis(hist_map, valid_symbols, start_time)
             
             elapsed_total = time.time() - start_time
-            print(f"🎉 Analysis complete! {len(results)} stocks analyzed in {elapsed_total/60:.1f} minutes ({len(results)/elapsed_total:.1f} stocks/sec)")
+            print(f"🎉 Analysis complete! {len(results)} stocks analyzed in {elapsed_total/60:.1f} minutes ({len(results)/max(elapsed_total, 1e-9):.1f} stocks/sec)")
             
             # Validate data integrity
             is_valid, validation_msg = self._validate_analysis_data(results)
@@ -791,68 +742,278 @@ class AdvancedTradingAnalyzer:
             print(f"Error in advanced analysis: {e}")
             return []
 
+    def use_process_pool(self, n_symbols: int) -> bool:
+        """Whether per-symbol analysis should run in worker processes."""
+        mode = str(self.analysis_mode or 'thread').lower()
+        if mode == 'process':
+            return n_symbols > 1
+        if mode == 'auto':
+            return n_symbols >= 20 and (self.cpu_count or 1) >= 4
+        return False
+
+    def worker_state(self) -> dict:
+        """State handed to process-pool workers (see process_analysis)."""
+        return {
+            'data_mode': self.data_mode,
+            'models': self.models,
+            'scalers': self.scalers,
+            'feature_importance': self.feature_importance,
+            '_breadth_context': self._breadth_context,
+        }
+
+    def _run_process_analysis(self, hist_map: dict, valid_symbols: list[str]) -> list | None:
+        """Analyze valid_symbols in worker processes; None when the pool cannot be used."""
+        from process_analysis import SharedPricePanel, ProcessAnalysisPool
+        panel = None
+        try:
+            panel = SharedPricePanel.create(hist_map, valid_symbols)
+            if panel is None:
+                return None
+            workers = min(self.process_workers or self.cpu_count or 1, len(valid_symbols))
+            print(f"🚀 Starting process-pool analysis of {len(valid_symbols)} stocks...")
+            print(f"⚡ Performance mode: {workers} worker processes, shared panel {panel.nbytes / 1e6:.1f} MB")
+            results = []
+            processed = 0
+            start_time = time.time()
+            with ProcessAnalysisPool(panel, 'advanced', self.worker_state(), workers=workers) as pool:
+                for sym, res in pool.map([s for s in valid_symbols if s in panel]):
+                    processed += 1
+                    if res:
+                        results.append(res)
+                    if processed % 25 == 0:
+                        elapsed = time.time() - start_time
+                        rate = processed / elapsed
+                        eta = (len(valid_symbols) - processed) / rate if rate > 0 else 0
+                        print(f"📊 Progress: {processed}/{len(valid_symbols)} ({processed/len(valid_symbols)*100:.1f}%) - Rate: {rate:.1f}/sec - ETA: {eta/60:.1f}min")
+            return results
+        except Exception as e:
+            print(f"⚠️ Process-pool analysis unavailable ({e}) - using threads")
+            return None
+        finally:
+            if panel is not None:
+                panel.close()
+
+    def _run_thread_analysis(self, hist_map: dict, valid_symbols: list[str], start_time: float) -> list:
+        """Analyze valid_symbols on a thread pool (I/O-friendly default mode)."""
+        results = []
+        print(f"🚀 Starting optimized analysis of {len(valid_symbols)} stocks...")
+        print(f"⚡ Performance mode: {self.max_workers} workers, caching enabled")
+            
+        # Enhanced task function with better error handling
+        def enhanced_task(sym_data):
+            sym, idx, total = sym_data
+            try:
+                pre_hist = hist_map.get(sym) if isinstance(hist_map, dict) else None
+                result = self.analyze_stock_comprehensive(sym, preloaded_hist=pre_hist)
+                if result:
+                    print(f"✅ {sym} ({idx+1}/{total}) - Score: {result.get('overall_score', 0):.1f}")
+                return result
+            except Exception as e:
+                print(f"❌ {sym} ({idx+1}/{total}) - Error: {str(e)[:50]}")
+                return None
+
+        # Prepare tasks with progress info
+        tasks = [(sym, i, len(valid_symbols)) for i, sym in enumerate(valid_symbols)]
+        
+        # Use optimized worker count
+        optimal_workers = min(self.max_workers, len(valid_symbols))
+        print(f"🔧 Using {optimal_workers} parallel workers")
+        
+        # Process in batches to avoid memory issues (OPTIMIZED: larger batches)
+        batch_size = max(100, optimal_workers * 4)  # Larger batches for better performance
+        
+        processed = 0
+        
+        for batch_start in range(0, len(tasks), batch_size):
+            batch_tasks = tasks[batch_start:batch_start + batch_size]
+            
+            with ThreadPoolExecutor(max_workers=optimal_workers) as executor:
+                futures = {executor.submit(enhanced_task, task): task for task in batch_tasks}
+                
+                for fut in as_completed(futures):
+                    try:
+                        res = fut.result()
+                        if res:
+                            results.append(res)
+                        processed += 1
+                        
+                        # Progress update every 25 stocks (reduce console spam)
+                        if processed % 25 == 0:
+                            elapsed = time.time() - start_time
+                            rate = processed / elapsed
+                            eta = (len(valid_symbols) - processed) / rate if rate > 0 else 0
+                            print(f"📊 Progress: {processed}/{len(valid_symbols)} ({processed/len(valid_symbols)*100:.1f}%) - Rate: {rate:.1f}/sec - ETA: {eta/60:.1f}min")
+                            
+                    except Exception as e:
+                        processed += 1
+                        continue
+            
+            # Small delay between batches to prevent resource exhaustion
+            if batch_start + batch_size < len(tasks):
+                time.sleep(0.1)
+        
+        return results
+
     def _compute_internal_breadth(self, hist_map: dict, symbols: list[str]) -> dict:
         """Compute internal market breadth metrics from already-fetched OHLCV.
-        Zero external calls. Uses last available data for each symbol.
+        Zero external calls. Uses the last available bar of each symbol, so
+        symbols that have not printed on the panel's latest date still count.
         """
         try:
-            total = max(1, len(symbols))
-            adv_1d = 0
-            rets_1d = []
-            above_50 = 0
-            above_200 = 0
-            nh_20 = 0
-            nl_20 = 0
+            panel = build_price_panel(hist_map, symbols, fields=('Close',))
+            close = panel['Close']
+            ctx = self.compute_current_breadth(close)
+            if not ctx:
+                return {}
+            on_last = int(close.iloc[-1].notna().sum())
+            if on_last < ctx['universe_size']:
+                print(f"📊 Breadth: {ctx['universe_size']} symbols, {on_last} with a bar on "
+                      f"{close.index[-1]:%Y-%m-%d} (others use their last bar)")
+            return ctx
+        except Exception as e:
+            print(f"⚠️ Internal breadth unavailable: {e}")
+            return {}
 
-            for s in symbols:
-                df = hist_map.get(s)
-                if not isinstance(df, pd.DataFrame) or df.empty or 'Close' not in df.columns:
-                    continue
-                close = df['Close']
-                if len(close) < 3:
-                    continue
-                r1 = float((close.iloc[-1] / close.iloc[-2]) - 1.0)
-                rets_1d.append(r1)
-                if r1 > 0:
-                    adv_1d += 1
+    @staticmethod
+    def _breadth_frames(close: pd.DataFrame) -> dict:
+        """Per date x symbol inputs shared by the breadth calculations.
 
-                # SMA checks (compute quickly here)
-                sma50 = close.rolling(50).mean().iloc[-1] if len(close) >= 50 else np.nan
-                sma200 = close.rolling(200).mean().iloc[-1] if len(close) >= 200 else np.nan
-                last = close.iloc[-1]
-                if not pd.isna(sma50) and last > sma50:
-                    above_50 += 1
-                if not pd.isna(sma200) and last > sma200:
-                    above_200 += 1
+        Windows count each symbol's own traded bars, not panel rows: the panel
+        is packed like align_right (holes squeezed out), rolled column-wise and
+        scattered back to the dates the symbol traded (NaN on other dates), so
+        a halt or missing print never shifts or blanks a symbol's SMAs.
+        """
+        valid = close.notna()
+        order = np.argsort(valid.to_numpy(), axis=0, kind='stable')
+        packed = pd.DataFrame(np.take_along_axis(close.to_numpy(dtype=float), order, axis=0))
 
-                # 20-day highs/lows
-                if len(close) >= 20:
-                    if last >= close.rolling(20).max().iloc[-1]:
-                        nh_20 += 1
-                    if last <= close.rolling(20).min().iloc[-1]:
-                        nl_20 += 1
+        def unpack(frame: pd.DataFrame) -> pd.DataFrame:
+            values = np.empty(frame.shape)
+            np.put_along_axis(values, order, frame.to_numpy(dtype=float), axis=0)
+            return pd.DataFrame(values, index=close.index, columns=close.columns)
 
-            dec_1d = max(0, len(rets_1d) - adv_1d)
-            adv_pct_1d = adv_1d / max(1, len(rets_1d))
-            adv_dec_ratio_1d = adv_1d / max(1, dec_1d)
-            pct_above_50 = above_50 / total
-            pct_above_200 = above_200 / total
-            nhl_ratio_20 = nh_20 / max(1, nl_20)
-            median_ret_1d = float(np.median(rets_1d)) if rets_1d else 0.0
+        n_bars = packed.notna().cumsum()
+        return {
+            'valid': valid,
+            'close': close,
+            'ret_1d': unpack((packed / packed.shift(1) - 1.0).where(n_bars >= 3)),
+            'sma50': unpack(packed.rolling(50).mean()),
+            'sma200': unpack(packed.rolling(200).mean()),
+            'hi20': unpack(packed.rolling(20).max()),
+            'lo20': unpack(packed.rolling(20).min()),
+        }
 
-            return {
-                'adv_pct_1d': adv_pct_1d,
-                'adv_dec_ratio_1d': adv_dec_ratio_1d,
-                'pct_above_sma50': pct_above_50,
-                'pct_above_sma200': pct_above_200,
-                'new_highs_20d': nh_20 / total,
-                'new_lows_20d': nl_20 / total,
-                'nh_nl_ratio_20d': nhl_ratio_20,
-                'median_ret_1d': median_ret_1d,
-                'universe_size': total,
-            }
-        except Exception as e:
+    @staticmethod
+    def compute_current_breadth(close: pd.DataFrame) -> dict:
+        """Breadth context from each symbol's own last bar of a Close panel.
+
+        Unlike the last row of compute_breadth_history, a symbol whose latest
+        bar is older than the panel's last date (halt, late print, different
+        listing calendar) is evaluated on that bar instead of being dropped;
+        universe_size is the number of symbols with any bar. Only each
+        symbol's trailing 200 traded bars are read, and only their last-row
+        values are computed.
+        """
+        if close is None or close.empty:
+            return {}
+        bars = align_right({'Close': close})['Close'].to_numpy(dtype=float)[-200:]
+        has_bar = ~np.isnan(bars[-1])
+        if not has_bar.any():
             return {}
+        bars = bars[:, has_bar]
+        n_bars = close.notna().to_numpy().sum(axis=0)[has_bar]
+
+        def trailing(func, window):
+            # Like rolling(window): NaN unless the symbol has window bars
+            values = bars[-window:]
+            with np.errstate(invalid='ignore'):
+                out = func(values, axis=0) if len(values) == window else np.full(values.shape[1], np.nan)
+            out[np.isnan(values).any(axis=0)] = np.nan
+            return out
+
+        last = bars[-1]
+        ret_1d = last / bars[-2] - 1.0 if len(bars) > 1 else np.full(len(last), np.nan)
+        ret_1d = ret_1d[(n_bars >= 3) & ~np.isnan(ret_1d)]
+        total = len(last)
+        adv = int((ret_1d > 0).sum())
+        dec = len(ret_1d) - adv
+        with np.errstate(invalid='ignore'):
+            above_50 = int((last > trailing(np.mean, 50)).sum())
+            above_200 = int((last > trailing(np.mean, 200)).sum())
+            nh = int((last >= trailing(np.max, 20)).sum())
+            nl = int((last <= trailing(np.min, 20)).sum())
+        return {
+            'adv_pct_1d': adv / max(1, len(ret_1d)),
+            'adv_dec_ratio_1d': adv / max(1, dec),
+            'pct_above_sma50': above_50 / total,
+            'pct_above_sma200': above_200 / total,
+            'new_highs_20d': nh / total,
+            'new_lows_20d': nl / total,
+            'nh_nl_ratio_20d': nh / max(1, nl),
+            'median_ret_1d': float(np.median(ret_1d)) if len(ret_1d) else 0.0,
+            'universe_size': total,
+        }
+
+    @staticmethod
+    def compute_breadth_history(close: pd.DataFrame, lookback: int | None = None) -> pd.DataFrame:
+        """Cross-sectional breadth for every date of a Close panel (dates x symbols).
+
+        All windows are trailing, so each row only uses data available on that
+        date (safe for regime detection and backtests). Pass lookback to compute
+        just the last N dates; only the rows holding each symbol's trailing 200
+        traded bars before them are touched.
+
+        Per date, symbols without a close that day are left out; percentages are
+        relative to the symbols reporting (universe_size). For the breadth of
+        the latest session use compute_current_breadth, which keeps symbols
+        whose last bar is older than the panel's last date.
+        """
+        cols = ['adv_pct_1d', 'adv_dec_ratio_1d', 'pct_above_sma50', 'pct_above_sma200',
+                'new_highs_20d', 'new_lows_20d', 'nh_nl_ratio_20d', 'median_ret_1d', 'universe_size']
+        if close is None or close.empty:
+            return pd.DataFrame(columns=cols)
+
+        if lookback is not None and int(lookback) < len(close):
+            # First row of the window, and for every symbol the row of its
+            # 200th traded bar before it (one more for the 1-day return)
+            counts = close.notna().to_numpy().cumsum(axis=0)
+            first = len(close) - int(lookback)
+            needed = np.maximum(counts[first] - 200, 1)
+            traded = counts[-1] > 0
+            if traded.any():
+                start = int((counts[:, traded] >= needed[None, traded]).argmax(axis=0).min())
+                close = close.iloc[start:]
+
+        frames = AdvancedTradingAnalyzer._breadth_frames(close)
+        valid = frames['valid']
+        last = frames['close']
+        ret_1d = frames['ret_1d']
+        adv = (ret_1d > 0).sum(axis=1)
+        n_ret = ret_1d.notna().sum(axis=1)
+        dec = (n_ret - adv).clip(lower=0)
+
+        universe = valid.sum(axis=1)
+        denom = universe.clip(lower=1)
+        above_50 = ((last > frames['sma50']) & valid).sum(axis=1)
+        above_200 = ((last > frames['sma200']) & valid).sum(axis=1)
+        nh = ((last >= frames['hi20']) & valid).sum(axis=1)
+        nl = ((last <= frames['lo20']) & valid).sum(axis=1)
+
+        history = pd.DataFrame({
+            'adv_pct_1d': adv / n_ret.clip(lower=1),
+            'adv_dec_ratio_1d': adv / dec.clip(lower=1),
+            'pct_above_sma50': above_50 / denom,
+            'pct_above_sma200': above_200 / denom,
+            'new_highs_20d': nh / denom,
+            'new_lows_20d': nl / denom,
+            'nh_nl_ratio_20d': nh / nl.clip(lower=1),
+            'median_ret_1d': ret_1d.median(axis=1).fillna(0.0),
+            'universe_size': universe,
+        }, index=close.index)
+        history = history[universe > 0]
+        if lookback is not None:
+            history = history.iloc[-int(lookback):]
+        return history
 
     def _get_safe_large_caps(self):
         """Curated list of highly reliable large-cap tickers for fallback."""
@@ -1000,8 +1161,30 @@ class AdvancedTradingAnalyzer:
         return sector_mapping.get(symbol, 'Technology')  # Default to Technology for unknown symbols
     
     def _create_comprehensive_features(self, df, info, news, insider, options, institutional, earnings, economic, sector, analyst):
-        """Create comprehensive feature set with 200+ features"""
+        """Create comprehensive feature set with 200+ features (latest bar)"""
+        matrix = self._create_feature_matrix(df, info, news, insider, options, institutional, earnings, economic, sector, analyst)
+        return matrix.iloc[[-1]].reset_index(drop=True)
+    
+    def _create_feature_matrix(self, df, info, news, insider, options, institutional, earnings, economic, sector, analyst):
+        """
+        Comprehensive features for every bar of df in one pass.
+        
+        Row j equals the features of df.iloc[:j+1] (every indicator column,
+        rolling window and pct_change only looks back), so training can use
+        all bars of a history without re-slicing it per bar.
+        """
         features = {}
+        close = df['Close']
+        
+        def latest(series, default=0):
+            return series.where(series.notna(), default)
+        
+        def flag(series):
+            return series.map(lambda v: 1 if v else 0)
+        
+        def price_vs(level):
+            ratio = close / level
+            return ratio.where(level.notna() & (level != 0), 1)
         
         # Technical features (100+ indicators)
         tech_indicators = ['RSI_14', 'RSI_21', 'RSI_30', 'RSI_50', 'MACD_12_26', 'MACD_5_35', 
@@ -1010,84 +1193,83 @@ class AdvancedTradingAnalyzer:
         
         for indicator in tech_indicators:
             if indicator in df.columns:
-                features[f'{indicator}_current'] = df[indicator].iloc[-1] if not pd.isna(df[indicator].iloc[-1]) else 0
-                features[f'{indicator}_avg_5'] = df[indicator].rolling(5).mean().iloc[-1] if not pd.isna(df[indicator].rolling(5).mean().iloc[-1]) else 0
-                features[f'{indicator}_avg_20'] = df[indicator].rolling(20).mean().iloc[-1] if not pd.isna(df[indicator].rolling(20).mean().iloc[-1]) else 0
-                features[f'{indicator}_std_20'] = df[indicator].rolling(20).std().iloc[-1] if not pd.isna(df[indicator].rolling(20).std().iloc[-1]) else 0
+                series = df[indicator]
+                features[f'{indicator}_current'] = latest(series)
+                features[f'{indicator}_avg_5'] = latest(series.rolling(5).mean())
+                features[f'{indicator}_avg_20'] = latest(series.rolling(20).mean())
+                features[f'{indicator}_std_20'] = latest(series.rolling(20).std())
         
         # Price features
-        features['Price_Change_1d'] = df['Close'].pct_change().iloc[-1] if not pd.isna(df['Close'].pct_change().iloc[-1]) else 0
-        features['Price_Change_5d'] = df['Close'].pct_change(5).iloc[-1] if not pd.isna(df['Close'].pct_change(5).iloc[-1]) else 0
-        features['Price_Change_20d'] = df['Close'].pct_change(20).iloc[-1] if not pd.isna(df['Close'].pct_change(20).iloc[-1]) else 0
-        features['Price_Change_50d'] = df['Close'].pct_change(50).iloc[-1] if not pd.isna(df['Close'].pct_change(50).iloc[-1]) else 0
+        features['Price_Change_1d'] = latest(close.pct_change())
+        features['Price_Change_5d'] = latest(close.pct_change(5))
+        features['Price_Change_20d'] = latest(close.pct_change(20))
+        features['Price_Change_50d'] = latest(close.pct_change(50))
         
         # Volume features
-        features['Volume_Ratio'] = df['Volume_Ratio'].iloc[-1] if not pd.isna(df['Volume_Ratio'].iloc[-1]) else 1
-        features['Volume_Change_1d'] = df['Volume_Change'].iloc[-1] if not pd.isna(df['Volume_Change'].iloc[-1]) else 0
-        features['Volume_Change_5d'] = df['Volume'].pct_change(5).iloc[-1] if not pd.isna(df['Volume'].pct_change(5).iloc[-1]) else 0
+        features['Volume_Ratio'] = latest(df['Volume_Ratio'], 1)
+        features['Volume_Change_1d'] = latest(df['Volume_Change'])
+        features['Volume_Change_5d'] = latest(df['Volume'].pct_change(5))
         
         # Moving average features
         ma_periods = [5, 10, 20, 50, 100, 200]
         for period in ma_periods:
             sma_col = f'SMA_{period}'
             if sma_col in df.columns:
-                features[f'Price_vs_SMA{period}'] = df['Close'].iloc[-1] / df[sma_col].iloc[-1] if not pd.isna(df[sma_col].iloc[-1]) and df[sma_col].iloc[-1] != 0 else 1
+                features[f'Price_vs_SMA{period}'] = price_vs(df[sma_col])
         
         # Bollinger Bands features
         if 'BB_20_2_upper' in df.columns:
-            bb_upper = df['BB_20_2_upper'].iloc[-1] if not pd.isna(df['BB_20_2_upper'].iloc[-1]) else df['Close'].iloc[-1]
-            bb_lower = df['BB_20_2_lower'].iloc[-1] if not pd.isna(df['BB_20_2_lower'].iloc[-1]) else df['Close'].iloc[-1]
-            bb_middle = df['BB_20_2_middle'].iloc[-1] if not pd.isna(df['BB_20_2_middle'].iloc[-1]) else df['Close'].iloc[-1]
+            bb_upper = df['BB_20_2_upper'].where(df['BB_20_2_upper'].notna(), close)
+            bb_lower = df['BB_20_2_lower'].where(df['BB_20_2_lower'].notna(), close)
+            bb_middle = df['BB_20_2_middle'].where(df['BB_20_2_middle'].notna(), close)
             
-            if bb_upper != bb_lower:
-                features['BB_Position'] = (df['Close'].iloc[-1] - bb_lower) / (bb_upper - bb_lower)
-                features['BB_Width'] = (bb_upper - bb_lower) / bb_middle if bb_middle != 0 else 0
-            else:
-                features['BB_Position'] = 0.5
-                features['BB_Width'] = 0
+            band = bb_upper != bb_lower
+            features['BB_Position'] = ((close - bb_lower) / (bb_upper - bb_lower)).where(band, 0.5)
+            features['BB_Width'] = ((bb_upper - bb_lower) / bb_middle).where(band & (bb_middle != 0), 0)
         
         # Ichimoku Cloud features
         if 'Ichimoku_Conversion' in df.columns:
-            features['Ichimoku_Conversion'] = df['Ichimoku_Conversion'].iloc[-1] if not pd.isna(df['Ichimoku_Conversion'].iloc[-1]) else 0
-            features['Ichimoku_Base'] = df['Ichimoku_Base'].iloc[-1] if not pd.isna(df['Ichimoku_Base'].iloc[-1]) else 0
-            features['Ichimoku_Cloud_Top'] = df['Ichimoku_Cloud_Top'].iloc[-1] if not pd.isna(df['Ichimoku_Cloud_Top'].iloc[-1]) else 0
-            features['Ichimoku_Cloud_Bottom'] = df['Ichimoku_Cloud_Bottom'].iloc[-1] if not pd.isna(df['Ichimoku_Cloud_Bottom'].iloc[-1]) else 0
+            features['Ichimoku_Conversion'] = latest(df['Ichimoku_Conversion'])
+            features['Ichimoku_Base'] = latest(df['Ichimoku_Base'])
+            features['Ichimoku_Cloud_Top'] = latest(df['Ichimoku_Cloud_Top'])
+            features['Ichimoku_Cloud_Bottom'] = latest(df['Ichimoku_Cloud_Bottom'])
         
         # Fibonacci features
         fib_levels = ['Retracement_0.236', 'Retracement_0.382', 'Retracement_0.5', 'Retracement_0.618', 'Retracement_0.786']
         for level in fib_levels:
             if level in df.columns:
-                features[f'Price_vs_{level}'] = df['Close'].iloc[-1] / df[level].iloc[-1] if not pd.isna(df[level].iloc[-1]) and df[level].iloc[-1] != 0 else 1
+                features[f'Price_vs_{level}'] = price_vs(df[level])
         
         # Pivot Points features
         pivot_levels = ['Pivot_Pivot', 'Pivot_R1', 'Pivot_R2', 'Pivot_R3', 'Pivot_S1', 'Pivot_S2', 'Pivot_S3']
         for level in pivot_levels:
             if level in df.columns:
-                features[f'Price_vs_{level}'] = df['Close'].iloc[-1] / df[level].iloc[-1] if not pd.isna(df[level].iloc[-1]) and df[level].iloc[-1] != 0 else 1
+                features[f'Price_vs_{level}'] = price_vs(df[level])
         
         # Volume Profile features
         if 'Volume_Profile_POC' in df.columns:
-            features['Volume_Profile_POC'] = df['Volume_Profile_POC'].iloc[-1] if not pd.isna(df['Volume_Profile_POC'].iloc[-1]) else 0
-            features['Volume_Profile_VAH'] = df['Volume_Profile_VAH'].iloc[-1] if not pd.isna(df['Volume_Profile_VAH'].iloc[-1]) else 0
-            features['Volume_Profile_VAL'] = df['Volume_Profile_VAL'].iloc[-1] if not pd.isna(df['Volume_Profile_VAL'].iloc[-1]) else 0
+            features['Volume_Profile_POC'] = latest(df['Volume_Profile_POC'])
+            features['Volume_Profile_VAH'] = latest(df['Volume_Profile_VAH'])
+            features['Volume_Profile_VAL'] = latest(df['Volume_Profile_VAL'])
         
         # Volatility features
-        features['Volatility_10'] = df['Volatility_10'].iloc[-1] if not pd.isna(df['Volatility_10'].iloc[-1]) else 0
-        features['Volatility_20'] = df['Volatility_20'].iloc[-1] if not pd.isna(df['Volatility_20'].iloc[-1]) else 0
-        features['Volatility_50'] = df['Volatility_50'].iloc[-1] if not pd.isna(df['Volatility_50'].iloc[-1]) else 0
+        features['Volatility_10'] = latest(df['Volatility_10'])
+        features['Volatility_20'] = latest(df['Volatility_20'])
+        features['Volatility_50'] = latest(df['Volatility_50'])
         
         # Pattern features
         pattern_indicators = ['Doji', 'Hammer', 'Shooting_Star', 'Engulfing', 'Harami', 'Morning_Star', 'Evening_Star']
         for pattern in pattern_indicators:
             if pattern in df.columns:
-                features[f'{pattern}_detected'] = 1 if df[pattern].iloc[-1] else 0
+                features[f'{pattern}_detected'] = flag(df[pattern])
         
         # Market structure features
         structure_indicators = ['Higher_High', 'Lower_Low', 'Breakout', 'Breakdown']
         for indicator in structure_indicators:
             if indicator in df.columns:
-                features[f'{indicator}_detected'] = 1 if df[indicator].iloc[-1] else 0
+                features[f'{indicator}_detected'] = flag(df[indicator])
         
+        # Snapshot features below (fundamentals, news, macro, sector, ...) are the same for every bar
         # Fundamental features
         fundamental_features = ['pe_ratio', 'pb_ratio', 'ps_ratio', 'peg_ratio', 'dividend_yield', 'beta', 
                                'market_cap', 'revenue_growth', 'earnings_growth', 'profit_margins', 'return_on_equity']
@@ -1170,7 +1352,7 @@ class AdvancedTradingAnalyzer:
         features['rating_changes'] = analyst['rating_changes']
         features['analyst_consensus'] = analyst['analyst_consensus']
         
-        return pd.DataFrame([features])
+        return pd.DataFrame(features, index=df.index)
     
     def _predict_comprehensive(self, features):
         """Make comprehensive prediction using ensemble of advanced models"""
@@ -2125,6 +2307,10 @@ class AdvancedTradingAnalyzer:
             volume_threshold = avg_vol_50 * 2
             unusual_volume_days = len(volume.tail(20)[volume.tail(20) > volume_threshold])
             
+            # Volume at price over the same 50-day window
+            profile = volume_profile(df, lookback=50)
+            current_price = float(close.iloc[-1])
+            
             # Volume quality score
             volume_quality = 50
             if volume_trend > 1.2:  # Increasing volume
@@ -2144,7 +2330,13 @@ class AdvancedTradingAnalyzer:
                 'unusual_volume_days': int(unusual_volume_days),
                 'volume_quality_score': int(min(100, max(0, volume_quality))),
                 'high_volume': volume_trend > 1.3,
-                'volume_breakout': unusual_volume_days >= 3
+                'volume_breakout': unusual_volume_days >= 3,
+                'poc': profile.get('poc'),
+                'value_area_high': profile.get('vah'),
+                'value_area_low': profile.get('val'),
+                'high_volume_nodes': profile.get('hvn', []),
+                'low_volume_nodes': profile.get('lvn', []),
+                'price_vs_poc': 'above' if profile and current_price > profile['poc'] else 'below' if profile else 'unknown'
             }
             
         except Exception as e:
@@ -2179,30 +2371,19 @@ class AdvancedTradingAnalyzer:
                         sector = stock_data['sector']
                         analyst = stock_data['analyst']
                         
-                        # Create features for each historical point
-                        for j in range(50, len(df)):  # Start from 50 to have enough history
-                            try:
-                                # Get historical data up to point j
-                                hist_df = df.iloc[:j+1]
-                                
-                                # Create features
-                                features = self._create_comprehensive_features(
-                                    hist_df, info, news, insider, options, 
-                                    institutional, earnings, economic, sector, analyst
-                                )
-                                
-                                if not features.empty:
-                                    # Calculate target (future return)
-                                    if j + 5 < len(df):  # 5-day future return
-                                        future_price = df['Close'].iloc[j + 5]
-                                        current_price = df['Close'].iloc[j]
-                                        target = (future_price - current_price) / current_price * 100
-                                        
-                                        training_data.append(features.values[0])
-                                        training_targets.append(target)
-                                        
-                            except Exception as e:
-                                continue
+                        # Create features for each historical point (one pass over all bars)
+                        matrix = self._create_feature_matrix(
+                            df, info, news, insider, options,
+                            institutional, earnings, economic, sector, analyst
+                        )
+                        
+                        # 5-day future return; rows start at 50 to have enough history
+                        close = df['Close'].to_numpy(dtype=float)
+                        rows = np.arange(50, len(df) - 5)
+                        if len(rows) > 0:
+                            targets = (close[rows + 5] - close[rows]) / close[rows] * 100
+                            training_data.extend(matrix.values[rows])
+                            training_targets.extend(targets)
                                 
                 except Exception as e:
                     print(f"Error collecting data from {symbol}: {e}")
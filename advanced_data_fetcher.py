@@ -3,12 +3,10 @@ Advanced Data Fetcher - Maximum Free Analysis Power
 Fetches comprehensive data from all possible free sources with advanced features
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import requests
 import os
-from bs4 import BeautifulSoup
 import json
 from datetime import datetime, timedelta
 import time
@@ -16,29 +14,29 @@ import time
 import random
 import re
 import threading
-from textblob import TextBlob
+from volume_profile import volume_profile
+from lazy_imports import lazy_module, lazy_attr, module_available
 import warnings
 warnings.filterwarnings('ignore')
 
+# Heavy / optional libraries load on first use (TextBlob pulls in NLTK)
+yf = lazy_module('yfinance')
+BeautifulSoup = lazy_attr('bs4', 'BeautifulSoup')
+TextBlob = lazy_attr('textblob', 'TextBlob')
+
 # Additional free data sources
-try:
-    import fredapi
-    FRED_AVAILABLE = True
-except ImportError:
-    FRED_AVAILABLE = False
-
-try:
-    from alpha_vantage.timeseries import TimeSeries
-    from alpha_vantage.fundamentaldata import FundamentalData
-    ALPHA_VANTAGE_AVAILABLE = True
-except ImportError:
-    ALPHA_VANTAGE_AVAILABLE = False
-
-try:
-    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-    VADER_AVAILABLE = True
-except ImportError:
-    VADER_AVAILABLE = False
+FRED_AVAILABLE = module_available('fredapi')
+if FRED_AVAILABLE:
+    fredapi = lazy_module('fredapi')
+
+ALPHA_VANTAGE_AVAILABLE = module_available('alpha_vantage')
+if ALPHA_VANTAGE_AVAILABLE:
+    TimeSeries = lazy_attr('alpha_vantage.timeseries', 'TimeSeries')
+    FundamentalData = lazy_attr('alpha_vantage.fundamentaldata', 'FundamentalData')
+
+VADER_AVAILABLE = module_available('vaderSentiment')
+if VADER_AVAILABLE:
+    SentimentIntensityAnalyzer = lazy_attr('vaderSentiment.vaderSentiment', 'SentimentIntensityAnalyzer')
 
 class AdvancedDataFetcher:
     """IMPROVED: Advanced data fetcher with caching, backoff, and better data extraction"""
@@ -2175,23 +2173,20 @@ class AdvancedDataFetcher:
             return {}
     
     def _calculate_volume_profile(self, high, low, close, volume, bins=20):
-        """Calculate volume profile"""
+        """Calculate volume profile (POC / value area) from the volume-at-price histogram"""
         try:
-            # Simple volume profile implementation
-            price_range = high.max() - low.min()
-            bin_size = price_range / bins
-            
-            # Find price of control (POC) - price level with highest volume
-            poc_price = close.iloc[-1]  # Simplified
-            
-            # Volume at high (VAH) and volume at low (VAL)
-            vah = high.rolling(window=20).max().iloc[-1]
-            val = low.rolling(window=20).min().iloc[-1]
+            profile = volume_profile(
+                pd.DataFrame({'High': high, 'Low': low, 'Close': close, 'Volume': volume}), bins=bins
+            )
+            if not profile:
+                return {'poc': close.iloc[-1], 'vah': high.iloc[-1], 'val': low.iloc[-1]}
             
             return {
-                'poc': poc_price,
-                'vah': vah,
-                'val': val
+                'poc': profile['poc'],
+                'vah': profile['vah'],
+                'val': profile['val'],
+                'hvn': profile['hvn'],
+                'lvn': profile['lvn']
             }
         except Exception as e:
             print(f"Error calculating volume profile: {e}")
@@ -9,10 +9,12 @@ import json
 import logging
 from typing import List, Dict, Optional, Any
 from datetime import datetime
-import yfinance as yf
 from xai_client import XAIClient
 from premium_quality_universe import get_premium_universe
 from cleaned_high_potential_universe import _normalize_symbol
+from lazy_imports import lazy_module
+
+yf = lazy_module('yfinance')
 
 class AIUniverseSelector:
     """
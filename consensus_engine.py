@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Consensus Engine
+Five investment perspectives as weight vectors over a symbol x sub-score matrix
+
+Each perspective is a set of weights over the component scores
+(fundamentals, momentum, risk, sentiment) plus a pass threshold:
+- Weighted perspective scores for the whole universe in one pass
+- 5-column pass/fail matrix -> agreement count is a row sum
+- Consensus tiers from a vectorized lookup on (agreement, score, quality)
+
+Because the score matrix is built once, re-evaluating consensus with
+different thresholds (what-if analysis, UI sliders) costs a few array ops.
+ScoreAccumulator builds the same matrix row by row while results stream in
+from the analysis workers.
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+
+COMPONENTS = ('fundamentals', 'momentum', 'risk', 'sentiment')
+
+# Weights are listed in the order the terms are summed.
+# 'gates' (optional) replace the score threshold: a symbol passes when it clears
+# every floor of ANY one gate.
+PERSPECTIVES = [
+    {
+        'name': 'institutional',
+        'label': 'Institutional',
+        'reason': 'Institutional Quality',
+        # Real institutions chase momentum — they don't ignore it (10% was too low).
+        'weights': {'fundamentals': 0.40, 'risk': 0.25, 'momentum': 0.35},
+        'threshold': 60,
+        'buy_threshold': 70,
+    },
+    {
+        'name': 'hedge_fund',
+        'label': 'Hedge Fund',
+        'reason': 'Hedge Fund Momentum',
+        'weights': {'momentum': 0.50, 'fundamentals': 0.30, 'risk': 0.20},
+        'threshold': 55,  # relaxed slightly (60→55) to enable 5/5 agreement
+        'buy_threshold': 65,
+    },
+    {
+        'name': 'quant_value',
+        'label': 'Quant Value',
+        'reason': 'Deep Value',
+        'weights': {'fundamentals': 0.70, 'momentum': 0.20, 'risk': 0.10},
+        'threshold': 60,
+        'buy_threshold': 70,
+    },
+    {
+        'name': 'risk_managed',
+        'label': 'Risk-Managed',
+        'reason': 'Low Risk',
+        'weights': {'risk': 0.50, 'fundamentals': 0.40, 'momentum': 0.10},
+        'threshold': 58,  # relaxed (65→58) to enable 5/5 agreement
+        'buy_threshold': 75,
+    },
+    {
+        'name': 'investment_bank',
+        'label': 'Investment Bank',
+        'reason': 'Wall St Consensus',
+        # Sentiment score is the proxy for analyst consensus/coverage
+        'weights': {'fundamentals': 0.50, 'sentiment': 0.50},
+        'gates': [{'fundamentals': 60, 'sentiment': 50}, {'fundamentals': 70}],
+        'buy_threshold': 65,
+        'require_success': True,
+    },
+]
+
+# agreement -> (min consensus score, min quality,
+#               (rec, confidence, risk_level, action) when both are met,
+#               (rec, confidence, risk_level, action) otherwise)
+CONSENSUS_TIERS = {
+    5: (80, 78, ('ULTIMATE BUY', 0.98, 'Lowest', 'Buy Aggressively'), ('STRONG BUY', 0.92, 'Low', 'Buy')),
+    4: (75, 70, ('STRONG BUY', 0.90, 'Low', 'Buy'), ('BUY', 0.85, 'Low-Medium', 'Buy')),
+    3: (70, 65, ('BUY', 0.80, 'Medium', 'Accumulate'), ('WEAK BUY', 0.70, 'Medium-High', 'Accumulate')),
+    2: (65, 60, ('WEAK BUY', 0.65, 'High', 'Watch / Speculate'), ('HOLD', 0.55, 'Very High', 'Watch')),
+}
+# 1 agreement or less (filtered out of consensus anyway)
+FALLBACK_TIER = ('HOLD', 0.50, 'Very High', 'Watch')
+
+
+def _component_score(result, component: str) -> float:
+    # Slotted StockResult records expose single values without building the dict
+    if hasattr(result, 'component_value'):
+        score = result.component_value(component, 'score', np.nan)
+        return np.nan if score is None else score
+    return (result.get(component) or {}).get('score', np.nan)
+
+
+class ScoreAccumulator:
+    """Thread-safe, growable symbol x sub-score matrix (one row per add())"""
+
+    def __init__(self, capacity: int = 256):
+        self.lock = threading.Lock()
+        self.symbols: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.scores = np.full((max(1, capacity), len(COMPONENTS) + 1), np.nan)
+        self.success = np.zeros(max(1, capacity), dtype=bool)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def add(self, symbol: str, result):
+        """Add (or replace) the sub-scores of one analyzed symbol."""
+        row = [_component_score(result, c) for c in COMPONENTS]
+        row.append(result.get('quality_score', 0) or 0)
+        success = bool(result.get('success'))
+        with self.lock:
+            idx = self.rows.get(symbol)
+            if idx is None:
+                idx = len(self.symbols)
+                if idx >= len(self.scores):
+                    self.scores = np.vstack([self.scores, np.full_like(self.scores, np.nan)])
+                    self.success = np.concatenate([self.success, np.zeros_like(self.success)])
+                self.symbols.append(symbol)
+                self.rows[symbol] = idx
+            self.scores[idx] = np.asarray(row, dtype=float)
+            self.success[idx] = success
+
+    def matrix(self, symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Score matrix in build_matrix layout.
+
+        Args:
+            symbols: Row order / subset (defaults to insertion order); every
+                symbol must have been added
+        """
+        with self.lock:
+            if symbols is None:
+                symbols = list(self.symbols)
+                idx = np.arange(len(symbols))
+            else:
+                symbols = list(symbols)
+                idx = np.array([self.rows[s] for s in symbols], dtype=int)
+            scores = self.scores[idx]
+            success = self.success[idx]
+        data = {c: scores[:, k] for k, c in enumerate(COMPONENTS)}
+        data['quality_score'] = scores[:, len(COMPONENTS)]
+        data['success'] = success
+        return pd.DataFrame(data, index=pd.Index(symbols, name='symbol'))
+
+
+class ConsensusEngine:
+    """Vectorized multi-perspective consensus over component score matrices."""
+
+    def __init__(self, perspectives: Optional[List[Dict]] = None, min_agreement: int = 2):
+        self.perspectives = perspectives or PERSPECTIVES
+        self.min_agreement = min_agreement
+        self.names = [p['name'] for p in self.perspectives]
+        # Dense 5 x 4 weight matrix (reference / UI display)
+        self.weight_matrix = np.array([
+            [p['weights'].get(c, 0.0) for c in COMPONENTS] for p in self.perspectives
+        ])
+
+    def build_matrix(self, base_results: Dict[str, Dict]) -> pd.DataFrame:
+        """
+        Symbol x sub-score matrix from analyze_stock results.
+
+        Returns:
+            DataFrame indexed by symbol with one column per component score,
+            plus quality_score and success.
+        """
+        accumulator = ScoreAccumulator(capacity=len(base_results))
+        for symbol, result in base_results.items():
+            accumulator.add(symbol, result)
+        return accumulator.matrix()
+
+    def perspective_scores(self, matrix: pd.DataFrame) -> pd.DataFrame:
+        """Weighted score per perspective (symbols x perspectives)."""
+        out = {}
+        for p in self.perspectives:
+            score = np.zeros(len(matrix))
+            for component, weight in p['weights'].items():
+                score = score + matrix[component].to_numpy(dtype=float) * weight
+            out[p['name']] = score
+        return pd.DataFrame(out, index=matrix.index)
+
+    def pass_matrix(self, matrix: pd.DataFrame, scores: pd.DataFrame,
+                    thresholds: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+        """
+        Boolean symbols x perspectives matrix.
+
+        Args:
+            thresholds: Optional per-perspective overrides of the score threshold
+                (for gated perspectives an override replaces the gates).
+        """
+        thresholds = thresholds or {}
+        out = {}
+        for p in self.perspectives:
+            name = p['name']
+            if name in thresholds:
+                passed = scores[name].to_numpy() >= thresholds[name]
+            elif p.get('gates'):
+                passed = np.zeros(len(matrix), dtype=bool)
+                for gate in p['gates']:
+                    ok = np.ones(len(matrix), dtype=bool)
+                    for component, floor in gate.items():
+                        ok &= matrix[component].to_numpy(dtype=float) >= floor
+                    passed |= ok
+            else:
+                passed = scores[name].to_numpy() >= p['threshold']
+            if p.get('require_success'):
+                passed &= matrix['success'].to_numpy(dtype=bool)
+            out[name] = passed
+        return pd.DataFrame(out, index=matrix.index)
+
+    def consensus_tiers(self, agreement: np.ndarray, avg_score: np.ndarray,
+                        quality_score: np.ndarray) -> pd.DataFrame:
+        """Vectorized tier lookup: recommendation, confidence, risk_level, action."""
+        agreement = np.asarray(agreement)
+        n = len(agreement)
+        columns = [np.full(n, value, dtype=object) for value in FALLBACK_TIER]
+        for count, (min_score, min_quality, strong_tier, weak_tier) in CONSENSUS_TIERS.items():
+            at_tier = agreement == count
+            strong = at_tier & (avg_score >= min_score) & (quality_score >= min_quality)
+            for i in range(len(columns)):
+                columns[i] = np.where(strong, strong_tier[i], np.where(at_tier, weak_tier[i], columns[i]))
+        return pd.DataFrame({
+            'recommendation': columns[0].astype(str),
+            'confidence': columns[1].astype(float),
+            'risk_level': columns[2].astype(str),
+            'action': columns[3].astype(str),
+        })
+
+    def evaluate(self, matrix: pd.DataFrame, thresholds: Optional[Dict[str, float]] = None,
+                 min_agreement: Optional[int] = None) -> pd.DataFrame:
+        """
+        Full consensus table for a score matrix.
+
+        Returns:
+            DataFrame indexed by symbol with perspective scores (rounded as in
+            the pick lists), pass flags (<name>_pass), strategies_agreeing,
+            consensus_score, recommendation, confidence and in_consensus.
+        """
+        min_agreement = self.min_agreement if min_agreement is None else min_agreement
+        scores = self.perspective_scores(matrix).round(2)
+        passed = self.pass_matrix(matrix, self.perspective_scores(matrix), thresholds)
+
+        agreement = passed.sum(axis=1).to_numpy()
+        # Average of the agreeing perspectives' (rounded) scores, summed in perspective order
+        total = np.zeros(len(matrix))
+        for name in self.names:
+            total = total + np.where(passed[name].to_numpy(), scores[name].to_numpy(), 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg = np.where(agreement > 0, total / np.maximum(agreement, 1), np.nan)
+
+        quality = matrix['quality_score'].to_numpy(dtype=float)
+        tiers = self.consensus_tiers(agreement, avg, quality)
+
+        table = scores.copy()
+        for name in self.names:
+            table[f'{name}_pass'] = passed[name].to_numpy()
+        table['strategies_agreeing'] = agreement
+        table['consensus_score'] = np.round(avg, 2)
+        table['quality_score'] = quality
+        table['recommendation'] = tiers['recommendation'].to_numpy()
+        table['confidence'] = tiers['confidence'].to_numpy()
+        table['in_consensus'] = agreement >= min_agreement
+        return table
+
+    def ranked(self, table: pd.DataFrame) -> pd.DataFrame:
+        """
+        Consensus rows ordered by agreement, then consensus score.
+
+        Ties keep the order in which symbols first appear in the per-perspective
+        pick lists (each sorted by score), matching the list-walking ranking.
+        """
+        consensus = table[table['in_consensus'].to_numpy()]
+        n = len(consensus)
+        first_list = np.full(n, len(self.names))
+        first_rank = np.zeros(n)
+        # Walk perspectives last -> first so the earliest list a symbol appears in wins
+        for k in range(len(self.names) - 1, -1, -1):
+            name = self.names[k]
+            passed = consensus[f'{name}_pass'].to_numpy()
+            order = np.argsort(-consensus[name].to_numpy(), kind='stable')
+            rank = np.empty(n)
+            rank[order] = np.arange(n)
+            first_list = np.where(passed, k, first_list)
+            first_rank = np.where(passed, rank, first_rank)
+        seen_order = np.lexsort((first_rank, first_list))
+        consensus = consensus.iloc[seen_order]
+        return consensus.sort_values(['strategies_agreeing', 'consensus_score'], ascending=False, kind='stable')
+
+    def tier_counts(self, table: pd.DataFrame) -> Dict[int, int]:
+        """Number of consensus symbols per agreement level (5, 4, 3, 2)."""
+        in_consensus = table[table['in_consensus']]
+        counts = in_consensus['strategies_agreeing'].value_counts()
+        return {k: int(counts.get(k, 0)) for k in (5, 4, 3, 2)}
@@ -32,15 +32,16 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
+
+from volume_profile import volume_profile, volume_profile_batch
+from lazy_imports import lazy_module, module_available
 import warnings
 warnings.filterwarnings('ignore')
 
-# Try to import yfinance for sector data
-try:
-    import yfinance as yf
-    YF_AVAILABLE = True
-except ImportError:
-    YF_AVAILABLE = False
+# yfinance for sector data (loaded on the first sector lookup)
+YF_AVAILABLE = module_available('yfinance')
+if YF_AVAILABLE:
+    yf = lazy_module('yfinance')
 
 
 class EnhancedSignalsAnalyzer:
@@ -63,6 +64,13 @@ class EnhancedSignalsAnalyzer:
         'XLRE': 'Real Estate',
         'XLC': 'Communication Services'
     }
+    # yfinance sector names that are spelled differently from the SPDR sectors
+    SECTOR_ALIASES = {
+        'Financial Services': 'XLF',
+        'Consumer Cyclical': 'XLY',
+        'Consumer Defensive': 'XLP',
+        'Basic Materials': 'XLB',
+    }
     
     def __init__(self):
         self.sector_momentum_cache = {}
@@ -141,6 +149,9 @@ class EnhancedSignalsAnalyzer:
             # Breakout confirmation (price above VWAP + high volume)
             breakout_confirmed = (current_price > current_vwap and volume_ratio >= 1.2)
             
+            # Volume profile over the same 20-day window
+            profile = volume_profile(hist, lookback=20)
+            
             return {
                 'vwap': round(current_vwap, 2),
                 'current_price': round(current_price, 2),
@@ -151,7 +162,10 @@ class EnhancedSignalsAnalyzer:
                 'volume_confirmation': volume_confirmation,
                 'volume_score': round(volume_score, 1),
                 'combined_vwap_volume_score': round(combined_score, 1),
-                'breakout_confirmed': breakout_confirmed
+                'breakout_confirmed': breakout_confirmed,
+                'poc': round(profile['poc'], 2) if profile else None,
+                'value_area_high': round(profile['vah'], 2) if profile else None,
+                'value_area_low': round(profile['val'], 2) if profile else None
             }
             
         except Exception as e:
@@ -168,7 +182,10 @@ class EnhancedSignalsAnalyzer:
             'volume_confirmation': 'NEUTRAL',
             'volume_score': 50,
             'combined_vwap_volume_score': 50,
-            'breakout_confirmed': False
+            'breakout_confirmed': False,
+            'poc': None,
+            'value_area_high': None,
+            'value_area_low': None
         }
     
     # =========================================================================
@@ -282,17 +299,7 @@ class EnhancedSignalsAnalyzer:
         if not sector_momentum.get('sectors'):
             return {'sector_rank': 6, 'sector_tier': 'MIDDLE', 'sector_adjustment': 0}
         
-        # Map stock sector to ETF
-        sector_to_etf = {v.lower(): k for k, v in self.SECTOR_ETFS.items()}
-        
-        stock_sector_lower = str(stock_sector).lower()
-        etf_symbol = None
-        
-        for sector_name, etf in sector_to_etf.items():
-            if sector_name in stock_sector_lower or stock_sector_lower in sector_name:
-                etf_symbol = etf
-                break
-        
+        etf_symbol = self.sector_etf(stock_sector)
         if not etf_symbol or etf_symbol not in sector_momentum['sectors']:
             return {'sector_rank': 6, 'sector_tier': 'MIDDLE', 'sector_adjustment': 0}
         
@@ -313,6 +320,22 @@ class EnhancedSignalsAnalyzer:
             'sector_adjustment': adjustment
         }
     
+    def sector_etf(self, stock_sector: Optional[str]) -> Optional[str]:
+        """Sector ETF for a sector name (SPDR or yfinance spelling), None if unknown."""
+        if not stock_sector:
+            return None
+        for name, etf in self.SECTOR_ALIASES.items():
+            if name.lower() == str(stock_sector).lower():
+                return etf
+        
+        # Map stock sector to ETF
+        sector_to_etf = {v.lower(): k for k, v in self.SECTOR_ETFS.items()}
+        stock_sector_lower = str(stock_sector).lower()
+        for sector_name, etf in sector_to_etf.items():
+            if sector_name in stock_sector_lower or stock_sector_lower in sector_name:
+                return etf
+        return None
+    
     def _empty_sector_result(self) -> Dict:
         return {
             'sectors': {},
@@ -794,6 +817,231 @@ class EnhancedSignalsAnalyzer:
             'bullish_confirmations': confirmations,
             'confirmation_count': len(confirmations)
         }
+    
+    # =========================================================================
+    # BATCH (UNIVERSE-WIDE) ENHANCED ANALYSIS
+    # =========================================================================
+    
+    def get_enhanced_signals_batch(self, panel: Dict[str, pd.DataFrame],
+                                   sectors: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """
+        Enhanced signals for a whole universe with array operations.
+        
+        Same rules as get_enhanced_signals, evaluated column-wise over an
+        aligned OHLCV panel instead of once per stock. The sector ETF ranking
+        is resolved once and broadcast to every symbol.
+        
+        Args:
+            panel: field -> DataFrame (dates x symbols), see price_panel.build_price_panel
+            sectors: Optional symbol -> sector name
+            
+        Returns:
+            DataFrame indexed by symbol with the component scores, enhancement
+            score/signal and bullish confirmations (same fields as the
+            'enhanced' block of PremiumStockAnalyzer results).
+        """
+        from price_panel import align_right
+        
+        sectors = sectors or {}
+        data = align_right(panel, ('High', 'Low', 'Close', 'Volume'))
+        high, low, close, volume = data['High'], data['Low'], data['Close'], data['Volume']
+        symbols = list(close.columns)
+        if not symbols:
+            return pd.DataFrame()
+        
+        n_bars = close.notna().sum().to_numpy()
+        price = close.iloc[-1].to_numpy()
+        has_20 = n_bars >= 20
+        has_50 = n_bars >= 50
+        
+        # --- 1. VWAP + volume -------------------------------------------------
+        typical_price = (high + low + close) / 3
+        vwap_20d = ((typical_price * volume).rolling(20).sum() / volume.rolling(20).sum()).iloc[-1].to_numpy()
+        vwap = np.where(np.isnan(vwap_20d), price, vwap_20d)
+        avg_volume_20 = volume.rolling(20).mean().iloc[-1].to_numpy()
+        recent_volume = volume.iloc[-3:].mean().to_numpy()
+        volume_ratio = np.where(avg_volume_20 > 0, recent_volume / avg_volume_20, 1.0)
+        volume_score = np.select([volume_ratio >= 1.5, volume_ratio >= 1.2, volume_ratio >= 0.8], [100, 80, 60], 30)
+        vwap_tiers = [price > vwap * 1.02, price > vwap, price > vwap * 0.98]
+        vwap_score = np.select(vwap_tiers, [85, 70, 50], 30)
+        vwap_signal = np.select(vwap_tiers, ['BULLISH', 'SLIGHTLY_BULLISH', 'NEUTRAL'], 'BEARISH')
+        combined_vwap = np.where(has_20, np.round(vwap_score * 0.6 + volume_score * 0.4, 1), 50)
+        breakout = has_20 & (price > vwap) & (volume_ratio >= 1.2)
+        
+        profile = volume_profile_batch(panel, lookbacks=(20,))
+        if profile.empty:
+            profile = pd.DataFrame(np.nan, index=symbols, columns=['poc', 'vah', 'val'])
+        else:
+            profile = profile.xs(20, level='lookback').reindex(symbols)
+        
+        # --- 3. Support / resistance ------------------------------------------
+        ema_8 = close.ewm(span=8, adjust=False).mean().iloc[-1].to_numpy()
+        ema_21 = close.ewm(span=21, adjust=False).mean().iloc[-1].to_numpy()
+        sma_50 = close.rolling(50).mean().iloc[-1].to_numpy()
+        sma_200 = close.rolling(200).mean().iloc[-1].to_numpy()
+        sma_200 = np.where(n_bars >= 200, sma_200, sma_50)
+        high_20d = high.iloc[-20:].max().to_numpy()
+        low_20d = low.iloc[-20:].min().to_numpy()
+        high_52w = high.max().to_numpy()
+        
+        # Swing points: bar i (5 <= i < min(len-5, 60), counted from each
+        # symbol's first bar) equals the max/min of the 11-bar window around it
+        rows = np.arange(len(close))[:, None]
+        offset = rows - (len(close) - n_bars)[None, :]
+        swing_window = (offset >= 5) & (offset < np.minimum(n_bars - 5, 60)[None, :])
+        hi_vals, lo_vals = high.to_numpy(), low.to_numpy()
+        swing_high = swing_window & (hi_vals == high.rolling(11, center=True).max().to_numpy())
+        swing_low = swing_window & (lo_vals == low.rolling(11, center=True).min().to_numpy())
+        
+        with np.errstate(invalid='ignore'):
+            support_candidates = np.vstack([ema_8, ema_21, sma_50, sma_200, low_20d])
+            support_fixed = np.where(support_candidates < price, support_candidates, -np.inf).max(axis=0)
+            support_swing = np.where(swing_low & (lo_vals < price), lo_vals, -np.inf).max(axis=0)
+            support = np.maximum(support_fixed, support_swing)
+            resistance_candidates = np.vstack([ema_8, ema_21, sma_50, high_20d, high_52w])
+            resistance_fixed = np.where(resistance_candidates > price, resistance_candidates, np.inf).min(axis=0)
+            resistance_swing = np.where(swing_high & (hi_vals > price), hi_vals, np.inf).min(axis=0)
+            resistance = np.minimum(resistance_fixed, resistance_swing)
+        
+        has_support = np.isfinite(support)
+        entry_zone_low = np.where(has_support, np.round(support * 0.995, 2), np.round(price * 0.97, 2))
+        entry_zone_high = np.where(has_support, np.round(support * 1.015, 2), np.round(price * 0.99, 2))
+        nearest_support = np.where(has_support, support, price * 0.95)
+        nearest_resistance = np.where(np.isfinite(resistance), resistance, price * 1.05)
+        support_distance_pct = ((price - nearest_support) / price) * 100
+        resistance_distance_pct = ((nearest_resistance - price) / price) * 100
+        with np.errstate(invalid='ignore', divide='ignore'):
+            risk_reward = np.where(support_distance_pct > 0, resistance_distance_pct / support_distance_pct, 1.0)
+        
+        entry_tiers = [support_distance_pct <= 2, support_distance_pct <= 5, support_distance_pct <= 10]
+        entry_score = np.where(has_50, np.select(entry_tiers, [90, 75, 55], 35), 50)
+        entry_timing = np.where(has_50, np.select(entry_tiers, [
+            'EXCELLENT - Near support',
+            'GOOD - Reasonable distance from support',
+            'WAIT - Consider waiting for pullback',
+        ], 'EXTENDED - Far from support, high risk'), 'UNKNOWN')
+        entry_zone = np.where(
+            has_50,
+            [f"${lo} - ${hi}" for lo, hi in zip(entry_zone_low, entry_zone_high)],
+            'N/A'
+        )
+        
+        # --- 4. RSI(2) mean reversion -----------------------------------------
+        delta = close.diff()
+        up, down = delta.where(delta > 0, 0), -delta.where(delta < 0, 0)
+        rsi_2 = (100 - (100 / (1 + up.rolling(2).mean() / down.rolling(2).mean().replace(0, 0.0001)))).iloc[-1].to_numpy()
+        rsi_5 = (100 - (100 / (1 + up.rolling(5).mean() / down.rolling(5).mean().replace(0, 0.0001)))).iloc[-1].to_numpy()
+        low_14 = low.rolling(14).min()
+        high_14 = high.rolling(14).max()
+        stoch_k = (((close - low_14) / (high_14 - low_14).replace(0, 0.0001)) * 100).iloc[-1].to_numpy()
+        sma_20 = close.rolling(20).mean().iloc[-1].to_numpy()
+        distance_from_sma = ((price - sma_20) / sma_20) * 100
+        
+        rsi_tiers = [rsi_2 < 5, rsi_2 < 10, rsi_2 < 20, rsi_2 > 95, rsi_2 > 90, rsi_2 > 80]
+        reversion_signal = np.select(rsi_tiers, [
+            'EXTREME_OVERSOLD', 'VERY_OVERSOLD', 'OVERSOLD',
+            'EXTREME_OVERBOUGHT', 'VERY_OVERBOUGHT', 'OVERBOUGHT'
+        ], 'NEUTRAL')
+        bounce_probability = np.select(rsi_tiers, [85, 78, 65, 25, 35, 45], 50)
+        is_bounce_setup = np.isin(reversion_signal, ['EXTREME_OVERSOLD', 'VERY_OVERSOLD', 'OVERSOLD'])
+        confirmations = (distance_from_sma < -5).astype(int) + (stoch_k < 20).astype(int) + (rsi_5 < 30).astype(int)
+        bounce_probability = np.where(is_bounce_setup, np.minimum(95, bounce_probability + confirmations * 5), bounce_probability)
+        reversion_score = np.select(
+            [np.isin(reversion_signal, ['EXTREME_OVERSOLD', 'VERY_OVERSOLD']), reversion_signal == 'OVERSOLD',
+             np.isin(reversion_signal, ['EXTREME_OVERBOUGHT', 'VERY_OVERBOUGHT'])],
+            [90, 70, 30], 50
+        )
+        reversion_score = np.where(has_20, reversion_score, 50)
+        reversion_signal = np.where(has_20, reversion_signal, 'NEUTRAL')
+        bounce_probability = np.where(has_20, bounce_probability, 50)
+        is_bounce_setup = has_20 & is_bounce_setup
+        rsi_2 = np.where(has_20, np.round(rsi_2, 2), 50)
+        
+        # --- 5. ATR stops -----------------------------------------------------
+        prev_close = close.shift(1)
+        true_range = np.fmax(np.fmax((high - low).to_numpy(), (high - prev_close).abs().to_numpy()),
+                             (low - prev_close).abs().to_numpy())
+        atr = pd.DataFrame(true_range).rolling(14).mean().iloc[-1].to_numpy()
+        stop_loss = price - atr * 2.0
+        stop_loss_pct = ((price - stop_loss) / price) * 100
+        target_2r = price + atr * 2.0 * 2
+        atr_pct = (atr / price) * 100
+        atr_tiers = [atr_pct < 1.5, atr_pct < 3.0, atr_pct < 5.0]
+        volatility_regime = np.where(has_20, np.select(atr_tiers, ['LOW', 'NORMAL', 'HIGH'], 'EXTREME'), 'UNKNOWN')
+        position_size = np.where(has_20, np.select(atr_tiers, ['FULL SIZE', 'STANDARD SIZE', 'REDUCE SIZE 25%'],
+                                                   'REDUCE SIZE 50%'), 'STANDARD SIZE')
+        stop_score = np.where(has_20, np.select(
+            [stop_loss_pct <= 3, stop_loss_pct <= 5, stop_loss_pct <= 8], [90, 75, 55], 35), 50)
+        
+        # --- 2. Sector rotation (one lookup per distinct sector) ---------------
+        default_sector = {'sector_rank': 6, 'sector_tier': 'MIDDLE', 'sector_adjustment': 0}
+        sector_names = [sectors.get(s) for s in symbols]
+        sector_scores = {name: self.get_stock_sector_score(name) for name in set(sector_names) if name}
+        sector_info = [sector_scores.get(name, default_sector) if name else default_sector for name in sector_names]
+        sector_rank = np.array([info.get('sector_rank', 6) for info in sector_info])
+        sector_tier = np.array([info.get('sector_tier', 'MIDDLE') for info in sector_info])
+        sector_adjustment = np.array([info.get('sector_adjustment', 0) for info in sector_info])
+        
+        # --- Combined ---------------------------------------------------------
+        base_score = np.mean(np.vstack([combined_vwap, entry_score, reversion_score, stop_score]).astype(float), axis=0)
+        enhancement_score = np.clip(base_score + sector_adjustment, 0, 100)
+        enhancement_signal = np.select(
+            [enhancement_score >= 75, enhancement_score >= 60, enhancement_score >= 40],
+            ['STRONG_ENHANCEMENT', 'MODERATE_ENHANCEMENT', 'NEUTRAL'], 'WEAK'
+        )
+        
+        confirmation_flags = [
+            (breakout, 'VWAP Breakout Confirmed'),
+            (entry_score >= 75, 'Near Support Entry'),
+            (is_bounce_setup, 'Mean Reversion Setup'),
+            (sector_tier == 'TOP', 'Leading Sector'),
+            (np.isin(volatility_regime, ['LOW', 'NORMAL']), 'Favorable Volatility'),
+        ]
+        flags = np.vstack([f for f, _ in confirmation_flags])
+        labels = [label for _, label in confirmation_flags]
+        bullish_confirmations = [[labels[k] for k in np.flatnonzero(flags[:, j])] for j in range(len(symbols))]
+        
+        def rounded(values, digits=2, valid=None):
+            out = pd.Series(np.round(values, digits), index=symbols, dtype=object)
+            if valid is not None:
+                out[~valid] = None
+            return out
+        
+        return pd.DataFrame({
+            'enhancement_score': np.round(enhancement_score, 1),
+            'enhancement_signal': enhancement_signal,
+            'bullish_confirmations': bullish_confirmations,
+            'confirmation_count': flags.sum(axis=0),
+            'vwap': rounded(vwap, valid=has_20),
+            'vwap_signal': np.where(has_20, vwap_signal, 'NEUTRAL'),
+            'breakout_confirmed': breakout,
+            'combined_vwap_volume_score': combined_vwap,
+            'poc': rounded(profile['poc'].to_numpy(dtype=float), valid=has_20),
+            'value_area_high': rounded(profile['vah'].to_numpy(dtype=float), valid=has_20),
+            'value_area_low': rounded(profile['val'].to_numpy(dtype=float), valid=has_20),
+            'entry_zone': entry_zone,
+            'entry_timing': entry_timing,
+            'entry_score': entry_score,
+            'nearest_support': rounded(nearest_support, valid=has_50),
+            'nearest_resistance': rounded(nearest_resistance, valid=has_50),
+            'risk_reward_ratio': np.where(has_50, np.round(risk_reward, 2), 1.0),
+            'rsi_2': rsi_2,
+            'reversion_signal': reversion_signal,
+            'reversion_score': reversion_score,
+            'bounce_probability': bounce_probability,
+            'is_bounce_setup': is_bounce_setup,
+            'recommended_stop': rounded(stop_loss, valid=has_20),
+            'stop_loss_pct': np.where(has_20, np.round(stop_loss_pct, 2), 5.0),
+            'target_2r': rounded(target_2r, valid=has_20),
+            'stop_score': stop_score,
+            'volatility_regime': volatility_regime,
+            'position_size_suggestion': position_size,
+            'sector_rank': sector_rank,
+            'sector_tier': sector_tier,
+            'sector_etf': [self.sector_etf(name) for name in sector_names],
+            'last_close': price,
+            'n_bars': n_bars,
+        }, index=pd.Index(symbols, name='symbol'))
 
 
 # =============================================================================
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Point-in-Time Feature Store
+Columnar storage for MLMetaPredictor feature vectors
+
+Rows are keyed by (symbol, as-of date) inside one directory per feature
+schema version, so vectors from an older feature layout are never mixed
+with the current one:
+- append(): analysis runs / walk-forward builds add rows (latest write wins)
+- read(): one contiguous float32 matrix + a symbol/as_of/target table
+- fill_targets(): labels stored rows with realized forward returns once
+  the horizon has passed
+
+Storage is one compressed .npz file per calendar month (features float32,
+symbols, dates, targets), written atomically.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class FeatureStore:
+    """Monthly-partitioned (symbol, as_of) -> feature vector store for one schema"""
+
+    def __init__(self, root: str = os.path.join('.cache', 'feature_store'), schema: str = 'default'):
+        self.root = root
+        self.schema = schema
+        self.path = os.path.join(root, schema)
+        self.lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Partitions
+    # ------------------------------------------------------------------
+
+    def _partition_file(self, month: str) -> str:
+        return os.path.join(self.path, f'{month}.npz')
+
+    def _partitions(self) -> List[str]:
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(f[:-4] for f in os.listdir(self.path) if f.endswith('.npz'))
+
+    def _load(self, month: str) -> Optional[Dict[str, np.ndarray]]:
+        try:
+            with np.load(self._partition_file(month), allow_pickle=False) as data:
+                return {k: data[k] for k in ('symbols', 'dates', 'features', 'targets')}
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Feature store partition {month} unreadable: {e}")
+            return None
+
+    def _write(self, month: str, part: Dict[str, np.ndarray]):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = self._partition_file(month) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **part)
+        os.replace(tmp_path, self._partition_file(month))
+
+    @staticmethod
+    def _dedup(part: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Keep the last row per (symbol, as_of), ordered by date then symbol."""
+        keys = pd.DataFrame({'symbol': part['symbols'], 'date': part['dates']})
+        keep = ~keys.duplicated(keep='last').to_numpy()
+        order = np.lexsort((part['symbols'][keep], part['dates'][keep]))
+        return {k: v[keep][order] for k, v in part.items()}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def append(self, symbols: Sequence[str], as_of, features: np.ndarray,
+               targets: Optional[Sequence[float]] = None) -> int:
+        """
+        Add feature rows.
+
+        Args:
+            symbols: One symbol per row
+            as_of: Date of the features (one date, or one per row)
+            features: (n_rows, n_features) matrix
+            targets: Optional forward returns (NaN when not yet known)
+
+        Returns:
+            Number of rows written
+        """
+        features = np.asarray(features, dtype=np.float32)
+        n = len(features)
+        if n == 0:
+            return 0
+        symbols = np.asarray(symbols, dtype=str)
+        dates = np.asarray(pd.to_datetime(as_of if np.ndim(as_of) else [as_of] * n).values, dtype='datetime64[D]')
+        targets = np.full(n, np.nan, dtype=np.float32) if targets is None else np.asarray(targets, dtype=np.float32)
+        months = dates.astype('datetime64[M]').astype(str)
+
+        with self.lock:
+            for month in np.unique(months):
+                rows = months == month
+                new = {'symbols': symbols[rows], 'dates': dates[rows],
+                       'features': features[rows], 'targets': targets[rows]}
+                old = self._load(month)
+                if old is not None and old['features'].shape[1] == features.shape[1]:
+                    new = {k: np.concatenate([old[k], new[k]]) for k in new}
+                self._write(month, self._dedup(new))
+        return n
+
+    def read(self, start=None, end=None, symbols: Optional[Sequence[str]] = None,
+             labelled_only: bool = False) -> Tuple[np.ndarray, pd.DataFrame]:
+        """
+        Stored rows as one contiguous float32 matrix.
+
+        Args:
+            start / end: Inclusive as-of date range
+            symbols: Restrict to these symbols
+            labelled_only: Only rows with a known target
+
+        Returns:
+            (features, meta) where meta has symbol, as_of, target per row
+        """
+        start = np.datetime64(pd.Timestamp(start).date()) if start is not None else None
+        end = np.datetime64(pd.Timestamp(end).date()) if end is not None else None
+        parts = []
+        for month in self._partitions():
+            if start is not None and np.datetime64(month, 'M') < start.astype('datetime64[M]'):
+                continue
+            if end is not None and np.datetime64(month, 'M') > end.astype('datetime64[M]'):
+                continue
+            part = self._load(month)
+            if part is None:
+                continue
+            mask = np.ones(len(part['dates']), dtype=bool)
+            if start is not None:
+                mask &= part['dates'] >= start
+            if end is not None:
+                mask &= part['dates'] <= end
+            if symbols is not None:
+                mask &= np.isin(part['symbols'], list(symbols))
+            if labelled_only:
+                mask &= np.isfinite(part['targets'])
+            parts.append({k: v[mask] for k, v in part.items()})
+
+        if not parts:
+            return np.empty((0, 0), dtype=np.float32), pd.DataFrame(columns=['symbol', 'as_of', 'target'])
+        features = np.ascontiguousarray(np.concatenate([p['features'] for p in parts]), dtype=np.float32)
+        meta = pd.DataFrame({
+            'symbol': np.concatenate([p['symbols'] for p in parts]),
+            'as_of': pd.to_datetime(np.concatenate([p['dates'] for p in parts])),
+            'target': np.concatenate([p['targets'] for p in parts]),
+        })
+        return features, meta
+
+    def fill_targets(self, hist_map: Dict[str, pd.DataFrame], horizon: int = 30) -> int:
+        """
+        Label unlabelled rows with the forward return over `horizon` bars.
+
+        Args:
+            hist_map: symbol -> OHLCV history covering the stored as-of dates
+
+        Returns:
+            Number of rows labelled
+        """
+        closes = {}
+        for symbol, df in hist_map.items():
+            try:
+                close = df['Close'].dropna()
+                idx = pd.DatetimeIndex(close.index)
+                if idx.tz is not None:
+                    idx = idx.tz_localize(None)
+                closes[symbol] = (idx.normalize().values.astype('datetime64[D]'), close.to_numpy(dtype=float))
+            except Exception:
+                continue
+
+        labelled = 0
+        with self.lock:
+            for month in self._partitions():
+                part = self._load(month)
+                if part is None:
+                    continue
+                todo = np.flatnonzero(~np.isfinite(part['targets']))
+                changed = False
+                for i in todo:
+                    series = closes.get(str(part['symbols'][i]))
+                    if series is None:
+                        continue
+                    dates, values = series
+                    pos = np.searchsorted(dates, part['dates'][i])
+                    if pos < len(dates) and dates[pos] == part['dates'][i] and pos + horizon < len(values):
+                        part['targets'][i] = (values[pos + horizon] - values[pos]) / values[pos] * 100
+                        changed = True
+                        labelled += 1
+                if changed:
+                    self._write(month, part)
+        return labelled
+
+    def stats(self) -> Dict:
+        """Row / labelled-row counts and size on disk."""
+        rows = labelled = size = 0
+        for month in self._partitions():
+            part = self._load(month)
+            if part is None:
+                continue
+            rows += len(part['dates'])
+            labelled += int(np.isfinite(part['targets']).sum())
+            size += os.path.getsize(self._partition_file(month))
+        return {'schema': self.schema, 'rows': rows, 'labelled': labelled,
+                'partitions': len(self._partitions()), 'size_mb': round(size / 1024 / 1024, 2)}
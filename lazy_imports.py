@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Lazy Imports
+Deferred loading of heavy optional dependencies
+
+Importing the analyzers used to pull in sklearn, LightGBM, XGBoost,
+yfinance, NLTK (via TextBlob) and Streamlit up front, even for runs that
+never train a model or render a page. Modules now bind these names to
+proxies that import on first attribute access or call:
+- lazy_module('lightgbm')                 -> stands in for `import lightgbm as lgb`
+- lazy_attr('sklearn.ensemble', 'RandomForestRegressor')
+                                          -> stands in for `from ... import ...`
+- module_available('xgboost')             -> *_AVAILABLE flag without importing
+
+`python lazy_imports.py` prints the import cost of the main modules.
+"""
+
+import importlib
+import importlib.util
+import subprocess
+import sys
+import threading
+from typing import Dict, List, Optional
+
+_lock = threading.RLock()
+
+
+def module_available(name: str) -> bool:
+    """True when a module can be imported (found on the path, not loaded)."""
+    if name in sys.modules:
+        return sys.modules[name] is not None
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class _LazyModule:
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with _lock:
+                module = self.__dict__['_module']
+                if module is None:
+                    module = importlib.import_module(self.__dict__['_name'])
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+class _LazyAttr:
+    """Proxy for a `from module import name` object (class or function)."""
+
+    def __init__(self, module: str, name: str):
+        self._module = module
+        self._name = name
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            with _lock:
+                if self._target is None:
+                    self._target = getattr(importlib.import_module(self._module), self._name)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        if attr in ('_module', '_name', '_target'):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    def __instancecheck__(self, instance):
+        return isinstance(instance, self._load())
+
+    def __repr__(self):
+        return f"<lazy {self._module}.{self._name}>"
+
+
+def lazy_module(name: str):
+    """Stand-in for `import name` that defers the import until first use."""
+    module = sys.modules.get(name)
+    return module if module is not None else _LazyModule(name)
+
+
+def lazy_attr(module: str, name: str):
+    """Stand-in for `from module import name` that defers the import until first use."""
+    loaded = sys.modules.get(module)
+    if loaded is not None and hasattr(loaded, name):
+        return getattr(loaded, name)
+    return _LazyAttr(module, name)
+
+
+def import_costs(modules: List[str], python: Optional[str] = None) -> Dict[str, float]:
+    """
+    Cumulative import time of each module in a fresh interpreter.
+
+    Args:
+        modules: Module names (imported one per subprocess)
+        python: Interpreter to use (defaults to the current one)
+
+    Returns:
+        Dict of module -> milliseconds (NaN when the import failed)
+    """
+    costs = {}
+    for module in modules:
+        try:
+            proc = subprocess.run([python or sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                  capture_output=True, text=True, timeout=120)
+            cost = float('nan')
+            for line in proc.stderr.splitlines():
+                parts = line.split('|')
+                if len(parts) == 3 and parts[2].strip() == module:
+                    cost = int(parts[1]) / 1000
+            costs[module] = cost
+        except Exception:
+            costs[module] = float('nan')
+    return costs
+
+
+if __name__ == '__main__':
+    targets = sys.argv[1:] or ['ml_meta_predictor', 'advanced_data_fetcher', 'premium_stock_analyzer',
+                               'advanced_analyzer', 'ultimate_strategy_analyzer_fixed', 'viewer_app',
+                               'scheduled_runner']
+    print("⏱️ Import cost (cumulative, fresh interpreter)")
+    for module, ms in import_costs(targets).items():
+        print(f"  {module:<34} {ms:8.0f} ms")
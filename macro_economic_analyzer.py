@@ -4,11 +4,13 @@ Macro Economic Analyzer
 Analyzes broad market indicators (Bond Yields, Dollar Index, VIX) to determine
 Strategic Market Regime (Risk-On / Risk-Off).
 """
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from typing import Dict, Any, Optional
+from lazy_imports import lazy_module
+
+yf = lazy_module('yfinance')
 
 class MacroEconomicAnalyzer:
     """
@@ -28,14 +30,17 @@ class MacroEconomicAnalyzer:
             'SPY': 'SPY'
         }
         
-    def analyze_macro_context(self, external_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def analyze_macro_context(self, external_context: Optional[Dict[str, Any]] = None,
+                              data: Optional[Dict[str, pd.Series]] = None) -> Dict[str, Any]:
         """
         Fetch and analyze macro data.
         Accepts external_context (e.g. from main analyzer) to reuse known-valid VIX/SPY data.
+        Accepts data already returned by _fetch_data() (fetched concurrently by the caller).
         Returns validation dict with regime and score.
         """
         print("\n🌍 Running Macro-Economic Analysis...")
-        data = self._fetch_data()
+        if data is None:
+            data = self._fetch_data()
         external_context = external_context or {}
         
         # Robust access to data (No hardcoded defaults)
@@ -15,6 +15,7 @@ Features:
 - SHAP-based interpretability
 - Calibrated probability outputs
 - Continuous learning from new data
+- Distilled single-model surrogate for bulk scoring
 """
 
 import numpy as np
@@ -23,54 +24,137 @@ from typing import Dict, List, Tuple, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
-# ML Models
-try:
-    import lightgbm as lgb
-    LIGHTGBM_AVAILABLE = True
-except ImportError:
-    LIGHTGBM_AVAILABLE = False
+# ML Models (imported on first use - see lazy_imports)
+from lazy_imports import lazy_module, lazy_attr, module_available
+
+LIGHTGBM_AVAILABLE = module_available('lightgbm')
+if LIGHTGBM_AVAILABLE:
+    lgb = lazy_module('lightgbm')
+else:
     print("⚠️ LightGBM not available - install with: pip install lightgbm")
 
-try:
-    import xgboost as xgb
-    XGBOOST_AVAILABLE = True
-except ImportError:
-    XGBOOST_AVAILABLE = False
+XGBOOST_AVAILABLE = module_available('xgboost')
+if XGBOOST_AVAILABLE:
+    xgb = lazy_module('xgboost')
+else:
     print("⚠️ XGBoost not available - install with: pip install xgboost")
 
-try:
-    import catboost as cb
-    CATBOOST_AVAILABLE = True
-except ImportError:
-    CATBOOST_AVAILABLE = False
+CATBOOST_AVAILABLE = module_available('catboost')
+if CATBOOST_AVAILABLE:
+    cb = lazy_module('catboost')
+else:
     print("⚠️ CatBoost not available - install with: pip install catboost")
 
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.neural_network import MLPRegressor
-from sklearn.preprocessing import StandardScaler
+RandomForestRegressor = lazy_attr('sklearn.ensemble', 'RandomForestRegressor')
+GradientBoostingRegressor = lazy_attr('sklearn.ensemble', 'GradientBoostingRegressor')
+HistGradientBoostingRegressor = lazy_attr('sklearn.ensemble', 'HistGradientBoostingRegressor')
+MLPRegressor = lazy_attr('sklearn.neural_network', 'MLPRegressor')
+StandardScaler = lazy_attr('sklearn.preprocessing', 'StandardScaler')
+train_test_split = lazy_attr('sklearn.model_selection', 'train_test_split')
 
 # SHAP for interpretability
-try:
-    import shap
-    SHAP_AVAILABLE = True
-except ImportError:
-    SHAP_AVAILABLE = False
+SHAP_AVAILABLE = module_available('shap')
+if SHAP_AVAILABLE:
+    shap = lazy_module('shap')
+else:
     print("⚠️ SHAP not available - install with: pip install shap")
 
 # Overall ML availability
 ML_AVAILABLE = (LIGHTGBM_AVAILABLE or XGBOOST_AVAILABLE or CATBOOST_AVAILABLE)
-from sklearn.model_selection import train_test_split
+import copy
 import joblib
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from model_registry import ModelRegistry, feature_schema_hash
+from feature_store import FeatureStore
+from model_tuning import tune_ensemble
 
-# Interpretability
-try:
-    import shap
-    SHAP_AVAILABLE = True
-except ImportError:
-    SHAP_AVAILABLE = False
-    print("⚠️ SHAP not available - install with: pip install shap")
+
+def _fit_model(model_name: str, params: Dict, n_threads: int,
+               X_train, y_train, X_val, y_val, init_model=None, rounds: int = 0) -> Tuple:
+    """
+    Fit one ensemble member with an explicit thread budget (runs in a pool worker).
+    
+    With init_model the model continues from the previous fit for `rounds`
+    more boosting rounds / trees / epochs instead of starting from zero.
+    
+    Returns:
+        (fitted model, validation RMSE, wall seconds)
+    """
+    started = time.time()
+    params = dict(params)
+    if init_model is not None and model_name in ('random_forest', 'gradient_boost', 'neural_net'):
+        # Refit in place on a private copy (the caller keeps the previous model)
+        init_model = copy.deepcopy(init_model)
+    if model_name == 'lightgbm':
+        params['n_jobs'] = n_threads
+        if init_model is not None:
+            params['n_estimators'] = rounds
+        model = lgb.LGBMRegressor(**params)
+        model.fit(
+            X_train, y_train,
+            eval_set=[(X_val, y_val)],
+            callbacks=[lgb.early_stopping(stopping_rounds=10, verbose=False), lgb.log_evaluation(period=0)],
+            init_model=init_model.booster_ if init_model is not None else None
+        )
+    elif model_name == 'xgboost':
+        params['n_jobs'] = n_threads
+        if init_model is not None:
+            params['n_estimators'] = rounds
+        model = xgb.XGBRegressor(**params)
+        model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False,
+                  xgb_model=init_model.get_booster() if init_model is not None else None)
+    elif model_name == 'catboost':
+        params['thread_count'] = n_threads
+        if init_model is not None:
+            params['iterations'] = rounds
+        model = cb.CatBoostRegressor(**params)
+        model.fit(X_train, y_train, eval_set=(X_val, y_val), verbose=False, init_model=init_model)
+    elif model_name == 'random_forest':
+        params['n_jobs'] = n_threads
+        if init_model is not None:
+            # warm_start keeps the existing trees and grows `rounds` new ones on the new samples
+            model = init_model
+            model.set_params(warm_start=True, n_estimators=model.n_estimators + rounds, n_jobs=n_threads)
+        else:
+            model = RandomForestRegressor(**params)
+        model.fit(X_train, y_train)
+    elif model_name == 'gradient_boost':
+        if init_model is not None:
+            model = init_model
+            model.set_params(warm_start=True, n_estimators=model.n_estimators + rounds)
+        else:
+            model = GradientBoostingRegressor(**params)
+        model.fit(X_train, y_train)
+    elif model_name == 'neural_net':
+        model = init_model if init_model is not None else MLPRegressor(**params)
+        # MLP trains through BLAS; cap its threads to the budget
+        try:
+            from threadpoolctl import threadpool_limits
+            limits = threadpool_limits(limits=n_threads)
+        except ImportError:
+            limits = None
+        try:
+            if init_model is not None:
+                # partial_fit has no validation split of its own
+                model.set_params(early_stopping=False)
+                if getattr(model, 'best_loss_', None) is None:
+                    model.best_loss_ = min(model.loss_curve_)
+                for _ in range(rounds):
+                    model.partial_fit(X_train, y_train)
+            else:
+                model.fit(X_train, y_train)
+        finally:
+            if limits is not None:
+                limits.unregister()
+    else:
+        raise ValueError(f"Unknown model: {model_name}")
+    val_pred = model.predict(X_val)
+    rmse = np.sqrt(np.mean((val_pred - y_val) ** 2))
+    return model, rmse, time.time() - started
 
 
 class MLMetaPredictor:
@@ -85,10 +169,29 @@ class MLMetaPredictor:
         os.makedirs(model_dir, exist_ok=True)
         
         self.models = {}
-        self.scaler = StandardScaler()
+        self.scaler = None  # StandardScaler, fitted by train() or loaded
         self.feature_names = []
         self.is_trained = False
         
+        # SHAP explainer is built once per loaded LightGBM model and reused
+        self._explainer = None
+        self._explainer_model = None
+        # Global feature importance (computed at train/load time for UI and Excel)
+        self.global_feature_importance = {}
+        # Wall time per model of the last training run
+        self.training_times = {}
+        
+        # Versioned model store; models of a registered version load on first use
+        self.registry = ModelRegistry(model_dir)
+        self.model_version = None
+        self._pending_version = None
+        self.training_info = {}
+        self.last_metrics = {}
+        
+        # Every computed feature vector is persisted per (symbol, as-of date, schema)
+        self.feature_schema = feature_schema_hash(self.get_feature_names())
+        self.feature_store = FeatureStore(schema=self.feature_schema)
+        
         # Model configurations (optimized for trading)
         self.model_configs = {
             'lightgbm': {
@@ -167,6 +270,35 @@ class MLMetaPredictor:
             }
         }
         
+        # Continuation budget per model for incremental retraining
+        # (boosting rounds / extra trees / extra stages / MLP epochs)
+        self.incremental_rounds = {
+            'lightgbm': 50,
+            'xgboost': 50,
+            'catboost': 50,
+            'random_forest': 20,
+            'gradient_boost': 20,
+            'neural_net': 10,
+        }
+        # Mean |shift| of new features (in training std units) that forces a full retrain
+        self.drift_threshold = 0.5
+        
+        # Distilled surrogate: one compact booster fitted to the weighted ensemble
+        # output, used for bulk scoring while its fidelity RMSE (expected-return
+        # points vs the ensemble) stays below surrogate_max_error
+        self.distill_enabled = True
+        self.surrogate = None
+        self.surrogate_info = {}
+        self.surrogate_max_error = 0.5
+        self.surrogate_params = {
+            'n_estimators': 150,
+            'learning_rate': 0.1,
+            'num_leaves': 15,
+            'min_child_samples': 10,
+            'verbose': -1,
+            'random_state': 42,
+        }
+        
         # Model weights for ensemble (tuned via validation)
         self.ensemble_weights = {
             'lightgbm': 0.25,
@@ -176,6 +308,8 @@ class MLMetaPredictor:
             'gradient_boost': 0.10,
             'neural_net': 0.10,
         }
+        # Result of the last tune() (best params, learned weights), kept with the models
+        self.tuning_info = {}
         
         print("🤖 ML Meta-Predictor initialized")
         print(f"   Available models: {sum(1 for c in self.model_configs.values() if c['enabled'])}/6")
@@ -276,6 +410,195 @@ class MLMetaPredictor:
         return np.array(features, dtype=np.float32)
 
     
+    def features_from_table(self, table: pd.DataFrame) -> np.ndarray:
+        """
+        Feature matrix for a scored metrics table (score_universe output).
+        
+        Same 30 features as extract_features() on the analyze_stock result of
+        each row, without building the nested result dicts.
+        """
+        n = len(table)
+        
+        def col(name, default=np.nan):
+            if name not in table.columns:
+                return np.full(n, default, dtype=float)
+            return pd.to_numeric(table[name], errors='coerce').to_numpy(dtype=float)
+        
+        def or_default(values, default, digits=None, nan_default=True):
+            # Mirrors `value or default` on the (rounded) result-dict value
+            if digits is not None:
+                values = np.round(values, digits)
+            missing = (values == 0) | (np.isnan(values) if nan_default else False)
+            return np.where(missing, default, values)
+        
+        momentum_ok = ~np.isnan(col('ma_200'))
+        technical_ok = ~np.isnan(col('macd'))
+        macd = np.where(technical_ok, np.round(col('macd'), 4), 0)
+        macd_signal = np.where(technical_ok, np.nan_to_num(np.round(col('macd_signal'), 4)), 0)
+        beta = col('beta')
+        
+        # Market context columns are optional (defaults match an empty market_context)
+        vix = col('vix')
+        vix_available = ~np.isnan(vix)
+        vix = np.where(vix_available & (vix > 3.0), vix, 18.0)
+        
+        columns = [
+            # Fundamentals
+            or_default(col('pe_ratio'), 0),
+            or_default(col('revenue_growth'), 0),
+            or_default(col('profit_margin'), 0),
+            or_default(col('roe'), 0),
+            or_default(col('debt_equity'), 0),
+            # Momentum
+            np.where(momentum_ok, or_default(col('rsi'), 50, 2, nan_default=False), 50),
+            np.where(momentum_ok, or_default(col('volume_ratio'), 1, 2, nan_default=False), 1),
+            np.where(momentum_ok, or_default(col('relative_strength'), 0, 2), 0),
+            np.where(momentum_ok & (col('ma_50') > col('ma_200')), 1, 0),
+            or_default(col('momentum_score'), 50),
+            # Risk
+            or_default(np.where(np.isnan(beta), 1.0, beta), 1, 2),
+            or_default(col('volatility'), 25, 2),
+            or_default(col('sharpe_ratio'), 0, 2),
+            or_default(col('max_drawdown'), -15, 2),
+            # Technical
+            macd,
+            np.where(technical_ok, np.nan_to_num(np.round(col('macd_hist'), 4)), 0),
+            np.where(technical_ok, or_default(col('bollinger_position'), 50, 2), 50),
+            or_default(col('technical_score'), 50),
+            np.where(macd > macd_signal, 1, 0),
+            # Sentiment
+            or_default(col('sentiment_score'), 50),
+            or_default(col('target_upside'), 0, 2),
+            or_default(col('institutional_ownership'), 50, 2),
+            # Quality scores
+            or_default(col('quality_score'), 50),
+            or_default(col('consensus_score'), 50),
+            or_default(col('confidence'), 0.5),
+            # Market context
+            vix,
+            np.zeros(n) if 'regime' not in table.columns else table['regime'].map(
+                lambda r: {'bull': 1, 'normal': 0, 'bear': -1}.get(str(r).lower(), 0)).to_numpy(dtype=float),
+            np.zeros(n) if 'trend' not in table.columns else table['trend'].map(
+                lambda t: {'UPTREND': 1, 'SIDEWAYS': 0, 'DOWNTREND': -1}.get(str(t).upper(), 0)).to_numpy(dtype=float),
+            np.where(vix_available & (vix < 20), 1, 0),
+            or_default(col('sector_momentum'), 0),
+        ]
+        return np.column_stack(columns).astype(np.float32)
+    
+    def train_with_dataset(self, dataset: pd.DataFrame, target: str = 'forward_return', min_samples: int = 50,
+                           incremental: bool = False, tune_budget: float = 0):
+        """
+        Train on a walk-forward sample table (see training_dataset.build_training_set).
+        
+        Args:
+            dataset: Scored metrics rows with a forward-return target column
+            target: Target column name
+            min_samples: Minimum usable rows to train at all
+            incremental: Continue the registered models instead of training from scratch
+            tune_budget: Seconds of purged-CV hyperparameter search before a full train (0 = off)
+        """
+        print(f"\n🎓 Training with REAL market data ({len(dataset)} walk-forward samples)...")
+        if dataset is None or dataset.empty or target not in dataset.columns:
+            print("⚠️ Empty training set. ML will remain disabled.")
+            self.is_trained = False
+            return
+        
+        X, y, usable = self._dataset_matrix(dataset, target)
+        self._record_dataset(dataset, X, y, usable)
+        
+        if len(X) < min_samples:
+            print(f"⚠️ Not enough valid real samples ({len(X)}). ML will remain disabled.")
+            self.is_trained = False
+            return
+        
+        if incremental:
+            self.train_incremental(X, y, validation_split=0.2)
+        else:
+            if tune_budget > 0 and 'date' in dataset.columns:
+                self.tune(X, y, dataset.loc[usable, 'date'].to_numpy(), time_budget=tune_budget)
+            self.train(X, y, validation_split=0.2)
+        
+        n_symbols = dataset.loc[usable, 'symbol'].nunique() if 'symbol' in dataset.columns else 0
+        self.training_info.update({'source': 'walk_forward', 'n_symbols': int(n_symbols)})
+        if 'date' in dataset.columns:
+            dates = pd.to_datetime(dataset.loc[usable, 'date'])
+            self.training_info['window_start'] = str(dates.min().date())
+            self.training_info['window_end'] = str(dates.max().date())
+        print(f"✅ Real data training complete with {len(X)} samples from {n_symbols} symbols")
+        print("   Models are now calibrated to actual market dynamics")
+        self.save_models()
+    
+    def _record_features(self, symbols: List[Optional[str]], X: np.ndarray, as_of=None,
+                         targets: Optional[np.ndarray] = None):
+        """Append feature rows to the feature store (never fails the caller)."""
+        if self.feature_store is None or X is None or len(X) == 0:
+            return
+        try:
+            keep = np.array([bool(sym) for sym in symbols])
+            if not keep.any():
+                return
+            as_of = as_of if as_of is not None else datetime.now().strftime('%Y-%m-%d')
+            if np.ndim(as_of):
+                as_of = np.asarray(as_of)[keep]
+            self.feature_store.append(
+                np.asarray(symbols, dtype=object)[keep], as_of, X[keep],
+                targets=None if targets is None else np.asarray(targets)[keep]
+            )
+        except Exception as e:
+            print(f"   ⚠️ Feature store write failed: {e}")
+    
+    def _dataset_matrix(self, dataset: pd.DataFrame, target: str = 'forward_return'):
+        """Feature matrix, targets and usable-row mask of a walk-forward table."""
+        X = self.features_from_table(dataset)
+        y = pd.to_numeric(dataset[target], errors='coerce').to_numpy(dtype=np.float32)
+        usable = ~np.isnan(X).any(axis=1) & ~np.isnan(y)
+        return X[usable], y[usable], usable
+    
+    def _record_dataset(self, dataset: pd.DataFrame, X: np.ndarray, y: np.ndarray, usable: np.ndarray):
+        if 'symbol' in dataset.columns and 'date' in dataset.columns:
+            self._record_features(list(dataset.loc[usable, 'symbol']), X,
+                                  as_of=dataset.loc[usable, 'date'].to_numpy(), targets=y)
+    
+    def store_dataset(self, dataset: pd.DataFrame, target: str = 'forward_return') -> int:
+        """Append a labelled walk-forward table to the feature store; returns rows written."""
+        if dataset is None or dataset.empty or target not in dataset.columns:
+            return 0
+        X, y, usable = self._dataset_matrix(dataset, target)
+        self._record_dataset(dataset, X, y, usable)
+        return len(X)
+    
+    def train_from_store(self, start=None, end=None, min_samples: int = 50, incremental: bool = False,
+                         tune_budget: float = 0):
+        """
+        Train on the labelled rows of the feature store (a file read, no recomputation).
+        
+        Args:
+            start / end: As-of date range of the training rows
+            incremental: Continue the registered models instead of training from scratch
+            tune_budget: Seconds of purged-CV hyperparameter search before a full train (0 = off)
+        """
+        X, meta = self.feature_store.read(start=start, end=end, labelled_only=True)
+        print(f"\n🎓 Training from feature store ({len(X)} labelled rows, schema {self.feature_schema})...")
+        if len(X) < min_samples:
+            print(f"⚠️ Not enough labelled rows ({len(X)}). ML will remain disabled.")
+            return False
+        
+        y = meta['target'].to_numpy(dtype=np.float32)
+        if incremental:
+            self.train_incremental(X, y, validation_split=0.2)
+        else:
+            if tune_budget > 0:
+                self.tune(X, y, meta['as_of'].to_numpy(), time_budget=tune_budget)
+            self.train(X, y, validation_split=0.2)
+        self.training_info.update({
+            'source': 'feature_store',
+            'n_symbols': int(meta['symbol'].nunique()),
+            'window_start': str(meta['as_of'].min().date()),
+            'window_end': str(meta['as_of'].max().date()),
+        })
+        self.save_models()
+        return True
+    
     def get_feature_names(self) -> List[str]:
         """Return feature names for interpretability"""
         return [
@@ -291,6 +614,8 @@ class MLMetaPredictor:
             'sentiment_score', 'target_upside', 'institutional_ownership',
             # Quality
             'quality_score', 'consensus_score', 'confidence',
+            # Market context
+            'vix_level', 'market_regime', 'market_trend', 'low_vix', 'sector_momentum',
         ]
     
     def train_with_synthetic_priors(self, n_samples: int = 1000):
@@ -388,6 +713,7 @@ class MLMetaPredictor:
         
         # Train models
         self.train(X, y, validation_split=0.2)
+        self.training_info['source'] = 'synthetic_priors'
         
         print(f"✅ Synthetic prior training complete with {n_samples} samples")
         print("   Models ready for cold-start predictions")
@@ -435,12 +761,13 @@ class MLMetaPredictor:
         
         # Train models
         self.train(X, y, validation_split=0.2)
+        self.training_info['source'] = 'real_snapshot'
         
         print(f"✅ Real data training complete with {valid_samples} samples")
         print("   Models are now calibrated to actual market dynamics")
         self.save_models()
 
-    def train(self, X: np.ndarray, y: np.ndarray, validation_split: float = 0.2):
+    def train(self, X: np.ndarray, y: np.ndarray, validation_split: float = 0.2, parallel: bool = True):
         """
         Train all available models
         
@@ -448,8 +775,15 @@ class MLMetaPredictor:
             X: Feature matrix (n_samples, n_features)
             y: Target values (forward returns)
             validation_split: Fraction for validation
+            parallel: Fit the models concurrently in a process pool
         """
         print(f"\n🎯 Training ML models on {len(X)} samples...")
+        self._pending_version = None
+        self.model_version = None
+        self.training_info = {'n_samples': int(len(X)), 'n_features': int(X.shape[1]),
+                              'validation_split': validation_split}
+        if self.tuning_info:
+            self.training_info['tuning'] = self.tuning_info
         
         # Split data
         X_train, X_val, y_train, y_val = train_test_split(
@@ -457,117 +791,453 @@ class MLMetaPredictor:
         )
         
         # Scale features
+        self.scaler = StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_val_scaled = self.scaler.transform(X_val)
         
         self.feature_names = self.get_feature_names()
         
-        # Train each model
+        # Train each model (independent fits run concurrently, see _fit_all)
         results = {}
+        for model_name, model, rmse in self._fit_all(X_train_scaled, y_train, X_val_scaled, y_val, parallel):
+            results[model_name] = rmse
+            self.models[model_name] = model
         
-        # LightGBM
-        if self.model_configs['lightgbm']['enabled']:
-            print("   Training LightGBM...")
-            lgb_model = lgb.LGBMRegressor(**self.model_configs['lightgbm']['params'])
-            lgb_model.fit(
-                X_train_scaled, y_train, 
-                eval_set=[(X_val_scaled, y_val)],
-                callbacks=[lgb.early_stopping(stopping_rounds=10, verbose=False), lgb.log_evaluation(period=0)]
-            )
-            val_pred = lgb_model.predict(X_val_scaled)
-            results['lightgbm'] = np.sqrt(np.mean((val_pred - y_val) ** 2))
-            self.models['lightgbm'] = lgb_model
-        
-        # XGBoost
-        if self.model_configs['xgboost']['enabled']:
-            print("   Training XGBoost...")
-            xgb_model = xgb.XGBRegressor(**self.model_configs['xgboost']['params'])
-            xgb_model.fit(
-                X_train_scaled, y_train,
-                eval_set=[(X_val_scaled, y_val)],
-                verbose=False
-            )
-            val_pred = xgb_model.predict(X_val_scaled)
-            results['xgboost'] = np.sqrt(np.mean((val_pred - y_val) ** 2))
-            self.models['xgboost'] = xgb_model
-        
-        # CatBoost
-        if self.model_configs['catboost']['enabled']:
-            print("   Training CatBoost...")
-            cat_model = cb.CatBoostRegressor(**self.model_configs['catboost']['params'])
-            cat_model.fit(X_train_scaled, y_train, eval_set=(X_val_scaled, y_val), verbose=False)
-            val_pred = cat_model.predict(X_val_scaled)
-            results['catboost'] = np.sqrt(np.mean((val_pred - y_val) ** 2))
-            self.models['catboost'] = cat_model
-        
-        # Random Forest
-        if self.model_configs['random_forest']['enabled']:
-            print("   Training Random Forest...")
-            rf_model = RandomForestRegressor(**self.model_configs['random_forest']['params'])
-            rf_model.fit(X_train_scaled, y_train)
-            val_pred = rf_model.predict(X_val_scaled)
-            results['random_forest'] = np.sqrt(np.mean((val_pred - y_val) ** 2))
-            self.models['random_forest'] = rf_model
-        
-        # Gradient Boosting
-        if self.model_configs['gradient_boost']['enabled']:
-            print("   Training Gradient Boosting...")
-            gb_model = GradientBoostingRegressor(**self.model_configs['gradient_boost']['params'])
-            gb_model.fit(X_train_scaled, y_train)
-            val_pred = gb_model.predict(X_val_scaled)
-            results['gradient_boost'] = np.sqrt(np.mean((val_pred - y_val) ** 2))
-            self.models['gradient_boost'] = gb_model
-        
-        # Neural Network
-        if self.model_configs['neural_net']['enabled']:
-            print("   Training Neural Network...")
-            nn_model = MLPRegressor(**self.model_configs['neural_net']['params'])
-            nn_model.fit(X_train_scaled, y_train)
-            val_pred = nn_model.predict(X_val_scaled)
-            results['neural_net'] = np.sqrt(np.mean((val_pred - y_val) ** 2))
-            self.models['neural_net'] = nn_model
-        
+        self._finish_training(results, X_train_scaled, X_val_scaled, y_val)
+        return results
+    
+    def _finish_training(self, results: Dict, X_train_scaled: np.ndarray, X_val_scaled: np.ndarray,
+                         y_val: np.ndarray):
+        """Mark the ensemble trained, refresh global importance, distill and print validation RMSE."""
         self.is_trained = True
+        self.last_metrics = results
+        self._compute_global_importance(X_val_scaled)
         
         # Print results
         print("\n📊 Validation RMSE:")
         for model_name, rmse in sorted(results.items(), key=lambda x: x[1]):
-            print(f"   {model_name:20s}: {rmse:.4f}")
+            print(f"   {model_name:20s}: {rmse:.4f}  ({self.training_times.get(model_name, 0):.1f}s)")
+        
+        self.surrogate = None
+        self.surrogate_info = {}
+        if self.distill_enabled:
+            self.distill(X_train_scaled, X_val_scaled, y_val)
+    
+    def _ensemble_outputs(self, X_scaled: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Weighted ensemble prediction and the per-model predictions for scaled rows."""
+        n = len(X_scaled)
+        predictions = {}
+        for model_name, model in self.models.items():
+            try:
+                predictions[model_name] = np.asarray(model.predict(X_scaled)).reshape(-1)
+            except Exception as e:
+                print(f"   ⚠️ {model_name} prediction failed: {e}")
+                predictions[model_name] = np.zeros(n)
+        
+        # Ensemble prediction (weighted average)
+        ensemble_pred = sum(
+            predictions.get(name, 0) * self.ensemble_weights.get(name, 0)
+            for name in predictions.keys()
+        )
+        return np.broadcast_to(np.asarray(ensemble_pred, dtype=float), (n,)), predictions
+    
+    def distill(self, X_train_scaled: np.ndarray, X_val_scaled: np.ndarray, y_val: np.ndarray,
+                n_jitter: int = 2, jitter_std: float = 0.1) -> Dict:
+        """
+        Fit the surrogate to reproduce the weighted ensemble output
+        
+        The student learns the ensemble's predictions (not the raw targets) on
+        the training rows plus n_jitter copies with Gaussian noise of jitter_std
+        (scaled units), so it also matches the ensemble between samples.
+        
+        Returns:
+            surrogate_info: fidelity RMSE vs the ensemble, validation RMSE and
+            latency per 1000 rows of both paths, and whether bulk scoring uses it
+        """
+        if not self.models or len(X_train_scaled) == 0 or len(X_val_scaled) == 0:
+            return {}
+        try:
+            started = time.time()
+            rng = np.random.default_rng(42)
+            X_teach = np.vstack([X_train_scaled] + [
+                X_train_scaled + rng.normal(0, jitter_std, X_train_scaled.shape) for _ in range(n_jitter)
+            ])
+            y_teach = self._ensemble_outputs(X_teach)[0]
+            
+            if LIGHTGBM_AVAILABLE:
+                student = lgb.LGBMRegressor(n_jobs=os.cpu_count() or 1, **self.surrogate_params)
+                kind = 'lightgbm'
+            else:
+                student = HistGradientBoostingRegressor(
+                    max_iter=self.surrogate_params['n_estimators'],
+                    learning_rate=self.surrogate_params['learning_rate'],
+                    max_leaf_nodes=self.surrogate_params['num_leaves'],
+                    min_samples_leaf=self.surrogate_params['min_child_samples'],
+                    random_state=self.surrogate_params['random_state'],
+                )
+                kind = 'hist_gradient_boost'
+            student.fit(X_teach, y_teach)
+            fit_seconds = time.time() - started
+            
+            # Both paths on the validation rows: accuracy and latency (best of 3)
+            ensemble_ms = surrogate_ms = float('inf')
+            for _ in range(3):
+                t0 = time.perf_counter()
+                ensemble_val = self._ensemble_outputs(X_val_scaled)[0]
+                ensemble_ms = min(ensemble_ms, (time.perf_counter() - t0) * 1000)
+                t0 = time.perf_counter()
+                surrogate_val = np.asarray(student.predict(X_val_scaled)).reshape(-1)
+                surrogate_ms = min(surrogate_ms, (time.perf_counter() - t0) * 1000)
+            per_1k = 1000.0 / len(X_val_scaled)
+            
+            info = {
+                'model': kind,
+                'fidelity_rmse': float(np.sqrt(np.mean((surrogate_val - ensemble_val) ** 2))),
+                'ensemble_val_rmse': float(np.sqrt(np.mean((ensemble_val - y_val) ** 2))),
+                'surrogate_val_rmse': float(np.sqrt(np.mean((surrogate_val - y_val) ** 2))),
+                'ensemble_ms_per_1k': float(ensemble_ms * per_1k),
+                'surrogate_ms_per_1k': float(surrogate_ms * per_1k),
+                'n_teacher_rows': int(len(X_teach)),
+                'fit_seconds': float(fit_seconds),
+            }
+            info['enabled'] = info['fidelity_rmse'] < self.surrogate_max_error
+        except Exception as e:
+            print(f"   ⚠️ Surrogate distillation failed: {e}")
+            return {}
+        
+        self.surrogate = student
+        self.surrogate_info = info
+        self.training_info['surrogate'] = info
+        
+        print(f"\n🧪 Distilled surrogate ({kind}, {len(X_teach)} teacher rows, {fit_seconds:.1f}s)")
+        print(f"   {'':20s}  {'val RMSE':>9s}  {'ms / 1k rows':>12s}")
+        print(f"   {'ensemble':20s}  {info['ensemble_val_rmse']:9.4f}  {info['ensemble_ms_per_1k']:12.1f}")
+        print(f"   {'surrogate':20s}  {info['surrogate_val_rmse']:9.4f}  {info['surrogate_ms_per_1k']:12.1f}")
+        status = "used for bulk scoring" if info['enabled'] else f"above {self.surrogate_max_error} - ensemble only"
+        print(f"   Fidelity RMSE vs ensemble: {info['fidelity_rmse']:.4f} ({status})")
+        return info
+    
+    def surrogate_ready(self) -> bool:
+        """True when bulk scoring may use the distilled surrogate."""
+        self._ensure_loaded()
+        return self.surrogate is not None and bool(self.surrogate_info.get('enabled'))
+    
+    def _full_retrain_reason(self, X: np.ndarray) -> Optional[str]:
+        """Why new samples cannot continue the current models (None when they can)."""
+        if not self.models:
+            return "no trained models to continue"
+        n_features = getattr(self.scaler, 'n_features_in_', None)
+        if n_features is None or n_features != X.shape[1]:
+            return "feature schema changed"
+        if self.feature_names and len(self.feature_names) != X.shape[1]:
+            return "feature schema changed"
+        scale = np.where(self.scaler.scale_ > 0, self.scaler.scale_, 1.0)
+        drift = float(np.mean(np.abs(np.nanmean(X, axis=0) - self.scaler.mean_) / scale))
+        if drift > self.drift_threshold:
+            return f"feature drift {drift:.2f} std"
+        return None
+    
+    def train_incremental(self, X: np.ndarray, y: np.ndarray, validation_split: float = 0.2,
+                          parallel: bool = True):
+        """
+        Continue the registered models with new samples (warm start)
+        
+        Boosters add incremental_rounds trees on top of the previous booster
+        (LightGBM init_model, XGBoost xgb_model, CatBoost init_model), the
+        forest / gradient boosting grow extra estimators via warm_start and the
+        MLP runs extra partial_fit epochs. The previous scaler is kept so the
+        continued models see the same feature scaling.
         
+        Falls back to a full train() when there is nothing to continue, the
+        feature schema changed or the new samples drifted too far.
+        """
+        if not self.is_trained:
+            self.load_models()
+        if self.is_trained:
+            self._ensure_loaded()
+        reason = self._full_retrain_reason(X)
+        if reason:
+            print(f"🔁 Full retrain ({reason})")
+            return self.train(X, y, validation_split=validation_split, parallel=parallel)
+        
+        base_version = self.model_version
+        print(f"\n♻️ Incremental retrain of {base_version or 'current models'} on {len(X)} new samples...")
+        X_train, X_val, y_train, y_val = train_test_split(
+            X, y, test_size=validation_split, random_state=42
+        )
+        X_train_scaled = self.scaler.transform(X_train)
+        X_val_scaled = self.scaler.transform(X_val)
+        
+        results = {}
+        fitted = self._fit_all(X_train_scaled, y_train, X_val_scaled, y_val, parallel,
+                               init_models=dict(self.models))
+        for model_name, model, rmse in fitted:
+            results[model_name] = rmse
+            self.models[model_name] = model
+        
+        self._pending_version = None
+        self.model_version = None
+        self.training_info = {'n_samples': int(len(X)), 'n_features': int(X.shape[1]),
+                              'validation_split': validation_split, 'mode': 'incremental',
+                              'base_version': base_version}
+        if self.tuning_info:
+            self.training_info['tuning'] = self.tuning_info
+        self._finish_training(results, X_train_scaled, X_val_scaled, y_val)
         return results
     
-    def predict(self, stock_data: Dict) -> Dict:
+    def tune(self, X: np.ndarray, y: np.ndarray, dates, time_budget: float = 300, n_folds: int = 4,
+             purge_days: int = 45, max_trials: int = 8, parallel: bool = True) -> Dict:
+        """
+        Hyperparameter search on purged walk-forward folds (see model_tuning)
+        
+        Every enabled model gets up to max_trials candidates (its current params
+        first) within one wall-clock budget; the best params replace
+        model_configs and the ensemble weights are learned from the
+        out-of-fold predictions. Call before train() so the final fit uses them.
+        
+        Args:
+            dates: As-of date of every row (the default 45-day purge covers the
+                30-bar forward-return horizon)
+            time_budget: Seconds for the whole search
+        """
+        base_params = {name: cfg['params'] for name, cfg in self.model_configs.items() if cfg['enabled']}
+        summary = tune_ensemble(X, y, dates, base_params, n_folds=n_folds, purge_days=purge_days,
+                                time_budget=time_budget, max_trials=max_trials, parallel=parallel)
+        if not summary or not summary['best']:
+            return {}
+        
+        hand_weights = {name: self.ensemble_weights.get(name, 0) for name in summary['best']}
+        self._apply_tuning(summary)
+        self.tuning_info = summary
+        
+        print(f"\n🔬 Tuning finished in {summary['elapsed']:.0f}s "
+              f"({summary['candidates_evaluated']}/{summary['candidates_total']} candidates, "
+              f"{summary['n_folds']} purged folds)")
+        for name, best in sorted(summary['best'].items(), key=lambda x: x[1]['cv_rmse']):
+            print(f"   {name:20s}: CV RMSE {best['cv_rmse']:.4f} (trial {best['trial']}), "
+                  f"weight {hand_weights[name]:.2f} -> {summary['weights'].get(name, 0):.2f}")
+        if summary['oof_rmse'] is not None:
+            print(f"   Out-of-fold RMSE of the learned blend: {summary['oof_rmse']:.4f}")
+        return summary
+    
+    def _apply_tuning(self, tuning: Dict):
+        """Use tuned params / learned weights (also when restored from a registry version)."""
+        for name, best in (tuning.get('best') or {}).items():
+            if name in self.model_configs:
+                params = dict(best['params'])
+                if isinstance(params.get('hidden_layer_sizes'), list):
+                    params['hidden_layer_sizes'] = tuple(params['hidden_layer_sizes'])
+                self.model_configs[name]['params'] = params
+        if tuning.get('weights'):
+            self.ensemble_weights = dict(tuning['weights'])
+    
+    def _thread_budgets(self, model_names: List[str], parallel: bool) -> Tuple[int, Dict[str, int]]:
+        """
+        Pool size and per-model thread counts that never exceed the available cores.
+        
+        Every worker gets cores // workers threads, so concurrently running fits
+        use at most all cores. Single-threaded models (GradientBoosting) get 1.
+        """
+        cores = os.cpu_count() or 1
+        workers = max(1, min(len(model_names), cores)) if parallel else 1
+        per_worker = max(1, cores // workers)
+        budgets = {name: (1 if name == 'gradient_boost' else per_worker) for name in model_names}
+        return workers, budgets
+    
+    def _fit_all(self, X_train, y_train, X_val, y_val, parallel: bool = True,
+                 init_models: Optional[Dict] = None) -> List[Tuple]:
+        """
+        Fit every enabled model, concurrently when more than one core is available.
+        
+        init_models (name -> previous model) continues those models for
+        incremental_rounds[name] instead of fitting them from scratch.
+        
+        Returns:
+            List of (model_name, fitted model, validation RMSE) in config order;
+            wall time per model is stored in self.training_times
+        """
+        model_names = [name for name, cfg in self.model_configs.items() if cfg['enabled']]
+        workers, budgets = self._thread_budgets(model_names, parallel)
+        init_models = init_models or {}
+        jobs = {name: (name, self.model_configs[name]['params'], budgets[name]) for name in model_names}
+        extra = {name: (init_models.get(name), self.incremental_rounds.get(name, 0)) for name in model_names}
+        
+        fitted = {}
+        started = time.time()
+        if workers > 1:
+            print(f"   Training {len(model_names)} models in {workers} processes "
+                  f"({', '.join(f'{n}={t}t' for n, t in budgets.items())})...")
+            try:
+                # spawn: training runs in a stage thread next to other threads,
+                # and forking a multithreaded process can deadlock the child
+                with ProcessPoolExecutor(max_workers=workers,
+                                         mp_context=multiprocessing.get_context('spawn')) as pool:
+                    futures = {pool.submit(_fit_model, *jobs[name], X_train, y_train, X_val, y_val, *extra[name]): name
+                               for name in model_names}
+                    for future in as_completed(futures):
+                        name = futures[future]
+                        try:
+                            fitted[name] = future.result()
+                        except Exception as e:
+                            print(f"   ⚠️ {name} training failed: {e}")
+            except Exception as e:
+                print(f"   ⚠️ Process pool unavailable ({e}) - training sequentially")
+        
+        for name in model_names:
+            if name in fitted:
+                continue
+            print(f"   Training {name}...")
+            try:
+                fitted[name] = _fit_model(*jobs[name], X_train, y_train, X_val, y_val, *extra[name])
+            except Exception as e:
+                print(f"   ⚠️ {name} training failed: {e}")
+        
+        self.training_times = {name: fitted[name][2] for name in model_names if name in fitted}
+        wall = time.time() - started
+        print(f"   ⏱️ Training wall time {wall:.1f}s (sum of model times {sum(self.training_times.values()):.1f}s)")
+        return [(name, fitted[name][0], fitted[name][1]) for name in model_names if name in fitted]
+    
+    def _get_explainer(self):
+        """SHAP TreeExplainer for the current LightGBM model (rebuilt only when the model changes)."""
+        if not SHAP_AVAILABLE or 'lightgbm' not in self.models:
+            return None
+        model = self.models['lightgbm']
+        if self._explainer is None or self._explainer_model is not model:
+            self._explainer = shap.TreeExplainer(model)
+            self._explainer_model = model
+        return self._explainer
+    
+    def _shap_rows(self, X_scaled: np.ndarray) -> Optional[np.ndarray]:
+        """SHAP values for all rows of a scaled feature matrix in one call."""
+        try:
+            explainer = self._get_explainer()
+            if explainer is None:
+                return None
+            return np.asarray(explainer.shap_values(X_scaled))
+        except Exception:
+            return None
+    
+    def _compute_global_importance(self, X_scaled: Optional[np.ndarray] = None):
+        """
+        Global feature importance: mean |SHAP| over X_scaled when available,
+        otherwise the normalized average of the tree models' importances.
+        """
+        names = self.feature_names or self.get_feature_names()
+        importance = None
+        if X_scaled is not None and len(X_scaled):
+            shap_values = self._shap_rows(X_scaled)
+            if shap_values is not None:
+                importance = np.abs(shap_values).mean(axis=0)
+        if importance is None:
+            tree_importances = []
+            for model in self.models.values():
+                values = getattr(model, 'feature_importances_', None)
+                if values is not None and np.sum(values) > 0:
+                    tree_importances.append(np.asarray(values, dtype=float) / np.sum(values))
+            if tree_importances:
+                importance = np.mean(tree_importances, axis=0)
+        if importance is None:
+            self.global_feature_importance = {}
+            return
+        pairs = sorted(zip(names, importance), key=lambda x: abs(x[1]), reverse=True)
+        self.global_feature_importance = {name: float(value) for name, value in pairs}
+    
+    def explain_batch(self, stock_data_list: List[Dict]) -> List[Dict]:
+        """
+        Per-stock SHAP feature contributions, one batch call for all stocks.
+        
+        Meant for the picks that are actually displayed or exported; returns
+        empty dicts when SHAP or the LightGBM model is unavailable.
+        """
+        explanations = [{} for _ in stock_data_list]
+        if not stock_data_list or not SHAP_AVAILABLE:
+            return explanations
+        self._ensure_loaded()
+        if 'lightgbm' not in self.models:
+            return explanations
+        rows, valid = [], []
+        for idx, stock_data in enumerate(stock_data_list):
+            try:
+                rows.append(self.extract_features(stock_data))
+                valid.append(idx)
+            except Exception:
+                continue
+        if not rows:
+            return explanations
+        shap_values = self._shap_rows(self.scaler.transform(np.vstack(rows)))
+        if shap_values is None:
+            return explanations
+        for row, idx in enumerate(valid):
+            explanations[idx] = {name: float(shap_values[row][i]) for i, name in enumerate(self.feature_names)}
+        return explanations
+    
+    def predict(self, stock_data: Dict, explain: bool = True) -> Dict:
         """
         Generate ML-enhanced predictions for a stock
         
         Returns:
             Dict with probability, expected_return, confidence, and interpretability
         """
+        result = self.predict_batch([stock_data], explain=explain)[0]
+        if result is None:
+            raise ValueError("Feature extraction failed")
+        return result
+    
+    def predict_batch(self, stock_data_list: List[Dict], explain: bool = False,
+                      as_of=None, fast: bool = False) -> List[Optional[Dict]]:
+        """
+        Generate ML-enhanced predictions for many stocks at once
+        
+        Builds one feature matrix, scales it once and runs a single predict()
+        per model over all rows (6 model calls instead of 6 per stock).
+        
+        Args:
+            explain: Also compute per-row SHAP contributions (one batch call);
+                off by default - use explain_batch() for the displayed picks
+            as_of: Date the features are recorded under in the feature store (today)
+            fast: Bulk scoring - use the distilled surrogate (one model call)
+                when it is within surrogate_max_error of the ensemble
+            
+        Returns:
+            List aligned with stock_data_list; entries are the same dicts as
+            predict() returns, or None where feature extraction failed.
+            'predictor' tells whether the 'ensemble' or the 'surrogate' scored it.
+        """
         if not self.is_trained:
             # Try to load saved models first
             if not self.load_models():
                 raise RuntimeError("ML models unavailable (no saved real models loaded)")
+        self._ensure_loaded()
         
-        # Extract features
-        features = self.extract_features(stock_data)
-        X = features.reshape(1, -1)
+        # Extract features (rows that fail are skipped and reported as None)
+        rows, valid = [], []
+        for idx, stock_data in enumerate(stock_data_list):
+            try:
+                rows.append(self.extract_features(stock_data))
+                valid.append(idx)
+            except Exception as e:
+                print(f"   ⚠️ Feature extraction failed for {stock_data.get('symbol', idx)}: {e}")
+        
+        results: List[Optional[Dict]] = [None] * len(stock_data_list)
+        if not rows:
+            return results
+        
+        X = np.vstack(rows)
+        self._record_features([stock_data_list[i].get('symbol') for i in valid], X, as_of)
         X_scaled = self.scaler.transform(X)
+        n = len(rows)
         
-        # Get predictions from all models
-        predictions = {}
-        for model_name, model in self.models.items():
+        # Surrogate (one model call) for bulk scoring, else every model once
+        predictor = 'ensemble'
+        if fast and self.surrogate_ready():
             try:
-                pred = model.predict(X_scaled)[0]
-                predictions[model_name] = pred
+                ensemble_pred = np.asarray(self.surrogate.predict(X_scaled), dtype=float).reshape(-1)
+                predictions = {'surrogate': ensemble_pred}
+                predictor = 'surrogate'
             except Exception as e:
-                print(f"   ⚠️ {model_name} prediction failed: {e}")
-                predictions[model_name] = 0
-        
-        # Ensemble prediction (weighted average)
-        ensemble_pred = sum(
-            predictions.get(name, 0) * self.ensemble_weights.get(name, 0)
-            for name in predictions.keys()
-        )
+                print(f"   ⚠️ Surrogate prediction failed ({e}) - using the full ensemble")
+        if predictor == 'ensemble':
+            ensemble_pred, predictions = self._ensemble_outputs(X_scaled)
         
         # Convert to probability (sigmoid transform)
         # Assume returns ~N(0, 10), so return > 5% is "good"
@@ -575,50 +1245,115 @@ class MLMetaPredictor:
         probability = 1 / (1 + np.exp(-z_score))
         
         # Confidence based on prediction variance across models
-        pred_values = list(predictions.values())
-        confidence = 1 / (1 + np.std(pred_values)) if len(pred_values) > 1 else 0.7
+        if len(predictions) > 1:
+            confidence = 1 / (1 + np.std(np.vstack(list(predictions.values())), axis=0))
+        else:
+            confidence = np.full(n, 0.7)
         
-        # Feature importance (if SHAP available)
-        feature_importance = {}
-        if SHAP_AVAILABLE and 'lightgbm' in self.models:
-            try:
-                explainer = shap.TreeExplainer(self.models['lightgbm'])
-                shap_values = explainer.shap_values(X_scaled)
+        # Feature importance (if requested and SHAP available)
+        shap_values = self._shap_rows(X_scaled) if explain else None
+        
+        for row, idx in enumerate(valid):
+            feature_importance = {}
+            if shap_values is not None:
                 for i, name in enumerate(self.feature_names):
-                    feature_importance[name] = float(shap_values[0][i])
-            except:
-                pass
-        
-        return {
-            'expected_return': float(ensemble_pred),
-            'probability': float(probability),
-            'confidence': float(confidence),
-            'model_predictions': predictions,
-            'feature_importance': feature_importance,
-            'ensemble_weight': self.ensemble_weights,
-        }
+                    feature_importance[name] = float(shap_values[row][i])
+            results[idx] = {
+                'expected_return': float(ensemble_pred[row]),
+                'probability': float(probability[row]),
+                'confidence': float(confidence[row]),
+                'model_predictions': {name: preds[row] for name, preds in predictions.items()},
+                'feature_importance': feature_importance,
+                'ensemble_weight': self.ensemble_weights,
+                'predictor': predictor,
+            }
+        return results
     
     def save_models(self):
-        """Save trained models to disk"""
+        """Save trained models as a new registry version (old versions are pruned)"""
         if not self.is_trained:
             print("⚠️ No trained models to save")
             return
         
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        models = dict(self.models)
+        if self.surrogate is not None:
+            models['surrogate'] = self.surrogate
+        self.model_version = self.registry.register(
+            models, self.scaler,
+            feature_names=self.feature_names or self.get_feature_names(),
+            n_features=getattr(self.scaler, 'n_features_in_', None),
+            metrics=self.last_metrics,
+            training=self.training_info,
+            feature_importance=self.global_feature_importance,
+        )
         
-        # Save each model
-        for name, model in self.models.items():
-            filename = os.path.join(self.model_dir, f'{name}_{timestamp}.joblib')
-            joblib.dump(model, filename)
+        print(f"✅ Models saved to {self.model_dir} (version {self.model_version})")
+    
+    def load_models(self, timestamp: str = None, lazy: bool = True):
+        """
+        Load trained models from disk
         
-        # Save scaler
-        scaler_file = os.path.join(self.model_dir, f'scaler_{timestamp}.joblib')
-        joblib.dump(self.scaler, scaler_file)
+        Reads the registry manifest only; the models themselves are loaded
+        (memory-mapped) on first predict unless lazy=False.
+        """
+        entry = self.registry.get(timestamp, schema_hash=self.feature_schema)
+        if entry is None:
+            if self.registry.versions():
+                print("⚠️ Saved models were trained on a different feature schema - retraining needed")
+                return False
+            return self._load_legacy_models(timestamp)
         
-        print(f"✅ Models saved to {self.model_dir}")
+        self._pending_version = entry['version']
+        self.model_version = entry['version']
+        self.feature_names = entry.get('feature_names') or self.get_feature_names()
+        self.global_feature_importance = entry.get('feature_importance') or {}
+        self.last_metrics = entry.get('metrics', {})
+        self.training_info = entry.get('training', {})
+        self.surrogate = None
+        self.surrogate_info = self.training_info.get('surrogate') or {}
+        self.tuning_info = self.training_info.get('tuning') or {}
+        if self.tuning_info:
+            self._apply_tuning(self.tuning_info)
+        self.is_trained = bool(entry.get('models'))
+        if not lazy:
+            self._ensure_loaded()
+        if self.is_trained:
+            n_models = sum(1 for name in entry['models'] if name != 'surrogate')
+            print(f"✅ Registered {n_models} trained models from {entry['version']} (loaded on first use)")
+        return self.is_trained
+    
+    def _ensure_loaded(self):
+        """Load the models of a registered version the first time they are needed."""
+        version = self._pending_version
+        if version is None:
+            return
+        self._pending_version = None
+        entry = self.registry.get(version)
+        started = time.time()
+        models = {}
+        for name in self.model_configs.keys():
+            if entry is None or name not in entry['models']:
+                continue
+            try:
+                models[name] = self.registry.load_model(version, name)
+            except Exception as e:
+                print(f"⚠️ Could not load {name} ({version}): {e}")
+        if entry is not None and 'surrogate' in entry['models'] and self.surrogate_info.get('enabled'):
+            try:
+                self.surrogate = self.registry.load_model(version, 'surrogate')
+            except Exception as e:
+                print(f"⚠️ Could not load surrogate ({version}): {e}")
+        try:
+            self.scaler = self.registry.load_scaler(version)
+        except Exception as e:
+            print(f"⚠️ Could not load scaler ({version}): {e}")
+            models = {}
+        self.models = models
+        self.is_trained = bool(models)
+        print(f"🤖 Loaded {len(models)} ML models ({version}) in {time.time() - started:.2f}s")
     
-    def load_models(self, timestamp: str = None):
-        """Load trained models from disk"""
+    def _load_legacy_models(self, timestamp: str = None):
+        """Load timestamped model files saved before the registry existed"""
         if timestamp is None:
             # Find latest
             if not os.path.exists(self.model_dir):
@@ -646,10 +1381,12 @@ class MLMetaPredictor:
         
         self.is_trained = loaded > 0
         if self.is_trained:
+            if not self.feature_names:
+                self.feature_names = self.get_feature_names()
+            self._compute_global_importance()
             print(f"✅ Loaded {loaded} trained models from {timestamp}")
         return self.is_trained
 
-
 if __name__ == "__main__":
     # Quick test
     print("="*80)
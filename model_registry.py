@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+ML Model Registry
+Versioned storage for the MLMetaPredictor ensemble
+
+Each training run is saved as one version directory next to a JSON manifest:
+- version id (training timestamp), feature schema hash
+- training window / sample counts and validation metrics
+- global feature importance (so the UI never needs the models for it)
+- one uncompressed joblib file per model + scaler
+
+Loading is split from reading the manifest: startup only reads the JSON,
+models are loaded on first use with joblib memory mapping (tree arrays are
+mapped from disk instead of copied into memory). Only the newest `keep`
+versions are kept.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import joblib
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def feature_schema_hash(feature_names: List[str], n_features: Optional[int] = None) -> str:
+    """Stable hash of the feature layout a model was trained on."""
+    payload = json.dumps({'names': list(feature_names), 'n': n_features or len(feature_names)})
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class ModelRegistry:
+    """Manifest-backed, versioned model store with lazy memory-mapped loading"""
+
+    def __init__(self, model_dir: str = '.ml_models', keep: int = 3):
+        self.model_dir = model_dir
+        self.keep = keep
+        os.makedirs(model_dir, exist_ok=True)
+        self.manifest_path = os.path.join(model_dir, MANIFEST_FILE)
+        self.lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if isinstance(manifest, dict) and isinstance(manifest.get('versions'), list):
+                return manifest
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Model manifest unreadable: {e}")
+        return {'versions': []}
+
+    def _write_manifest(self, manifest: Dict):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp_path, self.manifest_path)
+
+    def versions(self) -> List[Dict]:
+        """All registered versions, newest first."""
+        return sorted(self._read_manifest()['versions'], key=lambda v: v['version'], reverse=True)
+
+    def get(self, version: Optional[str] = None, schema_hash: Optional[str] = None) -> Optional[Dict]:
+        """
+        Manifest entry of a version (latest when None).
+
+        Args:
+            schema_hash: Only return versions trained on this feature schema
+        """
+        for entry in self.versions():
+            if version is not None and entry['version'] != version:
+                continue
+            if schema_hash is not None and entry.get('feature_schema') != schema_hash:
+                continue
+            return entry
+        return None
+
+    # ------------------------------------------------------------------
+    # Save / load
+    # ------------------------------------------------------------------
+
+    def register(self, models: Dict, scaler, feature_names: List[str], n_features: Optional[int] = None,
+                 metrics: Optional[Dict] = None, training: Optional[Dict] = None,
+                 feature_importance: Optional[Dict] = None, version: Optional[str] = None) -> str:
+        """
+        Save a trained ensemble as a new version and prune old ones.
+
+        Returns:
+            Version id
+        """
+        version = version or datetime.now().strftime('%Y%m%d_%H%M%S')
+        version_dir = os.path.join(self.model_dir, version)
+        os.makedirs(version_dir, exist_ok=True)
+
+        files = {}
+        for name, model in models.items():
+            files[name] = f'{name}.joblib'
+            # Uncompressed so numpy arrays can be memory-mapped on load
+            joblib.dump(model, os.path.join(version_dir, files[name]))
+        joblib.dump(scaler, os.path.join(version_dir, 'scaler.joblib'))
+
+        entry = {
+            'version': version,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'feature_schema': feature_schema_hash(feature_names, n_features),
+            'feature_names': list(feature_names),
+            'n_features': n_features or len(feature_names),
+            'models': files,
+            'scaler': 'scaler.joblib',
+            'metrics': {k: float(v) for k, v in (metrics or {}).items()},
+            'training': training or {},
+            'feature_importance': feature_importance or {},
+        }
+        with self.lock:
+            manifest = self._read_manifest()
+            manifest['versions'] = [v for v in manifest['versions'] if v['version'] != version] + [entry]
+            manifest['latest'] = version
+            self._write_manifest(manifest)
+            self._prune(manifest)
+        return version
+
+    def load_model(self, version: str, name: str, mmap: bool = True):
+        """Load one model of a version (memory-mapped arrays by default)."""
+        entry = self.get(version)
+        if entry is None or name not in entry['models']:
+            raise KeyError(f"{name} not in model version {version}")
+        path = os.path.join(self.model_dir, version, entry['models'][name])
+        return joblib.load(path, mmap_mode='r' if mmap else None)
+
+    def load_scaler(self, version: str):
+        entry = self.get(version)
+        if entry is None:
+            raise KeyError(f"Unknown model version {version}")
+        return joblib.load(os.path.join(self.model_dir, version, entry['scaler']))
+
+    def _prune(self, manifest: Dict):
+        """Keep the newest `keep` versions; remove older version dirs and legacy flat files."""
+        ordered = sorted(manifest['versions'], key=lambda v: v['version'], reverse=True)
+        doomed = ordered[self.keep:]
+        if doomed:
+            manifest['versions'] = ordered[:self.keep]
+            self._write_manifest(manifest)
+        for entry in doomed:
+            shutil.rmtree(os.path.join(self.model_dir, entry['version']), ignore_errors=True)
+
+        # Timestamped files from before the registry ({model}_{timestamp}.joblib)
+        for filename in os.listdir(self.model_dir):
+            path = os.path.join(self.model_dir, filename)
+            if filename.endswith('.joblib') and os.path.isfile(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        if doomed:
+            print(f"🧹 Model registry: pruned {len(doomed)} old version(s)")
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Ensemble Tuning
+Purged walk-forward CV + budgeted hyperparameter search for MLMetaPredictor
+
+- Folds are walk-forward in time: each fold validates on one block of
+  as-of dates and trains only on rows at least `purge_days` older, so the
+  30-bar forward-return labels of training rows never overlap validation
+- Fold matrices (scaled with a scaler fitted on the fold's training rows)
+  are built once and written as .npy files; pool workers memory-map them
+  instead of receiving a pickled copy per candidate
+- Candidates (base config first, then random draws from SEARCH_SPACES)
+  are scheduled round-robin over the models in a process pool until the
+  wall-clock budget is spent; fits still running at the deadline are
+  stopped, not waited for
+- Ensemble weights are fitted by non-negative least squares on the
+  out-of-fold predictions of each model's best candidate
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lazy_imports import lazy_attr
+
+StandardScaler = lazy_attr('sklearn.preprocessing', 'StandardScaler')
+nnls = lazy_attr('scipy.optimize', 'nnls')
+
+# Values tried per model (merged over the model's base params)
+SEARCH_SPACES = {
+    'lightgbm': {
+        'num_leaves': [15, 31, 63],
+        'learning_rate': [0.02, 0.05, 0.1],
+        'n_estimators': [200, 400],
+        'min_child_samples': [10, 20, 50],
+        'feature_fraction': [0.6, 0.8, 1.0],
+    },
+    'xgboost': {
+        'max_depth': [3, 4, 6, 8],
+        'learning_rate': [0.02, 0.05, 0.1],
+        'n_estimators': [200, 400],
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.6, 0.8, 1.0],
+        'min_child_weight': [1, 5, 10],
+    },
+    'catboost': {
+        'depth': [4, 6, 8],
+        'learning_rate': [0.03, 0.05, 0.1],
+        'iterations': [200, 400],
+        'l2_leaf_reg': [1, 3, 10],
+    },
+    'random_forest': {
+        'n_estimators': [100, 200],
+        'max_depth': [6, 10, None],
+        'min_samples_leaf': [1, 2, 5],
+        'max_features': [1.0, 'sqrt', 0.5],
+    },
+    'gradient_boost': {
+        'n_estimators': [100, 200],
+        'learning_rate': [0.03, 0.05, 0.1],
+        'max_depth': [3, 4, 6],
+        'subsample': [0.7, 0.8, 1.0],
+    },
+    'neural_net': {
+        'hidden_layer_sizes': [(64,), (64, 32), (128, 64, 32)],
+        'alpha': [0.0001, 0.001, 0.01],
+        'learning_rate_init': [0.001, 0.003],
+    },
+}
+
+
+def purged_walk_forward_folds(dates, n_folds: int = 4, purge_days: int = 45,
+                              min_train: int = 50) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Walk-forward (train, validation) row indices with a purge gap.
+
+    The sorted unique dates are cut into n_folds + 1 blocks; fold k validates
+    on block k and trains on every row dated more than purge_days before the
+    block starts.
+
+    Returns:
+        List of (train_idx, val_idx); folds with fewer than min_train
+        training rows are dropped
+    """
+    if dates is None or len(dates) == 0:
+        return []
+    days = pd.to_datetime(pd.Series(dates)).to_numpy().astype('datetime64[D]')
+    unique = np.unique(days)
+    if len(unique) < n_folds + 1:
+        return []
+    blocks = np.array_split(unique, n_folds + 1)
+    folds = []
+    for block in blocks[1:]:
+        val_start, val_end = block[0], block[-1]
+        train_idx = np.flatnonzero(days < val_start - np.timedelta64(purge_days, 'D'))
+        val_idx = np.flatnonzero((days >= val_start) & (days <= val_end))
+        if len(train_idx) >= min_train and len(val_idx):
+            folds.append((train_idx, val_idx))
+    return folds
+
+
+def build_fold_cache(X: np.ndarray, y: np.ndarray, folds: List[Tuple[np.ndarray, np.ndarray]],
+                     cache_dir: str) -> int:
+    """Write the scaled matrices of every fold once (fold_{k}_{X_train,y_train,X_val,y_val}.npy)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    for k, (train_idx, val_idx) in enumerate(folds):
+        scaler = StandardScaler()
+        arrays = {
+            'X_train': scaler.fit_transform(X[train_idx]),
+            'y_train': np.asarray(y[train_idx], dtype=float),
+            'X_val': scaler.transform(X[val_idx]),
+            'y_val': np.asarray(y[val_idx], dtype=float),
+        }
+        for name, values in arrays.items():
+            np.save(os.path.join(cache_dir, f'fold_{k}_{name}.npy'), values)
+    return len(folds)
+
+
+def _load_fold(cache_dir: str, k: int) -> Tuple[np.ndarray, ...]:
+    return tuple(np.load(os.path.join(cache_dir, f'fold_{k}_{name}.npy'), mmap_mode='r')
+                 for name in ('X_train', 'y_train', 'X_val', 'y_val'))
+
+
+def _evaluate_candidate(model_name: str, params: Dict, n_threads: int, cache_dir: str,
+                        n_folds: int, deadline: float) -> Optional[Tuple[float, np.ndarray, float]]:
+    """
+    Fit one candidate on every cached fold (runs in a pool worker).
+
+    Returns:
+        (mean fold RMSE, out-of-fold predictions in fold order, wall seconds),
+        or None when the deadline passed before all folds were fitted
+    """
+    from ml_meta_predictor import _fit_model
+
+    started = time.time()
+    rmses, oof = [], []
+    for k in range(n_folds):
+        if time.time() > deadline:
+            return None
+        X_train, y_train, X_val, y_val = _load_fold(cache_dir, k)
+        model, rmse, _ = _fit_model(model_name, params, n_threads, X_train, y_train, X_val, y_val)
+        rmses.append(rmse)
+        oof.append(np.asarray(model.predict(X_val), dtype=float).reshape(-1))
+    return float(np.mean(rmses)), np.concatenate(oof), time.time() - started
+
+
+def _stop_pool(pool: ProcessPoolExecutor, overdue: bool) -> None:
+    """
+    Shut the tuning pool down; with overdue candidates (still fitting past the
+    deadline) queued ones are cancelled and the workers terminated instead of
+    waiting for their fits to finish.
+    """
+    if not overdue:
+        pool.shutdown(wait=True)
+        return
+    processes = list((getattr(pool, '_processes', None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(timeout=5)
+
+
+def _candidates(model_names: List[str], base_params: Dict[str, Dict], max_trials: int,
+                seed: int = 42) -> List[Tuple[str, int, Dict]]:
+    """Base config plus max_trials - 1 distinct random draws per model, round-robin ordered."""
+    rng = np.random.default_rng(seed)
+    per_model = {}
+    for name in model_names:
+        space = SEARCH_SPACES.get(name, {})
+        trials, seen = [dict(base_params[name])], set()
+        for _ in range(max_trials * 10):
+            if len(trials) >= max_trials or not space:
+                break
+            draw = {key: values[rng.integers(len(values))] for key, values in space.items()}
+            key = repr(sorted(draw.items()))
+            if key in seen:
+                continue
+            seen.add(key)
+            trials.append({**base_params[name], **draw})
+        per_model[name] = trials
+    ordered = []
+    for trial in range(max_trials):
+        for name in model_names:
+            if trial < len(per_model[name]):
+                ordered.append((name, trial, per_model[name][trial]))
+    return ordered
+
+
+def learn_ensemble_weights(oof_predictions: Dict[str, np.ndarray], y: np.ndarray) -> Dict[str, float]:
+    """Non-negative least-squares blend of out-of-fold predictions, normalized to sum to 1."""
+    names = list(oof_predictions)
+    if not names:
+        return {}
+    P = np.column_stack([oof_predictions[name] for name in names])
+    try:
+        coef, _ = nnls(P, np.asarray(y, dtype=float))
+    except Exception:
+        coef = np.zeros(len(names))
+    if coef.sum() <= 0:
+        coef = np.ones(len(names))
+    coef = coef / coef.sum()
+    return {name: float(w) for name, w in zip(names, coef)}
+
+
+def tune_ensemble(X: np.ndarray, y: np.ndarray, dates, base_params: Dict[str, Dict],
+                  n_folds: int = 4, purge_days: int = 45, time_budget: float = 300,
+                  max_trials: int = 8, parallel: bool = True, seed: int = 42) -> Dict:
+    """
+    Budgeted per-model hyperparameter search on purged walk-forward folds.
+
+    Args:
+        X / y: Raw (unscaled) features and targets
+        dates: As-of date of every row (defines the folds)
+        base_params: model name -> current params (always evaluated first)
+        time_budget: Wall-clock seconds for the whole search (fold building included)
+        max_trials: Candidates per model, base config included
+
+    Returns:
+        Dict with best params and CV RMSE per model, learned ensemble weights,
+        out-of-fold RMSE of the blend and search statistics (empty when no
+        fold could be built)
+    """
+    started = time.time()
+    deadline = started + time_budget
+    folds = purged_walk_forward_folds(dates, n_folds=n_folds, purge_days=purge_days)
+    if not folds:
+        print("⚠️ Tuning skipped (not enough dated rows for walk-forward folds)")
+        return {}
+
+    model_names = list(base_params)
+    cache_dir = tempfile.mkdtemp(prefix='cv_folds_')
+    try:
+        build_fold_cache(X, y, folds, cache_dir)
+        y_oof = np.concatenate([np.asarray(y[val_idx], dtype=float) for _, val_idx in folds])
+        candidates = _candidates(model_names, base_params, max_trials, seed)
+
+        cores = os.cpu_count() or 1
+        workers = max(1, min(cores, len(candidates))) if parallel else 1
+        n_threads = max(1, cores // workers)
+        print(f"🔬 Tuning {len(model_names)} models: {len(candidates)} candidates x {len(folds)} purged folds, "
+              f"{workers} workers, budget {time_budget:.0f}s")
+
+        results = {}  # (name, trial) -> (rmse, oof, seconds)
+        cost = {}     # model name -> seconds of its last finished candidate
+
+        def affordable(name: str) -> bool:
+            return time.time() + cost.get(name, 0) < deadline
+
+        def record(key, outcome):
+            if outcome is not None:
+                results[key] = outcome
+                cost[key[0]] = outcome[2]
+
+        if workers > 1:
+            pending = list(candidates)
+            try:
+                # spawn (not fork): tuning runs inside a multithreaded pipeline
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+                running = {}
+                try:
+                    while pending or running:
+                        while pending and len(running) < workers:
+                            name, trial, params = pending.pop(0)
+                            if not affordable(name):
+                                continue
+                            future = pool.submit(_evaluate_candidate, name, params, n_threads,
+                                                 cache_dir, len(folds), deadline)
+                            running[future] = (name, trial)
+                        if not running:
+                            break
+                        done, _ = wait(running, timeout=max(0.0, deadline - time.time()),
+                                       return_when=FIRST_COMPLETED)
+                        for future in done:
+                            key = running.pop(future)
+                            try:
+                                record(key, future.result())
+                            except Exception as e:
+                                print(f"   ⚠️ {key[0]} trial {key[1]} failed: {e}")
+                        if time.time() >= deadline:
+                            break
+                finally:
+                    _stop_pool(pool, overdue=bool(running))
+                if running:
+                    print(f"   ⏱️ Budget spent: {len(running)} running candidates stopped")
+            except Exception as e:
+                print(f"   ⚠️ Process pool unavailable ({e}) - tuning sequentially")
+                workers = 1
+        if workers == 1:
+            for name, trial, params in candidates:
+                if (name, trial) in results or not affordable(name):
+                    continue
+                try:
+                    record((name, trial), _evaluate_candidate(name, params, n_threads, cache_dir,
+                                                              len(folds), deadline))
+                except Exception as e:
+                    print(f"   ⚠️ {name} trial {trial} failed: {e}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    best, oof_best = {}, {}
+    by_key = {(name, trial): p for name, trial, p in candidates}
+    for (name, trial), (rmse, oof, seconds) in results.items():
+        if name not in best or rmse < best[name]['cv_rmse']:
+            best[name] = {'params': by_key[(name, trial)], 'cv_rmse': rmse, 'trial': trial}
+            oof_best[name] = oof
+    weights = learn_ensemble_weights(oof_best, y_oof)
+    blend = sum(oof_best[name] * w for name, w in weights.items()) if weights else None
+    summary = {
+        'best': best,
+        'weights': weights,
+        'oof_rmse': float(np.sqrt(np.mean((blend - y_oof) ** 2))) if blend is not None else None,
+        'n_folds': len(folds),
+        'purge_days': purge_days,
+        'candidates_evaluated': len(results),
+        'candidates_total': len(candidates),
+        'elapsed': round(time.time() - started, 1),
+        'time_budget': time_budget,
+    }
+    return summary
@@ -8,15 +8,19 @@ Focus: Low-risk, high-quality stocks with steady growth
 Universe: 614 premium institutional-grade companies
 """
 
+import hashlib
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import yfinance as yf
 from typing import Dict, List, Tuple, Optional
 import warnings
 import time
+import os
+from lazy_imports import lazy_module
 warnings.filterwarnings('ignore')
 
+yf = lazy_module('yfinance')  # loaded on the first download
+
 # Import enhanced signals module for 20%+ accuracy improvement
 try:
     from enhanced_signals import EnhancedSignalsAnalyzer
@@ -31,6 +35,52 @@ try:
 except ImportError:
     _get_sector_fallback = lambda s: 'Unknown'
 
+# Content-addressed memo of analyze_stock results (skips unchanged symbols on re-runs)
+try:
+    from result_memo import ResultMemo, code_fingerprint, history_digest, _canonical
+    RESULT_MEMO_AVAILABLE = True
+except ImportError:
+    RESULT_MEMO_AVAILABLE = False
+
+# info fields read by analyze_stock (the only ones that enter the memo key)
+INFO_FIELDS = (
+    'trailingPE', 'forwardPE', 'revenueGrowth', 'profitMargins', 'returnOnEquity', 'debtToEquity',
+    'earningsGrowth', 'earningsQuarterlyGrowth', 'beta', 'heldPercentInstitutions', 'institutionalOwnership',
+    'recommendationMean', 'recommendationKey', 'targetMeanPrice', 'currentPrice', 'sector',
+    'earningsTimestamp', 'earningsDate',
+)
+
+# Raw inputs behind the 15 quality metrics (one row per symbol in score_universe tables)
+METRIC_COLUMNS = [
+    # Fundamentals
+    'pe_ratio', 'revenue_growth', 'profit_margin', 'roe', 'debt_equity', 'earnings_growth',
+    # Momentum
+    'ma_50', 'ma_200', 'price', 'rsi', 'volume_ratio', 'relative_strength', 'rs_6m', 'pct_from_52w_high',
+    # Risk
+    'beta', 'volatility', 'max_drawdown', 'sharpe_ratio', 'var_95',
+    # Technical
+    'macd', 'macd_signal', 'bollinger_upper', 'bollinger_lower', 'bollinger_position',
+    'support', 'resistance', 'volume_sma', 'mfi',
+    # Sentiment
+    'institutional_ownership', 'analyst_mean', 'analyst_key', 'target_upside',
+]
+
+# Inputs computed from the price history (momentum, risk, technical); an
+# incremental run reuses them while a symbol's bars are unchanged
+HISTORY_METRICS = [
+    'ma_50', 'ma_200', 'price', 'rsi', 'volume_ratio', 'relative_strength', 'rs_6m', 'pct_from_52w_high',
+    'volatility', 'max_drawdown', 'sharpe_ratio', 'var_95',
+    'macd', 'macd_signal', 'bollinger_upper', 'bollinger_lower', 'bollinger_position',
+    'support', 'resistance', 'volume_sma', 'mfi',
+]
+
+# info fields compared by incremental runs (earnings dates are tracked separately)
+EARNINGS_FIELDS = ('earningsTimestamp', 'earningsDate')
+FUNDAMENTAL_FIELDS = tuple(f for f in INFO_FIELDS if f not in EARNINGS_FIELDS)
+# Bars the windowed momentum / technical inputs look back over (52-week high:
+# 252); an incremental update evaluates them on this tail of the history only
+HISTORY_TAIL = 260
+
 
 class PremiumStockAnalyzer:
     """
@@ -70,6 +120,25 @@ class PremiumStockAnalyzer:
                 print("✅ Enhanced signals enabled (VWAP, Sector Rotation, S/R Zones, RSI(2), ATR Stops)")
             except Exception as e:
                 print(f"⚠️ Enhanced signals init failed: {e}")
+        # Universe-wide enhanced signals table (see prime_enhanced_signals)
+        self._enhanced_table = None
+        
+        # Result memo keyed by input content + code/config version
+        self.result_memo = None
+        self._memo_version = ''
+        if RESULT_MEMO_AVAILABLE:
+            try:
+                here = os.path.dirname(os.path.abspath(__file__))
+                self.result_memo = ResultMemo(cache_dir=os.path.join(here, '.cache'))
+                self._memo_version = code_fingerprint(
+                    os.path.join(here, 'premium_stock_analyzer.py'),
+                    os.path.join(here, 'enhanced_signals.py'),
+                    os.path.join(here, 'volume_profile.py'),
+                    config={'weights': self.quality_weights, 'data_mode': self.data_mode},
+                )
+            except Exception as e:
+                print(f"⚠️ Result memo unavailable: {e}")
+                self.result_memo = None
     
     def _get_spy_hist(self) -> Optional[pd.DataFrame]:
         """Get SPY history data, cached for the entire run to avoid 600+ redundant API calls."""
@@ -147,845 +216,1009 @@ class PremiumStockAnalyzer:
                 info = stock_data.get('info', {})
             else:
                 info = info or {}
-
-            # Calculate all 15 metrics
-            fundamentals = self._calculate_fundamentals(info, hist_data)
-            momentum = self._calculate_momentum(hist_data, symbol)
-            risk = self._calculate_risk(hist_data, info, momentum_score=momentum.get('score', 0))
-            technical = self._calculate_technical(hist_data)
-            # Use latest close as definitive price reference
-            current_price = float(hist_data['Close'].iloc[-1]) if not hist_data.empty else info.get('currentPrice', 0)
-            sentiment = self._calculate_sentiment(info, current_price=current_price)
-            
-            # Calculate overall quality score
-            quality_score = (
-                fundamentals['score'] * self.quality_weights['fundamentals'] +
-                momentum['score'] * self.quality_weights['momentum'] +
-                risk['score'] * self.quality_weights['risk'] +
-                sentiment['score'] * self.quality_weights['sentiment']
-            )
-            
-            # Get enhanced signals (VWAP, Sector, S/R, RSI(2), ATR) - 20%+ accuracy boost
-            enhanced_signals = None
-            enhancement_score = 0
-            if self.enhanced_analyzer:
-                try:
-                    stock_sector = info.get('sector', 'Unknown')
-                    enhanced_signals = self.enhanced_analyzer.get_enhanced_signals(hist_data, stock_sector)
-                    enhancement_score = enhanced_signals.get('enhancement_score', 0)
-                    
-                    # Apply enhancement adjustment to quality score (up to +/- 10 points)
-                    enhancement_adjustment = (enhancement_score - 50) / 5  # -10 to +10
-                    quality_score = min(100, max(0, quality_score + enhancement_adjustment))
-                except Exception as e:
-                    enhanced_signals = None
             
-            # Check earnings proximity (risk flag for imminent earnings - no extra API call)
-            earnings_info = self._check_earnings_proximity(symbol, info)
-            if earnings_info.get('earnings_imminent'):
-                # Reduce confidence when earnings are within 7 days (high volatility risk)
-                quality_score = max(0, quality_score - 5)
-            
-            # Determine recommendation
-            recommendation, confidence = self._determine_recommendation(
-                quality_score, fundamentals, momentum, risk, sentiment
-            )
-            
-            # Build result with enhanced signals
-            result = {
-                'symbol': symbol,
-                'quality_score': round(quality_score, 2),
-                'recommendation': recommendation,
-                'confidence': round(confidence, 2),
-                'fundamentals': fundamentals,
-                'momentum': momentum,
-                'risk': risk,
-                'technical': technical,
-                'sentiment': sentiment,
-                'current_price': current_price,
-                'sector': info.get('sector', 'Unknown') if info.get('sector', 'Unknown') != 'Unknown' else _get_sector_fallback(symbol),
-                'analysis_date': datetime.now().strftime('%Y-%m-%d'),
-                'earnings_date': earnings_info.get('earnings_date'),
-                'days_until_earnings': earnings_info.get('days_until_earnings'),
-                'earnings_risk': earnings_info.get('earnings_risk', 'UNKNOWN'),
-                'success': True
-            }
+            # Unchanged inputs -> return the stored result without recomputing
+            memo_key = self._memo_key(symbol, hist_data, info)
+            if memo_key:
+                cached = self.result_memo.get(memo_key)
+                if cached is not None:
+                    return cached
+
+            result, _ = self._analyze(symbol, hist_data, info)
             
-            # Add enhanced signals to result if available
-            if enhanced_signals:
-                result['enhanced'] = {
-                    'enhancement_score': enhanced_signals.get('enhancement_score', 50),
-                    'enhancement_signal': enhanced_signals.get('enhancement_signal', 'NEUTRAL'),
-                    'bullish_confirmations': enhanced_signals.get('bullish_confirmations', []),
-                    'confirmation_count': enhanced_signals.get('confirmation_count', 0),
-                    # VWAP data
-                    'vwap': enhanced_signals.get('vwap', {}).get('vwap'),
-                    'vwap_signal': enhanced_signals.get('vwap', {}).get('vwap_signal', 'NEUTRAL'),
-                    'breakout_confirmed': enhanced_signals.get('vwap', {}).get('breakout_confirmed', False),
-                    # Support/Resistance
-                    'entry_zone': enhanced_signals.get('support_resistance', {}).get('entry_zone', 'N/A'),
-                    'entry_timing': enhanced_signals.get('support_resistance', {}).get('entry_timing', 'UNKNOWN'),
-                    'entry_score': enhanced_signals.get('support_resistance', {}).get('entry_score', 50),
-                    'nearest_support': enhanced_signals.get('support_resistance', {}).get('nearest_support'),
-                    'nearest_resistance': enhanced_signals.get('support_resistance', {}).get('nearest_resistance'),
-                    'risk_reward_ratio': enhanced_signals.get('support_resistance', {}).get('risk_reward_ratio', 1.0),
-                    # Mean Reversion
-                    'rsi_2': enhanced_signals.get('mean_reversion', {}).get('rsi_2', 50),
-                    'reversion_signal': enhanced_signals.get('mean_reversion', {}).get('signal', 'NEUTRAL'),
-                    'bounce_probability': enhanced_signals.get('mean_reversion', {}).get('bounce_probability', 50),
-                    'is_bounce_setup': enhanced_signals.get('mean_reversion', {}).get('is_bounce_setup', False),
-                    # ATR Stop Loss
-                    'recommended_stop': enhanced_signals.get('atr_stops', {}).get('recommended_stop'),
-                    'stop_loss_pct': enhanced_signals.get('atr_stops', {}).get('stop_loss_pct', 5.0),
-                    'target_2r': enhanced_signals.get('atr_stops', {}).get('target_2r'),
-                    'volatility_regime': enhanced_signals.get('atr_stops', {}).get('volatility_regime', 'NORMAL'),
-                    'position_size_suggestion': enhanced_signals.get('atr_stops', {}).get('position_size_suggestion', 'STANDARD SIZE'),
-                    # Sector
-                    'sector_rank': enhanced_signals.get('sector', {}).get('sector_rank', 6),
-                    'sector_tier': enhanced_signals.get('sector', {}).get('sector_tier', 'MIDDLE')
-                }
+            if memo_key:
+                self.result_memo.put(memo_key, result, namespace='premium', symbol=symbol)
             
             return result
             
         except Exception as e:
             return self._empty_result(symbol, str(e))
     
-    def _calculate_fundamentals(self, info: Dict, hist: pd.DataFrame) -> Dict:
+    def _analyze(self, symbol: str, hist_data: pd.DataFrame, info: Dict,
+                 reuse: Optional[Dict] = None) -> Tuple[Dict, Dict]:
         """
-        Calculate 5 fundamental metrics (40% weight)
-        1. P/E Ratio (valuation)
-        2. Revenue Growth (business health)
-        3. Profit Margins (quality)
-        4. ROE (efficiency)
-        5. Debt/Equity (financial strength)
+        Score one symbol (analyze_stock without the fetch / memo).
+        
+        Args:
+            reuse: History inputs already computed for these bars ('metrics':
+                momentum / risk / technical inputs, optionally the 'enhanced'
+                block and its score); they are used instead of being recomputed
+        
+        Returns:
+            (result, history state for a later reuse)
         """
-        fundamentals = {}
-        scores = []
+        # Use latest close as definitive price reference
+        current_price = float(hist_data['Close'].iloc[-1]) if not hist_data.empty else info.get('currentPrice', 0)
+
+        if reuse is not None:
+            # History inputs known for these bars: only the info-based inputs are re-read
+            metrics = {'symbol': symbol}
+            metrics.update(self._fundamental_metrics(info))
+            metrics.update(reuse['metrics'])
+            metrics['beta'] = self._risk_metrics(None, info)['beta']
+            metrics.update(self._sentiment_metrics(info, current_price=current_price))
+        else:
+            # Collect the raw inputs for all 15 metrics (scored below in one table pass)
+            metrics = self._extract_metrics(symbol, hist_data, info, current_price=current_price)
         
-        # 1. P/E Ratio — growth-stock aware (2026 bull/AI market context)
-        # High-growth leaders like AMD/NVDA trade at 40-150x P/E and outperform.
-        # We apply PEG correction below to forgive high P/E when growth justifies it.
-        pe = info.get('trailingPE', info.get('forwardPE', 0))
-        if pe and pe > 0:
-            if 15 <= pe <= 30:
-                pe_score = 100   # Ideal: moderate value to growth
-            elif 10 <= pe < 15 or 30 < pe <= 45:
-                pe_score = 80   # Good range
-            elif 5 <= pe < 10 or 45 < pe <= 70:
-                pe_score = 65   # Acceptable for high-growth
-            elif pe > 70:
-                pe_score = 50   # High P/E — needs strong growth backing (PEG fix below)
-            else:
-                pe_score = 40   # Cheap but possibly distressed
+        # Get enhanced signals (VWAP, Sector, S/R, RSI(2), ATR) - 20%+ accuracy boost
+        enhanced_signals = None
+        if reuse is not None and 'enhanced' in reuse:
+            enhanced_row = reuse.get('enhanced')
+            if reuse.get('enhancement_score') is not None:
+                metrics['enhancement_score'] = reuse['enhancement_score']
         else:
-            pe = None
-            pe_score = 50  # Neutral if not available
+            enhanced_row = self._primed_enhanced_row(symbol, hist_data, info.get('sector', 'Unknown'))
+            if enhanced_row is not None:
+                metrics['enhancement_score'] = enhanced_row['enhancement_score']
+            elif self.enhanced_analyzer:
+                try:
+                    stock_sector = info.get('sector', 'Unknown')
+                    enhanced_signals = self.enhanced_analyzer.get_enhanced_signals(hist_data, stock_sector)
+                    # Applied to quality score in score_universe (up to +/- 10 points)
+                    metrics['enhancement_score'] = enhanced_signals.get('enhancement_score', 0)
+                except Exception as e:
+                    enhanced_signals = None
         
-        fundamentals['pe_ratio'] = pe
-        fundamentals['pe_score'] = pe_score
-        scores.append(pe_score)
+        # Check earnings proximity (risk flag for imminent earnings - no extra API call)
+        earnings_info = self._check_earnings_proximity(symbol, info)
+        metrics['earnings_imminent'] = bool(earnings_info.get('earnings_imminent'))
         
-        # 2. Revenue Growth — tiered to reward exceptional growth leaders
-        revenue_growth = info.get('revenueGrowth', 0)
-        if revenue_growth:
-            revenue_growth_pct = revenue_growth * 100
-            if revenue_growth_pct >= 50:
-                rev_score = 100  # Hypergrowth (NVDA, AMD territory)
-            elif revenue_growth_pct >= 30:
-                rev_score = 95  # Very strong growth
-            elif revenue_growth_pct >= 20:
-                rev_score = 88
-            elif revenue_growth_pct >= 10:
-                rev_score = 78
-            elif revenue_growth_pct >= 5:
-                rev_score = 65
-            elif revenue_growth_pct >= 0:
-                rev_score = 50
-            else:
-                rev_score = 30
-        else:
-            revenue_growth_pct = None
-            rev_score = 50
+        # Score through the same vectorized path used for whole-universe tables
+        row = self.score_universe(pd.DataFrame([metrics])).iloc[0]
+        fundamentals, momentum, risk, technical, sentiment = self._component_views(row)
         
-        fundamentals['revenue_growth'] = revenue_growth_pct
-        fundamentals['revenue_growth_score'] = rev_score
-        scores.append(rev_score)
+        # Build result with enhanced signals
+        result = {
+            'symbol': symbol,
+            'quality_score': float(row['quality_score']),
+            'recommendation': str(row['recommendation']),
+            'confidence': float(row['confidence']),
+            'fundamentals': fundamentals,
+            'momentum': momentum,
+            'risk': risk,
+            'technical': technical,
+            'sentiment': sentiment,
+            'current_price': current_price,
+            'sector': info.get('sector', 'Unknown') if info.get('sector', 'Unknown') != 'Unknown' else _get_sector_fallback(symbol),
+            **self._day_fields(earnings_info),
+            'success': True
+        }
         
-        # 3. Profit Margins (higher is better)
-        profit_margin = info.get('profitMargins', 0)
-        if profit_margin:
-            profit_margin_pct = profit_margin * 100
-            if profit_margin_pct >= 20:
-                margin_score = 100
-            elif profit_margin_pct >= 15:
-                margin_score = 85
-            elif profit_margin_pct >= 10:
-                margin_score = 70
-            elif profit_margin_pct >= 5:
-                margin_score = 50
-            else:
-                margin_score = 30
-        else:
-            profit_margin_pct = None
-            margin_score = 50
+        # Add enhanced signals to result if available
+        if enhanced_row is not None:
+            result['enhanced'] = enhanced_row
+        elif enhanced_signals:
+            result['enhanced'] = {
+                'enhancement_score': enhanced_signals.get('enhancement_score', 50),
+                'enhancement_signal': enhanced_signals.get('enhancement_signal', 'NEUTRAL'),
+                'bullish_confirmations': enhanced_signals.get('bullish_confirmations', []),
+                'confirmation_count': enhanced_signals.get('confirmation_count', 0),
+                # VWAP data
+                'vwap': enhanced_signals.get('vwap', {}).get('vwap'),
+                'vwap_signal': enhanced_signals.get('vwap', {}).get('vwap_signal', 'NEUTRAL'),
+                'breakout_confirmed': enhanced_signals.get('vwap', {}).get('breakout_confirmed', False),
+                # Support/Resistance
+                'entry_zone': enhanced_signals.get('support_resistance', {}).get('entry_zone', 'N/A'),
+                'entry_timing': enhanced_signals.get('support_resistance', {}).get('entry_timing', 'UNKNOWN'),
+                'entry_score': enhanced_signals.get('support_resistance', {}).get('entry_score', 50),
+                'nearest_support': enhanced_signals.get('support_resistance', {}).get('nearest_support'),
+                'nearest_resistance': enhanced_signals.get('support_resistance', {}).get('nearest_resistance'),
+                'risk_reward_ratio': enhanced_signals.get('support_resistance', {}).get('risk_reward_ratio', 1.0),
+                # Mean Reversion
+                'rsi_2': enhanced_signals.get('mean_reversion', {}).get('rsi_2', 50),
+                'reversion_signal': enhanced_signals.get('mean_reversion', {}).get('signal', 'NEUTRAL'),
+                'bounce_probability': enhanced_signals.get('mean_reversion', {}).get('bounce_probability', 50),
+                'is_bounce_setup': enhanced_signals.get('mean_reversion', {}).get('is_bounce_setup', False),
+                # ATR Stop Loss
+                'recommended_stop': enhanced_signals.get('atr_stops', {}).get('recommended_stop'),
+                'stop_loss_pct': enhanced_signals.get('atr_stops', {}).get('stop_loss_pct', 5.0),
+                'target_2r': enhanced_signals.get('atr_stops', {}).get('target_2r'),
+                'volatility_regime': enhanced_signals.get('atr_stops', {}).get('volatility_regime', 'NORMAL'),
+                'position_size_suggestion': enhanced_signals.get('atr_stops', {}).get('position_size_suggestion', 'STANDARD SIZE'),
+                # Sector
+                'sector_rank': enhanced_signals.get('sector', {}).get('sector_rank', 6),
+                'sector_tier': enhanced_signals.get('sector', {}).get('sector_tier', 'MIDDLE')
+            }
         
-        fundamentals['profit_margin'] = profit_margin_pct
-        fundamentals['margin_score'] = margin_score
-        scores.append(margin_score)
+        history = {
+            'metrics': {k: metrics.get(k, np.nan) for k in HISTORY_METRICS},
+            'enhancement_score': metrics.get('enhancement_score'),
+            'enhanced': result.get('enhanced'),
+        }
+        return result, history
+    
+    def input_signature(self, symbol: str, hist_data: pd.DataFrame, info: Dict) -> Dict[str, str]:
+        """
+        Digest of each input group of analyze_stock, compared by incremental runs:
+        bars (the price history), market (SPY closes and sector score used by
+        relative strength / enhanced signals), fundamentals, earnings dates and
+        code/config version. The run date is not an input: the day-dependent
+        fields are refreshed on every reuse (see _day_fields).
+        """
+        def digest(value) -> str:
+            return hashlib.sha256(_canonical(value).encode()).hexdigest()[:16]
         
-        # 4. ROE - Return on Equity (higher is better)
-        roe = info.get('returnOnEquity', 0)
-        if roe:
-            roe_pct = roe * 100
-            if roe_pct >= 20:
-                roe_score = 100
-            elif roe_pct >= 15:
-                roe_score = 85
-            elif roe_pct >= 10:
-                roe_score = 70
-            elif roe_pct >= 5:
-                roe_score = 50
-            else:
-                roe_score = 30
-        else:
-            roe_pct = None
-            roe_score = 50
+        market = {'spy': history_digest(self._get_spy_hist(), columns=('Close',))}
+        if self.enhanced_analyzer:
+            try:
+                market['sector'] = self.enhanced_analyzer.get_stock_sector_score(info.get('sector', 'Unknown'))
+            except Exception:
+                pass
+        return {
+            'version': self._memo_version,
+            'bars': self._bars_digest(hist_data),
+            'market': digest(market),
+            'fundamentals': digest({k: info.get(k) for k in FUNDAMENTAL_FIELDS}),
+            'earnings': digest({k: info.get(k) for k in EARNINGS_FIELDS}),
+        }
+    
+    @staticmethod
+    def _bars_digest(hist_data: pd.DataFrame) -> str:
+        """history_digest of the traded bars as float64 on daily tz-naive dates (same for any data path)."""
+        from price_panel import _normalize_index
+        bars = _normalize_index(hist_data[[c for c in ('Open', 'High', 'Low', 'Close', 'Volume')
+                                           if c in hist_data.columns]])
+        if 'Close' in bars.columns:
+            bars = bars[bars['Close'].notna()]
+        bars = bars.astype(np.float64)
+        bars.index = pd.DatetimeIndex(bars.index).as_unit('ns')
+        return history_digest(bars)
+    
+    @staticmethod
+    def _day_fields(earnings_info: Dict) -> Dict:
+        """Result fields that change with the calendar day alone."""
+        return {
+            'analysis_date': datetime.now().strftime('%Y-%m-%d'),
+            'earnings_date': earnings_info.get('earnings_date'),
+            'days_until_earnings': earnings_info.get('days_until_earnings'),
+            'earnings_risk': earnings_info.get('earnings_risk', 'UNKNOWN'),
+        }
+    
+    def analyze_stock_incremental(self, symbol: str, hist_data: pd.DataFrame, info: Optional[Dict],
+                                  previous: Optional[Dict] = None) -> Tuple[Dict, Optional[Dict], str]:
+        """
+        analyze_stock that carries a stored per-symbol state forward instead of
+        recomputing it from the full history.
         
-        fundamentals['roe'] = roe_pct
-        fundamentals['roe_score'] = roe_score
-        scores.append(roe_score)
+        - 'reused': no input changed - the stored result is returned with only
+          the day-dependent fields (analysis date, days until earnings) refreshed
+        - 'rescored': hist_data continues the stored window (the daily case:
+          one new bar, and with a rolling period fetch one bar dropped at the
+          start). The stored closes / MACD state are moved to the new window,
+          the windowed inputs are read from the last HISTORY_TAIL bars and the
+          info-based inputs are re-read before scoring. With the same bars and market the stored inputs and
+          enhanced block are used as they are.
+        - 'recomputed': no usable state (first run, code change, rewritten
+          history such as a split or dividend adjustment) - full analysis
         
-        # 5. Debt/Equity (lower is better)
-        debt_equity = info.get('debtToEquity', 0)
-        if debt_equity is not None and debt_equity >= 0:
-            if debt_equity <= 30:
-                de_score = 100
-            elif debt_equity <= 50:
-                de_score = 85
-            elif debt_equity <= 100:
-                de_score = 70
-            elif debt_equity <= 150:
-                de_score = 50
-            else:
-                de_score = 30
-        else:
-            debt_equity = None
-            de_score = 50
+        Args:
+            previous: State returned by an earlier call for this symbol
         
-        fundamentals['debt_equity'] = debt_equity
-        fundamentals['debt_equity_score'] = de_score
-        scores.append(de_score)
-
-        # 6. Earnings Growth (EPS growth — explosive earnings = major alpha signal)
-        earnings_growth = info.get('earningsGrowth', info.get('earningsQuarterlyGrowth', 0))
-        if earnings_growth:
-            eg_pct = earnings_growth * 100
-            if eg_pct >= 50:
-                eg_score = 100
-            elif eg_pct >= 30:
-                eg_score = 90
-            elif eg_pct >= 15:
-                eg_score = 78
-            elif eg_pct >= 5:
-                eg_score = 62
-            elif eg_pct >= 0:
-                eg_score = 50
-            else:
-                eg_score = 30
-        else:
-            eg_pct = None
-            eg_score = 50
-        fundamentals['earnings_growth'] = round(eg_pct, 2) if eg_pct is not None else None
-        fundamentals['earnings_growth_score'] = eg_score
-        scores.append(eg_score)
-
-        # PEG Correction: forgive high P/E when backed by strong revenue/earnings growth.
-        # A stock growing revenue 40%+ with P/E of 60 is cheaper than a 5%-grower at P/E 20.
-        if fundamentals.get('pe_ratio') and fundamentals['pe_ratio'] > 30:
-            growth_rate = max(
-                fundamentals.get('revenue_growth') or 0,
-                fundamentals.get('earnings_growth') or 0,
-                1,
-            )
-            peg = fundamentals['pe_ratio'] / growth_rate
-            if peg <= 1.0 and scores[0] < 90:
-                scores[0] = 90   # Exceptional PEG — fully forgive high P/E
-                fundamentals['pe_score'] = 90
-            elif peg <= 1.5 and scores[0] < 80:
-                scores[0] = 80
-                fundamentals['pe_score'] = 80
-            elif peg <= 2.5 and scores[0] < 70:
-                scores[0] = 70
-                fundamentals['pe_score'] = 70
-            fundamentals['peg_ratio'] = round(peg, 2)
-        else:
-            fundamentals['peg_ratio'] = None
-
-        # Overall fundamental score
-        fundamentals['score'] = np.mean(scores)
-        fundamentals['grade'] = self._score_to_grade(fundamentals['score'])
-
-        return fundamentals
+        Returns:
+            (result, state to store for the next run or None on failure, kind)
+        """
+        info = info or {}
+        if not RESULT_MEMO_AVAILABLE or hist_data is None or hist_data.empty:
+            return self.analyze_stock(symbol, hist_data=hist_data, info=info), None, 'recomputed'
+        try:
+            inputs = self.input_signature(symbol, hist_data, info)
+            earnings_info = self._check_earnings_proximity(symbol, info)
+            imminent = bool(earnings_info.get('earnings_imminent'))
+            previous = previous or {}
+            history = previous.get('history') or {}
+            before = previous.get('inputs', {})
+            changed = {group for group, value in inputs.items() if before.get(group) != value}
+            
+            if previous and not changed and history.get('earnings_imminent') == imminent:
+                result = dict(previous['result'])
+                result.update(self._day_fields(earnings_info))
+                return result, previous, 'reused'
+            
+            reuse, running, kind = None, None, 'recomputed'
+            if previous and 'version' not in changed:
+                if not changed & {'bars', 'market'}:
+                    reuse, running = history, history.get('running')
+                else:
+                    appended = self._append_history(hist_data, history)
+                    if appended is not None:
+                        reuse, running = appended
+                if reuse is not None:
+                    kind = 'rescored'
+            if reuse is None:
+                running = self._running_state(hist_data)
+            
+            result, state = self._analyze(symbol, hist_data, info, reuse=reuse)
+            state.update(running=running, last_date=hist_data.index[-1], earnings_imminent=imminent)
+            return result, {'inputs': inputs, 'history': state, 'result': result}, kind
+        except Exception as e:
+            return self._empty_result(symbol, str(e)), None, 'recomputed'
     
-    def _calculate_momentum(self, hist: pd.DataFrame, symbol: str) -> Dict:
+    def _running_state(self, hist_data: pd.DataFrame) -> Optional[Dict]:
         """
-        Calculate 4 momentum metrics (30% weight)
-        1. Price Trend (50/200 MA crossover)
-        2. RSI (single period - 14 days)
-        3. Volume Trend (accumulation/distribution)
-        4. Relative Strength vs SPY
+        State behind the MACD and risk inputs, carried forward bar by bar by
+        incremental runs: the window's closes and the MACD EMAs and signal.
+        None when closes are missing (gaps change the recursions).
         """
-        momentum = {}
-        scores = []
+        close = hist_data['Close']
+        if len(close) < 2 or close.isna().any():
+            return None
+        return self._macd_state(close.to_numpy(dtype=np.float64))
+    
+    @staticmethod
+    def _macd_state(closes: np.ndarray) -> Dict:
+        """MACD EMAs and signal over closes (the full-pass recursions from the first bar)."""
+        close = pd.Series(closes)
+        ema_fast = close.ewm(span=12, adjust=False).mean()
+        ema_slow = close.ewm(span=26, adjust=False).mean()
+        return {
+            'closes': closes,
+            'ema_fast': float(ema_fast.iloc[-1]),
+            'ema_slow': float(ema_slow.iloc[-1]),
+            'macd_signal': float((ema_fast - ema_slow).ewm(span=9, adjust=False).mean().iloc[-1]),
+        }
+    
+    @staticmethod
+    def _ewm_step(value: float, x: float, span: int) -> float:
+        """One adjust=False EWM update, evaluated the way pandas does it."""
+        alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+        decay = 1.0 - alpha
+        return value if value == x else (decay * value + alpha * x) / (decay + alpha)
+    
+    def _append_bars(self, running: Dict, closes: np.ndarray, n_dropped: int = 0) -> Dict:
+        """
+        Running state of the window that drops the first n_dropped stored bars
+        and appends the closes of new bars. The EMAs start on the window's
+        first bar, so a moved window start re-runs them over the closes.
+        """
+        window = np.concatenate([running['closes'][n_dropped:], np.asarray(closes, dtype=np.float64)])
+        if n_dropped:
+            return self._macd_state(window)
+        state = dict(running, closes=window)
+        for close in closes:
+            close = float(close)
+            state['ema_fast'] = self._ewm_step(state['ema_fast'], close, 12)
+            state['ema_slow'] = self._ewm_step(state['ema_slow'], close, 26)
+            state['macd_signal'] = self._ewm_step(state['macd_signal'], state['ema_fast'] - state['ema_slow'], 9)
+        return state
+    
+    @staticmethod
+    def _running_metrics(running: Dict) -> Dict:
+        """MACD and risk inputs from a running state (same length gates as the full pass)."""
+        closes = running['closes']
+        n_bars = len(closes)
+        returns = closes[1:] / closes[:-1] - 1
+        metrics = {'macd': np.nan, 'macd_signal': np.nan, 'volatility': np.nan,
+                   'max_drawdown': np.nan, 'sharpe_ratio': np.nan, 'var_95': np.nan}
+        if n_bars >= 50:
+            metrics['macd'] = running['ema_fast'] - running['ema_slow']
+            metrics['macd_signal'] = running['macd_signal']
+        std = returns.std(ddof=1) if len(returns) > 1 else np.nan
+        if len(returns) >= 21:
+            metrics['volatility'] = std * np.sqrt(252) * 100
+        if n_bars >= 252:
+            cumulative = np.cumprod(1 + returns)
+            peak = np.maximum.accumulate(cumulative)
+            metrics['max_drawdown'] = ((cumulative - peak) / peak).min() * 100
+        if len(returns) >= 252:
+            metrics['sharpe_ratio'] = (returns.mean() / std) * np.sqrt(252) if std > 0 else 0
+            metrics['var_95'] = np.percentile(returns, 5) * 100
+        return metrics
+    
+    def _append_history(self, hist_data: pd.DataFrame, history: Dict) -> Optional[Tuple[Dict, Dict]]:
+        """
+        History inputs of hist_data from the stored state of an earlier window
+        of it: the growing history of a fixed start or the rolling window of a
+        period fetch (e.g. '2y', whose first bar moves every day). hist_data
+        must contain the last stored bar date, and its closes up to that date
+        must equal the stored ones on the overlap. Bars that left the window
+        are dropped from the running state, new ones appended, and the
+        windowed inputs are read from the last HISTORY_TAIL bars.
         
-        if len(hist) < 200:
-            # Not enough data
-            return {
-                'score': 50,
-                'grade': 'C',
-                'price_trend': None,
-                'rsi': None,
-                'volume_trend': None,
-                'relative_strength': None
+        Returns:
+            (reuse for _analyze, running state) or None when hist_data does not
+            continue the stored window
+        """
+        running = history.get('running')
+        last_date = history.get('last_date')
+        if running is None or last_date is None or hist_data['Close'].isna().any():
+            return None
+        try:
+            end = hist_data.index.get_loc(last_date) + 1
+        except (KeyError, TypeError):
+            return None
+        if not isinstance(end, int):
+            return None
+        stored = running['closes']
+        n_dropped = len(stored) - end
+        close = hist_data['Close'].to_numpy(dtype=np.float64)
+        if n_dropped < 0 or end < 2 or not np.array_equal(stored[n_dropped:], close[:end]):
+            return None
+        running = self._append_bars(running, close[end:], n_dropped)
+        tail = hist_data.iloc[-HISTORY_TAIL:]
+        metrics = self._momentum_metrics(tail)
+        metrics.update(self._technical_metrics(tail))
+        metrics.update(self._running_metrics(running))
+        return {'metrics': {k: metrics.get(k, np.nan) for k in HISTORY_METRICS}}, running
+    
+    def _memo_key(self, symbol: str, hist_data: pd.DataFrame, info: Dict) -> Optional[str]:
+        """Content hash of analyze_stock's inputs (None when memoization is off)."""
+        if not self.result_memo or hist_data is None or hist_data.empty:
+            return None
+        try:
+            sector = info.get('sector', 'Unknown')
+            context = {
+                'date': datetime.now().strftime('%Y-%m-%d'),
+                'spy': history_digest(self._get_spy_hist(), columns=('Close',)),
             }
+            if self.enhanced_analyzer:
+                context['sector'] = self.enhanced_analyzer.get_stock_sector_score(sector)
+            return self.result_memo.make_key(
+                'premium', symbol, hist=hist_data, info=info, info_fields=INFO_FIELDS,
+                context=context, version=self._memo_version
+            )
+        except Exception:
+            return None
+    
+    def prime_enhanced_signals(self, hist_map: Dict[str, pd.DataFrame],
+                               sectors: Optional[Dict[str, str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Compute enhanced signals for a whole universe in one batch.
         
-        # 1. Price Trend - 50/200 MA
-        ma_50 = hist['Close'].rolling(50).mean().iloc[-1]
-        ma_200 = hist['Close'].rolling(200).mean().iloc[-1]
-        current_price = hist['Close'].iloc[-1]
+        analyze_stock then reads each symbol's 'enhanced' block from this table
+        instead of recomputing it, as long as the history it is given still
+        ends on the same bar and its info sector resolves to the sector ETF
+        primed here (any spelling, see EnhancedSignalsAnalyzer.sector_etf).
         
-        # Golden Cross: 50 MA > 200 MA and price above both
-        if ma_50 > ma_200:
-            if current_price > ma_50:
-                trend_score = 100  # Strong uptrend
-            else:
-                trend_score = 70  # Uptrend but price below 50 MA
-        else:
-            if current_price > ma_50:
-                trend_score = 60  # Death cross but price above 50 MA
-            else:
-                trend_score = 30  # Downtrend
+        Args:
+            hist_map: symbol -> OHLCV DataFrame
+            sectors: Optional symbol -> sector name ('Unknown' when not known,
+                as analyze_stock passes for info without a sector)
+        """
+        if not self.enhanced_analyzer:
+            return None
+        try:
+            from price_panel import build_price_panel
+            sectors = {sym: (sectors or {}).get(sym) or 'Unknown' for sym in hist_map}
+            panel = build_price_panel(hist_map, fields=('High', 'Low', 'Close', 'Volume'))
+            self._enhanced_table = self.enhanced_analyzer.get_enhanced_signals_batch(panel, sectors)
+            print(f"✅ Enhanced signals primed for {len(self._enhanced_table)} symbols")
+        except Exception as e:
+            print(f"⚠️ Enhanced signals batch failed: {e}")
+            self._enhanced_table = None
+        return self._enhanced_table
+    
+    def worker_state(self) -> Dict:
+        """
+        State a process-pool worker needs to score like this instance
+        (see process_analysis): SPY history, sector momentum and the primed
+        enhanced table are fetched here once instead of in every worker.
+        """
+        state = {
+            'data_mode': self.data_mode,
+            'spy_hist': self._get_spy_hist(),
+            'enhanced_table': self._enhanced_table,
+        }
+        if self.enhanced_analyzer:
+            try:
+                state['sector_momentum'] = self.enhanced_analyzer.get_sector_momentum()
+                state['sector_cache_time'] = self.enhanced_analyzer.sector_cache_time
+            except Exception:
+                pass
+        return state
+    
+    def _primed_enhanced_row(self, symbol: str, hist_data: pd.DataFrame,
+                             sector: Optional[str] = 'Unknown') -> Optional[Dict]:
+        """Enhanced block for symbol from the primed table, or None if stale/missing."""
+        table = self._enhanced_table
+        if table is None or symbol not in table.index or hist_data is None or hist_data.empty:
+            return None
+        row = table.loc[symbol]
+        if 'sector_etf' in table.columns:
+            # Sector rank / adjustment were resolved for the sector's ETF; the
+            # table may be primed with another spelling of the same sector
+            primed_etf = row['sector_etf'] if isinstance(row['sector_etf'], str) else None
+            if primed_etf != self.enhanced_analyzer.sector_etf(sector):
+                return None
+        try:
+            if int(row['n_bars']) != int(hist_data['Close'].notna().sum()):
+                return None
+            if float(row['last_close']) != float(hist_data['Close'].dropna().iloc[-1]):
+                return None
+        except Exception:
+            return None
         
-        momentum['price_trend'] = 'Uptrend' if ma_50 > ma_200 else 'Downtrend'
-        momentum['ma_50'] = round(ma_50, 2)
-        momentum['ma_200'] = round(ma_200, 2)
-        momentum['trend_score'] = trend_score
-        scores.append(trend_score)
+        def native(value):
+            return value.item() if isinstance(value, np.generic) else value
         
-        # 2. RSI - 14 period (single calculation, not 4 variants!)
-        delta = hist['Close'].diff()
+        keys = (
+            'enhancement_score', 'enhancement_signal', 'bullish_confirmations', 'confirmation_count',
+            'vwap', 'vwap_signal', 'breakout_confirmed',
+            'entry_zone', 'entry_timing', 'entry_score', 'nearest_support', 'nearest_resistance', 'risk_reward_ratio',
+            'rsi_2', 'reversion_signal', 'bounce_probability', 'is_bounce_setup',
+            'recommended_stop', 'stop_loss_pct', 'target_2r', 'volatility_regime', 'position_size_suggestion',
+            'sector_rank', 'sector_tier',
+        )
+        enhanced = {k: native(row[k]) for k in keys}
+        enhanced['bullish_confirmations'] = list(enhanced['bullish_confirmations'])
+        return enhanced
+    
+    # ------------------------------------------------------------------
+    # Raw metric extraction (one flat row per symbol)
+    # ------------------------------------------------------------------
+
+    def _extract_metrics(self, symbol: str, hist: pd.DataFrame, info: Dict,
+                         current_price: Optional[float] = None) -> Dict:
+        """
+        Collect the raw inputs behind the 15 quality metrics as one flat row.
+        Missing values are NaN; score_universe turns the rows into scores.
+        """
+        metrics = {'symbol': symbol}
+        metrics.update(self._fundamental_metrics(info))
+        metrics.update(self._momentum_metrics(hist))
+        metrics.update(self._risk_metrics(hist, info))
+        metrics.update(self._technical_metrics(hist))
+        metrics.update(self._sentiment_metrics(info, current_price=current_price))
+        return metrics
+
+    def _fundamental_metrics(self, info: Dict) -> Dict:
+        """
+        Fundamental inputs (P/E, revenue growth, margins, ROE, debt/equity, EPS growth).
+        Growth/margin/ROE values are converted to percent.
+        """
+        def pct_or_nan(value):
+            return value * 100 if value else np.nan
+
+        pe = info.get('trailingPE', info.get('forwardPE', 0))
+        debt_equity = info.get('debtToEquity', 0)
+        return {
+            'pe_ratio': pe if pe and pe > 0 else np.nan,
+            'revenue_growth': pct_or_nan(info.get('revenueGrowth', 0)),
+            'profit_margin': pct_or_nan(info.get('profitMargins', 0)),
+            'roe': pct_or_nan(info.get('returnOnEquity', 0)),
+            'debt_equity': debt_equity if debt_equity is not None and debt_equity >= 0 else np.nan,
+            'earnings_growth': pct_or_nan(info.get('earningsGrowth', info.get('earningsQuarterlyGrowth', 0))),
+        }
+
+    def _momentum_metrics(self, hist: pd.DataFrame) -> Dict:
+        """
+        Momentum inputs: 50/200 MA trend, RSI(14), volume ratio, 3m/6m relative
+        strength vs SPY and distance from the 52-week high. Needs 200 bars.
+        """
+        metrics = {
+            'ma_50': np.nan, 'ma_200': np.nan, 'price': np.nan, 'rsi': np.nan,
+            'volume_ratio': np.nan, 'relative_strength': np.nan, 'rs_6m': np.nan,
+            'pct_from_52w_high': np.nan,
+        }
+        if hist is None or len(hist) < 200:
+            return metrics
+
+        close = hist['Close']
+        current_price = close.iloc[-1]
+        metrics['ma_50'] = close.rolling(50).mean().iloc[-1]
+        metrics['ma_200'] = close.rolling(200).mean().iloc[-1]
+        metrics['price'] = current_price
+
+        # RSI - 14 period (single calculation, not 4 variants!)
+        delta = close.diff()
         gain = delta.where(delta > 0, 0).rolling(14).mean()
         loss = -delta.where(delta < 0, 0).rolling(14).mean()
         rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        rsi_current = rsi.iloc[-1]
-        
-        # RSI scoring — momentum-friendly (breakout stocks like AMD/NVDA run RSI 65-80)
-        # Old logic penalised RSI>60 — that was systematically filtering OUT the best performers.
-        if 50 <= rsi_current <= 70:
-            rsi_score = 100  # Prime momentum zone — trending up with room to run
-        elif 40 <= rsi_current < 50:
-            rsi_score = 82   # Building momentum
-        elif 70 < rsi_current <= 80:
-            rsi_score = 80   # Strong breakout momentum (was 40 — WRONG!)
-        elif 80 < rsi_current <= 85:
-            rsi_score = 62   # Overextended but still trending
-        elif rsi_current < 30:
-            rsi_score = 70   # Oversold — potential bounce
-        elif rsi_current < 40:
-            rsi_score = 75   # Slightly oversold
-        else:
-            rsi_score = 45   # >85: extremely overbought, caution
-        
-        momentum['rsi'] = round(rsi_current, 2)
-        momentum['rsi_score'] = rsi_score
-        scores.append(rsi_score)
-        
-        # 3. Volume Trend - comparing recent volume to average
+        metrics['rsi'] = (100 - (100 / (1 + rs))).iloc[-1]
+
+        # Volume Trend - comparing recent volume to average
         vol_20 = hist['Volume'].rolling(20).mean().iloc[-1]
         vol_recent = hist['Volume'].iloc[-5:].mean()
-        
-        vol_ratio = vol_recent / vol_20 if vol_20 > 0 else 1
-        
-        if vol_ratio >= 1.5:
-            vol_score = 100  # Strong accumulation
-        elif vol_ratio >= 1.2:
-            vol_score = 85
-        elif vol_ratio >= 0.8:
-            vol_score = 70  # Normal
-        else:
-            vol_score = 50  # Low volume
-        
-        momentum['volume_trend'] = 'High' if vol_ratio >= 1.2 else 'Normal' if vol_ratio >= 0.8 else 'Low'
-        momentum['volume_ratio'] = round(vol_ratio, 2)
-        momentum['volume_score'] = vol_score
-        scores.append(vol_score)
-        
-        # 4. Relative Strength vs SPY (uses cached SPY data - 1 API call instead of 600+)
+        metrics['volume_ratio'] = vol_recent / vol_20 if vol_20 > 0 else 1
+
+        # Relative Strength vs SPY (uses cached SPY data - 1 API call instead of 600+)
         try:
             spy_hist = self._get_spy_hist()
-            
             if spy_hist is not None and not spy_hist.empty and len(spy_hist) > 20:
-                # Calculate 3-month returns
-                stock_return = (hist['Close'].iloc[-1] / hist['Close'].iloc[-63] - 1) * 100 if len(hist) >= 63 else 0
+                stock_return = (current_price / close.iloc[-63] - 1) * 100 if len(hist) >= 63 else 0
                 spy_return = (spy_hist['Close'].iloc[-1] / spy_hist['Close'].iloc[-63] - 1) * 100 if len(spy_hist) >= 63 else 0
-                
-                relative_strength = stock_return - spy_return
-                
-                if relative_strength >= 10:
-                    rs_score = 100  # Significantly outperforming
-                elif relative_strength >= 5:
-                    rs_score = 85
-                elif relative_strength >= 0:
-                    rs_score = 70
-                elif relative_strength >= -5:
-                    rs_score = 50
-                else:
-                    rs_score = 30  # Underperforming
-                
-                momentum['relative_strength'] = round(relative_strength, 2)
-                momentum['relative_strength_score'] = rs_score
-                scores.append(rs_score)
+                metrics['relative_strength'] = stock_return - spy_return
 
-                # 4b. 6-month relative strength (better signal for sustained leaders)
+                # 6-month relative strength (better signal for sustained leaders)
                 if len(spy_hist) > 126 and len(hist) >= 126:
-                    stock_return_6m = (hist['Close'].iloc[-1] / hist['Close'].iloc[-126] - 1) * 100
+                    stock_return_6m = (current_price / close.iloc[-126] - 1) * 100
                     spy_return_6m = (spy_hist['Close'].iloc[-1] / spy_hist['Close'].iloc[-126] - 1) * 100
-                    rs_6m = stock_return_6m - spy_return_6m
-                    if rs_6m >= 20:
-                        rs_6m_score = 100
-                    elif rs_6m >= 10:
-                        rs_6m_score = 85
-                    elif rs_6m >= 0:
-                        rs_6m_score = 70
-                    elif rs_6m >= -10:
-                        rs_6m_score = 50
-                    else:
-                        rs_6m_score = 30
-                    momentum['rs_6m'] = round(rs_6m, 2)
-                    momentum['rs_6m_score'] = rs_6m_score
-                    scores.append(rs_6m_score)
-                else:
-                    momentum['rs_6m'] = None
-            else:
-                momentum['relative_strength'] = None
-                momentum['relative_strength_score'] = 50
-                scores.append(50)
+                    metrics['rs_6m'] = stock_return_6m - spy_return_6m
         except Exception:
-            momentum['relative_strength'] = None
-            momentum['relative_strength_score'] = 50
-            scores.append(50)
+            pass
 
-        # 5. 52-week High Proximity — breakout detection
-        # Stocks near 52w highs are in strong institutional demand and setting up breakouts.
+        # 52-week High Proximity — breakout detection
         try:
             high_52w = hist['High'].rolling(252).max().iloc[-1] if len(hist) >= 252 else hist['High'].max()
-            pct_from_high = ((current_price - high_52w) / high_52w) * 100
-            if pct_from_high >= -3:
-                h52w_score = 100  # At / breaking 52w high — breakout!
-            elif pct_from_high >= -10:
-                h52w_score = 85   # Strong — within 10% of highs
-            elif pct_from_high >= -20:
-                h52w_score = 68   # Moderate recovery
-            elif pct_from_high >= -35:
-                h52w_score = 50   # Below highs
-            else:
-                h52w_score = 30   # Deep below highs — weak
-            momentum['pct_from_52w_high'] = round(pct_from_high, 2)
-            momentum['h52w_score'] = h52w_score
-            scores.append(h52w_score)
+            metrics['pct_from_52w_high'] = ((current_price - high_52w) / high_52w) * 100
         except Exception:
-            momentum['pct_from_52w_high'] = None
-            momentum['h52w_score'] = 50
-            scores.append(50)
-        
-        # Overall momentum score
-        momentum['score'] = np.mean(scores)
-        momentum['grade'] = self._score_to_grade(momentum['score'])
-        
-        return momentum
-    
-    def _calculate_risk(self, hist: pd.DataFrame, info: Dict, momentum_score: float = 0) -> Dict:
+            pass
+
+        return metrics
+
+    def _risk_metrics(self, hist: pd.DataFrame, info: Dict) -> Dict:
         """
-        Calculate 3 risk metrics (20% weight)
-        1. Beta (market volatility) - WITH MOMENTUM FORGIVENESS
-        2. Max Drawdown (downside risk)
-        3. Sharpe Ratio (risk-adjusted returns)
+        Risk inputs: beta, annualized volatility, max drawdown, Sharpe ratio and
+        95% historical VaR (the last three need a full year of returns).
         """
-        risk = {}
-        scores = []
-        
-        # 1. Beta - lower is better for low-risk stocks
-        # BUT: For high momentum stocks, we forgive high beta (it means upside volatility)
         beta = info.get('beta', 1.0)
-        if beta is not None:
-            if beta <= 0.8:
-                beta_score = 100  # Low volatility
-            elif beta <= 1.0:
-                beta_score = 85
-            elif beta <= 1.2:
-                beta_score = 70
-            elif beta <= 1.5:
-                beta_score = 50
-            else:
-                # High Beta zone (> 1.5)
-                # Beta Forgiveness: high beta on a momentum leader = upside volatility, not risk!
-                if momentum_score >= 70:  # lowered from 80 — lets AMD/NVDA class through
-                    beta_score = 65  # Forgiven: reduced penalty
-                else:
-                    beta_score = 30  # High volatility penalty
-        else:
-            beta = 1.0
-            beta_score = 70
-        
-        risk['beta'] = round(beta, 2)
-        risk['beta_score'] = beta_score
-        scores.append(beta_score)
-        
-        returns = hist['Close'].pct_change().dropna()
+        metrics = {
+            'beta': beta if beta is not None else np.nan,
+            'volatility': np.nan, 'max_drawdown': np.nan, 'sharpe_ratio': np.nan, 'var_95': np.nan,
+        }
+        if hist is None or hist.empty:
+            return metrics
 
-        # Annualized volatility (percent)
+        returns = hist['Close'].pct_change().dropna()
         if len(returns) >= 21:
-            annualized_vol = returns.std() * np.sqrt(252) * 100
-            if annualized_vol <= 20:
-                vol_score = 100
-            elif annualized_vol <= 30:
-                vol_score = 85
-            elif annualized_vol <= 40:
-                vol_score = 70
-            elif annualized_vol <= 55:
-                vol_score = 50
-            else:
-                vol_score = 30
-        else:
-            annualized_vol = None
-            vol_score = 50
-
-        risk['volatility'] = round(annualized_vol, 2) if annualized_vol is not None else None
-        scores.append(vol_score)
-
-        # 2. Max Drawdown - lower is better
+            metrics['volatility'] = returns.std() * np.sqrt(252) * 100
         if len(hist) >= 252:
             cumulative = (1 + hist['Close'].pct_change()).cumprod()
             running_max = cumulative.expanding().max()
             drawdown = (cumulative - running_max) / running_max
-            max_drawdown = drawdown.min() * 100
-            
-            if max_drawdown >= -10:
-                dd_score = 100  # Very low drawdown
-            elif max_drawdown >= -15:
-                dd_score = 85
-            elif max_drawdown >= -20:
-                dd_score = 70
-            elif max_drawdown >= -30:
-                dd_score = 50
-            else:
-                dd_score = 30  # High drawdown risk
-        else:
-            max_drawdown = None
-            dd_score = 50
-        
-        risk['max_drawdown'] = round(max_drawdown, 2) if max_drawdown is not None else None
-        risk['drawdown_score'] = dd_score
-        scores.append(dd_score)
-        
-        # 3. Sharpe Ratio - higher is better
+            metrics['max_drawdown'] = drawdown.min() * 100
         if len(returns) >= 252:
-            sharpe = (returns.mean() / returns.std()) * np.sqrt(252) if returns.std() > 0 else 0
-            
-            if sharpe >= 1.5:
-                sharpe_score = 100  # Excellent risk-adjusted returns
-            elif sharpe >= 1.0:
-                sharpe_score = 85
-            elif sharpe >= 0.5:
-                sharpe_score = 70
-            elif sharpe >= 0:
-                sharpe_score = 50
-            else:
-                sharpe_score = 30
-        else:
-            sharpe = None
-            sharpe_score = 50
-        
-        risk['sharpe_ratio'] = round(sharpe, 2) if sharpe else None
-        risk['sharpe_score'] = sharpe_score
-        scores.append(sharpe_score)
+            metrics['sharpe_ratio'] = (returns.mean() / returns.std()) * np.sqrt(252) if returns.std() > 0 else 0
+            metrics['var_95'] = np.percentile(returns, 5) * 100
+        return metrics
 
-        # 4. Historical Value at Risk (95%)
-        if len(returns) >= 252:
-            var_95 = np.percentile(returns, 5) * 100
-            if var_95 >= -5:
-                var_score = 100
-            elif var_95 >= -10:
-                var_score = 85
-            elif var_95 >= -15:
-                var_score = 70
-            elif var_95 >= -20:
-                var_score = 50
-            else:
-                var_score = 30
-        else:
-            var_95 = None
-            var_score = 50
-
-        risk['var_95'] = round(var_95, 2) if var_95 is not None else None
-        scores.append(var_score)
-        
-        # Overall risk score (inverse - lower risk = higher score)
-        risk['score'] = np.mean(scores)
-        risk['grade'] = self._score_to_grade(risk['score'])
-        risk['risk_level'] = 'Low' if risk['score'] >= 75 else 'Medium' if risk['score'] >= 50 else 'High'
-        
-        return risk
-
-    def _calculate_technical(self, hist: pd.DataFrame) -> Dict:
-        """Calculate focused technical metrics (supporting Excel export)"""
+    def _technical_metrics(self, hist: pd.DataFrame) -> Dict:
+        """Technical inputs: MACD(12/26/9), Bollinger(20, 2), 50-day range, MFI(14). Needs 50 bars."""
+        metrics = {
+            'macd': np.nan, 'macd_signal': np.nan, 'bollinger_upper': np.nan, 'bollinger_lower': np.nan,
+            'bollinger_position': np.nan, 'support': np.nan, 'resistance': np.nan,
+            'volume_sma': np.nan, 'mfi': np.nan,
+        }
         if hist is None or hist.empty or len(hist) < 50:
-            return {
-                'score': 50,
-                'grade': 'C',
-                'macd': None,
-                'macd_signal': None,
-                'macd_hist': None,
-                'bollinger_position': None,
-                'bollinger_upper': None,
-                'bollinger_lower': None,
-                'support': None,
-                'resistance': None,
-                'volume_sma': None
-            }
+            return metrics
 
         close = hist['Close']
-
         ema_fast = close.ewm(span=12, adjust=False).mean()
         ema_slow = close.ewm(span=26, adjust=False).mean()
         macd_series = ema_fast - ema_slow
-        macd_signal_series = macd_series.ewm(span=9, adjust=False).mean()
-
-        macd = macd_series.iloc[-1]
-        macd_signal = macd_signal_series.iloc[-1]
-        macd_hist = macd - macd_signal
-        if macd > macd_signal:
-            macd_score = 100 if macd_hist > 0 else 80
-        elif macd_hist > -0.1:
-            macd_score = 60
-        else:
-            macd_score = 40
+        metrics['macd'] = macd_series.iloc[-1]
+        metrics['macd_signal'] = macd_series.ewm(span=9, adjust=False).mean().iloc[-1]
 
         rolling = close.rolling(window=20)
         ma20 = rolling.mean().iloc[-1]
         std20 = rolling.std().iloc[-1]
         upper_band = ma20 + 2 * std20
         lower_band = ma20 - 2 * std20
-        current_price = close.iloc[-1]
         band_range = upper_band - lower_band if upper_band and lower_band else None
         if band_range and band_range != 0:
-            bollinger_position = ((current_price - lower_band) / band_range) * 100
-            # Breakout-friendly scoring: upper band breakout = strong momentum, not overbought penalty
-            if bollinger_position >= 85:
-                bollinger_score = 90  # Upper band breakout — strong bullish momentum
-            elif bollinger_position >= 60:
-                bollinger_score = 100  # Strong upper half — healthy uptrend
-            elif 40 <= bollinger_position < 60:
-                bollinger_score = 82   # Mid-band — stable
-            elif 20 <= bollinger_position < 40:
-                bollinger_score = 65   # Lower half — weak
-            else:
-                bollinger_score = 52   # Near lower band — possible bounce or downtrend
-        else:
-            bollinger_position = None
-            bollinger_score = 60
+            metrics['bollinger_position'] = ((close.iloc[-1] - lower_band) / band_range) * 100
+        metrics['bollinger_upper'] = upper_band
+        metrics['bollinger_lower'] = lower_band
 
-        support = close.rolling(window=50).min().iloc[-1]
-        resistance = close.rolling(window=50).max().iloc[-1]
-        volume_sma = hist['Volume'].rolling(window=20).mean().iloc[-1]
+        metrics['support'] = close.rolling(window=50).min().iloc[-1]
+        metrics['resistance'] = close.rolling(window=50).max().iloc[-1]
+        metrics['volume_sma'] = hist['Volume'].rolling(window=20).mean().iloc[-1]
 
         # Money Flow Index (MFI) - volume-weighted RSI for better accuracy (no extra API call)
-        mfi_value = None
-        mfi_score = 60  # neutral default
         try:
-            if len(hist) >= 20 and 'High' in hist.columns and 'Low' in hist.columns and 'Volume' in hist.columns:
-                typical_price = (hist['High'] + hist['Low'] + hist['Close']) / 3
+            if 'High' in hist.columns and 'Low' in hist.columns and 'Volume' in hist.columns:
+                typical_price = (hist['High'] + hist['Low'] + close) / 3
                 money_flow = typical_price * hist['Volume']
                 tp_diff = typical_price.diff()
                 positive_flow = money_flow.where(tp_diff > 0, 0).rolling(14).sum()
                 negative_flow = money_flow.where(tp_diff < 0, 0).rolling(14).sum()
                 mfi_ratio = positive_flow / negative_flow.replace(0, np.nan)
-                mfi_series = 100 - (100 / (1 + mfi_ratio))
-                mfi_value = float(mfi_series.iloc[-1])
-                if not np.isnan(mfi_value):
-                    # MFI interpretation: <20 oversold (buy), >80 overbought (sell), 40-60 ideal
-                    if 40 <= mfi_value <= 60:
-                        mfi_score = 100  # Ideal zone
-                    elif 20 <= mfi_value < 40 or 60 < mfi_value <= 80:
-                        mfi_score = 75
-                    elif mfi_value < 20:
-                        mfi_score = 70  # Oversold - potential buy
-                    else:
-                        mfi_score = 40  # Overbought
-                else:
-                    mfi_value = None
+                metrics['mfi'] = float((100 - (100 / (1 + mfi_ratio))).iloc[-1])
         except Exception:
             pass
 
-        technical_score = np.mean([macd_score, bollinger_score, mfi_score])
-        technical_grade = self._score_to_grade(technical_score)
-
-        def safe_round(value, digits=2):
-            if value is None or (isinstance(value, float) and np.isnan(value)):
-                return None
-            return round(float(value), digits)
+        return metrics
 
-        return {
-            'score': technical_score,
-            'grade': technical_grade,
-            'macd': safe_round(macd, 4),
-            'macd_signal': safe_round(macd_signal, 4),
-            'macd_hist': safe_round(macd_hist, 4),
-            'bollinger_position': safe_round(bollinger_position, 2) if bollinger_position is not None else None,
-            'bollinger_upper': safe_round(upper_band, 2),
-            'bollinger_lower': safe_round(lower_band, 2),
-            'support': safe_round(support, 2),
-            'resistance': safe_round(resistance, 2),
-            'volume_sma': safe_round(volume_sma, 0),
-            'mfi': safe_round(mfi_value, 2) if mfi_value is not None else None,
-            'mfi_signal': 'OVERSOLD' if mfi_value and mfi_value < 20 else 'OVERBOUGHT' if mfi_value and mfi_value > 80 else 'NEUTRAL'
-        }
-    
-    def _calculate_sentiment(self, info: Dict, current_price: Optional[float] = None) -> Dict:
-        """
-        Calculate 3 sentiment metrics (10% weight)
-        1. Institutional Ownership Trend
-        2. Analyst Ratings Consensus
-        3. Recommendation Strength
-        """
-        sentiment = {}
-        scores = []
-        
-        # 1. Institutional Ownership (higher is better for quality stocks)
+    def _sentiment_metrics(self, info: Dict, current_price: Optional[float] = None) -> Dict:
+        """Sentiment inputs: institutional ownership (%), analyst consensus, target price upside (%)."""
         inst_ownership = info.get('institutionalOwnership', info.get('heldPercentInstitutions', 0))
-        if inst_ownership:
-            inst_pct = inst_ownership * 100 if inst_ownership < 1 else inst_ownership
-            if inst_pct >= 70:
-                inst_score = 100  # Strong institutional confidence
-            elif inst_pct >= 50:
-                inst_score = 85
-            elif inst_pct >= 30:
-                inst_score = 70
-            else:
-                inst_score = 50
-        else:
-            inst_pct = None
-            inst_score = 50
-        
-        sentiment['institutional_ownership'] = round(inst_pct, 2) if inst_pct else None
-        sentiment['institutional_score'] = inst_score
-        scores.append(inst_score)
-        
-        # 2. Analyst Ratings
+        inst_pct = (inst_ownership * 100 if inst_ownership < 1 else inst_ownership) if inst_ownership else np.nan
+
+        # recommendationKey ('buy', 'hold', ...) or recommendationMean (1 strong buy .. 5 sell)
         recommendation = info.get('recommendationKey', info.get('recommendationMean', 'hold'))
+        numeric_rec = isinstance(recommendation, (int, float))
+
         target_price = info.get('targetMeanPrice', 0)
         if not current_price:
             current_price = info.get('currentPrice', 0)
-        
-        # Map recommendation to score
-        rec_map = {
-            'strong_buy': 100,
-            'buy': 85,
-            'hold': 50,
-            'sell': 30,
-            'strong_sell': 10
-        }
-        if isinstance(recommendation, (int, float)):
-            # recommendationMean scale: 1 (strong buy) to 5 (sell)
-            if recommendation <= 1.5:
-                analyst_score = 100
-            elif recommendation <= 2.0:
-                analyst_score = 85
-            elif recommendation <= 3.0:
-                analyst_score = 70
-            elif recommendation <= 4.0:
-                analyst_score = 50
-            else:
-                analyst_score = 30
-            sentiment['analyst_rating'] = f"mean_{recommendation:.1f}"
-        else:
-            sentiment['analyst_rating'] = str(recommendation).upper()
-            analyst_score = rec_map.get(str(recommendation).lower(), 50)
-        
-        sentiment['analyst_score'] = analyst_score
-        scores.append(analyst_score)
-        
-        # 3. Target Price Upside
         if target_price and current_price and target_price > 0 and current_price > 0:
             upside = ((target_price - current_price) / current_price) * 100
-            
-            if upside >= 20:
-                upside_score = 100
-            elif upside >= 10:
-                upside_score = 85
-            elif upside >= 5:
-                upside_score = 70
-            elif upside >= 0:
-                upside_score = 50
-            else:
-                upside_score = 30
         else:
-            upside = None
-            upside_score = 50
-        
-        sentiment['target_upside'] = round(upside, 2) if upside else None
-        sentiment['upside_score'] = upside_score
-        scores.append(upside_score)
-        
-        # Overall sentiment score
-        sentiment['score'] = np.mean(scores)
-        sentiment['grade'] = self._score_to_grade(sentiment['score'])
-        
-        return sentiment
-    
-    def _determine_recommendation(self, quality_score: float, fundamentals: Dict, 
-                                  momentum: Dict, risk: Dict, sentiment: Dict) -> Tuple[str, float]:
+            upside = np.nan
+
+        return {
+            'institutional_ownership': inst_pct,
+            'analyst_mean': recommendation if numeric_rec else np.nan,
+            'analyst_key': None if numeric_rec else str(recommendation),
+            'target_upside': upside,
+        }
+
+    # ------------------------------------------------------------------
+    # Vectorized scoring
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _ladder(values: np.ndarray, edges: List[float], scores: List[float], default: float,
+                missing: float = 50, higher_is_better: bool = True) -> np.ndarray:
+        """Bucket values against descending (>=) or ascending (<=) edges; NaN -> missing."""
+        if higher_is_better:
+            conditions = [values >= edge for edge in edges]
+        else:
+            conditions = [values <= edge for edge in edges]
+        out = np.select(conditions, scores, default).astype(float)
+        return np.where(np.isnan(values), missing, out)
+
+    @staticmethod
+    def _grades(scores: np.ndarray) -> np.ndarray:
+        """Vectorized _score_to_grade."""
+        return np.select(
+            [scores >= 90, scores >= 85, scores >= 80, scores >= 75, scores >= 70,
+             scores >= 65, scores >= 60, scores >= 55, scores >= 50],
+            ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-'],
+            'D'
+        )
+
+    def score_universe(self, metrics: pd.DataFrame) -> pd.DataFrame:
         """
-        Determine stock recommendation based on quality score and individual components
-        
-        Returns: (recommendation, confidence)
+        Score a metrics table (one row per symbol, as produced by _extract_metrics)
+        in one vectorized pass.
+
+        Optional columns: 'enhancement_score' (enhanced signals adjustment, +/- 10)
+        and 'earnings_imminent' (-5 penalty).
+
+        Returns:
+            The metrics table plus every sub-score, component score/grade,
+            risk_level, quality_score, recommendation and confidence.
         """
-        # Base recommendation on quality score
-        if quality_score >= 80:
-            base_rec = 'STRONG BUY'
-            base_conf = 0.90
-        elif quality_score >= 70:
-            base_rec = 'BUY'
-            base_conf = 0.80
-        elif quality_score >= 60:
-            base_rec = 'WEAK BUY'
-            base_conf = 0.70
-        elif quality_score >= 50:
-            base_rec = 'HOLD'
-            base_conf = 0.60
-        else:
-            base_rec = 'AVOID'
-            base_conf = 0.50
-        
-        # Adjust confidence based on consistency across metrics
-        scores = [fundamentals['score'], momentum['score'], risk['score'], sentiment['score']]
-        score_std = np.std(scores)
-        
+        table = metrics.copy().reset_index(drop=True)
+        for col in METRIC_COLUMNS:
+            if col not in table.columns:
+                table[col] = np.nan
+
+        def col(name):
+            return pd.to_numeric(table[name], errors='coerce').to_numpy(dtype=float)
+
+        ladder = self._ladder
+
+        # Fundamentals ------------------------------------------------------
+        pe = col('pe_ratio')
+        pe_score = np.select(
+            [(pe >= 15) & (pe <= 30),
+             ((pe >= 10) & (pe < 15)) | ((pe > 30) & (pe <= 45)),
+             ((pe >= 5) & (pe < 10)) | ((pe > 45) & (pe <= 70)),
+             pe > 70],
+            [100, 80, 65, 50], 40
+        ).astype(float)
+        pe_score = np.where(np.isnan(pe), 50, pe_score)
+
+        rev = col('revenue_growth')
+        eg = col('earnings_growth')
+        rev_score = ladder(rev, [50, 30, 20, 10, 5, 0], [100, 95, 88, 78, 65, 50], 30)
+        margin_score = ladder(col('profit_margin'), [20, 15, 10, 5], [100, 85, 70, 50], 30)
+        roe_score = ladder(col('roe'), [20, 15, 10, 5], [100, 85, 70, 50], 30)
+        de_score = ladder(col('debt_equity'), [30, 50, 100, 150], [100, 85, 70, 50], 30, higher_is_better=False)
+        eg_score = ladder(eg, [50, 30, 15, 5, 0], [100, 90, 78, 62, 50], 30)
+
+        # PEG Correction: forgive high P/E when backed by strong revenue/earnings growth.
+        # A stock growing revenue 40%+ with P/E of 60 is cheaper than a 5%-grower at P/E 20.
+        growth_rate = np.maximum.reduce([np.nan_to_num(rev), np.nan_to_num(np.round(eg, 2)), np.ones(len(table))])
+        peg_applies = pe > 30
+        peg = np.where(peg_applies, pe / growth_rate, np.nan)
+        peg_floor = np.select([peg <= 1.0, peg <= 1.5, peg <= 2.5], [90, 80, 70], 0)
+        pe_score = np.where(peg_applies, np.maximum(pe_score, peg_floor), pe_score)
+
+        fundamentals_score = np.mean([pe_score, rev_score, margin_score, roe_score, de_score, eg_score], axis=0)
+
+        table['pe_score'] = pe_score
+        table['revenue_growth_score'] = rev_score
+        table['margin_score'] = margin_score
+        table['roe_score'] = roe_score
+        table['debt_equity_score'] = de_score
+        table['earnings_growth_score'] = eg_score
+        table['peg_ratio'] = peg
+
+        # Momentum ----------------------------------------------------------
+        ma_50, ma_200, price = col('ma_50'), col('ma_200'), col('price')
+        momentum_ok = ~np.isnan(ma_200)
+        golden = ma_50 > ma_200
+        above_50 = price > ma_50
+        trend_score = np.select([golden & above_50, golden, above_50], [100, 70, 60], 30).astype(float)
+
+        # RSI scoring — momentum-friendly (breakout stocks like AMD/NVDA run RSI 65-80)
+        rsi = col('rsi')
+        rsi_score = np.select(
+            [(rsi >= 50) & (rsi <= 70), (rsi >= 40) & (rsi < 50), (rsi > 70) & (rsi <= 80),
+             (rsi > 80) & (rsi <= 85), rsi < 30, rsi < 40],
+            [100, 82, 80, 62, 70, 75], 45
+        ).astype(float)
+        volume_score = ladder(col('volume_ratio'), [1.5, 1.2, 0.8], [100, 85, 70], 50)
+        rs_score = ladder(col('relative_strength'), [10, 5, 0, -5], [100, 85, 70, 50], 30)
+        # 6-month RS only counts toward the average when available
+        rs_6m_score = ladder(col('rs_6m'), [20, 10, 0, -10], [100, 85, 70, 50], 30, missing=np.nan)
+        h52w_score = ladder(col('pct_from_52w_high'), [-3, -10, -20, -35], [100, 85, 68, 50], 30)
+
+        momentum_parts = np.vstack([trend_score, rsi_score, volume_score, rs_score, rs_6m_score, h52w_score])
+        momentum_score = np.nansum(momentum_parts, axis=0) / np.sum(~np.isnan(momentum_parts), axis=0)
+        momentum_score = np.where(momentum_ok, momentum_score, 50.0)
+
+        for name, values in (('trend_score', trend_score), ('rsi_score', rsi_score),
+                             ('volume_score', volume_score), ('relative_strength_score', rs_score),
+                             ('rs_6m_score', rs_6m_score), ('h52w_score', h52w_score)):
+            table[name] = np.where(momentum_ok, values, np.nan)
+
+        # Risk --------------------------------------------------------------
+        # Beta Forgiveness: high beta on a momentum leader = upside volatility, not risk!
+        beta = col('beta')
+        beta_score = ladder(beta, [0.8, 1.0, 1.2, 1.5], [100, 85, 70, 50], 30, missing=70, higher_is_better=False)
+        beta_score = np.where((beta > 1.5) & (momentum_score >= 70), 65, beta_score)
+        volatility_score = ladder(col('volatility'), [20, 30, 40, 55], [100, 85, 70, 50], 30, higher_is_better=False)
+        drawdown_score = ladder(col('max_drawdown'), [-10, -15, -20, -30], [100, 85, 70, 50], 30)
+        sharpe_score = ladder(col('sharpe_ratio'), [1.5, 1.0, 0.5, 0], [100, 85, 70, 50], 30)
+        var_score = ladder(col('var_95'), [-5, -10, -15, -20], [100, 85, 70, 50], 30)
+
+        risk_score = np.mean([beta_score, volatility_score, drawdown_score, sharpe_score, var_score], axis=0)
+
+        table['beta_score'] = beta_score
+        table['volatility_score'] = volatility_score
+        table['drawdown_score'] = drawdown_score
+        table['sharpe_score'] = sharpe_score
+        table['var_score'] = var_score
+
+        # Technical ---------------------------------------------------------
+        macd, macd_signal = col('macd'), col('macd_signal')
+        technical_ok = ~np.isnan(macd)
+        macd_hist = macd - macd_signal
+        macd_score = np.select(
+            [(macd > macd_signal) & (macd_hist > 0), macd > macd_signal, macd_hist > -0.1],
+            [100, 80, 60], 40
+        ).astype(float)
+        # Breakout-friendly scoring: upper band breakout = strong momentum, not overbought penalty
+        bb_pos = col('bollinger_position')
+        bollinger_score = np.select(
+            [bb_pos >= 85, bb_pos >= 60, (bb_pos >= 40) & (bb_pos < 60), (bb_pos >= 20) & (bb_pos < 40)],
+            [90, 100, 82, 65], 52
+        ).astype(float)
+        bollinger_score = np.where(np.isnan(bb_pos), 60, bollinger_score)
+        # MFI interpretation: <20 oversold (buy), >80 overbought (sell), 40-60 ideal
+        mfi = col('mfi')
+        mfi_score = np.select(
+            [(mfi >= 40) & (mfi <= 60), ((mfi >= 20) & (mfi < 40)) | ((mfi > 60) & (mfi <= 80)), mfi < 20],
+            [100, 75, 70], 40
+        ).astype(float)
+        mfi_score = np.where(np.isnan(mfi), 60, mfi_score)
+
+        technical_score = np.mean([macd_score, bollinger_score, mfi_score], axis=0)
+        technical_score = np.where(technical_ok, technical_score, 50.0)
+
+        table['macd_hist'] = macd_hist
+        table['macd_score'] = np.where(technical_ok, macd_score, np.nan)
+        table['bollinger_score'] = np.where(technical_ok, bollinger_score, np.nan)
+        table['mfi_score'] = np.where(technical_ok, mfi_score, np.nan)
+
+        # Sentiment ---------------------------------------------------------
+        institutional_score = ladder(col('institutional_ownership'), [70, 50, 30], [100, 85, 70], 50)
+        rec_map = {'strong_buy': 100, 'buy': 85, 'hold': 50, 'sell': 30, 'strong_sell': 10}
+        analyst_mean = col('analyst_mean')
+        key_score = table['analyst_key'].map(
+            lambda k: rec_map.get(str(k).lower(), 50) if k is not None and k == k else 50
+        ).to_numpy(dtype=float)
+        analyst_score = np.where(
+            np.isnan(analyst_mean), key_score,
+            ladder(analyst_mean, [1.5, 2.0, 3.0, 4.0], [100, 85, 70, 50], 30, higher_is_better=False)
+        )
+        upside_score = ladder(col('target_upside'), [20, 10, 5, 0], [100, 85, 70, 50], 30)
+
+        sentiment_score = np.mean([institutional_score, analyst_score, upside_score], axis=0)
+
+        table['institutional_score'] = institutional_score
+        table['analyst_score'] = analyst_score
+        table['upside_score'] = upside_score
+
+        # Components --------------------------------------------------------
+        table['fundamentals_score'] = fundamentals_score
+        table['fundamentals_grade'] = self._grades(fundamentals_score)
+        table['momentum_score'] = momentum_score
+        table['momentum_grade'] = np.where(momentum_ok, self._grades(momentum_score), 'C')
+        table['risk_score'] = risk_score
+        table['risk_grade'] = self._grades(risk_score)
+        table['risk_level'] = np.select([risk_score >= 75, risk_score >= 50], ['Low', 'Medium'], 'High')
+        table['technical_score'] = technical_score
+        table['technical_grade'] = np.where(technical_ok, self._grades(technical_score), 'C')
+        table['sentiment_score'] = sentiment_score
+        table['sentiment_grade'] = self._grades(sentiment_score)
+
+        # Quality score -----------------------------------------------------
+        quality = (
+            fundamentals_score * self.quality_weights['fundamentals'] +
+            momentum_score * self.quality_weights['momentum'] +
+            risk_score * self.quality_weights['risk'] +
+            sentiment_score * self.quality_weights['sentiment']
+        )
+        if 'enhancement_score' in table.columns:
+            enhancement = col('enhancement_score')
+            adjusted = np.minimum(100, np.maximum(0, quality + (enhancement - 50) / 5))  # -10 to +10
+            quality = np.where(np.isnan(enhancement), quality, adjusted)
+        if 'earnings_imminent' in table.columns:
+            # Reduce confidence when earnings are within 7 days (high volatility risk)
+            imminent = table['earnings_imminent'].fillna(False).astype(bool).to_numpy()
+            quality = np.where(imminent, np.maximum(0, quality - 5), quality)
+
+        recommendation, confidence = self._recommendations(
+            quality, np.vstack([fundamentals_score, momentum_score, risk_score, sentiment_score]), risk_score
+        )
+        table['quality_score'] = np.round(quality, 2)
+        table['recommendation'] = recommendation
+        table['confidence'] = np.round(confidence, 2)
+        return table
+
+    def _recommendations(self, quality_score: np.ndarray, component_scores: np.ndarray,
+                         risk_score: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recommendation and confidence from quality score and component agreement.
+        component_scores is a (4, n) array of fundamentals/momentum/risk/sentiment scores.
+        """
+        tiers = [quality_score >= 80, quality_score >= 70, quality_score >= 60, quality_score >= 50]
+        base_rec = np.select(tiers, ['STRONG BUY', 'BUY', 'WEAK BUY', 'HOLD'], 'AVOID')
+        base_conf = np.select(tiers, [0.90, 0.80, 0.70, 0.60], 0.50)
+
         # Lower std = higher confidence (metrics agree)
-        if score_std < 10:
-            confidence = min(0.95, base_conf + 0.10)
-        elif score_std < 15:
-            confidence = base_conf
-        else:
-            confidence = max(0.50, base_conf - 0.10)
-        
+        score_std = np.std(component_scores, axis=0)
+        confidence = np.select(
+            [score_std < 10, score_std < 15],
+            [np.minimum(0.95, base_conf + 0.10), base_conf],
+            np.maximum(0.50, base_conf - 0.10)
+        )
+
         # Downgrade if risk is high
-        if risk['risk_level'] == 'High' and base_rec in ['STRONG BUY', 'BUY']:
-            base_rec = 'WEAK BUY' if base_rec == 'BUY' else 'BUY'
-            confidence *= 0.9
-        
-        return base_rec, confidence
+        downgrade = (risk_score < 50) & np.isin(base_rec, ['STRONG BUY', 'BUY'])
+        recommendation = np.where(downgrade, np.where(base_rec == 'BUY', 'WEAK BUY', 'BUY'), base_rec)
+        confidence = np.where(downgrade, confidence * 0.9, confidence)
+        return recommendation, confidence
+
+    def _component_views(self, row: pd.Series) -> Tuple[Dict, Dict, Dict, Dict, Dict]:
+        """Nested fundamentals/momentum/risk/technical/sentiment dicts for one scored row."""
+        def val(name, digits=None, falsy_none=False):
+            value = row.get(name)
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                return None
+            if falsy_none and not value:
+                return None
+            return round(value, digits) if digits is not None else value
+
+        fundamentals = {
+            'pe_ratio': val('pe_ratio'),
+            'pe_score': row['pe_score'],
+            'revenue_growth': val('revenue_growth'),
+            'revenue_growth_score': row['revenue_growth_score'],
+            'profit_margin': val('profit_margin'),
+            'margin_score': row['margin_score'],
+            'roe': val('roe'),
+            'roe_score': row['roe_score'],
+            'debt_equity': val('debt_equity'),
+            'debt_equity_score': row['debt_equity_score'],
+            'earnings_growth': val('earnings_growth', 2),
+            'earnings_growth_score': row['earnings_growth_score'],
+            'peg_ratio': val('peg_ratio', 2),
+            'score': row['fundamentals_score'],
+            'grade': row['fundamentals_grade'],
+        }
+
+        if val('ma_200') is None:
+            # Not enough data
+            momentum = {
+                'score': row['momentum_score'],
+                'grade': row['momentum_grade'],
+                'price_trend': None,
+                'rsi': None,
+                'volume_trend': None,
+                'relative_strength': None
+            }
+        else:
+            vol_ratio = row['volume_ratio']
+            momentum = {
+                'price_trend': 'Uptrend' if row['ma_50'] > row['ma_200'] else 'Downtrend',
+                'ma_50': val('ma_50', 2),
+                'ma_200': val('ma_200', 2),
+                'trend_score': row['trend_score'],
+                'rsi': round(row['rsi'], 2),
+                'rsi_score': row['rsi_score'],
+                'volume_trend': 'High' if vol_ratio >= 1.2 else 'Normal' if vol_ratio >= 0.8 else 'Low',
+                'volume_ratio': round(vol_ratio, 2),
+                'volume_score': row['volume_score'],
+                'relative_strength': val('relative_strength', 2),
+                'relative_strength_score': row['relative_strength_score'],
+                'rs_6m': val('rs_6m', 2),
+                'rs_6m_score': val('rs_6m_score'),
+                'pct_from_52w_high': val('pct_from_52w_high', 2),
+                'h52w_score': row['h52w_score'],
+                'score': row['momentum_score'],
+                'grade': row['momentum_grade'],
+            }
+
+        beta = val('beta')
+        risk = {
+            'beta': round(beta if beta is not None else 1.0, 2),
+            'beta_score': row['beta_score'],
+            'volatility': val('volatility', 2),
+            'max_drawdown': val('max_drawdown', 2),
+            'drawdown_score': row['drawdown_score'],
+            'sharpe_ratio': val('sharpe_ratio', 2, falsy_none=True),
+            'sharpe_score': row['sharpe_score'],
+            'var_95': val('var_95', 2),
+            'score': row['risk_score'],
+            'grade': row['risk_grade'],
+            'risk_level': row['risk_level'],
+        }
+
+        def safe_round(name, digits=2):
+            value = val(name)
+            return round(float(value), digits) if value is not None else None
+
+        if val('macd') is None:
+            technical = {
+                'score': row['technical_score'],
+                'grade': row['technical_grade'],
+                'macd': None,
+                'macd_signal': None,
+                'macd_hist': None,
+                'bollinger_position': None,
+                'bollinger_upper': None,
+                'bollinger_lower': None,
+                'support': None,
+                'resistance': None,
+                'volume_sma': None
+            }
+        else:
+            mfi_value = val('mfi')
+            technical = {
+                'score': row['technical_score'],
+                'grade': row['technical_grade'],
+                'macd': safe_round('macd', 4),
+                'macd_signal': safe_round('macd_signal', 4),
+                'macd_hist': safe_round('macd_hist', 4),
+                'bollinger_position': safe_round('bollinger_position', 2),
+                'bollinger_upper': safe_round('bollinger_upper', 2),
+                'bollinger_lower': safe_round('bollinger_lower', 2),
+                'support': safe_round('support', 2),
+                'resistance': safe_round('resistance', 2),
+                'volume_sma': safe_round('volume_sma', 0),
+                'mfi': safe_round('mfi', 2),
+                'mfi_signal': 'OVERSOLD' if mfi_value and mfi_value < 20 else 'OVERBOUGHT' if mfi_value and mfi_value > 80 else 'NEUTRAL'
+            }
+
+        analyst_mean = val('analyst_mean')
+        sentiment = {
+            'institutional_ownership': val('institutional_ownership', 2, falsy_none=True),
+            'institutional_score': row['institutional_score'],
+            'analyst_rating': f"mean_{analyst_mean:.1f}" if analyst_mean is not None else str(row.get('analyst_key')).upper(),
+            'analyst_score': row['analyst_score'],
+            'target_upside': val('target_upside', 2, falsy_none=True),
+            'upside_score': row['upside_score'],
+            'score': row['sentiment_score'],
+            'grade': row['sentiment_grade'],
+        }
+
+        return fundamentals, momentum, risk, technical, sentiment
     
     def _score_to_grade(self, score: float) -> str:
         """Convert numerical score to letter grade"""
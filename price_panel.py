@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Price Panel Utilities
+Aligns per-symbol OHLCV histories into date x symbol panels
+
+Used for cross-sectional work that should not loop over symbols:
+- Internal market breadth (every date, not just the last bar)
+- Universe-wide signal batches
+
+Histories from different sources (yfinance tz-aware, Stooq naive) are
+normalized to tz-naive daily dates before alignment.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+
+PANEL_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+def _normalize_index(df: pd.DataFrame) -> pd.DataFrame:
+    """Return df with a tz-naive, de-duplicated, sorted daily DatetimeIndex."""
+    idx = pd.DatetimeIndex(df.index)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    idx = idx.normalize()
+    out = df.copy(deep=False)
+    out.index = idx
+    if not out.index.is_monotonic_increasing:
+        out = out.sort_index()
+    if out.index.has_duplicates:
+        out = out[~out.index.duplicated(keep='last')]
+    return out
+
+
+def build_price_panel(hist_map: Dict[str, pd.DataFrame],
+                      symbols: Optional[Sequence[str]] = None,
+                      fields: Sequence[str] = PANEL_FIELDS) -> Dict[str, pd.DataFrame]:
+    """
+    Align histories into one DataFrame per field (rows = dates, columns = symbols).
+
+    Args:
+        hist_map: symbol -> OHLCV DataFrame
+        symbols: Optional subset/order of symbols (defaults to hist_map order)
+        fields: OHLCV columns to extract
+
+    Returns:
+        Dict of field -> panel. Symbols without usable history are dropped;
+        dates a symbol did not trade are NaN.
+    """
+    if symbols is None:
+        symbols = list(hist_map.keys())
+
+    frames: Dict[str, pd.DataFrame] = {}
+    for s in symbols:
+        df = hist_map.get(s)
+        if not isinstance(df, pd.DataFrame) or df.empty:
+            continue
+        if not set(fields).issubset(df.columns):
+            continue
+        try:
+            frames[s] = _normalize_index(df[list(fields)])
+        except Exception:
+            continue
+
+    if not frames:
+        return {f: pd.DataFrame(dtype=float) for f in fields}
+
+    panel = pd.concat(frames, axis=1, sort=True)
+    return {
+        f: panel.xs(f, axis=1, level=1).astype(float)
+        for f in fields
+    }
+
+
+def symbols_in_panel(panel: Dict[str, pd.DataFrame]) -> List[str]:
+    """Symbols (columns) present in a panel built by build_price_panel."""
+    for df in panel.values():
+        return list(df.columns)
+    return []
+
+
+def panel_history(panel: Dict[str, pd.DataFrame], symbol: str) -> Optional[pd.DataFrame]:
+    """Rebuild a single-symbol OHLCV DataFrame (trading days only) from a panel."""
+    try:
+        df = pd.DataFrame({f: p[symbol] for f, p in panel.items()})
+        df = df[df['Close'].notna()] if 'Close' in df.columns else df.dropna(how='all')
+        return df if not df.empty else None
+    except Exception:
+        return None
+
+
+def align_right(panel: Dict[str, pd.DataFrame],
+                fields: Optional[Sequence[str]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Pack each symbol's trading days against the last row of the panel.
+
+    Row -1 is every symbol's own latest bar, row -k its k-th latest bar, and
+    rows before a symbol's first bar are NaN. Column-wise rolling/ewm/shift
+    on the result therefore match the same operations on each symbol's own
+    history (holes from date alignment are squeezed out).
+
+    Returns:
+        Dict of field -> DataFrame with a positional RangeIndex and the
+        panel's symbol columns.
+    """
+    fields = list(fields or panel.keys())
+    close = panel['Close']
+    valid = close.notna().to_numpy()
+    # Stable sort puts missing rows first and keeps bar order for the rest
+    order = np.argsort(valid, axis=0, kind='stable')
+    n_bars = valid.sum(axis=0)
+    empty_rows = np.arange(len(close))[:, None] < (len(close) - n_bars)[None, :]
+
+    aligned = {}
+    for f in fields:
+        values = np.take_along_axis(panel[f].to_numpy(dtype=float), order, axis=0)
+        values[empty_rows] = np.nan
+        aligned[f] = pd.DataFrame(values, columns=close.columns)
+    return aligned
+
+
+def aligned_dates(panel: Dict[str, pd.DataFrame]) -> np.ndarray:
+    """
+    Trading date of every cell of align_right(panel) (rows x symbols, NaT before a symbol's first bar).
+    """
+    close = panel['Close']
+    valid = close.notna().to_numpy()
+    order = np.argsort(valid, axis=0, kind='stable')
+    n_bars = valid.sum(axis=0)
+    empty_rows = np.arange(len(close))[:, None] < (len(close) - n_bars)[None, :]
+
+    dates = np.asarray(pd.DatetimeIndex(close.index).values)[order]
+    dates[empty_rows] = np.datetime64('NaT')
+    return dates
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Process-Pool Analysis
+CPU-bound per-symbol analysis in worker processes over a shared-memory price panel
+
+Indicator math, analyze_stock scoring and enhanced signals are pure Python /
+pandas work that a thread pool serializes on the GIL. In process mode:
+- The run's histories are copied once into a SharedPricePanel (one shared
+  memory block, fields x dates x symbols float64)
+- Each worker attaches to the block and rebuilds its analyzer once (models,
+  SPY history, sector momentum and breadth are handed over at start-up, so
+  workers make no extra market-data calls)
+- A task ships only the symbol (plus its small info dict); the worker reads
+  the history straight from shared memory and returns a compact record
+  (StockResult for the premium analyzer)
+
+Workers are started with 'spawn' so a pool can be created safely from a
+process that already runs fetch/stage threads.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from price_panel import PANEL_FIELDS, build_price_panel
+
+
+class SharedPricePanel:
+    """Date x symbol OHLCV panel stored in one shared-memory block"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, spec: Dict, owner: bool):
+        self.shm = shm
+        self.spec = spec
+        self.owner = owner
+        self.fields = tuple(spec['fields'])
+        self._close = self.fields.index('Close')
+        self.symbols = list(spec['symbols'])
+        self.columns = {s: i for i, s in enumerate(self.symbols)}
+        self.dates = pd.DatetimeIndex(np.asarray(spec['dates'], dtype='datetime64[ns]'))
+        self.values = np.ndarray(tuple(spec['shape']), dtype=np.float64, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, hist_map: Dict[str, pd.DataFrame], symbols: Optional[Sequence[str]] = None,
+               fields: Sequence[str] = PANEL_FIELDS) -> Optional['SharedPricePanel']:
+        """
+        Align histories (see price_panel.build_price_panel) and copy them into shared memory.
+        fields must include 'Close': its non-NaN entries mark the dates a symbol traded.
+        """
+        if 'Close' not in fields:
+            raise ValueError("SharedPricePanel needs the 'Close' field")
+        panel = build_price_panel(hist_map, symbols, fields=fields)
+        if not panel or panel[fields[0]].empty:
+            return None
+        close = panel[fields[0]]
+        shape = (len(fields), len(close.index), len(close.columns))
+        shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+        spec = {
+            'name': shm.name,
+            'shape': shape,
+            'fields': tuple(fields),
+            'symbols': list(close.columns),
+            'dates': close.index.values.astype('datetime64[ns]'),
+        }
+        shared = cls(shm, spec, owner=True)
+        for k, field in enumerate(fields):
+            shared.values[k] = panel[field].to_numpy(dtype=np.float64)
+        return shared
+
+    @classmethod
+    def attach(cls, spec: Dict) -> 'SharedPricePanel':
+        return cls(shared_memory.SharedMemory(name=spec['name']), spec, owner=False)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self.columns
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def history(self, symbol: str) -> Optional[pd.DataFrame]:
+        """One symbol's OHLCV history (dates it traded only), copied out of shared memory."""
+        j = self.columns.get(symbol)
+        if j is None:
+            return None
+        block = self.values[:, :, j]
+        traded = ~np.isnan(block[self._close])
+        if not traded.any():
+            return None
+        return pd.DataFrame({field: block[k, traded].copy() for k, field in enumerate(self.fields)},
+                            index=self.dates[traded])
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def close(self):
+        """Detach (and free the block when this process created it)."""
+        self.values = None
+        try:
+            self.shm.close()
+        except Exception:
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ----------------------------------------------------------------------
+# Worker side (module globals live once per worker process)
+# ----------------------------------------------------------------------
+
+_PANEL: Optional[SharedPricePanel] = None
+_ANALYZER = None
+_KIND = None
+
+
+def _init_worker(spec: Dict, kind: str, state: Dict):
+    global _PANEL, _ANALYZER, _KIND
+    _PANEL = SharedPricePanel.attach(spec)
+    _KIND = kind
+    if kind == 'premium':
+        from premium_stock_analyzer import PremiumStockAnalyzer
+        analyzer = PremiumStockAnalyzer(data_mode=state.get('data_mode', 'light'))
+        # Serve the parent's SPY / sector snapshot; a worker never fetches them
+        # itself (a failed parent fetch must not turn into one retry per symbol)
+        spy_hist = state.get('spy_hist')
+        analyzer._spy_hist_cache = spy_hist
+        analyzer._spy_cache_time = time.time()
+        analyzer._get_spy_hist = lambda: spy_hist
+        analyzer._enhanced_table = state.get('enhanced_table')
+        if analyzer.enhanced_analyzer:
+            sector_momentum = state.get('sector_momentum') or analyzer.enhanced_analyzer._empty_sector_result()
+            analyzer.enhanced_analyzer.sector_momentum_cache = sector_momentum
+            analyzer.enhanced_analyzer.sector_cache_time = state.get('sector_cache_time')
+            analyzer.enhanced_analyzer.get_sector_momentum = lambda force_refresh=False: sector_momentum
+    elif kind == 'advanced':
+        from advanced_analyzer import AdvancedTradingAnalyzer
+        analyzer = AdvancedTradingAnalyzer(enable_training=False, data_mode=state.get('data_mode', 'light'))
+        for attr in ('models', 'scalers', 'feature_importance', '_breadth_context'):
+            if attr in state:
+                setattr(analyzer, attr, state[attr])
+    else:
+        raise ValueError(f"Unknown analysis worker kind: {kind}")
+    _ANALYZER = analyzer
+
+
+def _analyze_task(symbol: str, info: Optional[Dict] = None):
+    """Run one symbol in a worker; the history comes from the shared panel."""
+    hist = _PANEL.history(symbol)
+    if _KIND == 'premium':
+        from stock_result import StockResult
+        if hist is None:
+            return None
+        result = _ANALYZER.analyze_stock(symbol, hist_data=hist, info=info or {})
+        if result and result.get('success'):
+            return StockResult.from_dict(result)
+        return {'symbol': symbol, 'success': False, 'error': (result or {}).get('error', 'Unknown error')}
+    return _ANALYZER.analyze_stock_comprehensive(symbol, preloaded_hist=hist)
+
+
+def _incremental_task(symbol: str, info: Optional[Dict] = None, previous: Optional[Dict] = None):
+    """PremiumStockAnalyzer.analyze_stock_incremental in a worker -> (record, state, kind)."""
+    from stock_result import StockResult
+    hist = _PANEL.history(symbol)
+    if hist is None:
+        return None
+    result, state, kind = _ANALYZER.analyze_stock_incremental(symbol, hist, info or {}, previous)
+    if result and result.get('success'):
+        return StockResult.from_dict(result), state, kind
+    return {'symbol': symbol, 'success': False, 'error': (result or {}).get('error', 'Unknown error')}, None, kind
+
+
+def default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+class ProcessAnalysisPool:
+    """Process pool of analyzer workers attached to one SharedPricePanel"""
+
+    def __init__(self, panel: SharedPricePanel, kind: str, state: Optional[Dict] = None,
+                 workers: Optional[int] = None):
+        """
+        Args:
+            kind: 'premium' (PremiumStockAnalyzer.analyze_stock -> StockResult) or
+                'advanced' (AdvancedTradingAnalyzer.analyze_stock_comprehensive -> dict)
+            state: Analyzer state handed to every worker once at start-up
+        """
+        self.panel = panel
+        self.kind = kind
+        self.workers = workers or default_workers()
+        self.broken = False
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(panel.spec, kind, state or {}),
+        )
+
+    def submit(self, symbol: str, info: Optional[Dict] = None):
+        return self.pool.submit(_analyze_task, symbol, info)
+
+    def analyze(self, symbol: str, info: Optional[Dict] = None) -> Any:
+        """Blocking single-symbol call (raises when the pool broke)."""
+        try:
+            return self.submit(symbol, info).result()
+        except Exception:
+            self.broken = True
+            raise
+
+    def analyze_incremental(self, symbol: str, info: Optional[Dict] = None, previous: Optional[Dict] = None):
+        """Blocking incremental call (premium workers; previous is the symbol's stored state)."""
+        try:
+            return self.pool.submit(_incremental_task, symbol, info, previous).result()
+        except Exception:
+            self.broken = True
+            raise
+
+    def map(self, symbols: List[str]):
+        """Yield (symbol, result) as workers finish."""
+        from concurrent.futures import as_completed
+        futures = {self.submit(s): s for s in symbols}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception:
+                yield futures[future], None
+
+    def close(self):
+        try:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -18,6 +18,7 @@ logging.getLogger("urllib3").setLevel(logging.CRITICAL)
 
 from advanced_analyzer import AdvancedTradingAnalyzer
 from ultimate_strategy_analyzer_fixed import FixedUltimateStrategyAnalyzer
+from run_checkpoint import latest_incomplete, read_summary
 from cleaned_high_potential_universe import get_cleaned_high_potential_universe
 
 # Professional Trading Interface - Like Goldman Sachs, JP Morgan, Citadel
@@ -238,6 +239,19 @@ if is_ultimate:
         help="Analyzes all 614+ premium stocks with 5-perspective consensus + AI review"
     )
     st.sidebar.info("⏱️ Takes 60-90 minutes for full analysis")
+    
+    # Offer to continue a run of today that was interrupted (session died, crash,
+    # rate limit); older runs would restore stale market / AI outputs
+    resume_run_id = None
+    interrupted_run = latest_incomplete(prefix=datetime.now().strftime('%Y%m%d'))
+    interrupted = read_summary(interrupted_run) if interrupted_run else None
+    if interrupted:
+        if st.sidebar.checkbox(
+            f"♻️ Resume interrupted run {interrupted_run}",
+            value=False,
+            help=f"{interrupted['symbols']} stocks and {len(interrupted['stages'])} stages already done - only the rest is analyzed"
+        ):
+            resume_run_id = interrupted_run
 
 # Toggle ML training (optional: longer run, potentially higher accuracy)
 if not is_ultimate:
@@ -637,9 +651,14 @@ if should_run_analysis:
             st.info("⏱️ **Estimated Time:** 60–90 minutes for complete 5-perspective analysis + AI review")
             st.info("☕ **Tip:** Sit back while we finalize the consensus and AI review.")
             
-            final_recommendations = ultimate_analyzer.run_ultimate_strategy(
-                progress_callback=update_progress
-            )
+            if resume_run_id:
+                final_recommendations = ultimate_analyzer.resume(
+                    resume_run_id, progress_callback=update_progress
+                )
+            else:
+                final_recommendations = ultimate_analyzer.run_ultimate_strategy(
+                    progress_callback=update_progress
+                )
 
         # Clear progress UI after analysis completes
         progress_bar.empty()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Result Memoization - content-addressed store for per-symbol analysis results
+
+Keys are hashes of the exact inputs of an analysis:
+- the tail of the price history (values + dates)
+- the info fields the analyzer reads
+- the market context it depends on (benchmark, breadth, sector ranks, date)
+- a version stamp of the code/config that produced the result
+
+Re-running a strategy on unchanged data therefore returns the stored result
+for every symbol, while any change to the inputs (or to the scoring code)
+produces a new key. Results live in one SQLite table with least-recently-used
+eviction once the store exceeds its size budget.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+HISTORY_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+_fingerprints: Dict[tuple, str] = {}
+
+
+def code_fingerprint(*module_files: str, config: Optional[Dict] = None) -> str:
+    """
+    Version stamp from the source of the modules that produce a result.
+
+    Editing any of the files (or passing a different config) changes the
+    stamp, so stale results are never served after a scoring change.
+    """
+    cache_key = tuple(module_files)
+    if cache_key not in _fingerprints:
+        digest = hashlib.sha256()
+        for path in module_files:
+            try:
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+            except Exception:
+                digest.update(path.encode())
+        _fingerprints[cache_key] = digest.hexdigest()[:16]
+    stamp = _fingerprints[cache_key]
+    if config:
+        stamp += '_' + hashlib.sha256(_canonical(config).encode()).hexdigest()[:8]
+    return stamp
+
+
+def _canonical(value: Any) -> str:
+    """Stable JSON text for dicts/lists of plain values."""
+    def default(obj):
+        if isinstance(obj, (np.integer, np.floating, np.bool_)):
+            return obj.item()
+        if isinstance(obj, pd.DataFrame):
+            return history_digest(obj)
+        return str(obj)
+    return json.dumps(value, sort_keys=True, default=default)
+
+
+def history_digest(df: Optional[pd.DataFrame], tail: Optional[int] = None,
+                   columns: Sequence[str] = HISTORY_COLUMNS) -> str:
+    """Hash of a price history's values and dates (optionally only the last `tail` rows)."""
+    if df is None or not isinstance(df, pd.DataFrame) or df.empty:
+        return 'empty'
+    if tail:
+        df = df.tail(tail)
+    cols = [c for c in columns if c in df.columns]
+    digest = hashlib.sha256()
+    digest.update(str(len(df)).encode())
+    digest.update(pd.util.hash_pandas_object(df[cols], index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ResultMemo:
+    """SQLite-backed memo of analysis results keyed by input content hash
+
+    Each process keeps one WAL-mode connection, so lookups from analysis
+    workers never wait on another process's writes. get() only reads; the
+    last_access touches that drive LRU eviction are buffered and written in
+    one batch with the next put(), every TOUCH_BATCH hits, or on close().
+    """
+
+    TOUCH_BATCH = 256
+
+    def __init__(self, cache_dir: str = '.cache', max_mb: float = 256, max_entries: int = 50000):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_file = os.path.join(cache_dir, 'result_memo.sqlite')
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._writes_since_evict = 0
+        self._touched: Dict[str, float] = {}
+        self._conn = None
+        self._pid = None
+        self._init_db()
+
+    def _db(self) -> sqlite3.Connection:
+        """This process's connection (opened lazily; reopened after a fork). Call under self.lock."""
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn = conn
+            self._pid = os.getpid()
+            self._touched = {}
+        return self._conn
+
+    def _init_db(self):
+        with self.lock:
+            try:
+                conn = self._db()
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS results (
+                        key TEXT PRIMARY KEY,
+                        namespace TEXT,
+                        symbol TEXT,
+                        data BLOB,
+                        size INTEGER,
+                        created REAL,
+                        last_access REAL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_results_access ON results(last_access)')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_results_symbol ON results(namespace, symbol)')
+                conn.commit()
+            except Exception as e:
+                print(f"⚠️ Result memo init error: {e}")
+
+    def make_key(self, namespace: str, symbol: str, hist: Optional[pd.DataFrame] = None,
+                 info: Optional[Dict] = None, info_fields: Optional[Iterable[str]] = None,
+                 context: Optional[Dict] = None, version: str = '', tail: Optional[int] = None) -> str:
+        """
+        Content hash of everything an analysis result depends on.
+
+        Args:
+            namespace: Analyzer name (separates result types)
+            hist: Price history used by the analysis
+            info: Fundamental info dict
+            info_fields: Only these info keys enter the key (all when None)
+            context: Market context (benchmark digest, breadth, sector ranks, date, ...)
+            version: Code/config stamp (see code_fingerprint)
+            tail: Number of trailing history rows the analysis actually reads
+        """
+        info = info or {}
+        if info_fields is not None:
+            info = {k: info.get(k) for k in info_fields}
+        payload = _canonical({
+            'ns': namespace,
+            'symbol': symbol,
+            'hist': history_digest(hist, tail),
+            'info': info,
+            'context': context or {},
+            'version': version,
+        })
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """Stored result for key (None on miss or when older than max_age seconds)."""
+        with self.lock:
+            try:
+                row = self._db().execute('SELECT data, created FROM results WHERE key = ?', (key,)).fetchone()
+                now = time.time()
+                if row and (max_age is None or now - row[1] < max_age):
+                    value = pickle.loads(row[0])
+                    self.hits += 1
+                    self._touched[key] = now
+                    if len(self._touched) >= self.TOUCH_BATCH:
+                        self._flush_touches()
+                    return value
+            except Exception:
+                pass
+            self.misses += 1
+        return None
+
+    def _flush_touches(self):
+        """Write buffered last_access times in one transaction. Call under self.lock."""
+        if not self._touched:
+            return
+        touched = [(t, k) for k, t in self._touched.items()]
+        self._touched = {}
+        conn = self._db()
+        conn.executemany('UPDATE results SET last_access = ? WHERE key = ?', touched)
+        conn.commit()
+
+    def put(self, key: str, value: Any, namespace: str = '', symbol: str = ''):
+        """Store a result and evict least-recently-used entries when over budget."""
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"⚠️ Result memo write error ({symbol}): {e}")
+            return
+        with self.lock:
+            try:
+                now = time.time()
+                conn = self._db()
+                self._touched.pop(key, None)
+                conn.execute('''
+                    INSERT OR REPLACE INTO results (key, namespace, symbol, data, size, created, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (key, namespace, symbol, blob, len(blob), now, now))
+                conn.commit()
+                self._flush_touches()
+                self._writes_since_evict += 1
+                if self._writes_since_evict >= 100:
+                    self._evict(conn)
+                    self._writes_since_evict = 0
+            except Exception as e:
+                print(f"⚠️ Result memo write error ({symbol}): {e}")
+
+    def _evict(self, conn):
+        """Drop least-recently-used rows until the store fits max_mb / max_entries."""
+        total_bytes, count = conn.execute('SELECT COALESCE(SUM(size), 0), COUNT(*) FROM results').fetchone()
+        excess_bytes = total_bytes - self.max_bytes
+        excess_rows = count - self.max_entries
+        if excess_bytes <= 0 and excess_rows <= 0:
+            return
+        doomed = []
+        freed = 0
+        for key, size in conn.execute('SELECT key, size FROM results ORDER BY last_access ASC'):
+            if freed >= excess_bytes and len(doomed) >= excess_rows:
+                break
+            doomed.append((key,))
+            freed += size
+        conn.executemany('DELETE FROM results WHERE key = ?', doomed)
+        conn.commit()
+        print(f"🧹 Result memo: evicted {len(doomed)} entries ({freed / 1024 / 1024:.1f} MB)")
+
+    def stats(self) -> Dict:
+        """Entry count, size and hit/miss counters for this process."""
+        with self.lock:
+            try:
+                total_bytes, count = self._db().execute(
+                    'SELECT COALESCE(SUM(size), 0), COUNT(*) FROM results').fetchone()
+            except Exception:
+                total_bytes, count = 0, 0
+        lookups = self.hits + self.misses
+        return {
+            'entries': count,
+            'size_mb': round(total_bytes / 1024 / 1024, 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': f"{(self.hits / lookups) * 100:.1f}%" if lookups else "0%",
+        }
+
+    def clear(self, namespace: Optional[str] = None):
+        """Remove all results (or only one namespace)."""
+        with self.lock:
+            try:
+                conn = self._db()
+                self._touched = {}
+                if namespace is None:
+                    conn.execute('DELETE FROM results')
+                else:
+                    conn.execute('DELETE FROM results WHERE namespace = ?', (namespace,))
+                conn.commit()
+            except Exception as e:
+                print(f"⚠️ Result memo clear error: {e}")
+
+    def close(self):
+        """Write pending access times and close this process's connection."""
+        with self.lock:
+            if self._conn is None or self._pid != os.getpid():
+                self._conn = None
+                return
+            try:
+                self._flush_touches()
+            except Exception as e:
+                print(f"⚠️ Result memo flush error: {e}")
+            self._conn.close()
+            self._conn = None
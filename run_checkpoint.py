@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Run Checkpoints
+Stage-level and per-symbol checkpoints for long ultimate-strategy runs
+
+Every run gets a directory under .cache/runs/<run_id>/:
+- manifest.json   run id, status, pid of the process running it, completed
+                  stages (rewritten atomically)
+- stages/<name>.pkl   pickled outputs of each completed stage
+- symbols.db      one row per successfully analyzed symbol (SQLite, so a
+                  crash mid-write never corrupts earlier rows)
+
+StageGraph.run() restores completed stages instead of executing them, and
+_run_quality_analysis() skips symbols already in symbols.db, so resuming a
+crashed or rate-limited run only costs the remaining work.
+"""
+
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_ROOT = os.path.join('.cache', 'runs')
+
+
+class RunCheckpoint:
+    """Checkpoint directory of one run"""
+
+    def __init__(self, run_id: Optional[str] = None, root: str = DEFAULT_ROOT):
+        self.root = root
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.path = os.path.join(root, self.run_id)
+        self.lock = threading.Lock()
+        self._conn = None
+        os.makedirs(os.path.join(self.path, 'stages'), exist_ok=True)
+        self.manifest = self._read_manifest() or {
+            'run_id': self.run_id,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'stages': [],
+        }
+        # Opening a checkpoint (re)starts the run in this process
+        self.manifest['status'] = 'running'
+        self.manifest['pid'] = os.getpid()
+        self._write_manifest()
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+
+    def _manifest_file(self) -> str:
+        return os.path.join(self.path, 'manifest.json')
+
+    def _read_manifest(self) -> Optional[Dict]:
+        try:
+            with open(self._manifest_file()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Run manifest {self.run_id} unreadable: {e}")
+            return None
+
+    def _write_manifest(self):
+        self.manifest['updated'] = datetime.now().isoformat(timespec='seconds')
+        tmp_path = self._manifest_file() + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self._manifest_file())
+
+    @property
+    def status(self) -> str:
+        return self.manifest.get('status', 'running')
+
+    def mark(self, status: str):
+        """Set the run status ('running', 'complete', 'stopped', 'failed')."""
+        with self.lock:
+            self.manifest['status'] = status
+            self._write_manifest()
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+
+    def _stage_file(self, stage: str) -> str:
+        return os.path.join(self.path, 'stages', f'{stage}.pkl')
+
+    def completed(self, stage: str) -> bool:
+        return stage in self.manifest.get('stages', []) and os.path.exists(self._stage_file(stage))
+
+    def load(self, stage: str) -> Optional[Dict[str, Any]]:
+        """Outputs (name -> value) of a completed stage, None when missing or unreadable."""
+        try:
+            with open(self._stage_file(stage), 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Checkpoint of stage '{stage}' unreadable, re-running it: {e}")
+            return None
+
+    def save(self, stage: str, outputs: Dict[str, Any]) -> bool:
+        """Persist a finished stage's outputs; False when they cannot be pickled."""
+        tmp_path = self._stage_file(stage) + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(outputs, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._stage_file(stage))
+        except Exception as e:
+            print(f"⚠️ Could not checkpoint stage '{stage}': {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        with self.lock:
+            if stage not in self.manifest['stages']:
+                self.manifest['stages'].append(stage)
+            self._write_manifest()
+        return True
+
+    # ------------------------------------------------------------------
+    # Symbols
+    # ------------------------------------------------------------------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(os.path.join(self.path, 'symbols.db'), check_same_thread=False)
+            self._conn.execute('CREATE TABLE IF NOT EXISTS symbols (symbol TEXT PRIMARY KEY, record BLOB)')
+            self._conn.commit()
+        return self._conn
+
+    def save_symbol(self, symbol: str, record: Any):
+        """Store one analyzed symbol (committed immediately)."""
+        try:
+            blob = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+            with self.lock:
+                conn = self._db()
+                conn.execute('INSERT OR REPLACE INTO symbols (symbol, record) VALUES (?, ?)', (symbol, blob))
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️ Could not checkpoint {symbol}: {e}")
+
+    def load_symbols(self, symbols: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Stored records (optionally only for the given symbols)."""
+        wanted = set(symbols) if symbols is not None else None
+        records = {}
+        try:
+            with self.lock:
+                rows = self._db().execute('SELECT symbol, record FROM symbols').fetchall()
+        except Exception as e:
+            print(f"⚠️ Symbol checkpoints unreadable: {e}")
+            return records
+        for symbol, blob in rows:
+            if wanted is not None and symbol not in wanted:
+                continue
+            try:
+                records[symbol] = pickle.loads(blob)
+            except Exception:
+                continue
+        return records
+
+    def symbol_count(self) -> int:
+        try:
+            with self.lock:
+                return self._db().execute('SELECT COUNT(*) FROM symbols').fetchone()[0]
+        except Exception:
+            return 0
+
+    def close(self):
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def summary(self) -> Dict:
+        return {
+            'run_id': self.run_id,
+            'status': self.status,
+            'created': self.manifest.get('created'),
+            'stages': list(self.manifest.get('stages', [])),
+            'symbols': self.symbol_count(),
+        }
+
+
+def list_runs(root: str = DEFAULT_ROOT) -> List[Dict]:
+    """Manifests of all checkpointed runs, newest first."""
+    runs = []
+    if not os.path.isdir(root):
+        return runs
+    for run_id in sorted(os.listdir(root), reverse=True):
+        try:
+            with open(os.path.join(root, run_id, 'manifest.json')) as f:
+                runs.append(json.load(f))
+        except Exception:
+            continue
+    return runs
+
+
+def _process_alive(pid) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except (OSError, TypeError, ValueError):
+        return False
+    return True
+
+
+def is_live(manifest: Dict) -> bool:
+    """Whether a run is still executing (status 'running' and its process is alive)."""
+    return manifest.get('status', 'running') == 'running' and _process_alive(manifest.get('pid'))
+
+
+def latest_incomplete(root: str = DEFAULT_ROOT, prefix: Optional[str] = None) -> Optional[str]:
+    """
+    Run id of the newest interrupted run (optionally with a run-id prefix, e.g. today's date).
+
+    Interrupted means it crashed ('running' without a live process) or failed.
+    Runs that stopped on purpose (PipelineStop) and runs still executing in
+    another process are never offered for resuming.
+    """
+    for manifest in list_runs(root):
+        run_id = manifest.get('run_id', '')
+        if prefix is not None and not run_id.startswith(prefix):
+            continue
+        if manifest.get('status') in ('complete', 'stopped') or is_live(manifest):
+            continue
+        return run_id
+    return None
+
+
+def read_summary(run_id: str, root: str = DEFAULT_ROOT) -> Optional[Dict]:
+    """
+    RunCheckpoint.summary() of a run without opening it for writing.
+
+    The manifest is only read and symbols.db is opened read-only, so UIs can
+    show a run (even one that is live in another process) without touching it.
+    """
+    path = os.path.join(root, run_id)
+    try:
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except Exception:
+        return None
+    symbols = 0
+    db_file = os.path.join(path, 'symbols.db')
+    if os.path.exists(db_file):
+        try:
+            conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+            try:
+                symbols = conn.execute('SELECT COUNT(*) FROM symbols').fetchone()[0]
+            finally:
+                conn.close()
+        except Exception:
+            symbols = 0
+    return {
+        'run_id': manifest.get('run_id', run_id),
+        'status': manifest.get('status', 'running'),
+        'created': manifest.get('created'),
+        'stages': list(manifest.get('stages', [])),
+        'symbols': symbols,
+    }
+
+
+def prune_runs(root: str = DEFAULT_ROOT, max_keep: int = 5, keep: Sequence[str] = ()):
+    """Delete all but the newest max_keep run directories."""
+    if not os.path.isdir(root):
+        return
+    run_ids = sorted((d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d))), reverse=True)
+    for run_id in run_ids[max_keep:]:
+        if run_id not in keep:
+            shutil.rmtree(os.path.join(root, run_id), ignore_errors=True)
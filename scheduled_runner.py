@@ -43,10 +43,21 @@ def run_analysis():
     analyzer = AdvancedTradingAnalyzer(enable_training=False, data_mode="light")
     analyzer.stock_universe = get_cleaned_high_potential_universe()
     ultimate = FixedUltimateStrategyAnalyzer(analyzer)
+    # Each run appends the new bars to the per-symbol state of the last run
+    # instead of recomputing every full history (see symbol_state)
+    ultimate.incremental = True
 
     # ── run ──────────────────────────────────────────────────────────────
-    print("📊 Running Ultimate Strategy analysis...")
-    results = ultimate.run_ultimate_strategy()
+    # A run of today that died partway (crash, rate limit, timeout) is resumed
+    # from its checkpoints instead of starting over
+    from run_checkpoint import latest_incomplete
+    resume_id = latest_incomplete(ultimate.checkpoint_root, prefix=datetime.now().strftime("%Y%m%d"))
+    if resume_id:
+        print(f"📊 Resuming interrupted Ultimate Strategy run {resume_id}...")
+        results = ultimate.resume(resume_id)
+    else:
+        print("📊 Running Ultimate Strategy analysis...")
+        results = ultimate.run_ultimate_strategy()
 
     elapsed = round((time.time() - start_time) / 60, 1)
     print(f"\n✅ Analysis complete in {elapsed} minutes")
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Stage Graph Executor
+Runs a pipeline expressed as a DAG of stages with declared inputs/outputs
+
+Each stage names the values it reads and the values it produces. The
+scheduler starts every stage whose inputs are available on a thread pool,
+so independent stages (network fetches, AI calls, macro data) overlap:
+- run(): executes the graph, returns all produced values
+- timings: start offset / duration / thread of every stage
+- progress(): thread-safe wrapper for a UI progress callback; calls from
+  stage threads are queued and delivered on the thread that called run()
+  (Streamlit only accepts UI updates from its script thread)
+
+A stage can end the whole run early by raising PipelineStop(value).
+
+With a checkpoint (run_checkpoint.RunCheckpoint) every finished stage's
+outputs are saved; on the next run with the same checkpoint those stages are
+restored instead of executed, and stages whose outputs are only consumed by
+restored stages are skipped altogether.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class PipelineStop(Exception):
+    """Raised by a stage to stop the pipeline; value is handed back to the caller."""
+
+    def __init__(self, value: Any = None):
+        super().__init__("pipeline stopped")
+        self.value = value
+
+
+class Stage:
+    __slots__ = ('name', 'func', 'inputs', 'outputs', 'checkpoint')
+
+    def __init__(self, name: str, func: Callable, inputs: Sequence[str], outputs: Sequence[str],
+                 checkpoint: bool = True):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.checkpoint = checkpoint
+
+
+class StageGraph:
+    """DAG of stages executed with maximal concurrency"""
+
+    def __init__(self, name: str = 'pipeline', max_workers: int = 4):
+        self.name = name
+        self.max_workers = max_workers
+        self.stages: Dict[str, Stage] = {}
+        self.timings: Dict[str, Dict] = {}
+        self.wall_seconds = 0.0
+        self._progress_queue = queue.Queue()
+        self._owner = None
+
+    def stage(self, name: str, func: Callable, inputs: Sequence[str] = (),
+              outputs: Optional[Sequence[str]] = None, checkpoint: bool = True) -> 'StageGraph':
+        """
+        Add a stage.
+
+        Args:
+            func: Called with the inputs as keyword arguments; returns the single
+                output, or a tuple in `outputs` order
+            outputs: Names of produced values (defaults to the stage name)
+            checkpoint: Save/restore the outputs with a run checkpoint (off for
+                bulky or cheap-to-rebuild values)
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self.stages[name] = Stage(name, func, inputs, outputs if outputs is not None else (name,), checkpoint)
+        return self
+
+    def order(self, initial: Sequence[str] = ()) -> List[str]:
+        """Topological order of the stages; raises ValueError on missing inputs or cycles."""
+        producers = {}
+        for stage in self.stages.values():
+            for output in stage.outputs:
+                if output in producers or output in initial:
+                    raise ValueError(f"Value '{output}' produced twice")
+                producers[output] = stage.name
+        for stage in self.stages.values():
+            for value in stage.inputs:
+                if value not in producers and value not in initial:
+                    raise ValueError(f"Stage '{stage.name}' needs '{value}', which nothing produces")
+
+        available, ordered, remaining = set(initial), [], dict(self.stages)
+        while remaining:
+            ready = [n for n, s in remaining.items() if all(v in available for v in s.inputs)]
+            if not ready:
+                raise ValueError(f"Cycle between stages: {', '.join(remaining)}")
+            for name in ready:
+                ordered.append(name)
+                available.update(remaining.pop(name).outputs)
+        return ordered
+
+    def progress(self, callback: Optional[Callable]) -> Optional[Callable]:
+        """Progress callback usable from any stage thread (None stays None)."""
+        if callback is None:
+            return None
+
+        def report(*args, **kwargs):
+            if threading.current_thread() is self._owner:
+                callback(*args, **kwargs)
+            else:
+                self._progress_queue.put((callback, args, kwargs))
+        return report
+
+    def _drain_progress(self):
+        while True:
+            try:
+                callback, args, kwargs = self._progress_queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                callback(*args, **kwargs)
+            except Exception:
+                pass
+
+    def _restore(self, checkpoint, initial: Sequence[str]) -> Dict[str, Dict]:
+        """
+        Outputs of checkpointed stages, plus the names of stages nobody needs.
+
+        Returns:
+            Dict of stage name -> restored outputs; stages that are not restored but
+            only feed restored stages are mapped to None (skipped, nothing restored)
+        """
+        restored = {}
+        if checkpoint is None:
+            return restored
+        for name, stage in self.stages.items():
+            if stage.checkpoint and checkpoint.completed(name):
+                outputs = checkpoint.load(name)
+                if isinstance(outputs, dict) and all(o in outputs for o in stage.outputs):
+                    restored[name] = outputs
+        if not restored:
+            return restored
+        # Walk back from the sinks: a stage must run if it is not restored and
+        # some stage that runs (or nothing at all) consumes its outputs
+        consumers = {name: [c for c in self.stages.values() if set(c.inputs) & set(stage.outputs)]
+                     for name, stage in self.stages.items()}
+        needed = {}
+        for name in reversed(self.order(initial)):
+            needed[name] = name not in restored and (
+                not consumers[name] or any(needed[c.name] for c in consumers[name]))
+        for name, run in needed.items():
+            if not run and name not in restored:
+                restored[name] = None
+        return restored
+
+    def _execute(self, stage: Stage, values: Dict, started: float):
+        begin = time.time()
+        try:
+            return stage.func(**{name: values[name] for name in stage.inputs})
+        finally:
+            end = time.time()
+            self.timings[stage.name] = {
+                'start': round(begin - started, 3),
+                'seconds': round(end - begin, 3),
+                'thread': threading.current_thread().name,
+            }
+
+    def run(self, context: Optional[Dict] = None, checkpoint=None,
+            on_restore: Optional[Callable[[str, Dict], None]] = None) -> Dict:
+        """
+        Execute every stage once its inputs exist.
+
+        Args:
+            context: Initial values available to all stages
+            checkpoint: Optional RunCheckpoint; completed stages are restored from
+                it and every newly finished stage is saved to it
+            on_restore: Called with (stage name, outputs) for each restored stage,
+                so callers can re-apply state the stage would have set
+
+        Returns:
+            Dict of all values (context + every stage output)
+
+        Raises:
+            PipelineStop from a stage (other stages are cancelled / awaited),
+            or the first stage exception
+        """
+        values = dict(context or {})
+        self.order(list(values))
+        self.timings = {}
+        self._owner = threading.current_thread()
+        started = time.time()
+        pending = dict(self.stages)
+        failure = None
+
+        for name, outputs in self._restore(checkpoint, list(values)).items():
+            pending.pop(name)
+            if outputs is None:
+                continue
+            values.update({o: outputs[o] for o in self.stages[name].outputs})
+            self.timings[name] = {'start': 0.0, 'seconds': 0.0, 'thread': 'checkpoint'}
+            if on_restore:
+                on_restore(name, outputs)
+        if checkpoint is not None and len(pending) < len(self.stages):
+            print(f"♻️ Resumed {len(self.stages) - len(pending)} stage(s) from checkpoint {checkpoint.run_id}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name) as pool:
+            running = {}
+            while pending or running:
+                if failure is None:
+                    for name in [n for n, s in pending.items() if all(v in values for v in s.inputs)]:
+                        stage = pending.pop(name)
+                        running[pool.submit(self._execute, stage, values, started)] = stage
+                if not running:
+                    break
+                done, _ = wait(running, timeout=0.1, return_when=FIRST_COMPLETED)
+                self._drain_progress()
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        result = future.result()
+                    except BaseException as e:
+                        if failure is None:
+                            failure = e
+                            pending.clear()
+                        continue
+                    if len(stage.outputs) == 1:
+                        outputs = {stage.outputs[0]: result}
+                    else:
+                        outputs = dict(zip(stage.outputs, result))
+                    values.update(outputs)
+                    if checkpoint is not None and stage.checkpoint:
+                        checkpoint.save(stage.name, outputs)
+        self._drain_progress()
+        self.wall_seconds = time.time() - started
+        if failure is not None:
+            raise failure
+        return values
+
+    def report(self) -> str:
+        """Per-stage timing table (start offset, duration) plus overlap summary."""
+        lines = [f"⏱️ {self.name}: {self.wall_seconds:.1f}s wall, "
+                 f"{sum(t['seconds'] for t in self.timings.values()):.1f}s of stage time"]
+        for name, t in sorted(self.timings.items(), key=lambda x: x[1]['start']):
+            lines.append(f"   {name:22s} +{t['start']:7.1f}s  {t['seconds']:7.1f}s")
+        return '\n'.join(lines)
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Compact Stock Result Records
+Slotted, flat storage for PremiumStockAnalyzer.analyze_stock results
+
+A run keeps 700+ results alive from quality analysis through consensus,
+export and summary. Each StockResult stores every metric as one slot
+(fundamentals_pe_ratio, momentum_rsi, enhanced_vwap, ...) instead of six
+nested dicts per stock:
+- Mapping interface (get / [] / keys) compatible with result dicts
+- Component dicts ('fundamentals', 'enhanced', ...) are built only on access
+- Flat Excel-style names (rsi_14, support_level, ...) resolve directly to slots
+- results_frame() builds a typed column table without intermediate dicts
+
+to_dict() returns exactly the dict analyze_stock produced (UI boundary).
+"""
+
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+TOP_FIELDS = (
+    'symbol', 'quality_score', 'recommendation', 'confidence', 'current_price', 'sector',
+    'analysis_date', 'earnings_date', 'days_until_earnings', 'earnings_risk', 'error', 'success',
+)
+
+COMPONENT_FIELDS = {
+    'fundamentals': (
+        'pe_ratio', 'pe_score', 'revenue_growth', 'revenue_growth_score', 'profit_margin', 'margin_score',
+        'roe', 'roe_score', 'debt_equity', 'debt_equity_score', 'earnings_growth', 'earnings_growth_score',
+        'peg_ratio', 'score', 'grade',
+    ),
+    'momentum': (
+        'price_trend', 'ma_50', 'ma_200', 'trend_score', 'rsi', 'rsi_score', 'volume_trend', 'volume_ratio',
+        'volume_score', 'relative_strength', 'relative_strength_score', 'rs_6m', 'rs_6m_score',
+        'pct_from_52w_high', 'h52w_score', 'score', 'grade',
+    ),
+    'risk': (
+        'beta', 'beta_score', 'volatility', 'max_drawdown', 'drawdown_score', 'sharpe_ratio', 'sharpe_score',
+        'var_95', 'score', 'grade', 'risk_level',
+    ),
+    'technical': (
+        'score', 'grade', 'macd', 'macd_signal', 'macd_hist', 'bollinger_position', 'bollinger_upper',
+        'bollinger_lower', 'support', 'resistance', 'volume_sma', 'mfi', 'mfi_signal',
+    ),
+    'sentiment': (
+        'institutional_ownership', 'institutional_score', 'analyst_rating', 'analyst_score',
+        'target_upside', 'upside_score', 'score', 'grade',
+    ),
+    'enhanced': (
+        'enhancement_score', 'enhancement_signal', 'bullish_confirmations', 'confirmation_count',
+        'vwap', 'vwap_signal', 'breakout_confirmed', 'entry_zone', 'entry_timing', 'entry_score',
+        'nearest_support', 'nearest_resistance', 'risk_reward_ratio', 'rsi_2', 'reversion_signal',
+        'bounce_probability', 'is_bounce_setup', 'recommended_stop', 'stop_loss_pct', 'target_2r',
+        'volatility_regime', 'position_size_suggestion', 'sector_rank', 'sector_tier',
+    ),
+}
+COMPONENTS = tuple(COMPONENT_FIELDS)
+
+# Flat (Excel / all-analyzed) column -> (component, key, default when the key is absent)
+FLAT_FIELDS = {
+    'pe_ratio': ('fundamentals', 'pe_ratio', None),
+    'revenue_growth': ('fundamentals', 'revenue_growth', None),
+    'profit_margin': ('fundamentals', 'profit_margin', None),
+    'roe': ('fundamentals', 'roe', None),
+    'debt_equity': ('fundamentals', 'debt_equity', None),
+    'fundamentals_score': ('fundamentals', 'score', None),
+    'fundamentals_grade': ('fundamentals', 'grade', 'N/A'),
+    'rsi_14': ('momentum', 'rsi', None),
+    'price_trend': ('momentum', 'price_trend', 'N/A'),
+    'relative_strength': ('momentum', 'relative_strength', None),
+    'volume_trend': ('momentum', 'volume_trend', 'N/A'),
+    'momentum_score': ('momentum', 'score', None),
+    'momentum_grade': ('momentum', 'grade', 'N/A'),
+    'ma_50': ('momentum', 'ma_50', None),
+    'ma_200': ('momentum', 'ma_200', None),
+    'volume_ratio': ('momentum', 'volume_ratio', None),
+    'beta': ('risk', 'beta', None),
+    'volatility': ('risk', 'volatility', None),
+    'sharpe_ratio': ('risk', 'sharpe_ratio', None),
+    'max_drawdown': ('risk', 'max_drawdown', None),
+    'var_95': ('risk', 'var_95', None),
+    'risk_score': ('risk', 'score', None),
+    'risk_grade': ('risk', 'grade', 'N/A'),
+    'risk_level': ('risk', 'risk_level', 'N/A'),
+    'macd': ('technical', 'macd', None),
+    'macd_signal': ('technical', 'macd_signal', None),
+    'macd_hist': ('technical', 'macd_hist', None),
+    'bollinger_position': ('technical', 'bollinger_position', None),
+    'bollinger_upper': ('technical', 'bollinger_upper', None),
+    'bollinger_lower': ('technical', 'bollinger_lower', None),
+    'support_level': ('technical', 'support', None),
+    'resistance_level': ('technical', 'resistance', None),
+    'volume_sma': ('technical', 'volume_sma', None),
+    'mfi': ('technical', 'mfi', None),
+    'mfi_signal': ('technical', 'mfi_signal', None),
+    'technical_score': ('technical', 'score', None),
+    'technical_grade': ('technical', 'grade', 'N/A'),
+    'sentiment_score': ('sentiment', 'score', None),
+    'sentiment_grade': ('sentiment', 'grade', 'N/A'),
+    'target_upside': ('sentiment', 'target_upside', None),
+    'institutional_ownership': ('sentiment', 'institutional_ownership', None),
+    'analyst_rating': ('sentiment', 'analyst_rating', None),
+}
+
+# Defaults of the consensus picks' original flattening (differ from the export ones above)
+PICK_DEFAULTS = {
+    'fundamentals_grade': None, 'price_trend': 'neutral', 'volume_trend': None, 'momentum_grade': None,
+    'beta': 1, 'risk_grade': None, 'risk_level': 'Unknown', 'technical_grade': None, 'sentiment_grade': None,
+}
+
+_COMPONENT_SLOTS = tuple(f'{c}_{k}' for c, keys in COMPONENT_FIELDS.items() for k in keys)
+_SLOT_NAMES: Dict[Tuple[str, str], str] = {(c, k): f'{c}_{k}' for c, keys in COMPONENT_FIELDS.items() for k in keys}
+_KNOWN = {c: set(keys) for c, keys in COMPONENT_FIELDS.items()}
+_MISSING = object()
+
+# Key layouts are shared between records (a run has only a handful of distinct ones)
+_LAYOUTS: Dict[tuple, tuple] = {}
+
+
+def _intern(layout: tuple) -> tuple:
+    return _LAYOUTS.setdefault(layout, layout)
+
+
+class StockResult:
+    """One analyzed stock: flat slots plus the key layout of the original result dict."""
+
+    __slots__ = TOP_FIELDS + _COMPONENT_SLOTS + ('_layout', '_extra')
+
+    def __init__(self):
+        self._layout = ()
+        self._extra = None
+
+    @classmethod
+    def from_dict(cls, result: Dict) -> 'StockResult':
+        """Pack an analyze_stock result dict (nested component dicts included)."""
+        record = cls()
+        layout = []
+        for key, value in result.items():
+            if key in _KNOWN and isinstance(value, dict):
+                keys = tuple(value)
+                layout.append((key, _intern(keys)))
+                for k in keys:
+                    if k in _KNOWN[key]:
+                        setattr(record, _SLOT_NAMES[key, k], value[k])
+                    else:
+                        record._set_extra((key, k), value[k])
+            else:
+                layout.append((key, None))
+                if key in TOP_FIELDS:
+                    setattr(record, key, value)
+                else:
+                    record._set_extra(key, value)
+        record._layout = _intern(tuple(layout))
+        return record
+
+    def _set_extra(self, key, value):
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def _top(self, key, default=_MISSING):
+        if key in TOP_FIELDS:
+            return getattr(self, key, default)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        return default
+
+    def component_value(self, component: str, key: str, default: Any = None) -> Any:
+        """Single metric without building the component dict."""
+        slot = _SLOT_NAMES.get((component, key))
+        if slot is not None:
+            return getattr(self, slot, default)
+        if self._extra is not None:
+            return self._extra.get((component, key), default)
+        return default
+
+    def _component_keys(self, component: str) -> Optional[tuple]:
+        for key, keys in self._layout:
+            if key == component:
+                return keys
+        return None
+
+    def component(self, component: str) -> Optional[Dict]:
+        """Component dict (fresh copy, same keys/order as the original result)."""
+        keys = self._component_keys(component)
+        if keys is None:
+            return None
+        return {k: self.component_value(component, k) for k in keys}
+
+    # ------------------------------------------------------------------
+    # Mapping interface (drop-in for result dicts)
+    # ------------------------------------------------------------------
+
+    def keys(self) -> List[str]:
+        return [key for key, _ in self._layout]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._layout)
+
+    def __contains__(self, key) -> bool:
+        return any(k == key for k, _ in self._layout)
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in _KNOWN and isinstance(value, dict):
+            self._layout = tuple(item for item in self._layout if item[0] != key)
+            self._layout = _intern(self._layout + ((key, _intern(tuple(value))),))
+            for k, v in value.items():
+                if k in _KNOWN[key]:
+                    setattr(self, _SLOT_NAMES[key, k], v)
+                else:
+                    self._set_extra((key, k), v)
+            return
+        if key not in self:
+            self._layout = _intern(self._layout + ((key, None),))
+        if key in TOP_FIELDS:
+            setattr(self, key, value)
+        else:
+            self._set_extra(key, value)
+
+    def get(self, key, default=None):
+        """Top-level key, component dict, or flat column name (rsi_14, support_level, ...)."""
+        if key in _KNOWN:
+            view = self.component(key)
+            return default if view is None else view
+        if key in self:
+            return self._top(key, default)
+        flat = FLAT_FIELDS.get(key)
+        if flat is not None:
+            return self._flat_value(key, flat[2] if default is None else default)
+        return default
+
+    def _flat_value(self, name: str, absent: Any) -> Any:
+        """FLAT_FIELDS column, or absent when its component key is missing."""
+        component, k, _ = FLAT_FIELDS[name]
+        keys = self._component_keys(component)
+        if keys is not None and k in keys:
+            return self.component_value(component, k)
+        return absent
+
+    def update(self, other=(), **kwargs):
+        """dict.update: set keys from a mapping / pairs and keyword arguments."""
+        pairs = other.items() if hasattr(other, 'items') else other
+        for key, value in pairs:
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self) -> Dict:
+        """The original analyze_stock result dict."""
+        return {key: (self.component(key) if keys is not None else self._top(key, None))
+                for key, keys in self._layout}
+
+    def flat(self, nested: bool = True, defaults: Optional[Dict[str, Any]] = None) -> Dict:
+        """
+        Flattened export row (symbol/sector/score/price + FLAT_FIELDS [+ component dicts]).
+
+        Args:
+            defaults: Column -> value for missing metrics, overriding the
+                FLAT_FIELDS defaults (consensus picks pass PICK_DEFAULTS)
+        """
+        defaults = defaults or {}
+        row = {
+            'symbol': self._top('symbol', None),
+            'sector': self._top('sector', 'Unknown'),
+            'quality_score': self._top('quality_score', None),
+            'current_price': self._top('current_price', None),
+        }
+        for name, (_, _, absent) in FLAT_FIELDS.items():
+            row[name] = self._flat_value(name, defaults.get(name, absent))
+        if nested:
+            for component in COMPONENTS[:5]:
+                row[component] = self.get(component, {})
+        return row
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)}
+
+    def __setstate__(self, state):
+        self._layout = ()
+        self._extra = None
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"StockResult({self._top('symbol', '?')}, quality={self._top('quality_score', None)})"
+
+
+def as_record(result) -> StockResult:
+    """StockResult for a result dict (records pass through)."""
+    return result if isinstance(result, StockResult) else StockResult.from_dict(result)
+
+
+def results_frame(records: Iterable, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Column table of flat fields for many results (records or dicts).
+
+    Args:
+        columns: Field names (defaults to symbol/sector/quality_score/current_price
+            plus every FLAT_FIELDS column)
+    """
+    records = [as_record(r) for r in records]
+    columns = list(columns or ['symbol', 'sector', 'quality_score', 'current_price', *FLAT_FIELDS])
+    return pd.DataFrame({c: [r.get(c) for r in records] for c in columns}, columns=columns)
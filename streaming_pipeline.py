@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Streaming Pipeline
+fetch -> analyze -> sink with bounded queues instead of fixed batches
+
+Fetch workers pull items from a shared cursor and push their payloads
+(price histories) into a bounded queue; analyze workers consume the queue
+and hand each result to a sink as soon as it is ready:
+- No batch barriers: a slow symbol only occupies one worker
+- Backpressure: fetchers block when the queue is full, so at most
+  queue_size fetched payloads are alive at any time (flat memory)
+- Throughput is set by the slower of the two stages
+- on_item() is called on the thread that called run() (UI progress)
+- replace() turns a failed item into replacement items that join the same
+  run right away (no serial tail after the main items)
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Optional
+
+_DONE = object()
+
+
+class StreamingPipeline:
+    """Two-stage worker pipeline joined by a bounded queue"""
+
+    def __init__(self, fetch: Callable[[Any], Any], analyze: Callable[[Any, Any], Any],
+                 sink: Optional[Callable[[Any, Any], None]] = None,
+                 fetch_workers: int = 4, analyze_workers: int = 2, queue_size: int = 16,
+                 replace: Optional[Callable[[Any], Iterable]] = None):
+        """
+        Args:
+            fetch: item -> payload, or None when the item failed
+            analyze: (item, payload) -> result, or None when the item failed
+            sink: (item, result) for every successful result (called on analyze threads)
+            queue_size: Max fetched payloads waiting for an analyzer
+            replace: failed item -> replacement items to stream in the same run
+                (called on worker threads)
+        """
+        self.fetch = fetch
+        self.analyze = analyze
+        self.sink = sink
+        self.replace = replace
+        self.fetch_workers = max(1, fetch_workers)
+        self.analyze_workers = max(1, analyze_workers)
+        self.queue_size = max(1, queue_size)
+        self.stats: Dict = {}
+
+    def run(self, items: Iterable, on_item: Optional[Callable[[int, Any, bool], None]] = None,
+            poll: float = 0.1) -> Dict:
+        """
+        Stream all items through fetch and analyze.
+
+        Args:
+            on_item: (completed count, item, success) after each item, on this thread
+
+        Returns:
+            Stats dict (completed / succeeded / failed / replaced counts, busy
+            seconds per stage, queue high-water mark, wall seconds)
+        """
+        cursor = iter(items)
+        cursor_lock = threading.Lock()
+        work = queue.Queue(maxsize=self.queue_size)
+        finished = queue.Queue()
+        lock = threading.Lock()
+        stats = {'completed': 0, 'succeeded': 0, 'failed': 0, 'replaced': 0, 'fetch_seconds': 0.0,
+                 'analyze_seconds': 0.0, 'max_queue': 0}
+        fetchers_left = [self.fetch_workers]
+        # Replacements are served before the rest of the cursor; fetchers only
+        # exit once nothing is in flight that could still fail and add more
+        extra = deque()
+        in_flight = [0]
+        more = threading.Condition(cursor_lock)
+        started = time.time()
+
+        def next_item():
+            with more:
+                while True:
+                    if extra:
+                        item = extra.popleft()
+                    else:
+                        item = next(cursor, _DONE)
+                    if item is not _DONE:
+                        in_flight[0] += 1
+                        return item
+                    if not in_flight[0]:
+                        more.notify_all()
+                        return _DONE
+                    more.wait(poll)
+
+        def finish(item, ok: bool):
+            replacements = []
+            if not ok and self.replace is not None:
+                try:
+                    replacements = list(self.replace(item) or ())
+                except Exception:
+                    replacements = []
+            with more:
+                extra.extend(replacements)
+                stats['replaced'] += len(replacements)
+                in_flight[0] -= 1
+                more.notify_all()
+            finished.put((item, ok))
+
+        def fetcher():
+            try:
+                while True:
+                    item = next_item()
+                    if item is _DONE:
+                        return
+                    begin = time.time()
+                    try:
+                        payload = self.fetch(item)
+                    except Exception:
+                        payload = None
+                    with lock:
+                        stats['fetch_seconds'] += time.time() - begin
+                    if payload is None:
+                        finish(item, False)
+                        continue
+                    work.put((item, payload))
+                    with lock:
+                        stats['max_queue'] = max(stats['max_queue'], work.qsize())
+            finally:
+                with lock:
+                    fetchers_left[0] -= 1
+                    last = fetchers_left[0] == 0
+                if last:
+                    for _ in range(self.analyze_workers):
+                        work.put(_DONE)
+
+        def analyzer():
+            while True:
+                entry = work.get()
+                if entry is _DONE:
+                    finished.put(_DONE)
+                    return
+                item, payload = entry
+                begin = time.time()
+                try:
+                    result = self.analyze(item, payload)
+                    if result is not None and self.sink is not None:
+                        self.sink(item, result)
+                except Exception:
+                    result = None
+                del payload, entry
+                with lock:
+                    stats['analyze_seconds'] += time.time() - begin
+                finish(item, result is not None)
+
+        threads = [threading.Thread(target=fetcher, name=f'fetch_{i}', daemon=True)
+                   for i in range(self.fetch_workers)]
+        threads += [threading.Thread(target=analyzer, name=f'analyze_{i}', daemon=True)
+                    for i in range(self.analyze_workers)]
+        for thread in threads:
+            thread.start()
+
+        analyzers_left = self.analyze_workers
+        while analyzers_left:
+            try:
+                entry = finished.get(timeout=poll)
+            except queue.Empty:
+                continue
+            if entry is _DONE:
+                analyzers_left -= 1
+                continue
+            item, ok = entry
+            stats['completed'] += 1
+            stats['succeeded' if ok else 'failed'] += 1
+            if on_item:
+                try:
+                    on_item(stats['completed'], item, ok)
+                except Exception:
+                    pass
+        # Fetch failures are queued before the last fetcher releases the
+        # analyzers, so every item has been counted once all analyzers are done
+        for thread in threads:
+            thread.join()
+
+        stats['wall_seconds'] = round(time.time() - started, 2)
+        stats['fetch_seconds'] = round(stats['fetch_seconds'], 2)
+        stats['analyze_seconds'] = round(stats['analyze_seconds'], 2)
+        self.stats = stats
+        return stats
+
+    def report(self) -> str:
+        s = self.stats
+        if not s:
+            return ''
+        replaced = f", {s['replaced']} replacements" if s.get('replaced') else ''
+        return (f"🚰 Streamed {s['completed']} items in {s['wall_seconds']:.1f}s "
+                f"({s['succeeded']} ok, {s['failed']} failed{replaced}) | fetch busy {s['fetch_seconds']:.1f}s "
+                f"x{self.fetch_workers}, analyze busy {s['analyze_seconds']:.1f}s x{self.analyze_workers}, "
+                f"queue peak {s['max_queue']}/{self.queue_size}")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Symbol State Store
+Per-symbol inputs and sub-scores of the last quality analysis, for incremental runs
+
+For every analyzed symbol the store keeps the state returned by
+PremiumStockAnalyzer.analyze_stock_incremental():
+- inputs    digests of the bars, market context, fundamentals, earnings dates
+            and code version the result was computed from
+- history   momentum / risk / technical inputs and the enhanced block, the
+            bar count and digest they cover, and the running MACD / return /
+            drawdown state the next day's bars are appended to
+- result    the analyze_stock result
+
+The next run extends each symbol's state with its new bars (or reuses it when
+nothing changed) instead of recomputing the full history. Rows live in one
+SQLite table (like the run checkpoints), so an interrupted run never corrupts
+earlier rows.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+DEFAULT_PATH = os.path.join('.cache', 'symbol_state.sqlite')
+
+
+class SymbolStateStore:
+    """SQLite table of symbol -> last analysis state"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self._conn = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute('CREATE TABLE IF NOT EXISTS symbol_state '
+                               '(symbol TEXT PRIMARY KEY, state BLOB, updated REAL)')
+            self._conn.commit()
+        return self._conn
+
+    def load(self, symbols: Optional[Sequence[str]] = None) -> Dict[str, Dict]:
+        """Stored states (optionally only for the given symbols)."""
+        wanted = set(symbols) if symbols is not None else None
+        states = {}
+        try:
+            with self.lock:
+                rows = self._db().execute('SELECT symbol, state FROM symbol_state').fetchall()
+        except Exception as e:
+            print(f"⚠️ Symbol state store unreadable: {e}")
+            return states
+        for symbol, blob in rows:
+            if wanted is not None and symbol not in wanted:
+                continue
+            try:
+                states[symbol] = pickle.loads(blob)
+            except Exception:
+                continue
+        return states
+
+    def save(self, symbol: str, state: Dict[str, Any]):
+        """Store one symbol's state (committed immediately)."""
+        try:
+            blob = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+            with self.lock:
+                conn = self._db()
+                conn.execute('INSERT OR REPLACE INTO symbol_state (symbol, state, updated) VALUES (?, ?, ?)',
+                             (symbol, blob, time.time()))
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️ Could not store state of {symbol}: {e}")
+
+    def count(self) -> int:
+        try:
+            with self.lock:
+                return self._db().execute('SELECT COUNT(*) FROM symbol_state').fetchone()[0]
+        except Exception:
+            return 0
+
+    def close(self):
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,105 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from premium_stock_analyzer import PremiumStockAnalyzer
+from stock_result import StockResult
+from ultimate_strategy_analyzer_fixed import FixedUltimateStrategyAnalyzer
+
+
+def _bars(rng, n=300, vol=0.02):
+    close = 40 * np.exp(np.cumsum(rng.normal(0.0004, vol, n)))
+    spread = rng.uniform(0.002, 0.02, n)
+    return pd.DataFrame({
+        'Open': close, 'High': close * (1 + spread), 'Low': close * (1 - spread), 'Close': close,
+        'Volume': rng.integers(500_000, 3_000_000, n).astype(float),
+    }, index=pd.bdate_range('2024-01-02', periods=n))
+
+
+class _Fetcher:
+    """Bulk + per-symbol fetches served from a fixed dataset (dead symbols return nothing)."""
+
+    data_mode = 'light'
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.preloaded = {}
+
+    def get_bulk_history(self, symbols):
+        return {sym: self.dataset[sym][0].copy() for sym in symbols if sym in self.dataset}
+
+    def get_comprehensive_stock_data(self, symbol, preloaded_hist=None):
+        if symbol not in self.dataset:
+            return None
+        self.preloaded[symbol] = preloaded_hist is not None
+        hist, info = self.dataset[symbol]
+        return {'data': preloaded_hist if preloaded_hist is not None else hist.copy(), 'info': dict(info)}
+
+
+def _premium(spy):
+    analyzer = PremiumStockAnalyzer()
+    analyzer.result_memo = None
+    enhanced = analyzer.enhanced_analyzer
+    sectors = {
+        etf: {'sector_name': name, 'momentum_5d': 5.0 - rank, 'rank': rank,
+              'tier': 'TOP' if rank <= 3 else 'MIDDLE' if rank <= 8 else 'BOTTOM'}
+        for rank, (etf, name) in enumerate(enhanced.SECTOR_ETFS.items(), 1)
+    }
+    enhanced.sector_momentum_cache = dict(enhanced._empty_sector_result(), sectors=sectors)
+    enhanced.sector_cache_time = pd.Timestamp.now().to_pydatetime()
+    analyzer._spy_hist_cache = spy
+    analyzer._spy_cache_time = time.time()
+    return analyzer
+
+
+def _ultimate(fetcher, premium, replacements):
+    analyzer = FixedUltimateStrategyAnalyzer.__new__(FixedUltimateStrategyAnalyzer)
+    analyzer.analyzer = type('Analyzer', (), {'data_fetcher': fetcher})()
+    analyzer.premium_analyzer = premium
+    analyzer.ai_selector = None
+    analyzer._symbol_denylist = set()
+    analyzer.checkpoint = None
+    analyzer.incremental = False
+    analyzer.analysis_mode = 'thread'
+    analyzer.fetch_workers = 2
+    analyzer.analyze_workers = 2
+    analyzer.stream_queue_size = 4
+    analyzer._backfill_candidates = lambda symbols, limit=None: [
+        sym for sym in replacements if sym not in symbols][:limit]
+    return analyzer
+
+
+def test_backfilled_symbols_match_a_fresh_fetch():
+    rng = np.random.default_rng(21)
+    spy = _bars(rng, vol=0.01)
+    universe = ['A0', 'A1', 'A2', 'A3', 'A4']
+    dead = {'A1', 'A3'}
+    replacements = ['R0', 'R1', 'R2']
+    dataset = {'SPY': (spy, {})}
+    for i, sym in enumerate(universe + replacements):
+        if sym not in dead:
+            dataset[sym] = (_bars(rng), {'trailingPE': 10 + 3 * i, 'revenueGrowth': 0.02 * i,
+                                         'profitMargins': 0.12, 'returnOnEquity': 0.18, 'beta': 1.0,
+                                         'sector': 'Technology' if i % 2 else 'Financial Services'})
+    fetcher = _Fetcher(dataset)
+    analyzer = _ultimate(fetcher, _premium(spy), replacements)
+
+    # Prefetch (replacements included in the bulk pass), then the streamed main pass + backfill
+    hist_map = analyzer._stage_history_prefetch(analyzer._stage_candidates(universe))
+    assert set(hist_map) == set(dataset)
+    results = analyzer._run_quality_analysis(universe, hist_map=hist_map)
+
+    assert set(results) == (set(universe) - dead) | set(replacements)
+    assert all(fetcher.preloaded[sym] for sym in replacements)
+
+    fresh = _premium(spy)
+    for sym in replacements:
+        record = results[sym]
+        assert isinstance(record, StockResult)
+        hist, info = dataset[sym]
+        expected = fresh.analyze_stock(sym, hist_data=hist.copy(), info=dict(info))
+        for key in ('quality_score', 'recommendation', 'confidence', 'sector'):
+            assert record[key] == expected[key], (sym, key)
+        for component in ('fundamentals', 'momentum', 'risk', 'technical', 'sentiment', 'enhanced'):
+            assert record[component] == expected[component], (sym, component)
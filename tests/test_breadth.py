@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from advanced_analyzer import AdvancedTradingAnalyzer
+from price_panel import build_price_panel
+
+
+def _hist_map(n_symbols=12, n_days=260, seed=7):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2025-01-01', periods=n_days)
+    hist_map = {}
+    for i in range(n_symbols):
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+        df = pd.DataFrame({'Close': close}, index=dates)
+        # A few symbols stop printing before the panel's last date
+        if i % 4 == 0:
+            df = df.iloc[:-(i // 4 + 1)]
+        hist_map[f'S{i}'] = df
+    return hist_map
+
+
+def _per_symbol_breadth(hist_map):
+    """Reference: each symbol evaluated on its own last bar."""
+    rets, adv, above_50, above_200, nh, nl = [], 0, 0, 0, 0, 0
+    for df in hist_map.values():
+        close = df['Close'].dropna()
+        last = close.iloc[-1]
+        r1 = last / close.iloc[-2] - 1.0
+        rets.append(r1)
+        adv += r1 > 0
+        above_50 += last > close.rolling(50).mean().iloc[-1]
+        above_200 += last > close.rolling(200).mean().iloc[-1]
+        nh += last >= close.rolling(20).max().iloc[-1]
+        nl += last <= close.rolling(20).min().iloc[-1]
+    total = len(hist_map)
+    return {
+        'adv_pct_1d': adv / total,
+        'pct_above_sma50': above_50 / total,
+        'pct_above_sma200': above_200 / total,
+        'new_highs_20d': nh / total,
+        'new_lows_20d': nl / total,
+        'median_ret_1d': float(np.median(rets)),
+        'universe_size': total,
+    }
+
+
+def test_current_breadth_uses_each_symbols_last_bar():
+    hist_map = _hist_map()
+    close = build_price_panel(hist_map, list(hist_map), fields=('Close',))['Close']
+    ctx = AdvancedTradingAnalyzer.compute_current_breadth(close)
+    expected = _per_symbol_breadth(hist_map)
+    for key, value in expected.items():
+        assert np.isclose(ctx[key], value), key
+    # The history's last row only covers symbols with a bar that day
+    history = AdvancedTradingAnalyzer.compute_breadth_history(close)
+    assert history['universe_size'].iloc[-1] < ctx['universe_size']
+
+
+def test_breadth_history_lookback_matches_full_history():
+    hist_map = _hist_map()
+    close = build_price_panel(hist_map, list(hist_map), fields=('Close',))['Close']
+    full = AdvancedTradingAnalyzer.compute_breadth_history(close)
+    tail = AdvancedTradingAnalyzer.compute_breadth_history(close, lookback=5)
+    pd.testing.assert_frame_equal(tail, full.iloc[-5:])
+
+
+def _gapped_hist_map(n_symbols=24, n_days=320, seed=0):
+    """Symbols with halts / missing prints inside their trailing 200 bars."""
+    hist_map = _hist_map(n_symbols, n_days, seed)
+    rng = np.random.default_rng(seed)
+    for i, (symbol, df) in enumerate(hist_map.items()):
+        if i % 2:
+            start = int(rng.integers(200, 300))
+            gap = df.index[start:start + int(rng.integers(5, 30))]
+            # Halts leave NaN rows, missing prints leave no row at all
+            hist_map[symbol] = df.drop(gap) if i % 3 == 0 else df.assign(Close=df['Close'].mask(df.index.isin(gap)))
+    return hist_map
+
+
+def test_current_breadth_counts_traded_bars_across_gaps():
+    hist_map = _gapped_hist_map()
+    close = build_price_panel(hist_map, list(hist_map), fields=('Close',))['Close']
+    ctx = AdvancedTradingAnalyzer.compute_current_breadth(close)
+    expected = _per_symbol_breadth(hist_map)
+    for key, value in expected.items():
+        assert np.isclose(ctx[key], value), key
+
+
+def test_breadth_history_counts_traded_bars_across_gaps():
+    hist_map = _gapped_hist_map()
+    close = build_price_panel(hist_map, list(hist_map), fields=('Close',))['Close']
+    history = AdvancedTradingAnalyzer.compute_breadth_history(close)
+    # Any date: the symbols reporting that day, each on its own bars up to it
+    for date in (close.index[150], close.index[250], close.index[-1]):
+        upto = {s: df.loc[:date] for s, df in hist_map.items()
+                if date in df.index and not np.isnan(df.loc[date, 'Close'])}
+        expected = _per_symbol_breadth(upto)
+        for key in ('pct_above_sma50', 'pct_above_sma200', 'new_highs_20d', 'new_lows_20d', 'universe_size'):
+            assert np.isclose(history.loc[date, key], expected[key]), (date, key)
+    tail = AdvancedTradingAnalyzer.compute_breadth_history(close, lookback=40)
+    pd.testing.assert_frame_equal(tail, history.iloc[-40:])
@@ -0,0 +1,100 @@
+from collections import defaultdict
+
+import numpy as np
+
+from consensus_engine import CONSENSUS_TIERS, FALLBACK_TIER, ConsensusEngine, PERSPECTIVES
+from ultimate_strategy_analyzer_fixed import FixedUltimateStrategyAnalyzer
+
+
+def _results(n=300, seed=11):
+    rng = np.random.default_rng(seed)
+    results = {}
+    for i in range(n):
+        # Coarse scores so ties in agreement and consensus score occur
+        scores = {c: float(rng.integers(8, 20) * 5) for c in ('fundamentals', 'momentum', 'risk', 'sentiment')}
+        results[f'S{i:03d}'] = {
+            'symbol': f'S{i:03d}',
+            'success': bool(rng.random() > 0.05),
+            'quality_score': float(rng.uniform(40, 95)),
+            'current_price': 100.0,
+            'sector': 'Technology',
+            'fundamentals': {'score': scores['fundamentals'], 'grade': 'B'},
+            'momentum': {'score': scores['momentum'], 'grade': 'B'},
+            'risk': {'score': scores['risk'], 'grade': 'B', 'risk_level': 'Medium'},
+            'sentiment': {'score': scores['sentiment'], 'grade': 'B'},
+            'technical': {'score': 50.0, 'grade': 'C'},
+        }
+    return results
+
+
+def _list_walking_consensus(results):
+    """Reference: per-perspective pick lists merged symbol by symbol."""
+    symbol_map = defaultdict(list)
+    for p in PERSPECTIVES:
+        picks = []
+        for symbol, r in results.items():
+            if p.get('require_success') and not r.get('success'):
+                continue
+            score = sum(r[c]['score'] * w for c, w in p['weights'].items())
+            if p.get('gates'):
+                passed = any(all(r[c]['score'] >= f for c, f in g.items()) for g in p['gates'])
+            else:
+                passed = score >= p['threshold']
+            if passed:
+                picks.append({'symbol': symbol, 'score': round(score, 2)})
+        picks.sort(key=lambda x: x['score'], reverse=True)
+        for pick in picks:
+            symbol_map[pick['symbol']].append((p['name'], pick['score']))
+
+    consensus = []
+    for symbol, strategies in symbol_map.items():
+        count = len(strategies)
+        if count < 2:
+            continue
+        avg = sum(s for _, s in strategies) / count
+        quality = results[symbol]['quality_score']
+        tier = FALLBACK_TIER
+        if count in CONSENSUS_TIERS:
+            min_score, min_quality, strong, weak = CONSENSUS_TIERS[count]
+            tier = strong if avg >= min_score and quality >= min_quality else weak
+        consensus.append({
+            'symbol': symbol,
+            'strategies_agreeing': count,
+            'agreeing_perspectives': [n for n, _ in strategies],
+            'consensus_score': round(avg, 2),
+            'recommendation': tier[0],
+        })
+    consensus.sort(key=lambda x: (x['strategies_agreeing'], x['consensus_score']), reverse=True)
+    return consensus
+
+
+def _analyzer():
+    analyzer = FixedUltimateStrategyAnalyzer.__new__(FixedUltimateStrategyAnalyzer)
+    analyzer.consensus_engine = ConsensusEngine()
+    analyzer.score_matrix = None
+    analyzer.consensus_table = None
+    analyzer._consensus_source = None
+    analyzer.score_accumulator = None
+    analyzer.ml_predictor = None
+    analyzer.base_results = {}
+    return analyzer
+
+
+def test_ranked_table_matches_list_walking_order():
+    results = _results()
+    engine = ConsensusEngine()
+    ranked = engine.ranked(engine.evaluate(engine.build_matrix(results)))
+    expected = _list_walking_consensus(results)
+    assert list(ranked.index) == [p['symbol'] for p in expected]
+    assert ranked['strategies_agreeing'].tolist() == [p['strategies_agreeing'] for p in expected]
+    assert ranked['consensus_score'].tolist() == [p['consensus_score'] for p in expected]
+    assert ranked['recommendation'].tolist() == [p['recommendation'] for p in expected]
+
+
+def test_find_consensus_uses_the_results_passed_in():
+    results = _results()
+    picks = _analyzer()._find_consensus(results, {})
+    expected = _list_walking_consensus(results)
+    assert [p['symbol'] for p in picks] == [p['symbol'] for p in expected]
+    assert [sorted(p['agreeing_perspectives']) for p in picks] == \
+        [sorted(p['agreeing_perspectives']) for p in expected]
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from premium_stock_analyzer import PremiumStockAnalyzer
+
+
+def _hist_map(n_symbols=6, n_days=260, seed=5):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2025-01-01', periods=n_days)
+    hist_map = {}
+    for i in range(n_symbols):
+        close = 30 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n_days)))
+        spread = rng.uniform(0.002, 0.02, n_days)
+        df = pd.DataFrame({
+            'Open': close, 'High': close * (1 + spread), 'Low': close * (1 - spread), 'Close': close,
+            'Volume': rng.integers(500_000, 3_000_000, n_days).astype(float),
+        }, index=dates)
+        # Different history lengths, as after a bulk download
+        hist_map[f'S{i}'] = df.iloc[i * 15:]
+    return hist_map
+
+
+def _analyzer():
+    analyzer = PremiumStockAnalyzer()
+    analyzer.result_memo = None
+    # Fixed sector ranking instead of the live ETF download
+    enhanced = analyzer.enhanced_analyzer
+    ranked = list(enhanced.SECTOR_ETFS.items())
+    sectors = {
+        etf: {'sector_name': name, 'momentum_5d': 5.0 - rank, 'rank': rank,
+              'tier': 'TOP' if rank <= 3 else 'MIDDLE' if rank <= 8 else 'BOTTOM'}
+        for rank, (etf, name) in enumerate(ranked, 1)
+    }
+    enhanced.sector_momentum_cache = dict(enhanced._empty_sector_result(), sectors=sectors)
+    enhanced.sector_cache_time = pd.Timestamp.now().to_pydatetime()
+    return analyzer
+
+
+def test_primed_blocks_match_per_stock_enhanced_signals():
+    hist_map = _hist_map()
+    analyzer = _analyzer()
+    sectors = {'S0': 'Technology', 'S1': 'Utilities', 'S2': 'Healthcare'}
+    table = analyzer.prime_enhanced_signals(hist_map, sectors)
+    assert table is not None and len(table) == len(hist_map)
+
+    for symbol, hist in hist_map.items():
+        info = {'sector': sectors[symbol]} if symbol in sectors else {}
+        primed, _ = analyzer._analyze(symbol, hist, info)
+        analyzer._enhanced_table = None
+        per_stock, _ = analyzer._analyze(symbol, hist, info)
+        analyzer._enhanced_table = table
+
+        assert primed['enhanced'].keys() == per_stock['enhanced'].keys()
+        for key, value in per_stock['enhanced'].items():
+            if isinstance(value, float):
+                assert np.isclose(primed['enhanced'][key], value, equal_nan=True), (symbol, key)
+            else:
+                assert primed['enhanced'][key] == value, (symbol, key)
+        assert primed['quality_score'] == per_stock['quality_score']
+
+
+def test_primed_block_is_not_used_for_another_sector_or_history():
+    hist_map = _hist_map()
+    analyzer = _analyzer()
+    analyzer.prime_enhanced_signals(hist_map, {'S0': 'Technology'})
+    hist = hist_map['S0']
+    assert analyzer._primed_enhanced_row('S0', hist, 'Technology') is not None
+    assert analyzer._primed_enhanced_row('S0', hist, 'Energy') is None
+    assert analyzer._primed_enhanced_row('S0', hist.iloc[:-1], 'Technology') is None
+    assert analyzer._primed_enhanced_row('S1', hist_map['S1'], 'Unknown') is not None
+
+
+def test_primed_rows_match_yfinance_sector_spellings():
+    hist_map = _hist_map()
+    analyzer = _analyzer()
+    # Primed with sector_mapping names, looked up with yfinance info['sector']
+    primed = {'S0': 'Financials', 'S1': 'Consumer Discretionary', 'S2': 'Consumer Staples', 'S3': 'Materials'}
+    reported = {'S0': 'Financial Services', 'S1': 'Consumer Cyclical', 'S2': 'Consumer Defensive',
+                'S3': 'Basic Materials'}
+    table = analyzer.prime_enhanced_signals(hist_map, primed)
+
+    for symbol, sector in reported.items():
+        hist = hist_map[symbol]
+        row = analyzer._primed_enhanced_row(symbol, hist, sector)
+        assert row is not None, symbol
+        analyzer._enhanced_table = None
+        per_stock, _ = analyzer._analyze(symbol, hist, {'sector': sector})
+        analyzer._enhanced_table = table
+        assert row['sector_rank'] == per_stock['enhanced']['sector_rank'], symbol
+        assert row['enhancement_score'] == per_stock['enhanced']['enhancement_score'], symbol
+    assert analyzer._primed_enhanced_row('S0', hist_map['S0'], 'Consumer Cyclical') is None
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from advanced_analyzer import AdvancedTradingAnalyzer
+from advanced_data_fetcher import AdvancedDataFetcher
+
+SNAPSHOT = dict(
+    info={'pe_ratio': 21.5, 'beta': 1.1},
+    news={'sentiment_score': 0.1, 'news_count': 3, 'reddit_sentiment': {'sentiment': 0.2},
+          'twitter_sentiment': {'sentiment': 0.0}, 'vader_sentiment': 0.1, 'finbert_sentiment': 0.05},
+    insider={'insider_buys': 1, 'insider_sells': 2, 'net_insider_activity': -1, 'insider_confidence': 0.4},
+    options={'put_call_ratio': 0.8, 'implied_volatility': 0.3, 'options_volume': 1000},
+    institutional={'institutional_ownership': 0.6, 'institutional_confidence': 0.5, 'hedge_fund_activity': 0.1},
+    earnings={},
+    economic={'vix': 17.0},
+    sector={'sector_performance': 0.02, 'sector_rank': 3, 'sector_momentum': 0.01, 'sector_volatility': 0.2},
+    analyst={'analyst_rating': 'Buy', 'price_target': 120, 'rating_changes': 1, 'analyst_consensus': 0.7},
+)
+
+
+def _history(n=260, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    df = pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.005, n)), 'High': close * 1.02, 'Low': close * 0.98,
+        'Close': close, 'Volume': rng.integers(1_000_000, 5_000_000, n).astype(float),
+    }, index=pd.bdate_range('2024-01-01', periods=n))
+    fetcher = AdvancedDataFetcher.__new__(AdvancedDataFetcher)
+    return fetcher._add_advanced_technical_indicators(df)
+
+
+def _per_prefix(prefix):
+    """Reference: a few features computed from the last bar of a prefix, as the per-bar loop did."""
+    def last(series, default=0):
+        value = series.iloc[-1]
+        return default if pd.isna(value) else value
+
+    close = prefix['Close']
+    ref = {
+        'RSI_14_current': last(prefix['RSI_14']),
+        'RSI_14_avg_5': last(prefix['RSI_14'].rolling(5).mean()),
+        'RSI_14_std_20': last(prefix['RSI_14'].rolling(20).std()),
+        'Price_Change_1d': last(close.pct_change()),
+        'Price_Change_50d': last(close.pct_change(50)),
+        'Volume_Change_5d': last(prefix['Volume'].pct_change(5)),
+        'Volatility_20': last(prefix['Volatility_20']),
+    }
+    sma = prefix['SMA_50'].iloc[-1]
+    ref['Price_vs_SMA50'] = close.iloc[-1] / sma if not pd.isna(sma) and sma != 0 else 1
+    return ref
+
+
+def test_feature_matrix_rows_match_per_prefix_features():
+    df = _history()
+    analyzer = AdvancedTradingAnalyzer.__new__(AdvancedTradingAnalyzer)
+    args = list(SNAPSHOT.values())
+    matrix = analyzer._create_feature_matrix(df, *args)
+    assert len(matrix) == len(df)
+
+    for j in (0, 19, 49, 120, 199, len(df) - 1):
+        prefix = df.iloc[:j + 1]
+        # Bit-identical to the features of the history as it stood at bar j
+        row = analyzer._create_comprehensive_features(prefix, *args)
+        assert list(row.columns) == list(matrix.columns)
+        np.testing.assert_array_equal(row.to_numpy(dtype=float)[0], matrix.to_numpy(dtype=float)[j])
+        for name, value in _per_prefix(prefix).items():
+            assert matrix[name].iloc[j] == value, (j, name)
+
+    # Snapshot features are broadcast unchanged to every bar
+    assert (matrix['news_sentiment'] == 0.1).all()
+    assert (matrix['analyst_rating'] == 1).all()
+    assert (matrix['fund_pe_ratio'] == 21.5).all()
@@ -0,0 +1,134 @@
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from premium_stock_analyzer import PremiumStockAnalyzer, HISTORY_METRICS
+
+
+def _bars(rng, n, drift=0.0003, vol=0.02):
+    close = 30 * np.exp(np.cumsum(rng.normal(drift, vol, n)))
+    spread = rng.uniform(0.002, 0.02, n)
+    return pd.DataFrame({
+        'Open': close, 'High': close * (1 + spread), 'Low': close * (1 - spread), 'Close': close,
+        'Volume': rng.integers(500_000, 3_000_000, n).astype(float),
+    }, index=pd.bdate_range('2024-06-03', periods=400)[-n:])
+
+
+def _universe(seed=11):
+    rng = np.random.default_rng(seed)
+    spy = _bars(rng, 400, vol=0.01)
+    symbols = {}
+    for i, n in enumerate((400, 330, 255, 180, 90)):
+        info = {'trailingPE': 12 + 4 * i, 'revenueGrowth': 0.05 * i, 'profitMargins': 0.1,
+                'returnOnEquity': 0.15, 'beta': 0.8 + 0.2 * i, 'recommendationKey': 'buy',
+                'targetMeanPrice': 40.0, 'sector': 'Technology' if i % 2 else 'Utilities'}
+        symbols[f'S{i}'] = (_bars(rng, n), info)
+    return spy, symbols
+
+
+def _analyzer(spy):
+    analyzer = PremiumStockAnalyzer()
+    analyzer.result_memo = None
+    # Fixed sector ranking instead of the live ETF download
+    enhanced = analyzer.enhanced_analyzer
+    sectors = {
+        etf: {'sector_name': name, 'momentum_5d': 5.0 - rank, 'rank': rank,
+              'tier': 'TOP' if rank <= 3 else 'MIDDLE' if rank <= 8 else 'BOTTOM'}
+        for rank, (etf, name) in enumerate(enhanced.SECTOR_ETFS.items(), 1)
+    }
+    enhanced.sector_momentum_cache = dict(enhanced._empty_sector_result(), sectors=sectors)
+    enhanced.sector_cache_time = pd.Timestamp.now().to_pydatetime()
+    analyzer._spy_hist_cache = spy
+    analyzer._spy_cache_time = time.time()
+    return analyzer
+
+
+def _run(analyzer, symbols, states, day_end):
+    kinds = Counter()
+    results = {}
+    for symbol, (hist, info) in symbols.items():
+        result, state, kind = analyzer.analyze_stock_incremental(
+            symbol, hist.iloc[:len(hist) + day_end], info, states.get(symbol))
+        assert result['success'], result.get('error')
+        kinds[kind] += 1
+        results[symbol] = result
+        if state is not None:
+            states[symbol] = state
+    return results, kinds
+
+
+def test_next_day_bar_updates_stored_state():
+    spy, symbols = _universe()
+    analyzer = _analyzer(spy.iloc[:-1])
+    states = {}
+
+    _, kinds = _run(analyzer, symbols, states, day_end=-1)
+    assert kinds == {'recomputed': len(symbols)}
+
+    # Next day: one more bar for every symbol and for SPY
+    analyzer._spy_hist_cache = spy
+    results, kinds = _run(analyzer, symbols, states, day_end=0)
+    assert kinds == {'rescored': len(symbols)}
+
+    fresh = _analyzer(spy)
+    for symbol, (hist, info) in symbols.items():
+        expected = fresh.analyze_stock(symbol, hist, info)
+        for key in ('quality_score', 'recommendation', 'confidence'):
+            assert results[symbol][key] == expected[key], (symbol, key)
+        assert results[symbol]['enhanced'] == expected['enhanced'], symbol
+
+        stored = states[symbol]['history']['metrics']
+        full = fresh._extract_metrics(symbol, hist, info)
+        for name in HISTORY_METRICS:
+            assert np.isclose(stored[name], full[name], rtol=1e-9, atol=0, equal_nan=True), (symbol, name)
+
+    # Same-day rerun: nothing changed
+    _, kinds = _run(analyzer, symbols, states, day_end=0)
+    assert kinds == {'reused': len(symbols)}
+
+
+def test_rewritten_history_is_recomputed():
+    spy, symbols = _universe()
+    analyzer = _analyzer(spy)
+    hist, info = symbols['S0']
+    _, state, kind = analyzer.analyze_stock_incremental('S0', hist.iloc[:-1], info)
+    assert kind == 'recomputed'
+
+    # Dividend adjustment rescales the stored bars: they are no longer a prefix
+    adjusted = hist.copy()
+    adjusted[['Open', 'High', 'Low', 'Close']] *= 0.99
+    result, _, kind = analyzer.analyze_stock_incremental('S0', adjusted, info, state)
+    assert kind == 'recomputed'
+    assert result['quality_score'] == analyzer.analyze_stock('S0', adjusted, info)['quality_score']
+
+
+def test_rolling_window_is_rescored():
+    spy, symbols = _universe()
+    analyzer = _analyzer(spy.iloc[:-1])
+    states = {}
+    for symbol, (hist, info) in symbols.items():
+        _, states[symbol], kind = analyzer.analyze_stock_incremental(symbol, hist.iloc[:-1], info)
+        assert kind == 'recomputed'
+
+    # Next day of a period='2y' style fetch: one bar added, the first one dropped
+    analyzer._spy_hist_cache = spy
+    fresh = _analyzer(spy)
+    for symbol, (hist, info) in symbols.items():
+        window = hist.iloc[1:]
+        result, state, kind = analyzer.analyze_stock_incremental(symbol, window, info, states[symbol])
+        assert kind == 'rescored', symbol
+
+        expected = fresh.analyze_stock(symbol, window, info)
+        for key in ('quality_score', 'recommendation', 'confidence'):
+            assert result[key] == expected[key], (symbol, key)
+        stored = state['history']['metrics']
+        full = fresh._extract_metrics(symbol, window, info)
+        for name in HISTORY_METRICS:
+            assert np.isclose(stored[name], full[name], rtol=1e-9, atol=0, equal_nan=True), (symbol, name)
+
+        # Without the last stored bar the window does not continue the state
+        gapped = window.drop(hist.index[-2])
+        _, _, kind = analyzer.analyze_stock_incremental(symbol, gapped, info, states[symbol])
+        assert kind == 'recomputed', symbol
@@ -0,0 +1,75 @@
+import numpy as np
+
+from ml_meta_predictor import MLMetaPredictor
+
+
+def _stock(rng, symbol):
+    return {
+        'symbol': symbol,
+        'fundamentals': {'pe_ratio': rng.uniform(8, 40), 'revenue_growth': rng.uniform(-5, 25),
+                         'profit_margin': rng.uniform(0, 30), 'roe': rng.uniform(0, 30),
+                         'debt_equity': rng.uniform(0, 2)},
+        'momentum': {'rsi': rng.uniform(20, 80), 'volume_ratio': rng.uniform(0.5, 2),
+                     'relative_strength': rng.normal(0, 5), 'price_trend': rng.choice(['Uptrend', 'Downtrend']),
+                     'score': rng.uniform(20, 90)},
+        'risk': {'beta': rng.uniform(0.5, 2), 'volatility': rng.uniform(10, 60),
+                 'sharpe_ratio': rng.normal(0.5, 0.5), 'max_drawdown': -rng.uniform(5, 50)},
+        'technical': {'macd': rng.normal(0, 1), 'macd_signal': rng.normal(0, 1), 'macd_hist': rng.normal(0, 0.5),
+                      'bollinger_position': rng.uniform(0, 100), 'score': rng.uniform(20, 90)},
+        'sentiment': {'score': rng.uniform(20, 90), 'target_upside': rng.normal(10, 10),
+                      'institutional_ownership': rng.uniform(20, 90)},
+        'quality_score': rng.uniform(30, 90),
+        'market_context': {'vix': rng.uniform(12, 35), 'regime': 'normal', 'trend': 'UPTREND'},
+    }
+
+
+def _trained_predictor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    predictor = MLMetaPredictor(model_dir=str(tmp_path / 'models'))
+    for name, config in predictor.model_configs.items():
+        config['enabled'] = name in ('xgboost', 'random_forest', 'gradient_boost', 'neural_net') and config['enabled']
+    predictor.model_configs['random_forest']['params'].update(n_estimators=20, n_jobs=1)
+    predictor.model_configs['gradient_boost']['params']['n_estimators'] = 20
+    predictor.model_configs['xgboost']['params']['n_estimators'] = 20
+    predictor.distill_enabled = False
+
+    rng = np.random.default_rng(0)
+    X = np.vstack([predictor.extract_features(_stock(rng, f'T{i}')) for i in range(200)])
+    y = 0.3 * X[:, 22] - 0.2 * X[:, 15] + rng.normal(0, 2, len(X))
+    predictor.train(X, y, parallel=False)
+    return predictor
+
+
+def _reference_predict(predictor, stock):
+    """The per-stock path: one model call per model on a single scaled row."""
+    X_scaled = predictor.scaler.transform(predictor.extract_features(stock).reshape(1, -1))
+    predictions = {name: model.predict(X_scaled)[0] for name, model in predictor.models.items()}
+    ensemble = sum(pred * predictor.ensemble_weights.get(name, 0) for name, pred in predictions.items())
+    return {
+        'expected_return': float(ensemble),
+        'probability': float(1 / (1 + np.exp(-ensemble / 10.0))),
+        'confidence': float(1 / (1 + np.std(list(predictions.values())))),
+        'model_predictions': predictions,
+    }
+
+
+def test_predict_batch_matches_per_stock_predict(tmp_path, monkeypatch):
+    predictor = _trained_predictor(tmp_path, monkeypatch)
+    rng = np.random.default_rng(7)
+    stocks = [_stock(rng, f'S{i}') for i in range(25)]
+    stocks.insert(5, {'symbol': 'BAD', 'fundamentals': {'pe_ratio': 'n/a'}})
+
+    batch = predictor.predict_batch(stocks)
+    assert batch[5] is None
+
+    for stock, result in zip(stocks, batch):
+        if stock['symbol'] == 'BAD':
+            continue
+        single = predictor.predict(stock, explain=False)
+        reference = _reference_predict(predictor, stock)
+        for expected in (single, reference):
+            for key in ('expected_return', 'probability', 'confidence'):
+                assert np.isclose(result[key], expected[key], rtol=1e-6, atol=1e-9), (stock['symbol'], key)
+            assert set(result['model_predictions']) == set(expected['model_predictions'])
+            for name, value in expected['model_predictions'].items():
+                assert np.isclose(result['model_predictions'][name], value, rtol=1e-6, atol=1e-9)
@@ -0,0 +1,33 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+import model_tuning
+from model_tuning import tune_ensemble
+
+
+def _dataset(n_rows=4000, n_features=20, seed=3):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features))
+    y = X[:, 0] * 0.5 + rng.normal(scale=0.5, size=n_rows)
+    dates = pd.bdate_range('2022-01-03', periods=400)[rng.integers(0, 400, n_rows)]
+    return X, y, dates
+
+
+def test_tight_budget_stops_running_fits(monkeypatch):
+    # Two pool workers even on a single-core runner
+    monkeypatch.setattr(model_tuning.os, 'cpu_count', lambda: 2)
+    X, y, dates = _dataset()
+    # A single fold fit of either model takes far longer than the budget
+    base = {'random_forest': {'n_estimators': 1000, 'max_depth': None, 'random_state': 0},
+            'gradient_boost': {'n_estimators': 3000, 'max_depth': 6, 'random_state': 0}}
+
+    started = time.time()
+    summary = tune_ensemble(X, y, dates, base, n_folds=2, purge_days=5, time_budget=8, max_trials=1)
+    elapsed = time.time() - started
+
+    assert elapsed < 20, elapsed
+    assert summary['candidates_total'] == 2
+    assert summary['candidates_evaluated'] == 0
+    assert summary['best'] == {} and summary['weights'] == {}
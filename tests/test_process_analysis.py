@@ -0,0 +1,143 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import process_analysis
+from premium_stock_analyzer import PremiumStockAnalyzer
+from process_analysis import ProcessAnalysisPool, SharedPricePanel
+from stock_result import StockResult
+from ultimate_strategy_analyzer_fixed import FixedUltimateStrategyAnalyzer
+
+
+def _hist_map(seed=5):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2023-01-02', periods=300).as_unit('ns')
+    hist_map = {}
+    for i, n in enumerate((300, 260, 120)):
+        close = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n)))
+        df = pd.DataFrame({
+            'Open': close * 0.995, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+            'Volume': rng.integers(100_000, 2_000_000, n).astype(float),
+        }, index=dates[-n:])
+        if i == 1:
+            # A halt: rows missing in the middle of the history
+            df = df.drop(df.index[100:110])
+        hist_map[f'S{i}'] = df
+    return hist_map
+
+
+def _attached_history(spec, symbol):
+    panel = SharedPricePanel.attach(spec)
+    try:
+        return panel.history(symbol)
+    finally:
+        panel.close()
+
+
+def _analyzer(spy):
+    analyzer = PremiumStockAnalyzer()
+    analyzer.result_memo = None
+    enhanced = analyzer.enhanced_analyzer
+    sectors = {
+        etf: {'sector_name': name, 'momentum_5d': 5.0 - rank, 'rank': rank,
+              'tier': 'TOP' if rank <= 3 else 'MIDDLE' if rank <= 8 else 'BOTTOM'}
+        for rank, (etf, name) in enumerate(enhanced.SECTOR_ETFS.items(), 1)
+    }
+    enhanced.sector_momentum_cache = dict(enhanced._empty_sector_result(), sectors=sectors)
+    enhanced.sector_cache_time = pd.Timestamp.now().to_pydatetime()
+    analyzer._spy_hist_cache = spy
+    analyzer._spy_cache_time = time.time()
+    return analyzer
+
+
+def test_create_attach_history_round_trip():
+    hist_map = _hist_map()
+    with SharedPricePanel.create(hist_map) as panel:
+        assert len(panel) == 3 and 'S1' in panel and 'XYZ' not in panel
+        assert panel.history('XYZ') is None
+        for symbol, df in hist_map.items():
+            pd.testing.assert_frame_equal(panel.history(symbol), df, check_freq=False)
+
+        attached = SharedPricePanel.attach(panel.spec)
+        pd.testing.assert_frame_equal(attached.history('S1'), hist_map['S1'], check_freq=False)
+        attached.close()
+        # Detaching a non-owner leaves the block to its creator
+        pd.testing.assert_frame_equal(panel.history('S2'), hist_map['S2'], check_freq=False)
+
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            history = executor.submit(_attached_history, panel.spec, 'S1').result()
+        pd.testing.assert_frame_equal(history, hist_map['S1'], check_freq=False)
+
+
+def test_close_unlinks_the_block():
+    panel = SharedPricePanel.create(_hist_map())
+    name = panel.spec['name']
+    panel.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_panel_requires_close():
+    with pytest.raises(ValueError):
+        SharedPricePanel.create(_hist_map(), fields=('Open', 'High', 'Low', 'Volume'))
+
+
+def test_premium_workers_score_like_the_parent():
+    hist_map = _hist_map()
+    spy = hist_map['S0'].copy()
+    analyzer = _analyzer(spy)
+    info = {'trailingPE': 18, 'revenueGrowth': 0.1, 'profitMargins': 0.12, 'returnOnEquity': 0.15,
+            'beta': 1.1, 'sector': 'Technology'}
+    with SharedPricePanel.create(hist_map) as panel:
+        with ProcessAnalysisPool(panel, 'premium', analyzer.worker_state(), workers=1) as pool:
+            record = pool.analyze('S1', info)
+    assert isinstance(record, StockResult)
+    expected = analyzer.analyze_stock('S1', hist_data=hist_map['S1'], info=info)
+    assert record['quality_score'] == expected['quality_score']
+    assert record['recommendation'] == expected['recommendation']
+
+
+def test_broken_pool_is_flagged():
+    with SharedPricePanel.create(_hist_map()) as panel:
+        # Worker start-up fails, so every task breaks the pool
+        with ProcessAnalysisPool(panel, 'unknown', workers=1) as pool:
+            with pytest.raises(Exception):
+                pool.analyze('S0')
+            # score_symbol checks the flag and scores in-process from then on
+            assert pool.broken
+            # map() raises too, so _run_process_analysis falls back to threads
+            with pytest.raises(Exception):
+                list(pool.map(['S0']))
+
+
+def test_pool_start_failure_falls_back_to_threads(monkeypatch):
+    created = []
+    original_create = SharedPricePanel.create
+
+    def create(hist_map, symbols=None, fields=process_analysis.PANEL_FIELDS):
+        panel = original_create(hist_map, symbols, fields)
+        created.append(panel.spec['name'])
+        return panel
+
+    def failing_pool(*args, **kwargs):
+        raise OSError("cannot start workers")
+
+    monkeypatch.setattr(SharedPricePanel, 'create', staticmethod(create))
+    monkeypatch.setattr(process_analysis, 'ProcessAnalysisPool', failing_pool)
+    analyzer = FixedUltimateStrategyAnalyzer.__new__(FixedUltimateStrategyAnalyzer)
+    analyzer.analysis_mode = 'process'
+    analyzer.process_workers = 2
+    analyzer.premium_analyzer = SimpleNamespace(worker_state=lambda: {})
+
+    assert analyzer._start_process_pool(_hist_map(), 3) == (None, None)
+    # The panel created for the failed pool is freed
+    assert len(created) == 1
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=created[0])
@@ -0,0 +1,40 @@
+import multiprocessing
+import sqlite3
+
+from result_memo import ResultMemo
+
+
+def _writer(cache_dir, start):
+    memo = ResultMemo(cache_dir=cache_dir)
+    for i in range(start, start + 50):
+        memo.put(f'k{i}', {'i': i}, namespace='t', symbol=f'S{i}')
+        assert memo.get(f'k{i}') == {'i': i}
+    memo.close()
+
+
+def test_get_does_not_write_until_touches_are_flushed(tmp_path):
+    memo = ResultMemo(cache_dir=str(tmp_path))
+    memo.put('a', {'score': 1}, namespace='t', symbol='A')
+    stored = sqlite3.connect(memo.db_file).execute(
+        "SELECT last_access FROM results WHERE key = 'a'").fetchone()[0]
+
+    assert memo.get('a') == {'score': 1}
+    assert memo.get('missing') is None
+    conn = sqlite3.connect(memo.db_file)
+    assert conn.execute("SELECT last_access FROM results WHERE key = 'a'").fetchone()[0] == stored
+
+    memo.close()
+    assert conn.execute("SELECT last_access FROM results WHERE key = 'a'").fetchone()[0] > stored
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert memo.stats()['hits'] == 1 and memo.stats()['misses'] == 1
+
+
+def test_concurrent_processes_share_the_store(tmp_path):
+    ctx = multiprocessing.get_context('spawn')
+    procs = [ctx.Process(target=_writer, args=(str(tmp_path), n * 50)) for n in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    assert [p.exitcode for p in procs] == [0, 0, 0]
+    assert ResultMemo(cache_dir=str(tmp_path)).stats()['entries'] == 150
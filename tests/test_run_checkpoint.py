@@ -0,0 +1,55 @@
+import json
+import os
+
+from run_checkpoint import RunCheckpoint, latest_incomplete, read_summary
+
+
+def _run(root, run_id, status, pid=None):
+    checkpoint = RunCheckpoint(run_id, root=str(root))
+    checkpoint.save_symbol('AAPL', {'score': 1})
+    checkpoint.mark(status)
+    checkpoint.close()
+    if pid is not None:
+        manifest_file = os.path.join(str(root), run_id, 'manifest.json')
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+        manifest['pid'] = pid
+        with open(manifest_file, 'w') as f:
+            json.dump(manifest, f)
+
+
+def _dead_pid():
+    pid = 2 ** 22
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return pid
+        except PermissionError:
+            pass
+        pid += 1
+
+
+def test_latest_incomplete_skips_stopped_and_live_runs(tmp_path):
+    _run(tmp_path, '20260101_090000', 'failed')
+    _run(tmp_path, '20260102_090000', 'running', pid=_dead_pid())
+    _run(tmp_path, '20260102_100000', 'stopped')
+    _run(tmp_path, '20260102_110000', 'running', pid=os.getpid())
+    _run(tmp_path, '20260102_120000', 'complete')
+
+    assert latest_incomplete(str(tmp_path)) == '20260102_090000'
+    assert latest_incomplete(str(tmp_path), prefix='20260101') == '20260101_090000'
+    assert latest_incomplete(str(tmp_path), prefix='20260103') is None
+
+
+def test_read_summary_leaves_the_run_untouched(tmp_path):
+    _run(tmp_path, '20260102_090000', 'failed')
+    manifest_file = os.path.join(str(tmp_path), '20260102_090000', 'manifest.json')
+    before = open(manifest_file).read()
+
+    summary = read_summary('20260102_090000', root=str(tmp_path))
+
+    assert summary['status'] == 'failed'
+    assert summary['symbols'] == 1
+    assert open(manifest_file).read() == before
+    assert read_summary('missing', root=str(tmp_path)) is None
@@ -0,0 +1,108 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from premium_stock_analyzer import PremiumStockAnalyzer
+
+# quality_score / recommendation / confidence of the fixture symbols as the
+# per-symbol scalar scoring (before score_universe) computed them
+SCALAR_RESULTS = {
+    'S0': (59.8, 'HOLD', 0.6),
+    'S1': (68.73, 'WEAK BUY', 0.7),
+    'S2': (68.82, 'WEAK BUY', 0.8),
+    'S3': (59.8, 'HOLD', 0.7),
+    'S4': (62.15, 'WEAK BUY', 0.7),
+    'S5': (63.3, 'WEAK BUY', 0.6),
+    'S6': (61.55, 'WEAK BUY', 0.7),
+    'S7': (56.73, 'HOLD', 0.5),
+    'S8': (62.55, 'WEAK BUY', 0.7),
+    'S9': (58.05, 'HOLD', 0.7),
+    'S10': (59.55, 'HOLD', 0.6),
+    'S11': (74.32, 'BUY', 0.8),
+    'S12': (54.05, 'HOLD', 0.7),
+    'S13': (60.6, 'WEAK BUY', 0.8),
+    'S14': (66.85, 'WEAK BUY', 0.6),
+    'S15': (63.7, 'WEAK BUY', 0.6),
+    'S16': (57.45, 'HOLD', 0.7),
+    'S17': (69.25, 'WEAK BUY', 0.8),
+    'S18': (71.57, 'BUY', 0.9),
+    'S19': (56.83, 'HOLD', 0.6),
+}
+
+
+def _bars(rng, n, drift, vol):
+    close = 40 * np.exp(np.cumsum(rng.normal(drift, vol, n)))
+    return pd.DataFrame({
+        'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+        'Volume': rng.integers(500_000, 3_000_000, n).astype(float),
+    }, index=pd.bdate_range('2025-01-01', periods=300)[-n:])
+
+
+def _info(seed):
+    rng = np.random.default_rng(seed)
+    info = {
+        'trailingPE': rng.choice([None, rng.uniform(-5, 80)]), 'forwardPE': rng.uniform(5, 50),
+        'revenueGrowth': rng.choice([None, rng.uniform(-0.2, 0.6)]), 'profitMargins': rng.uniform(-0.1, 0.4),
+        'returnOnEquity': rng.uniform(-0.1, 0.5), 'debtToEquity': rng.choice([None, rng.uniform(0, 300)]),
+        'earningsGrowth': rng.uniform(-0.3, 0.8), 'beta': rng.choice([None, rng.uniform(0.3, 2.5)]),
+        'heldPercentInstitutions': rng.uniform(0.1, 0.95), 'recommendationMean': rng.uniform(1, 4.5),
+        'recommendationKey': rng.choice(['buy', 'strong_buy', 'hold', 'sell', 'none']),
+        'targetMeanPrice': rng.uniform(20, 90), 'sector': 'Technology',
+    }
+    return {k: v for k, v in info.items() if v is not None}
+
+
+def _universe(n_symbols=20, seed=3):
+    rng = np.random.default_rng(seed)
+    spy = _bars(rng, 300, 0.0004, 0.01)
+    symbols = {}
+    for i in range(n_symbols):
+        hist = _bars(rng, int(rng.integers(30, 300)), rng.normal(0, 0.002), rng.uniform(0.005, 0.04))
+        symbols[f'S{i}'] = (hist, _info(i))
+    return spy, symbols
+
+
+def _analyzer(spy):
+    analyzer = PremiumStockAnalyzer()
+    analyzer.result_memo = None
+    analyzer.enhanced_analyzer = None
+    analyzer._spy_hist_cache = spy
+    analyzer._spy_cache_time = time.time()
+    return analyzer
+
+
+def test_score_universe_matches_per_symbol_scores():
+    spy, symbols = _universe()
+    analyzer = _analyzer(spy)
+
+    rows = []
+    for symbol, (hist, info) in symbols.items():
+        metrics = analyzer._extract_metrics(symbol, hist, info, current_price=float(hist['Close'].iloc[-1]))
+        metrics['enhancement_score'] = float(np.random.default_rng(len(hist)).uniform(20, 80))
+        metrics['earnings_imminent'] = len(hist) % 3 == 0
+        rows.append(metrics)
+    metrics = pd.DataFrame(rows)
+
+    # Whole universe in one shuffled table vs one single-row table per symbol
+    shuffled = metrics.sample(frac=1, random_state=1)
+    table = analyzer.score_universe(shuffled).set_index('symbol')
+    for _, row in metrics.iterrows():
+        single = analyzer.score_universe(pd.DataFrame([row])).iloc[0]
+        scored = table.loc[row['symbol']]
+        for name in single.index.drop('symbol'):
+            expected, actual = single[name], scored[name]
+            if isinstance(expected, (float, np.floating)) and np.isnan(expected):
+                assert np.isnan(actual), (row['symbol'], name)
+            else:
+                assert actual == expected, (row['symbol'], name)
+
+
+def test_analyze_stock_keeps_scalar_scores():
+    spy, symbols = _universe()
+    analyzer = _analyzer(spy)
+    for symbol, (hist, info) in symbols.items():
+        result = analyzer.analyze_stock(symbol, hist, info)
+        assert result['success'], result.get('error')
+        expected = SCALAR_RESULTS[symbol]
+        assert (result['quality_score'], result['recommendation'], result['confidence']) == expected, symbol
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from premium_quality_universe import get_premium_universe
+from ultimate_strategy_analyzer_fixed import FixedUltimateStrategyAnalyzer
+
+
+def _analyzer(mode='thread', ai_enabled=False, denylist=()):
+    analyzer = FixedUltimateStrategyAnalyzer.__new__(FixedUltimateStrategyAnalyzer)
+    analyzer.stage_workers = 4
+    analyzer.analysis_mode = mode
+    analyzer.ai_selector = SimpleNamespace(enabled=ai_enabled)
+    analyzer._symbol_denylist = set(denylist)
+    return analyzer
+
+
+def _upstream(graph, stage_name):
+    """Names of every stage stage_name (transitively) depends on."""
+    producers = {out: name for name, stage in graph.stages.items() for out in stage.outputs}
+    seen, pending = set(), list(graph.stages[stage_name].inputs)
+    while pending:
+        producer = producers.get(pending.pop())
+        if producer is not None and producer not in seen:
+            seen.add(producer)
+            pending.extend(graph.stages[producer].inputs)
+    return seen
+
+
+def test_history_prefetch_does_not_wait_for_ai_selection():
+    graph = _analyzer()._build_stage_graph(auto_export=False)
+    assert 'ai_universe' not in _upstream(graph, 'history_prefetch')
+    assert 'universe' not in _upstream(graph, 'history_prefetch')
+    assert {'ai_universe', 'history_prefetch'} <= _upstream(graph, 'ml_training')
+    graph.order(['progress'])
+
+
+def test_process_mode_quality_analysis_runs_after_ml_training():
+    graph = _analyzer('process')._build_stage_graph(auto_export=False)
+    assert 'ml_training' in _upstream(graph, 'quality_analysis')
+    graph.order(['progress'])
+
+    graph = _analyzer('thread')._build_stage_graph(auto_export=False)
+    assert 'ml_training' not in _upstream(graph, 'quality_analysis')
+
+
+def test_candidates_cover_the_ai_selection_pool():
+    static = ['AAA', 'BBB', 'CCC']
+    assert _analyzer()._stage_candidates(static) == static
+
+    premium = get_premium_universe()
+    candidates = _analyzer(ai_enabled=True, denylist={'BBB', premium[0]})._stage_candidates(static)
+    assert candidates[:2] == ['AAA', 'CCC']
+    assert set(candidates) == (set(static) | set(premium)) - {'BBB', premium[0]}
+    assert len(candidates) == len(set(candidates))
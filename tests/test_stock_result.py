@@ -0,0 +1,96 @@
+"""StockResult: dict round-trips, pickling across processes and flat() defaults."""
+
+import copy
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from stock_result import FLAT_FIELDS, PICK_DEFAULTS, StockResult, as_record
+
+
+def _result(symbol='AAA'):
+    return {
+        'symbol': symbol,
+        'quality_score': 71.5,
+        'recommendation': 'BUY',
+        'current_price': 123.4,
+        'sector': 'Technology',
+        'fundamentals': {'pe_ratio': 21.0, 'score': 18.0, 'grade': 'B', 'custom_metric': 3},
+        'momentum': {'price_trend': 'bullish', 'rsi': 58.2, 'score': 20.0, 'grade': 'A'},
+        'risk': {'beta': 1.3, 'max_drawdown': -0.21, 'score': 12.0, 'grade': 'C', 'risk_level': 'Medium'},
+        'technical': {'score': 11.0, 'grade': 'B', 'macd': 0.4},
+        'sentiment': {'analyst_rating': 2.1, 'score': 7.0, 'grade': 'B'},
+        'enhanced': {'enhancement_score': 4.0, 'vwap': 120.0},
+        'analysis_date': '2024-01-02T00:00:00',
+        'success': True,
+        'model_note': {'source': 'unit'},
+    }
+
+
+def _assert_same(record, expected):
+    assert record.to_dict() == expected
+    assert list(record.to_dict()) == list(expected)
+    for component in ('fundamentals', 'momentum', 'risk'):
+        assert list(record[component]) == list(expected[component])
+
+
+def test_from_dict_to_dict_round_trip_keeps_keys_order_and_extras():
+    result = _result()
+    record = StockResult.from_dict(result)
+    _assert_same(record, result)
+    assert record['fundamentals']['custom_metric'] == 3
+    assert record['model_note'] == {'source': 'unit'}
+    assert as_record(record) is record
+    assert StockResult.from_dict(record.to_dict()).to_dict() == result
+
+
+def test_update_and_setitem_match_dict_semantics():
+    result = _result()
+    record = StockResult.from_dict(result)
+    changes = {'quality_score': 80.0, 'momentum': {'rsi': 40.0, 'grade': 'C'}, 'ml_score': 0.7}
+    record.update(changes, recommendation='HOLD')
+    result.update(changes, recommendation='HOLD')
+    assert record.to_dict() == result
+    record.update([('confidence', 'High')])
+    assert record['confidence'] == 'High'
+    assert record.get('rsi_14') == 40.0
+
+
+def test_pickle_round_trip():
+    result = _result()
+    record = pickle.loads(pickle.dumps(StockResult.from_dict(result)))
+    _assert_same(record, result)
+
+
+def test_process_pool_round_trip():
+    results = [_result(symbol) for symbol in ('AAA', 'BBB')]
+    records = [StockResult.from_dict(result) for result in results]
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        returned = list(executor.map(copy.copy, records))
+    for record, result in zip(returned, results):
+        assert isinstance(record, StockResult)
+        _assert_same(record, result)
+
+
+def test_flat_defaults_match_original_flattening():
+    record = StockResult.from_dict({'symbol': 'EMPTY', 'quality_score': 10.0,
+                                    'momentum': {}, 'risk': {}, 'success': True})
+    pick = record.flat(defaults=PICK_DEFAULTS)
+    assert pick['price_trend'] == 'neutral'
+    assert pick['beta'] == 1
+    assert pick['risk_level'] == 'Unknown'
+    assert pick['volume_trend'] is None
+    assert pick['fundamentals_grade'] is None
+    assert pick['sector'] == 'Unknown'
+
+    exported = record.flat(nested=False)
+    for name, (_, _, absent) in FLAT_FIELDS.items():
+        assert exported[name] == absent
+    assert exported['risk_level'] == 'N/A'
+
+    full = StockResult.from_dict(_result()).flat(defaults=PICK_DEFAULTS)
+    assert full['price_trend'] == 'bullish'
+    assert full['beta'] == 1.3
+    assert full['risk_level'] == 'Medium'
+    assert full['momentum'] == _result()['momentum']
@@ -0,0 +1,118 @@
+import threading
+import time
+
+from streaming_pipeline import StreamingPipeline
+
+
+def _run(pipeline, items, timeout=10, **kwargs):
+    """pipeline.run on a background thread; fails instead of hanging the suite."""
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.update(stats=pipeline.run(items, **kwargs)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "pipeline did not shut down"
+    return outcome['stats']
+
+
+def _pipeline_threads():
+    return [t for t in threading.enumerate() if t.name.startswith(('fetch_', 'analyze_')) and t.is_alive()]
+
+
+def test_backpressure_bounds_fetched_payloads():
+    gate = threading.Event()
+    fetched = []
+    lock = threading.Lock()
+
+    def fetch(item):
+        with lock:
+            fetched.append(item)
+        return item
+
+    def analyze(item, payload):
+        gate.wait(10)
+        return payload
+
+    results = []
+    pipeline = StreamingPipeline(fetch, analyze, lambda item, result: results.append(result),
+                                 fetch_workers=2, analyze_workers=1, queue_size=3)
+    runner = threading.Thread(target=pipeline.run, args=(range(20),), daemon=True)
+    runner.start()
+    time.sleep(0.5)
+    # Blocked analyzer: queue_size payloads queued, one being analyzed and one
+    # held by each fetcher waiting for queue space - nothing else is fetched
+    assert len(fetched) == 3 + 1 + 2
+    gate.set()
+    runner.join(10)
+    assert not runner.is_alive()
+    assert sorted(results) == list(range(20))
+    assert pipeline.stats['succeeded'] == 20
+    assert pipeline.stats['max_queue'] == 3
+
+
+def test_failed_items_are_replaced_in_the_same_run():
+    fetch_order = []
+
+    def fetch(item):
+        fetch_order.append(item)
+        return None if item.startswith('BAD') else item
+
+    replacements = {'BAD1': ['R1'], 'BAD2': ['BAD3'], 'BAD3': ['R3', 'R4']}
+    pipeline = StreamingPipeline(fetch, lambda item, payload: payload, fetch_workers=1, analyze_workers=1,
+                                 replace=lambda item: replacements.get(item))
+    seen = []
+    stats = _run(pipeline, ['A', 'BAD1', 'B', 'BAD2', 'C'], on_item=lambda n, item, ok: seen.append((item, ok)))
+
+    # Replacements are served before the rest of the items, chains included
+    assert fetch_order == ['A', 'BAD1', 'R1', 'B', 'BAD2', 'BAD3', 'R3', 'R4', 'C']
+    assert stats['completed'] == 9
+    assert stats['failed'] == 3
+    assert stats['replaced'] == 4
+    assert sorted(item for item, ok in seen if ok) == ['A', 'B', 'C', 'R1', 'R3', 'R4']
+
+
+def test_analyze_failure_replacement_keeps_fetchers_running():
+    def analyze(item, payload):
+        if item == 'X':
+            # Fails after the cursor is exhausted: fetchers must wait for its replacement
+            time.sleep(0.3)
+            return None
+        return payload
+
+    results = []
+    pipeline = StreamingPipeline(lambda item: item, analyze, lambda item, result: results.append(result),
+                                 fetch_workers=2, analyze_workers=1, replace=lambda item: ['Y'] if item == 'X' else [])
+    stats = _run(pipeline, ['A', 'X'])
+    assert sorted(results) == ['A', 'Y']
+    assert stats['replaced'] == 1
+    assert stats['completed'] == 3
+
+
+def test_stage_exceptions_fail_items_and_shut_down():
+    def fetch(item):
+        if item == 1:
+            raise RuntimeError("fetch failed")
+        return item
+
+    def analyze(item, payload):
+        if item == 2:
+            raise ValueError("analyze failed")
+        return payload
+
+    def sink(item, result):
+        if item == 3:
+            raise KeyError("sink failed")
+
+    def replace(item):
+        raise RuntimeError("no replacements")
+
+    def on_item(count, item, ok):
+        raise RuntimeError("UI callback failed")
+
+    pipeline = StreamingPipeline(fetch, analyze, sink, fetch_workers=3, analyze_workers=2, queue_size=2,
+                                 replace=replace)
+    stats = _run(pipeline, range(10), on_item=on_item)
+    assert stats['completed'] == 10
+    assert stats['failed'] == 3
+    assert stats['succeeded'] == 7
+    assert stats['replaced'] == 0
+    assert not _pipeline_threads()
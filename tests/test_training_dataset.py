@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from premium_stock_analyzer import PremiumStockAnalyzer
+from price_panel import build_price_panel
+from training_dataset import CURRENT_INFO_FIELDS, build_training_set
+
+
+def _hist_map(n_symbols=4, n_days=320, seed=3):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2024-01-01', periods=n_days)
+    hist_map = {}
+    for i in range(n_symbols):
+        close = 40 * np.exp(np.cumsum(rng.normal(0.0005, 0.015, n_days)))
+        hist_map[f'S{i}'] = pd.DataFrame({
+            'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+            'Volume': rng.integers(1_000_000, 2_000_000, n_days).astype(float),
+        }, index=dates)
+    return hist_map
+
+
+def test_walk_forward_samples_carry_no_current_info():
+    hist_map = _hist_map()
+    scorer = PremiumStockAnalyzer()
+    table = build_training_set(build_price_panel(hist_map), scorer, horizon=30, step=5)
+
+    assert len(table) > 0
+    for name in CURRENT_INFO_FIELDS:
+        assert table[name].isna().all(), name
+    # Every sample is at least one horizon older than the last bar
+    last_bar = max(df.index[-1] for df in hist_map.values())
+    assert (table['date'] <= last_bar - pd.tseries.offsets.BDay(30)).all()
+    # Labels still come from the price history
+    sample = table.iloc[0]
+    close = hist_map[sample['symbol']]['Close']
+    pos = close.index.get_loc(sample['date'])
+    expected = (close.iloc[pos + 30] / close.iloc[pos] - 1) * 100
+    assert np.isclose(sample['forward_return'], expected)
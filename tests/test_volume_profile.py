@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+import advanced_analyzer
+import enhanced_signals
+from advanced_analyzer import AdvancedTradingAnalyzer
+from advanced_data_fetcher import AdvancedDataFetcher
+from enhanced_signals import EnhancedSignalsAnalyzer
+from price_panel import build_price_panel
+from volume_profile import volume_profile, volume_profile_batch
+
+
+def _ohlcv(n=120, seed=2):
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    high = close * (1 + rng.uniform(0, 0.02, n))
+    low = close * (1 - rng.uniform(0, 0.02, n))
+    # A few zero-range bars (High == Low)
+    high[::17] = low[::17] = close[::17]
+    return pd.DataFrame({
+        'Open': close, 'High': high, 'Low': low, 'Close': close,
+        'Volume': rng.integers(100_000, 2_000_000, n).astype(float),
+    }, index=pd.bdate_range('2025-01-01', periods=n))
+
+
+def _reference_profile(df, bins=20, value_area_pct=0.70):
+    """Per-bar, per-bin loop: each bar's volume spread over its High-Low range."""
+    edges = np.linspace(df['Low'].min(), df['High'].max(), bins + 1)
+    width = (edges[-1] - edges[0]) / bins
+    hist = np.zeros(bins)
+    for high, low, close, volume in df[['High', 'Low', 'Close', 'Volume']].itertuples(index=False):
+        if high > low:
+            for b in range(bins):
+                overlap = min(high, edges[b + 1]) - max(low, edges[b])
+                if overlap > 0:
+                    hist[b] += volume * overlap / (high - low)
+        else:
+            hist[min(int((close - edges[0]) // width), bins - 1)] += volume
+
+    poc = int(hist.argmax())
+    lo = hi = poc
+    covered = hist[poc]
+    while covered < hist.sum() * value_area_pct:
+        up = hist[hi + 1] if hi + 1 < bins else -1.0
+        down = hist[lo - 1] if lo - 1 >= 0 else -1.0
+        if up >= down:
+            hi += 1
+            covered += up
+        else:
+            lo -= 1
+            covered += down
+    centers = (edges[:-1] + edges[1:]) / 2
+    mean = hist.mean()
+    hvn = [centers[b] for b in range(bins)
+           if hist[b] > mean and (b == 0 or hist[b] >= hist[b - 1]) and (b == bins - 1 or hist[b] >= hist[b + 1])]
+    lvn = [centers[b] for b in range(bins)
+           if hist[b] < mean and (b == 0 or hist[b] <= hist[b - 1]) and (b == bins - 1 or hist[b] <= hist[b + 1])]
+    return {'profile': hist, 'poc': centers[poc], 'vah': edges[hi + 1], 'val': edges[lo], 'hvn': hvn, 'lvn': lvn}
+
+
+def test_kernel_matches_per_bar_loop():
+    df = _ohlcv()
+    for lookback in (None, 20, 50):
+        window = df.tail(lookback) if lookback else df
+        expected = _reference_profile(window)
+        profile = volume_profile(df, lookback=lookback)
+        assert np.allclose(profile['profile'], expected['profile'], rtol=1e-9)
+        for key in ('poc', 'vah', 'val'):
+            assert np.isclose(profile[key], expected[key], rtol=1e-12), (lookback, key)
+        assert np.allclose(profile['hvn'], expected['hvn']) and np.allclose(profile['lvn'], expected['lvn'])
+        assert np.isclose(profile['profile'].sum(), window['Volume'].sum())
+
+
+def test_batch_matches_single_symbol_profiles():
+    hist_map = {f'S{i}': _ohlcv(n=60 + 20 * i, seed=i) for i in range(4)}
+    panel = build_price_panel(hist_map, fields=('High', 'Low', 'Close', 'Volume'))
+    table = volume_profile_batch(panel, lookbacks=(20, 50))
+    for (lookback, symbol), row in table.iterrows():
+        single = volume_profile(hist_map[symbol], lookback=lookback)
+        for key in ('poc', 'vah', 'val', 'poc_volume_pct'):
+            assert np.isclose(row[key], single[key], rtol=1e-12), (lookback, symbol, key)
+
+
+def test_fetcher_reports_real_poc_and_value_area():
+    df = _ohlcv()
+    fetcher = AdvancedDataFetcher.__new__(AdvancedDataFetcher)
+    levels = fetcher._calculate_volume_profile(df['High'], df['Low'], df['Close'], df['Volume'])
+    expected = _reference_profile(df)
+    # Intended change: previously poc = last close, vah / val = 20-day high / low
+    assert np.isclose(levels['poc'], expected['poc'])
+    assert np.isclose(levels['vah'], expected['vah']) and np.isclose(levels['val'], expected['val'])
+    assert levels['poc'] != df['Close'].iloc[-1]
+    assert levels['vah'] != df['High'].rolling(20).max().iloc[-1]
+
+
+def test_analyzer_and_vwap_only_add_profile_fields(monkeypatch):
+    df = _ohlcv()
+    analyzer = AdvancedTradingAnalyzer.__new__(AdvancedTradingAnalyzer)
+    enhanced = EnhancedSignalsAnalyzer()
+    with_profile = analyzer.calculate_volume_profile(df), enhanced.calculate_vwap(df)
+
+    monkeypatch.setattr(advanced_analyzer, 'volume_profile', lambda *a, **k: {})
+    monkeypatch.setattr(enhanced_signals, 'volume_profile', lambda *a, **k: {})
+    without = analyzer.calculate_volume_profile(df), enhanced.calculate_vwap(df)
+
+    added = ({'poc', 'value_area_high', 'value_area_low', 'high_volume_nodes', 'low_volume_nodes', 'price_vs_poc'},
+             {'poc', 'value_area_high', 'value_area_low'})
+    for full, bare, new_keys in zip(with_profile, without, added):
+        # Intended change: the profile levels are added, every other field is unchanged
+        assert new_keys <= set(full)
+        for key in set(full) - new_keys:
+            assert full[key] == bare[key] or (pd.isna(full[key]) and pd.isna(bare[key])), key
+    assert np.isclose(with_profile[0]['poc'], _reference_profile(df.tail(50))['poc'])
+    assert with_profile[1]['poc'] == round(_reference_profile(df.tail(20))['poc'], 2)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Walk-Forward Training Set Builder
+Point-in-time ML samples for every symbol of a price panel
+
+Instead of one analyze_stock() call per symbol at a single past date, the
+builder evaluates the 15 quality-metric inputs for every bar of every symbol
+in a few column-wise rolling/expanding passes, samples them every `step`
+bars and labels each sample with the forward return over `horizon` bars:
+- Price inputs (momentum, risk, technical) see only the bars up to the sample
+- Relative strength uses the benchmark as of the sample date
+- Info-derived inputs (CURRENT_INFO_FIELDS) are left missing
+- Rows are scored with PremiumStockAnalyzer.score_universe
+
+Fundamentals, analyst data, ownership, beta and target price only exist as
+today's info snapshot. Every labelled sample is at least `horizon` bars older
+than that snapshot, so those values would describe the period the label is
+measured over. target_upside is the worst case: today's targetMeanPrice over
+the sample's close largely restates forward_return. The samples therefore
+carry NaN for these fields and score_universe gives them its neutral
+missing-value scores. Point-in-time fundamentals reach the model through the
+feature store rows recorded for live picks.
+
+The result is a flat table (symbol, date, forward_return, metrics, scores)
+that MLMetaPredictor.features_from_table turns into a feature matrix.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+from price_panel import align_right, aligned_dates, _normalize_index
+
+# Inputs that come from the current info dict and have no history
+CURRENT_INFO_FIELDS = (
+    'pe_ratio', 'revenue_growth', 'profit_margin', 'roe', 'debt_equity', 'earnings_growth',
+    'beta', 'institutional_ownership', 'analyst_mean', 'analyst_key', 'target_upside',
+)
+
+
+def _price_metrics(data: Dict[str, pd.DataFrame], count: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Momentum / risk / technical inputs of PremiumStockAnalyzer for every bar.
+
+    Args:
+        data: align_right panel (rows x symbols)
+        count: Number of bars each symbol has up to each row
+
+    Returns:
+        Dict of metric -> rows x symbols array, NaN where the per-stock
+        calculation would not have enough history
+    """
+    close, high, low, volume = data['Close'], data['High'], data['Low'], data['Volume']
+    metrics = {}
+
+    # Momentum (needs 200 bars)
+    momentum_ok = count >= 200
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = -delta.where(delta < 0, 0).rolling(14).mean()
+    vol_20 = volume.rolling(20).mean().to_numpy()
+    vol_recent = volume.rolling(5).mean().to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        volume_ratio = np.where(vol_20 > 0, vol_recent / vol_20, 1)
+    high_52w = high.rolling(252, min_periods=1).max()
+    momentum = {
+        'ma_50': close.rolling(50).mean().to_numpy(),
+        'ma_200': close.rolling(200).mean().to_numpy(),
+        'price': close.to_numpy(),
+        'rsi': (100 - (100 / (1 + gain / loss))).to_numpy(),
+        'volume_ratio': volume_ratio,
+        'pct_from_52w_high': (((close - high_52w) / high_52w) * 100).to_numpy(),
+        # Stock side of the 3m / 6m relative strength (benchmark applied per sample)
+        'stock_return_3m': np.where(count >= 63, ((close / close.shift(62) - 1) * 100).to_numpy(), 0),
+        'stock_return_6m': ((close / close.shift(125) - 1) * 100).to_numpy(),
+    }
+    for name, values in momentum.items():
+        metrics[name] = np.where(momentum_ok, values, np.nan)
+
+    # Risk (expanding over each symbol's full history so far)
+    returns = close.pct_change()
+    n_returns = count - 1
+    expanding = returns.expanding()
+    ret_mean = expanding.mean().to_numpy()
+    ret_std = expanding.std().to_numpy()
+    cumulative = (1 + returns).cumprod()
+    drawdown = (cumulative - cumulative.cummax()) / cumulative.cummax()
+    metrics['volatility'] = np.where(n_returns >= 21, ret_std * np.sqrt(252) * 100, np.nan)
+    metrics['max_drawdown'] = np.where(count >= 252, drawdown.cummin().to_numpy() * 100, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(ret_std > 0, (ret_mean / ret_std) * np.sqrt(252), 0)
+    metrics['sharpe_ratio'] = np.where(n_returns >= 252, sharpe, np.nan)
+    metrics['var_95'] = np.where(n_returns >= 252, expanding.quantile(0.05).to_numpy() * 100, np.nan)
+
+    # Technical (needs 50 bars)
+    technical_ok = count >= 50
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    rolling = close.rolling(window=20)
+    ma20 = rolling.mean().to_numpy()
+    std20 = rolling.std().to_numpy()
+    upper_band = ma20 + 2 * std20
+    lower_band = ma20 - 2 * std20
+    band_range = upper_band - lower_band
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bollinger_position = np.where(band_range != 0, ((close.to_numpy() - lower_band) / band_range) * 100, np.nan)
+    typical_price = (high + low + close) / 3
+    money_flow = typical_price * volume
+    tp_diff = typical_price.diff()
+    positive_flow = money_flow.where(tp_diff > 0, 0).rolling(14).sum()
+    negative_flow = money_flow.where(tp_diff < 0, 0).rolling(14).sum()
+    mfi_ratio = positive_flow / negative_flow.replace(0, np.nan)
+    technical = {
+        'macd': macd.to_numpy(),
+        'macd_signal': macd.ewm(span=9, adjust=False).mean().to_numpy(),
+        'bollinger_upper': upper_band,
+        'bollinger_lower': lower_band,
+        'bollinger_position': bollinger_position,
+        'support': close.rolling(window=50).min().to_numpy(),
+        'resistance': close.rolling(window=50).max().to_numpy(),
+        'volume_sma': volume.rolling(window=20).mean().to_numpy(),
+        'mfi': (100 - (100 / (1 + mfi_ratio))).to_numpy(),
+    }
+    for name, values in technical.items():
+        metrics[name] = np.where(technical_ok, values, np.nan)
+
+    return metrics
+
+
+def _benchmark_returns(benchmark: Optional[pd.DataFrame], dates: np.ndarray):
+    """3m / 6m benchmark returns as of each date (None when the benchmark is too short)."""
+    n = len(dates)
+    if benchmark is None or not isinstance(benchmark, pd.DataFrame) or benchmark.empty:
+        return np.zeros(n), np.full(n, np.nan), np.zeros(n, dtype=bool)
+    spy = _normalize_index(benchmark[['Close']])['Close'].dropna()
+    spy_close = spy.to_numpy(dtype=float)
+    pos = np.searchsorted(spy.index.values, dates, side='right') - 1
+    spy_count = pos + 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ret_3m = np.where(spy_count >= 63,
+                          (spy_close[pos] / spy_close[np.maximum(pos - 62, 0)] - 1) * 100, 0)
+        ret_6m = np.where(spy_count > 126,
+                          (spy_close[pos] / spy_close[np.maximum(pos - 125, 0)] - 1) * 100, np.nan)
+    return ret_3m, ret_6m, spy_count > 20
+
+
+def build_training_set(panel: Dict[str, pd.DataFrame], scorer,
+                       benchmark: Optional[pd.DataFrame] = None, horizon: int = 30,
+                       step: int = 5, min_history: int = 200) -> pd.DataFrame:
+    """
+    Labelled walk-forward samples for every symbol of a price panel.
+
+    Args:
+        panel: field -> DataFrame (dates x symbols), see price_panel.build_price_panel
+        scorer: PremiumStockAnalyzer (its score_universe scores the samples)
+        benchmark: SPY history (OHLCV DataFrame) for relative strength
+        horizon: Forward-return horizon in bars
+        step: Bars between consecutive samples of one symbol
+        min_history: Bars a symbol needs before its first sample
+
+    Returns:
+        DataFrame with symbol, date, forward_return (%) and the scored metrics
+        (one row per sample, score_universe columns; CURRENT_INFO_FIELDS are
+        missing); empty when no symbol has min_history + horizon bars.
+    """
+    data = align_right(panel, ('High', 'Low', 'Close', 'Volume'))
+    close = data['Close'].to_numpy()
+    n_rows = len(close)
+    if n_rows == 0:
+        return pd.DataFrame()
+    symbols = list(data['Close'].columns)
+    n_bars = np.isfinite(close).sum(axis=0)
+    count = np.arange(n_rows)[:, None] - (n_rows - n_bars)[None, :] + 1
+
+    # Sample rows: every `step` bars back from the last bar with a full horizon ahead
+    last_sample = n_rows - 1 - horizon
+    if last_sample < 0:
+        return pd.DataFrame()
+    sample_rows = np.arange(last_sample, -1, -step)[::-1]
+    rows, cols = np.nonzero(count[sample_rows] >= max(min_history, 1))
+    if len(rows) == 0:
+        return pd.DataFrame()
+    rows = sample_rows[rows]
+
+    metrics = _price_metrics(data, count)
+    dates = aligned_dates(panel)[rows, cols]
+
+    table = pd.DataFrame({
+        'symbol': np.asarray(symbols, dtype=object)[cols],
+        'date': pd.DatetimeIndex(dates),
+    })
+    with np.errstate(invalid='ignore', divide='ignore'):
+        table['forward_return'] = ((close[rows + horizon, cols] - close[rows, cols]) / close[rows, cols]) * 100
+    for name, values in metrics.items():
+        table[name] = values[rows, cols]
+
+    # Relative strength vs the benchmark as of each sample date
+    spy_3m, spy_6m, spy_ok = _benchmark_returns(benchmark, dates)
+    momentum_ok = count[rows, cols] >= 200
+    table['relative_strength'] = np.where(momentum_ok & spy_ok, table['stock_return_3m'] - spy_3m, np.nan)
+    table['rs_6m'] = np.where(momentum_ok & spy_ok & (count[rows, cols] >= 126),
+                              table['stock_return_6m'] - spy_6m, np.nan)
+    table = table.drop(columns=['stock_return_3m', 'stock_return_6m'])
+
+    # No point-in-time info snapshot exists for past samples (see module docstring)
+    for name in CURRENT_INFO_FIELDS:
+        table[name] = None if name == 'analyst_key' else np.nan
+
+    table = table[np.isfinite(table['forward_return'])]
+    return scorer.score_universe(table)
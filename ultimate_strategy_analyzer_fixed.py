@@ -13,16 +13,30 @@ Uses 5 investment perspectives applied to quality scores:
 Designed for 614 premium institutional-grade stocks
 """
 
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import threading
 import time
 from typing import List, Dict, Optional
-import streamlit as st
 from collections import defaultdict
 from premium_stock_analyzer import PremiumStockAnalyzer
 from rate_limit_manager import rate_limit_manager
+from consensus_engine import ConsensusEngine, ScoreAccumulator
+from stock_result import StockResult, PICK_DEFAULTS, as_record, results_frame
+from price_panel import build_price_panel
+from sector_mapping import get_sector
+from training_dataset import build_training_set
 from macro_economic_analyzer import MacroEconomicAnalyzer
+from lazy_imports import lazy_module
+from stage_graph import StageGraph, PipelineStop
+from streaming_pipeline import StreamingPipeline
+from run_checkpoint import RunCheckpoint, latest_incomplete, prune_runs, DEFAULT_ROOT as CHECKPOINT_ROOT
+from symbol_state import SymbolStateStore, DEFAULT_PATH as SYMBOL_STATE_PATH
+
+# Streamlit loads only when results are rendered (headless runs never need it)
+st = lazy_module('streamlit')
 
 # ML Enhancement
 try:
@@ -116,9 +130,19 @@ class FixedUltimateStrategyAnalyzer:
         self.strategy_results = {}
         self.consensus_recommendations = []
         
+        # Vectorized 5-perspective consensus (score matrix built once per run)
+        self.consensus_engine = ConsensusEngine()
+        self.score_matrix = None
+        self.consensus_table = None
+        self._consensus_source = None
+        
         # Initialize ML meta-predictor
         self.ml_predictor = None
         self.needs_real_training = False
+        # Registered models older than this get an incremental (warm-start) refresh
+        self.ml_refresh_days = 7
+        # Seconds of purged walk-forward hyperparameter search before a full retrain (0 = off)
+        self.ml_tune_budget = 0
         
         if ML_AVAILABLE:
             print("🤖 Initializing ML Meta-Predictor...")
@@ -203,8 +227,61 @@ class FixedUltimateStrategyAnalyzer:
 
         # Global trading mode (NORMAL / DEFENSIVE / NO_NEW_TRADES / AGGRESSIVE)
         self.global_trading_mode = None
+        
+        # Stage graph: concurrent independent stages, timings of the last run
+        self.stage_workers = 4
+        self.stage_timings = {}
+        self.market_day_assessment = None
+        self.market_tradability = None
+        
+        # Run checkpoints (.cache/runs/<run_id>): completed stages and analyzed
+        # symbols survive a crash, resume(run_id) continues from them
+        self.checkpoint_enabled = True
+        self.checkpoint_root = CHECKPOINT_ROOT
+        self.checkpoint_keep = 5
+        self.checkpoint = None
+        self.run_id = None
+        
+        # Streaming quality analysis: fetch workers feed analyze workers through
+        # a bounded queue (at most stream_queue_size histories in flight)
+        self.fetch_workers = 4
+        self.analyze_workers = 2
+        self.stream_queue_size = 16
+        self.score_accumulator = None
+        
+        # 'thread', 'process' (scoring in worker processes attached to a
+        # shared-memory price panel, see process_analysis) or 'auto'
+        self.analysis_mode = 'auto'
+        self.process_workers = None
+        
+        # Incremental run: each symbol's state stored by the last run
+        # (symbol_state.SymbolStateStore) is updated with the new bars instead of
+        # recomputed; perspectives and consensus are still rebuilt over all symbols
+        self.incremental = False
+        self.symbol_state_path = SYMBOL_STATE_PATH
+        self.incremental_stats = {}
+    
+    def resume(self, run_id: Optional[str] = None, progress_callback=None, *, auto_export: bool = True):
+        """
+        Continue an interrupted run from its checkpoints.
+        
+        Completed stages are restored and symbols already analyzed are not
+        fetched again, so only the remaining work is done.
+        
+        Args:
+            run_id: Run to resume (defaults to the newest unfinished run)
+        """
+        run_id = run_id or latest_incomplete(self.checkpoint_root)
+        if not run_id:
+            print("⚠️ No interrupted run to resume - starting a new run")
+        elif not os.path.isdir(os.path.join(self.checkpoint_root, run_id)):
+            print(f"⚠️ No checkpoints for run {run_id} - starting it from scratch")
+        else:
+            print(f"♻️ Resuming run {run_id}")
+        return self.run_ultimate_strategy(progress_callback, auto_export=auto_export, run_id=run_id)
     
-    def run_ultimate_strategy(self, progress_callback=None, *, auto_export: bool = True):
+    def run_ultimate_strategy(self, progress_callback=None, *, auto_export: bool = True,
+                              run_id: Optional[str] = None):
         """
         Run Premium Ultimate Strategy
         
@@ -213,6 +290,15 @@ class FixedUltimateStrategyAnalyzer:
         3. Find consensus (3/5, 4/5, 5/5 agreement)
         4. Optional AI review and market analysis
         
+        The steps run as a stage graph (see _build_stage_graph): stages that do
+        not depend on each other - AI universe selection, the history prefetch,
+        market conditions, macro data and ML training - run concurrently.
+        Per-stage timings end up in self.stage_timings and results['stage_timings'].
+        
+        With checkpoint_enabled, finished stages and analyzed symbols are saved
+        under checkpoint_root/<run_id>; passing the id of an interrupted run
+        (or calling resume()) restores them instead of recomputing.
+        
         Returns:
             dict: Consensus recommendations with quality breakdowns
         """
@@ -222,38 +308,215 @@ class FixedUltimateStrategyAnalyzer:
         if progress_callback:
             progress_callback("Starting Premium Ultimate Strategy...", 0)
         
-        # STEP 1: Smart Universe Selection (AI Phase 1)
-        full_universe = []
-        ai_market_reasoning = ""
-        ai_focus_sectors = []
+        self.checkpoint = self._open_checkpoint(run_id)
+        self.run_id = self.checkpoint.run_id if self.checkpoint else run_id
+        graph = self._build_stage_graph(auto_export)
+        status = 'failed'
+        try:
+            values = graph.run({'progress': graph.progress(progress_callback)},
+                               checkpoint=self.checkpoint, on_restore=self._restore_stage_state)
+            final_results = values['final_results']
+            status = 'complete'
+        except PipelineStop as stop:
+            final_results = stop.value
+            status = 'stopped'
+        finally:
+            self.stage_timings = graph.timings
+            print(graph.report())
+            if self.checkpoint is not None:
+                self.checkpoint.mark(status)
+                self.checkpoint.close()
+                self.checkpoint = None
+        
+        if isinstance(final_results, dict):
+            final_results['stage_timings'] = self.stage_timings
+            final_results['run_id'] = self.run_id
+            if self.incremental:
+                final_results['incremental_stats'] = self.incremental_stats
         
+        if progress_callback:
+            progress_callback("Analysis complete!", 100)
+        
+        return final_results
+    
+    def _open_checkpoint(self, run_id: Optional[str] = None) -> Optional[RunCheckpoint]:
+        if not self.checkpoint_enabled:
+            return None
+        try:
+            checkpoint = RunCheckpoint(run_id, root=self.checkpoint_root)
+            prune_runs(self.checkpoint_root, max_keep=self.checkpoint_keep, keep=[checkpoint.run_id])
+            print(f"💾 Checkpointing run {checkpoint.run_id} to {checkpoint.path}")
+            return checkpoint
+        except Exception as e:
+            print(f"⚠️ Run checkpoints disabled: {e}")
+            return None
+    
+    def _restore_stage_state(self, stage: str, outputs: Dict):
+        """Re-apply the attributes a stage sets when its outputs come from a checkpoint."""
+        if stage == 'universe':
+            self._denylist_excluded = outputs.get('denylist_excluded', [])
+        elif stage == 'market_day':
+            self.market_day_assessment = outputs['market_analysis'].get('day_assessment')
+        elif stage == 'tradability':
+            self.market_tradability = outputs['tradability']
+        elif stage == 'quality_analysis':
+            self.base_results = outputs['base_results']
+        elif stage == 'perspectives':
+            self.strategy_results = outputs['strategy_results']
+        elif stage == 'catalysts':
+            self.consensus_recommendations = outputs['catalyst_picks']
+    
+    def _build_stage_graph(self, auto_export: bool = True) -> StageGraph:
+        """
+        The run as a DAG of stages (inputs -> outputs):
+        
+            ai_universe, static_universe, market_conditions, macro_data  (no inputs)
+            candidates         static_universe            -> candidates
+            universe           ai_selection, static_universe -> universe, denylist_excluded
+            history_prefetch   candidates                 -> hist_map
+            ml_training        universe, hist_map         -> ml_ready
+            market_context     market_conditions, macro_data, universe -> market_context
+            market_timing      market_context             -> timed_context
+            market_day         timed_context              -> market_analysis
+            tradability        market_analysis            -> tradability
+            quality_analysis   universe, hist_map [, ml_ready in process mode] -> base_results
+            perspectives       base_results               -> strategy_results
+            consensus          base_results, market_analysis, tradability, ml_ready -> consensus_picks
+            pick_validation    consensus_picks, market_analysis -> validated_picks
+            catalysts          validated_picks, market_analysis -> catalyst_picks
+            ai_review          catalyst_picks, market_analysis, base_results -> ai_insights
+            top_picks          catalyst_picks, market_analysis, ai_insights -> ai_top_picks
+            final_results      catalyst_picks, market_analysis, ai_insights, ai_top_picks -> final_results
+        """
+        graph = StageGraph('ultimate_strategy', max_workers=self.stage_workers)
+        graph.stage('ai_universe', self._stage_ai_universe, ['progress'], ['ai_selection'])
+        graph.stage('static_universe', self._stage_static_universe)
+        graph.stage('universe', self._stage_universe, ['ai_selection', 'static_universe', 'progress'],
+                    ['universe', 'denylist_excluded'])
+        graph.stage('candidates', self._stage_candidates, ['static_universe'])
+        graph.stage('history_prefetch', self._stage_history_prefetch, ['candidates', 'progress'], ['hist_map'],
+                    checkpoint=False)
+        graph.stage('ml_training', self._stage_ml_training, ['universe', 'hist_map', 'progress'], ['ml_ready'])
+        graph.stage('market_conditions', self._stage_market_conditions, ['progress'])
+        graph.stage('macro_data', self._stage_macro_data)
+        graph.stage('market_context', self._stage_market_context,
+                    ['market_conditions', 'macro_data', 'ai_selection'])
+        graph.stage('market_timing', self._stage_market_timing, ['market_context', 'progress'], ['timed_context'])
+        graph.stage('market_day', self._stage_market_day, ['timed_context', 'progress'], ['market_analysis'])
+        graph.stage('tradability', self._stage_tradability, ['market_analysis', 'progress'])
+        quality_inputs = ['universe', 'hist_map', 'progress']
+        if self._may_use_processes():
+            # Scoring processes start only after ml_training's own all-core
+            # process pools are done, so the two never oversubscribe the CPU
+            quality_inputs.append('ml_ready')
+        graph.stage('quality_analysis', self._stage_quality_analysis, quality_inputs, ['base_results'])
+        graph.stage('perspectives', self._stage_perspectives, ['base_results', 'progress'], ['strategy_results'])
+        graph.stage('consensus', self._stage_consensus,
+                    ['base_results', 'market_analysis', 'tradability', 'ml_ready', 'progress'],
+                    ['consensus_picks'])
+        graph.stage('pick_validation', self._stage_pick_validation,
+                    ['consensus_picks', 'market_analysis', 'progress'], ['validated_picks'])
+        graph.stage('catalysts', self._stage_catalysts, ['validated_picks', 'market_analysis'], ['catalyst_picks'])
+        graph.stage('ai_review', self._stage_ai_review,
+                    ['catalyst_picks', 'market_analysis', 'base_results', 'progress'], ['ai_insights'])
+        graph.stage('top_picks', self._stage_top_picks,
+                    ['catalyst_picks', 'market_analysis', 'ai_insights'], ['ai_top_picks'])
+        graph.stage('final_results',
+                    lambda catalyst_picks, market_analysis, ai_insights, ai_top_picks, progress:
+                    self._stage_final_results(catalyst_picks, market_analysis, ai_insights, ai_top_picks,
+                                              progress, auto_export),
+                    ['catalyst_picks', 'market_analysis', 'ai_insights', 'ai_top_picks', 'progress'])
+        return graph
+    
+    # ------------------------------------------------------------------
+    # Pipeline stages (see _build_stage_graph)
+    # ------------------------------------------------------------------
+    
+    def _stage_ai_universe(self, progress=None) -> Optional[Dict]:
+        """STEP 1: Smart Universe Selection (AI Phase 1); None when AI selection is off or failed."""
+        if not (self.ai_selector and self.ai_selector.enabled):
+            return None
+        if progress:
+            progress("🤖 AI performing global market scan...", 2)
+        try:
+            # Target ~150 best stocks for the current market condition
+            selection_result = self.ai_selector.select_universe(target_size=150)
+            print(f"✅ AI Universe Selection: Using {len(selection_result.get('universe', []))} stocks")
+            print(f"   Reasoning: {selection_result.get('reasoning', '')}")
+            return selection_result
+        except Exception as e:
+            print(f"⚠️ AI Universe Selection failed: {e}. Falling back to full list.")
+            return None
+    
+    def _stage_static_universe(self) -> List[str]:
+        return self.analyzer._get_expanded_stock_universe()
+    
+    def _stage_candidates(self, static_universe: List[str]) -> List[str]:
+        """
+        Every symbol the universe stage can pick: the static list, plus the premium
+        list the AI selector chooses from (and falls back to), minus the denylist.
+        Known before the AI selection, so the history prefetch can run alongside it.
+        """
+        candidates = list(static_universe)
         if self.ai_selector and self.ai_selector.enabled:
-            if progress_callback:
-                progress_callback("🤖 AI performing global market scan...", 2)
-            
-            try:
-                # Target ~150 best stocks for the current market condition
-                selection_result = self.ai_selector.select_universe(target_size=150)
-                full_universe = selection_result.get('universe', [])
-                ai_market_reasoning = selection_result.get('reasoning', '')
-                ai_focus_sectors = selection_result.get('focus_sectors', [])
-                
-                print(f"✅ AI Universe Selection: Using {len(full_universe)} stocks")
-                print(f"   Reasoning: {ai_market_reasoning}")
-                
-            except Exception as e:
-                print(f"⚠️ AI Universe Selection failed: {e}. Falling back to full list.")
-                full_universe = self.analyzer._get_expanded_stock_universe()
+            from premium_quality_universe import get_premium_universe
+            candidates += get_premium_universe()
+        denylist = self._symbol_denylist or set()
+        return [sym for sym in dict.fromkeys(candidates) if sym.upper() not in denylist]
+    
+    def _stage_history_prefetch(self, candidates: List[str], progress=None) -> Dict[str, pd.DataFrame]:
+        """
+        Bulk-load every history the run will need, once: the candidate symbols the
+        universe is selected from, SPY (ML benchmark) and the replacements a
+        backfill would pick for symbols the bulk download could not return.
+        Quality analysis and ML training read from this map.
+        """
+        fetcher = getattr(self.analyzer, 'data_fetcher', None)
+        if fetcher is None or not hasattr(fetcher, 'get_bulk_history') or not candidates:
+            return {}
+        if progress:
+            progress(f"Prefetching price history for {len(candidates)} candidate stocks...", 10)
+        started = time.time()
+        hist_map = self._bulk_history(fetcher, list(candidates) + ['SPY'])
+
+        # Symbols without a history will fail analysis; fetch their likely
+        # replacements in the same bulk pass instead of one by one during backfill
+        missing = [sym for sym in candidates if sym not in hist_map]
+        target_min = max(len(candidates), 680)
+        needed = target_min - (len(candidates) - len(missing))
+        replacements = []
+        if needed > 0:
+            replacements = [sym for sym in self._backfill_candidates(candidates, limit=needed) if sym not in hist_map]
+            if replacements:
+                hist_map.update(self._bulk_history(fetcher, replacements))
+
+        print(f"📦 Prefetched {len(hist_map)} histories in {time.time() - started:.1f}s "
+              f"({len(candidates) - len(missing)}/{len(candidates)} candidates, "
+              f"{sum(1 for sym in replacements if sym in hist_map)} backfill candidates)")
+        return hist_map
+    
+    @staticmethod
+    def _bulk_history(fetcher, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        try:
+            hist_map = fetcher.get_bulk_history(symbols) or {}
+            return {sym: df for sym, df in hist_map.items() if isinstance(df, pd.DataFrame) and not df.empty}
+        except Exception as e:
+            print(f"⚠️ History prefetch failed: {e}")
+            return {}
+    
+    def _stage_universe(self, ai_selection: Optional[Dict], static_universe: List[str], progress=None) -> tuple:
+        if ai_selection is not None:
+            full_universe = ai_selection.get('universe', [])
         else:
-            if progress_callback:
-                progress_callback("Loading premium stock universe...", 5)
-            full_universe = self.analyzer._get_expanded_stock_universe()
-            
+            if progress and not (self.ai_selector and self.ai_selector.enabled):
+                progress("Loading premium stock universe...", 5)
+            full_universe = static_universe
+        
         full_universe, self._denylist_excluded = self._apply_symbol_denylist(full_universe)
         
         total_stocks = len(full_universe)
-        if progress_callback:
-            progress_callback(f"Loaded {total_stocks} premium stocks", 8)
+        if progress:
+            progress(f"Loaded {total_stocks} premium stocks", 8)
         
         print(f"\n{'='*80}")
         print(f"🎯 PREMIUM ULTIMATE STRATEGY")
@@ -261,19 +524,34 @@ class FixedUltimateStrategyAnalyzer:
         print(f"   Method: 15 quality metrics (not 200+ indicators)")
         print(f"   Perspectives: 5 investment styles for consensus")
         print(f"{'='*80}\n")
-        
-        # STEP 1.5: Train ML on Real Data (if needed)
+        return full_universe, self._denylist_excluded
+    
+    def _stage_ml_training(self, universe: List[str], hist_map: Dict, progress=None) -> bool:
+        """STEP 1.5: Train ML on Real Data (if needed), from the prefetched histories."""
         analyzer_enable_training = bool(getattr(self.analyzer, 'enable_training', True))
         analyzer_data_mode = str(getattr(self.analyzer, 'data_mode', '') or '').lower()
-        if self.needs_real_training and self.ml_predictor and analyzer_enable_training and analyzer_data_mode != 'light':
-            self._train_ml_on_real_data(full_universe, progress_callback)
-        
-        # STEP 2: Analyze market conditions
-        if progress_callback:
-            progress_callback("Analyzing market conditions (finding regime)...", 10)
-        
-        # Get base market analysis
-        market_analysis = self._analyze_market_conditions()
+        if self.ml_predictor and analyzer_enable_training and analyzer_data_mode != 'light':
+            incremental = not self.needs_real_training
+            if self.needs_real_training or self._ml_refresh_due():
+                self._train_ml_on_real_data(universe, progress, incremental=incremental, hist_map=hist_map)
+        return bool(self.ml_predictor and getattr(self.ml_predictor, 'is_trained', False))
+    
+    def _stage_market_conditions(self, progress=None) -> Dict:
+        """STEP 2: Analyze market conditions."""
+        if progress:
+            progress("Analyzing market conditions (finding regime)...", 10)
+        return self._analyze_market_conditions()
+    
+    def _stage_macro_data(self):
+        """Yields / DXY / VIX series for the macro context (independent of everything else)."""
+        try:
+            return self.macro_analyzer._fetch_data()
+        except Exception as e:
+            print(f"⚠️ Macro data fetch failed: {e}")
+            return None
+    
+    def _stage_market_context(self, market_conditions: Dict, macro_data, ai_selection: Optional[Dict]) -> Dict:
+        market_analysis = dict(market_conditions)
         
         # Prepare context from what we ALREADY know (to avoid re-fetching failures)
         macro_context_args = {
@@ -282,7 +560,8 @@ class FixedUltimateStrategyAnalyzer:
         }
         
         # Get REAL Macro Logic (Yields, DXY) + Merge with known VIX
-        macro_context = self.macro_analyzer.analyze_macro_context(external_context=macro_context_args)
+        macro_context = self.macro_analyzer.analyze_macro_context(external_context=macro_context_args,
+                                                                  data=macro_data)
         if macro_context:
             print(f"   Using Macro Context: {macro_context.get('summary')}")
             # Merge macro data into market_analysis
@@ -291,15 +570,18 @@ class FixedUltimateStrategyAnalyzer:
             market_analysis['macro_score'] = macro_context.get('macro_score')
         
         # Inject AI Phase 1 Context
+        ai_market_reasoning = (ai_selection or {}).get('reasoning', '')
         if ai_market_reasoning:
             market_analysis['ai_phase1_reasoning'] = ai_market_reasoning
-            market_analysis['ai_focus_sectors'] = ai_focus_sectors
-        
-        # STEP 2.25: MARKET TIMING SIGNAL (NEW - Critical for actionable decisions)
-        market_timing_signal = None
+            market_analysis['ai_focus_sectors'] = (ai_selection or {}).get('focus_sectors', [])
+        return market_analysis
+    
+    def _stage_market_timing(self, market_context: Dict, progress=None) -> Dict:
+        """STEP 2.25: MARKET TIMING SIGNAL (NEW - Critical for actionable decisions)."""
+        market_analysis = market_context
         if self.market_timing:
-            if progress_callback:
-                progress_callback("Generating market timing signal...", 11)
+            if progress:
+                progress("Generating market timing signal...", 11)
             
             market_timing_signal = self.market_timing.analyze_market_conditions(market_analysis)
             
@@ -308,12 +590,15 @@ class FixedUltimateStrategyAnalyzer:
             
             # Store for later use
             market_analysis['timing_signal'] = market_timing_signal
-            
-        # STEP 2.3: MARKET DAY ADVISOR (NEW - Phase 2 - Skip Today Warnings)
+        return market_analysis
+    
+    def _stage_market_day(self, timed_context: Dict, progress=None) -> Dict:
+        """STEP 2.3: MARKET DAY ADVISOR (NEW - Phase 2 - Skip Today Warnings)."""
+        market_analysis = timed_context
         self.market_day_assessment = None
         if self.market_day_advisor:
-            if progress_callback:
-                progress_callback("Generating trading day assessment...", 12)
+            if progress:
+                progress("Generating trading day assessment...", 12)
             
             self.market_day_assessment = self.market_day_advisor.analyze_trading_conditions(market_analysis)
             
@@ -328,14 +613,15 @@ class FixedUltimateStrategyAnalyzer:
                 print("\n" + "⚠️ " * 20)
                 print("🔴 SKIP TODAY RECOMMENDED - Consider waiting for better conditions!")
                 print("⚠️ " * 20 + "\n")
-
-        
-        # STEP 2.5: AI Market Tradability Check (NEW)
+        return market_analysis
+    
+    def _stage_tradability(self, market_analysis: Dict, progress=None) -> Dict:
+        """STEP 2.5: AI Market Tradability Check (NEW)."""
         self.market_tradability = None  # Reset at start of run
         market_tradability = {}
         if self.ai_validator and self.ai_validator.enabled:
-            if progress_callback:
-                progress_callback("AI analyzing if now is good time to trade...", 12)
+            if progress:
+                progress("AI analyzing if now is good time to trade...", 12)
             
             print(f"\n{'='*80}")
             print("🧠 AI MARKET TRADABILITY ANALYSIS")
@@ -364,57 +650,66 @@ class FixedUltimateStrategyAnalyzer:
                     'opportunities': ['Use quant consensus outputs']
                 }
             market_tradability = self.market_tradability
+        return market_tradability
+    
+    def _stage_quality_analysis(self, universe: List[str], hist_map: Dict, progress=None,
+                                ml_ready: Optional[bool] = None) -> Dict:
+        """STEP 3: Run quality analysis on all stocks (after ml_training when processes may be used)."""
+        if progress:
+            progress(f"Running quality analysis on {len(universe)} stocks...", 15)
         
-        # STEP 3: Run quality analysis on all stocks
-        if progress_callback:
-            progress_callback(f"Running quality analysis on {total_stocks} stocks...", 15)
-        
-        self.base_results = self._run_quality_analysis(
-            full_universe, progress_callback
-        )
+        self.base_results = self._run_quality_analysis(universe, progress, hist_map=hist_map)
         
         if not self.base_results:
             print("❌ No quality results!")
-            return self._empty_results()
-        
-        # STEP 4: Apply 4 investment perspectives
-        if progress_callback:
-            progress_callback("Applying 5 investment perspectives...", 70)
+            raise PipelineStop(self._empty_results())
+        return self.base_results
+    
+    def _stage_perspectives(self, base_results: Dict, progress=None) -> Dict:
+        """STEP 4: Apply 5 investment perspectives."""
+        if progress:
+            progress("Applying 5 investment perspectives...", 70)
         
         print(f"\n{'='*80}")
         print("📊 Applying 5 Investment Perspectives to Quality Scores")
         print(f"{'='*80}")
         
         self.strategy_results = {
-            'institutional': self._apply_institutional_perspective(self.base_results),
-            'hedge_fund': self._apply_hedge_fund_perspective(self.base_results),
-            'quant_value': self._apply_quant_value_perspective(self.base_results),
-            'risk_managed': self._apply_risk_managed_perspective(self.base_results),
-            'investment_bank': self._apply_investment_bank_perspective(self.base_results)
+            'institutional': self._apply_institutional_perspective(base_results),
+            'hedge_fund': self._apply_hedge_fund_perspective(base_results),
+            'quant_value': self._apply_quant_value_perspective(base_results),
+            'risk_managed': self._apply_risk_managed_perspective(base_results),
+            'investment_bank': self._apply_investment_bank_perspective(base_results)
         }
-        
+        return self.strategy_results
+    
+    def _stage_consensus(self, base_results: Dict, market_analysis: Dict, tradability: Dict,
+                         ml_ready: bool, progress=None) -> List[Dict]:
+        """STEP 5-6.25: Consensus, regime filters and sector concentration limit."""
         # STEP 5: Find consensus
-        if progress_callback:
-            progress_callback("Finding consensus recommendations...", 80)
+        if progress:
+            progress("Finding consensus recommendations...", 80)
         
-        consensus_picks = self._find_consensus(self.strategy_results, market_analysis)
+        consensus_picks = self._find_consensus(base_results, market_analysis)
         
         # STEP 6: Apply regime filters (relaxed for premium stocks)
-        if progress_callback:
-            progress_callback("Applying market regime filters...", 85)
+        if progress:
+            progress("Applying market regime filters...", 85)
         
         consensus_picks, regime_removed = self._apply_regime_filters(
             consensus_picks, market_analysis
         )
         
         # STEP 6.25: SECTOR CONCENTRATION LIMIT (NEW - risk reduction)
-        consensus_picks = self._apply_sector_diversification(consensus_picks, max_sector_pct=0.35)
-        
-        # STEP 6.5: AI Pick Validation (NEW - Critical!)
+        return self._apply_sector_diversification(consensus_picks, max_sector_pct=0.35)
+    
+    def _stage_pick_validation(self, consensus_picks: List[Dict], market_analysis: Dict,
+                               progress=None) -> List[Dict]:
+        """STEP 6.5: AI Pick Validation (NEW - Critical!)."""
         pick_validation = {}
         if self.ai_validator and self.ai_validator.enabled and consensus_picks:
-            if progress_callback:
-                progress_callback("AI validating picks with news, sentiment, risks...", 87)
+            if progress:
+                progress("AI validating picks with news, sentiment, risks...", 87)
             
             print(f"\n{'='*80}")
             print("🧠 AI PICK VALIDATION (News, Sentiment, Hidden Risks)")
@@ -452,8 +747,11 @@ class FixedUltimateStrategyAnalyzer:
                     print(f"  {pick['symbol']}: {pick['ai_validation']} - {pick['ai_verdict'][:60]}...")
             
             print(f"{'='*80}\n")
-        
-        # STEP 6.75: AI CATALYST & NEWS ANALYSIS (NEW - deep dive for top tier)
+        return consensus_picks
+    
+    def _stage_catalysts(self, validated_picks: List[Dict], market_analysis: Dict) -> List[Dict]:
+        """STEP 6.75: AI CATALYST & NEWS ANALYSIS (NEW - deep dive for top tier)."""
+        consensus_picks = validated_picks
         catalyst_results = []
         if self.catalyst_analyzer and consensus_picks:
             print(f"\n{'='*80}")
@@ -483,16 +781,21 @@ class FixedUltimateStrategyAnalyzer:
         
         # Store consensus recommendations
         self.consensus_recommendations = consensus_picks
-        
-        # STEP 7: Optional: Get AI review for top picks
-        if progress_callback:
-            progress_callback("Generating AI insights...", 90)
-        
-        ai_insights = self._get_ai_market_review(
-            consensus_picks, market_analysis, self.base_results
+        return consensus_picks
+    
+    def _stage_ai_review(self, catalyst_picks: List[Dict], market_analysis: Dict, base_results: Dict,
+                         progress=None) -> Dict:
+        """STEP 7: Optional: Get AI review for top picks."""
+        if progress:
+            progress("Generating AI insights...", 90)
+        
+        return self._get_ai_market_review(
+            catalyst_picks, market_analysis, base_results
         )
-        
-        # STEP 7.5: AI TOP PICKS SELECTION (NEW - combines ALL intelligence layers)
+    
+    def _stage_top_picks(self, catalyst_picks: List[Dict], market_analysis: Dict, ai_insights: Dict) -> Optional[Dict]:
+        """STEP 7.5: AI TOP PICKS SELECTION (NEW - combines ALL intelligence layers)."""
+        consensus_picks = catalyst_picks
         
         # Calculate Base Ultimate Score (Pre-AI) for ALL picks
         # This ensures we have a score even if AI fails or for validation
@@ -557,10 +860,14 @@ class FixedUltimateStrategyAnalyzer:
                 pick.setdefault('ai_top_pick_position', None)
                 pick.setdefault('ai_top_pick_entry', None)
                 pick.setdefault('ai_top_pick_reason', None)
-        
-        # STEP 8: Prepare final results
-        if progress_callback:
-            progress_callback("Preparing final results...", 95)
+        return ai_top_picks
+    
+    def _stage_final_results(self, catalyst_picks: List[Dict], market_analysis: Dict, ai_insights: Dict,
+                             ai_top_picks: Optional[Dict], progress=None, auto_export: bool = True) -> Dict:
+        """STEP 8-9: Prepare final results and auto-export."""
+        consensus_picks = catalyst_picks
+        if progress:
+            progress("Preparing final results...", 95)
         
         final_results = self._prepare_final_results(
             consensus_picks, market_analysis, ai_insights, ai_top_picks
@@ -579,17 +886,30 @@ class FixedUltimateStrategyAnalyzer:
                     traceback.print_exc()
             else:
                 print("⚠️ No consensus picks to export - check if analysis found any 2+ agreement stocks")
-        
-        if progress_callback:
-            progress_callback("Analysis complete!", 100)
-        
         return final_results
 
-    def _train_ml_on_real_data(self, universe: List[str], progress_callback=None):
+    def _ml_refresh_due(self) -> bool:
+        """True when the registered ML models are older than ml_refresh_days."""
+        try:
+            version = getattr(self.ml_predictor, 'model_version', None)
+            if not version:
+                return False
+            trained_at = datetime.strptime(version, '%Y%m%d_%H%M%S')
+            return (datetime.now() - trained_at).days >= self.ml_refresh_days
+        except Exception:
+            return False
+
+    def _train_ml_on_real_data(self, universe: List[str], progress_callback=None, incremental: bool = False,
+                               hist_map: Optional[Dict[str, pd.DataFrame]] = None):
         """
         Train ML models on real data from a subset of the universe.
-        Uses 'time travel' validation: trains on data from 30 days ago vs today's price.
+        Uses walk-forward 'time travel' samples: every few bars of each history is
+        scored point-in-time and labelled with the return of the following 30 bars.
+        With incremental=True only samples after the last training window are used
+        to continue the registered models (warm start).
+        Histories in hist_map (history_prefetch stage) are used instead of refetching.
         """
+        prefetched = hist_map or {}
         print(f"\n{'='*80}")
         print("🎓 TRAINING ML MODELS ON REAL DATA")
         print(f"{'='*80}")
@@ -617,63 +937,63 @@ class FixedUltimateStrategyAnalyzer:
             
         print(f"   Fetching history for {len(training_subset)} stocks to calibrate AI...")
         
-        training_data = []
-        valid_count = 0
-        
-        for i, symbol in enumerate(training_subset):
+        hist_map = {}
+        for symbol in training_subset:
             try:
-                # Get comprehensive data
-                stock_data = self.analyzer.data_fetcher.get_comprehensive_stock_data(symbol)
-                if not stock_data or 'data' not in stock_data:
-                    continue
-                    
-                hist = stock_data['data']
-                if len(hist) < 90: # Need enough history (60 days + 30 days target)
-                    continue
-                
-                # Time Travel: Go back 30 days
-                # We want to predict returns over the NEXT 30 days
-                lookback_days = 30
-                target_idx = len(hist) - lookback_days
-                
-                if target_idx < 60:
-                    continue
-                    
-                # Slice history to represent "the past"
-                past_hist = hist.iloc[:target_idx]
-                
-                # Calculate the ACTUAL return that happened (the target)
-                past_price = hist['Close'].iloc[target_idx-1] # Price at end of "past"
-                current_price = hist['Close'].iloc[-1]        # Price today
-                
-                if past_price <= 0:
+                # Only the price history is needed (see training_dataset)
+                hist = prefetched.get(symbol)
+                if hist is None or hist.empty:
+                    stock_data = self.analyzer.data_fetcher.get_comprehensive_stock_data(symbol)
+                    if not stock_data or 'data' not in stock_data:
+                        continue
+                    hist = stock_data['data']
+                if hist is None or len(hist) < 90:  # Need enough history (60 days + 30 days target)
                     continue
-                    
-                actual_forward_return = ((current_price - past_price) / past_price) * 100
-                
-                # Analyze the "past" state to get features
-                # We use the same analyzer but with truncated history
-                past_analysis = self.premium_analyzer.analyze_stock(
-                    symbol, 
-                    hist_data=past_hist, 
-                    info=stock_data.get('info', {})
-                )
-                
-                if past_analysis and past_analysis.get('success'):
-                    # Attach the known target
-                    past_analysis['forward_return'] = actual_forward_return
-                    training_data.append(past_analysis)
-                    valid_count += 1
-                    print(f"   + Added training sample: {symbol} (Target: {actual_forward_return:+.1f}%)", end='\r')
-                    
+                hist_map[symbol] = hist
             except Exception:
                 continue
-                
-        print(f"\n   Collected {valid_count} valid training samples.")
         
-        if len(training_data) >= 50:
-            self.ml_predictor.train_with_real_data(training_data)
-            self.needs_real_training = False
+        try:
+            benchmark = prefetched.get('SPY')
+            if benchmark is None:
+                spy_data = self.analyzer.data_fetcher.get_comprehensive_stock_data('SPY')
+                if spy_data and 'data' in spy_data:
+                    benchmark = spy_data['data']
+            if benchmark is None or len(benchmark) < 63:
+                benchmark = self.premium_analyzer._get_spy_hist()
+        except Exception:
+            benchmark = None
+        
+        # Every 5th bar of every history -> thousands of point-in-time samples
+        training_set = build_training_set(
+            build_price_panel(hist_map), self.premium_analyzer,
+            benchmark=benchmark, horizon=30, step=5
+        )
+        print(f"   Collected {len(training_set)} walk-forward samples from {len(hist_map)} symbols.")
+        
+        # Walk-forward rows and past runs' pick features (labelled once 30 bars have
+        # passed) go to the feature store; training reads them back as one matrix
+        store = getattr(self.ml_predictor, 'feature_store', None)
+        if store is None:
+            if len(training_set) >= 50 and not incremental:
+                self.ml_predictor.train_with_dataset(training_set, tune_budget=self.ml_tune_budget)
+                self.needs_real_training = not self.ml_predictor.is_trained
+            return
+        labelled = store.fill_targets(hist_map, horizon=30)
+        stored = self.ml_predictor.store_dataset(training_set)
+        print(f"   Feature store: +{stored} walk-forward rows, {labelled} past picks labelled ({store.stats()['labelled']} labelled rows)")
+        
+        start = None
+        if incremental:
+            window_end = (getattr(self.ml_predictor, 'training_info', {}) or {}).get('window_end')
+            start = pd.Timestamp(window_end) + pd.Timedelta(days=1) if window_end else None
+            print(f"   Refreshing with rows newer than the last training window ({window_end}).")
+        
+        tune_budget = 0 if incremental else self.ml_tune_budget
+        if self.ml_predictor.train_from_store(start=start, incremental=incremental, tune_budget=tune_budget):
+            self.needs_real_training = not self.ml_predictor.is_trained
+        elif incremental:
+            print("   Not enough new samples for a refresh - keeping the registered models.")
         else:
             print("⚠️ Could not collect enough real data to train ML reliably. ML disabled for this run.")
             self.needs_real_training = True
@@ -801,178 +1121,270 @@ class FixedUltimateStrategyAnalyzer:
         except Exception:
             return float(pick.get('ultimate_score', 0) or 0)
     
-    def _run_quality_analysis(self, symbols: List[str], progress_callback=None) -> Dict:
+    def _run_quality_analysis(self, symbols: List[str], progress_callback=None,
+                              hist_map: Optional[Dict[str, pd.DataFrame]] = None) -> Dict:
         """
-        Run quality analysis on all stocks using PremiumStockAnalyzer with batch processing.
+        Run quality analysis on all stocks using PremiumStockAnalyzer as a streaming
+        fetch -> analyze pipeline (bounded queue, no batch barriers); scored records
+        go straight into the results table and the consensus score accumulator.
         If data fetches fail (delisted/unavailable symbols), automatically backfill with
         TFSA-friendly replacements so the analyzed universe stays at full strength.
+        Histories already in hist_map (history_prefetch stage) are not fetched again.
+        Symbols stored in the run checkpoint are restored instead of re-analyzed,
+        and every newly analyzed symbol is checkpointed as soon as it finishes.
+        In process mode, symbols whose history is in hist_map are scored by worker
+        processes reading a shared-memory panel (only the info dict is sent).
+        With incremental=True each symbol's stored state is carried forward: new
+        bars are appended to it and fundamentals / earnings dates are re-read;
+        only symbols without a usable state (e.g. rewritten history) are recomputed.
         """
-        import time
-        import time
-        import gc
-        from concurrent.futures import ThreadPoolExecutor, as_completed
+        hist_map = hist_map or {}
+        fetches_fundamentals = str(getattr(self.analyzer.data_fetcher, 'data_mode', '') or '').lower() != 'light'
+        checkpoint = self.checkpoint
+        restored = checkpoint.load_symbols() if checkpoint is not None else {}
 
         results = {}
         total = len(symbols)
-        batch_size = 50  # Process 50 stocks per batch
         failed_symbols: List[str] = []
+        # Scores flow into the consensus matrix as each symbol finishes
+        self.score_accumulator = ScoreAccumulator(capacity=max(total, 680))
+
+        state_store = SymbolStateStore(self.symbol_state_path) if self.incremental else None
+        prior_states = state_store.load() if state_store is not None else {}
+        stats_lock = threading.Lock()
+        self.incremental_stats = {'reused': 0, 'rescored': 0, 'recomputed': 0}
+
+        if hist_map:
+            # Enhanced signals for every prefetched history in one batch, before
+            # the worker state (which carries the table) is taken. Rows are
+            # matched on the sector ETF, so the yfinance spelling of
+            # info['sector'] finds the row primed with the sector_mapping name
+            self.premium_analyzer.prime_enhanced_signals(hist_map, {sym: get_sector(sym) for sym in hist_map})
+        panel, pool = self._start_process_pool(hist_map, total)
+        analyze_workers = pool.workers if pool is not None else self.analyze_workers
 
         print(f"\n📊 Analyzing {total} stocks with 15 quality metrics...")
-        print(f"🔄 Using batch processing: {batch_size} stocks per batch with 15s rest periods (Parallelized)")
-
-        def analyze_symbol(symbol: str, global_idx: Optional[int] = None, total_count: Optional[int] = None) -> bool:
-            """Shared analysis routine so we can reuse it when backfilling."""
+        print(f"🔄 Streaming pipeline: {self.fetch_workers} fetch workers -> queue({self.stream_queue_size}) "
+              f"-> {analyze_workers} analyze {'processes' if pool is not None else 'workers'}")
+        if restored:
+            print(f"♻️ {len(restored)} symbols restored from checkpoint {checkpoint.run_id} - skipping them")
+        if state_store is not None:
+            print(f"🧩 Incremental run: diffing against {len(prior_states)} stored symbol states")
+
+        def fetch_symbol(symbol: str) -> Optional[Dict]:
+            """Fetch stage: history + info (None when the symbol has no data)."""
             try:
-                # Removed progress_callback from thread to prevent Streamlit context errors
-                
-                # Smart Rate Limiting (Exponential Backoff)
-                rate_limit_manager.acquire('YAHOO')
+                preloaded = hist_map.get(symbol)
+                if preloaded is not None and preloaded.empty:
+                    preloaded = None
+                # A prefetched history in light mode needs no request at all
+                throttled = preloaded is None or fetches_fundamentals
+                if throttled:
+                    # Smart Rate Limiting (Exponential Backoff)
+                    rate_limit_manager.acquire('YAHOO')
                 
                 try:
-                    stock_data = self.analyzer.data_fetcher.get_comprehensive_stock_data(symbol)
-                    rate_limit_manager.success('YAHOO')
+                    stock_data = self.analyzer.data_fetcher.get_comprehensive_stock_data(
+                        symbol, preloaded_hist=preloaded)
+                    if throttled:
+                        rate_limit_manager.success('YAHOO')
                 except Exception as e:
                     if '429' in str(e) or 'Too Many Requests' in str(e):
                         rate_limit_manager.handle_error('YAHOO', 429)
                         print(f"   ⚠️ Rate limit hit for {symbol}, backing off...")
-                        return False # Retry logic is handled by backoff + failed_symbols list checks later? 
-                        # Actually just failing here means it goes to failed_symbols.
+                        failed_symbols.append(symbol)
+                        return None
                     raise e
                 
                 if not stock_data or 'data' not in stock_data:
                     failed_symbols.append(symbol)
-                    return False
-
-                hist_data = stock_data.get('data')
-                info = stock_data.get('info', {})
-
-                quality_result = self.premium_analyzer.analyze_stock(
-                    symbol, hist_data=hist_data, info=info
-                )
-
-                if quality_result and quality_result.get('success'):
-                    results[symbol] = quality_result
-
-                    if global_idx and total_count and global_idx % 20 == 0:
-                        print(f"   ✅ Analyzed {global_idx}/{total_count} stocks")
-                        sample = results[symbol]
-                        # Reduced logging verbosity
-                        # print(f"      📋 Sample {symbol} quality_score: {sample.get('quality_score', 'MISSING')}")
-                    return True
-
-                failed_symbols.append(symbol)
-                # Log failures occasionally
-                if quality_result and not quality_result.get('success') and global_idx and global_idx % 50 == 0:
-                    error_msg = quality_result.get('error', 'Unknown error')
-                    print(f"   ⚠️ {symbol}: {error_msg}")
-                return False
+                    return None
+                return stock_data
 
             except Exception as exc:
                 failed_symbols.append(symbol)
                 print(f"   ⚠️ Error analyzing {symbol}: {exc}")
-                return False
-
-        # Process in batches with parallel execution
-        with ThreadPoolExecutor(max_workers=4) as executor:  # Slightly increased workers
-            for batch_start in range(0, total, batch_size):
-                batch_end = min(batch_start + batch_size, total)
-                batch_symbols = symbols[batch_start:batch_end]
-                batch_num = (batch_start // batch_size) + 1
-                total_batches = (total + batch_size - 1) // batch_size
-
-                print(f"\n📦 Processing batch {batch_num}/{total_batches} ({len(batch_symbols)} stocks)...")
-                
-                # Submit batch to thread pool WITHOUT Streamlit context hack
-                # We map future -> (symbol, index)
-                futures = {}
-                for idx, symbol in enumerate(batch_symbols, start=batch_start):
-                    # We pass global_idx for logging purposes inside, but NOT for UI
-                    futures[executor.submit(analyze_symbol, symbol, idx + 1, total)] = (symbol, idx + 1)
-                
-                # Wait for batch to complete and update progress in MAIN thread
-                completed_in_batch = 0
-                for future in as_completed(futures):
-                    sym, g_idx = futures[future]
-                    completed_in_batch += 1
-                    
-                    # Update UI from main thread
-                    if progress_callback and g_idx % 5 == 0: # Update every 5 stocks
-                        pct = int(15 + (g_idx / max(total, 1) * 55))
-                        pct = min(70, pct)
-                        progress_callback(f"Analyzing {sym} ({g_idx}/{total})...", pct)
-                    
-                    try:
-                        future.result()
-                    except Exception as e:
-                        print(f"   ⚠️ Thread error for {sym}: {e}")
-
-                # Explicitly clear memory after each batch
-                gc.collect()
-
-                # No manual sleep needed - Smart Rate Limiter handles it dynamically
-                # if batch_end < total:
-                #     print("😴 Resting 15 seconds before next batch (avoiding rate limits)...")
-                #     time.sleep(15)
-
-        print(f"\n✅ Quality analysis complete: {len(results)}/{total} stocks successful")
-
-        # Attempt to backfill missing symbols to maintain full universe size
-        target_min = max(total, 680)
-        if len(results) < target_min:
-            needed = target_min - len(results)
-            print(f"🔁 {needed} symbols missing due to data gaps — sourcing replacements...")
-
-            candidate_pool: List[str] = []
+                return None
+
+        def keep_state(symbol: str, state: Optional[Dict], kind: str):
+            """Count how much of an incremental symbol was reused and store its new state."""
+            with stats_lock:
+                self.incremental_stats[kind] += 1
+            if state is not None and kind != 'reused':
+                state_store.save(symbol, state)
+
+        def score_symbol(symbol: str, stock_data: Dict) -> Optional[StockResult]:
+            """Analyze stage: 15 quality metrics -> compact record (None on failure)."""
+            info = stock_data.get('info', {})
+            if pool is not None and not pool.broken and symbol in panel:
+                try:
+                    if state_store is not None:
+                        record, state, kind = (pool.analyze_incremental(symbol, info, prior_states.get(symbol))
+                                               or (None, None, 'recomputed'))
+                        if isinstance(record, StockResult):
+                            keep_state(symbol, state, kind)
+                    else:
+                        record = pool.analyze(symbol, info)
+                    if isinstance(record, StockResult):
+                        return record
+                    failed_symbols.append(symbol)
+                    return None
+                except Exception as exc:
+                    print(f"   ⚠️ Worker process failed on {symbol} ({exc}) - scoring in-process from here on")
             try:
-                from cleaned_high_potential_universe import sanitize_runtime_universe, _get_reserve_pool, _load_valid_questrade_symbols  # type: ignore
-
-                updated_universe = sanitize_runtime_universe(symbols, failed_symbols=failed_symbols, target_min=target_min)
-                for sym in updated_universe:
-                    if sym not in results and sym not in symbols and sym not in candidate_pool:
-                        candidate_pool.append(sym)
-                        if len(candidate_pool) >= needed:
-                            break
-
-                if len(candidate_pool) < needed:
-                    extra_candidates, _ = _load_valid_questrade_symbols()
-                    for sym in extra_candidates:
-                        if sym not in results and sym not in symbols and sym not in candidate_pool:
-                            candidate_pool.append(sym)
-                            if len(candidate_pool) >= needed:
-                                break
-
-                if len(candidate_pool) < needed:
-                    for sym in _get_reserve_pool():
-                        if sym not in results and sym not in candidate_pool:
-                            candidate_pool.append(sym)
-                            if len(candidate_pool) >= needed:
-                                break
-
+                if state_store is not None:
+                    quality_result, state, kind = self.premium_analyzer.analyze_stock_incremental(
+                        symbol, stock_data.get('data'), info, prior_states.get(symbol)
+                    )
+                    if quality_result and quality_result.get('success'):
+                        keep_state(symbol, state, kind)
+                else:
+                    quality_result = self.premium_analyzer.analyze_stock(
+                        symbol, hist_data=stock_data.get('data'), info=info
+                    )
             except Exception as exc:
-                print(f"⚠️ Unable to access replacement universes: {exc}")
+                failed_symbols.append(symbol)
+                print(f"   ⚠️ Error analyzing {symbol}: {exc}")
+                return None
+
+            if quality_result and quality_result.get('success'):
+                # Compact slotted record; nested dicts are rebuilt only where a view is needed
+                return StockResult.from_dict(quality_result)
+
+            failed_symbols.append(symbol)
+            # Log failures occasionally
+            if quality_result and not quality_result.get('success') and len(failed_symbols) % 50 == 0:
+                error_msg = quality_result.get('error', 'Unknown error')
+                print(f"   ⚠️ {symbol}: {error_msg}")
+            return None
+
+        def collect(symbol: str, record: StockResult):
+            """Sink: results table, consensus accumulator and run checkpoint."""
+            results[symbol] = record
+            self.score_accumulator.add(symbol, record)
+            if checkpoint is not None and symbol not in restored:
+                checkpoint.save_symbol(symbol, record)
+
+        def stream(batch: List[str], total_count: int, replace=None):
+            """Stream batch through fetch -> analyze; replace(failed symbol) adds replacements."""
+            for symbol in batch:
+                if symbol in restored:
+                    collect(symbol, restored[symbol])
+            pending = [sym for sym in batch if sym not in restored]
+            if not pending:
+                return
+            done_before = len(batch) - len(pending)
+
+            def replace_symbol(symbol: str) -> List[str]:
+                # A replacement finished in the checkpointed run is restored, not re-analyzed
+                replacements = []
+                for sym in replace(symbol):
+                    if sym in restored:
+                        collect(sym, restored[sym])
+                    else:
+                        replacements.append(sym)
+                return replacements
+
+            def on_item(completed: int, symbol: str, ok: bool):
+                g_idx = done_before + completed
+                if ok and g_idx % 20 == 0:
+                    print(f"   ✅ Analyzed {g_idx}/{total_count} stocks")
+                # Update UI from the calling thread
+                if progress_callback and g_idx % 5 == 0:  # Update every 5 stocks
+                    pct = min(70, int(15 + (g_idx / max(total_count, 1) * 55)))
+                    progress_callback(f"Analyzing {symbol} ({g_idx}/{total_count})...", pct)
+
+            pipeline = StreamingPipeline(fetch_symbol, score_symbol, collect,
+                                         fetch_workers=self.fetch_workers,
+                                         analyze_workers=analyze_workers,
+                                         queue_size=max(self.stream_queue_size, analyze_workers * 2),
+                                         replace=replace_symbol if replace is not None else None)
+            pipeline.run(pending, on_item=on_item)
+            print(pipeline.report())
 
-            if len(candidate_pool) < needed:
-                try:
-                    from questrade_valid_universe import get_questrade_valid_universe
-                    for sym in get_questrade_valid_universe():
-                        if sym not in results and sym not in symbols and sym not in candidate_pool:
-                            candidate_pool.append(sym)
-                            if len(candidate_pool) >= needed:
-                                break
-                except Exception as exc:
-                    print(f"⚠️ Unable to extend candidate pool from Questrade universe: {exc}")
+        try:
+            results = self._stream_quality_analysis(symbols, results, failed_symbols, stream)
+        finally:
+            if pool is not None:
+                pool.close()
+            if panel is not None:
+                panel.close()
+            if state_store is not None:
+                state_store.close()
+        if state_store is not None:
+            counts = self.incremental_stats
+            print(f"🧩 Incremental: {counts['reused']} unchanged (reused), {counts['rescored']} updated from "
+                  f"stored state (new bars appended), {counts['recomputed']} recomputed")
+        return results
 
-            candidate_pool = candidate_pool[:needed]
+    def _may_use_processes(self) -> bool:
+        """Whether analysis_mode / core count allow process-mode scoring at all."""
+        mode = str(self.analysis_mode or 'thread').lower()
+        return mode == 'process' or (mode == 'auto' and (os.cpu_count() or 1) >= 4)
 
-            if candidate_pool:
-                print(f"🔧 Backfilling with {len(candidate_pool)} replacement symbols...")
-                start_idx = total
-                for offset, symbol in enumerate(candidate_pool, 1):
-                    analyze_symbol(symbol, global_idx=start_idx + offset, total_count=target_min)
+    def _start_process_pool(self, hist_map: Dict[str, pd.DataFrame], n_symbols: int) -> tuple:
+        """
+        (SharedPricePanel, ProcessAnalysisPool) for process mode, else (None, None).
+        In the stage graph, quality_analysis then depends on ml_training, so the
+        pool never starts while training holds the cores.
+        """
+        mode = str(self.analysis_mode or 'thread').lower()
+        cores = os.cpu_count() or 1
+        if not self._may_use_processes() or len(hist_map) < 2 or (mode == 'auto' and len(hist_map) < 20):
+            return None, None
+        panel = None
+        try:
+            from process_analysis import SharedPricePanel, ProcessAnalysisPool
+            panel = SharedPricePanel.create(hist_map)
+            if panel is None:
+                return None, None
+            workers = min(self.process_workers or cores, max(1, n_symbols))
+            pool = ProcessAnalysisPool(panel, 'premium', self.premium_analyzer.worker_state(), workers=workers)
+            print(f"🧮 Process mode: {workers} analysis processes over a {panel.nbytes / 1e6:.1f} MB "
+                  f"shared price panel ({len(panel)} symbols)")
+            return panel, pool
+        except Exception as e:
+            print(f"⚠️ Process-pool analysis unavailable ({e}) - using threads")
+            if panel is not None:
+                panel.close()
+            return None, None
 
-                print(f"✅ Backfill complete. Total analyzed: {len(results)} stocks")
-            else:
-                print("⚠️ Replacement pool empty – final universe smaller than target")
+    def _stream_quality_analysis(self, symbols: List[str], results: Dict, failed_symbols: List[str],
+                                 stream) -> Dict:
+        """
+        Main pass + backfill of _run_quality_analysis as one stream: replacements for
+        a universe below target are queued behind it, and every failed symbol queues
+        the next replacement as soon as it fails, so the backfill overlaps the main
+        pass instead of adding a serial tail.
+        """
+        total = len(symbols)
+        target_min = max(total, 680)
+        candidates = self._backfill_candidates(symbols)
+        shortfall = candidates[:target_min - total]
+        spare = iter(candidates[len(shortfall):])
+        spare_lock = threading.Lock()
+        backfilled: List[str] = []
+        exhausted = []
+
+        def replace(symbol: str) -> List[str]:
+            with spare_lock:
+                replacement = next(spare, None)
+                if replacement is None:
+                    exhausted.append(symbol)
+                    return []
+                backfilled.append(replacement)
+                return [replacement]
+
+        if shortfall:
+            print(f"🔁 Universe below target {target_min} — streaming {len(shortfall)} replacement symbols behind it")
+        stream(list(symbols) + shortfall, target_min, replace)
+
+        print(f"\n✅ Quality analysis complete: {sum(1 for sym in symbols if sym in results)}/{total} stocks successful")
+        if shortfall or backfilled:
+            print(f"✅ Backfill complete ({len(shortfall) + len(backfilled)} replacement symbols streamed "
+                  f"alongside the main pass). Total analyzed: {len(results)} stocks")
+        if exhausted:
+            print(f"⚠️ Replacement pool empty – {len(exhausted)} failed symbols could not be replaced")
 
         final_count = len(results)
         if final_count < target_min:
@@ -982,38 +1394,100 @@ class FixedUltimateStrategyAnalyzer:
 
         return results
     
+    def _backfill_candidates(self, symbols: List[str], limit: Optional[int] = None) -> List[str]:
+        """TFSA-friendly replacement symbols outside symbols (reserve pool, then Questrade lists), in order."""
+        excluded = set(symbols)
+        candidates: List[str] = []
+
+        def extend(source):
+            for sym in source:
+                if limit is not None and len(candidates) >= limit:
+                    return
+                if sym not in excluded:
+                    excluded.add(sym)
+                    candidates.append(sym)
+
+        try:
+            from cleaned_high_potential_universe import _get_reserve_pool, _load_valid_questrade_symbols  # type: ignore
+            extend(_get_reserve_pool())
+            extend(_load_valid_questrade_symbols()[0])
+        except Exception as exc:
+            print(f"⚠️ Unable to access replacement universes: {exc}")
+
+        try:
+            from questrade_valid_universe import get_questrade_valid_universe
+            extend(get_questrade_valid_universe())
+        except Exception as exc:
+            print(f"⚠️ Unable to extend candidate pool from Questrade universe: {exc}")
+
+        return candidates
+    
+    def _get_consensus_table(self, quality_results: Dict) -> pd.DataFrame:
+        """Symbol x perspective consensus table, evaluated once per quality_results."""
+        if (self.consensus_table is None or self._consensus_source is not quality_results
+                or len(self.consensus_table) != len(quality_results)):
+            accumulator = self.score_accumulator
+            if accumulator is not None and all(s in accumulator.rows for s in quality_results):
+                # Rows were accumulated while the analysis streamed in
+                self.score_matrix = accumulator.matrix(list(quality_results))
+            else:
+                self.score_matrix = self.consensus_engine.build_matrix(quality_results)
+            self.consensus_table = self.consensus_engine.evaluate(self.score_matrix)
+            self._consensus_source = quality_results
+        return self.consensus_table
+
+    def what_if_consensus(self, thresholds: Optional[Dict[str, float]] = None,
+                          min_agreement: int = 2) -> pd.DataFrame:
+        """
+        Re-run consensus on the current score matrix with different perspective
+        thresholds (e.g. {'hedge_fund': 60}). No re-analysis needed.
+
+        Returns:
+            Consensus table restricted to symbols meeting min_agreement,
+            sorted by agreement then consensus score.
+        """
+        if self.score_matrix is None:
+            if not self.base_results:
+                return pd.DataFrame()
+            self._get_consensus_table(self.base_results)
+        table = self.consensus_engine.evaluate(self.score_matrix, thresholds=thresholds,
+                                               min_agreement=min_agreement)
+        return self.consensus_engine.ranked(table)
+
+    def _perspective_picks(self, name: str, quality_results: Dict, extra_fields) -> List[Dict]:
+        """Pick list for one perspective, read from the pass/fail columns of the consensus table."""
+        table = self._get_consensus_table(quality_results)
+        spec = next(p for p in self.consensus_engine.perspectives if p['name'] == name)
+        raw_scores = self.consensus_engine.perspective_scores(self.score_matrix)[name]
+
+        picks = []
+        for symbol in table.index[table[f'{name}_pass'].to_numpy()]:
+            result = quality_results[symbol]
+            pick = {
+                'symbol': symbol,
+                'score': float(table.at[symbol, name]),
+                'quality_score': result['quality_score'],
+                'recommendation': 'BUY' if raw_scores[symbol] >= spec['buy_threshold'] else 'WEAK BUY',
+                'perspective': spec['label'],
+            }
+            pick.update(extra_fields(result))
+            pick['current_price'] = result['current_price']
+            picks.append(pick)
+
+        picks.sort(key=lambda x: x['score'], reverse=True)
+        return picks
+
     def _apply_institutional_perspective(self, quality_results: Dict) -> List[Dict]:
         """
         Institutional Consensus Perspective
-        Focus: Stability + Quality + Low Risk
+        Focus: Stability + Quality + Momentum leadership
         
-        Weight: Fundamentals 60%, Risk 30%, Momentum 10%
+        Weight: Fundamentals 40%, Risk 25%, Momentum 35% (pass >= 60, BUY >= 70)
         """
-        picks = []
-        
-        for symbol, result in quality_results.items():
-            # Institutional scoring: quality + safety + momentum leadership.
-            # Real institutions chase momentum — they don't ignore it (10% was too low).
-            inst_score = (
-                result['fundamentals']['score'] * 0.40 +
-                result['risk']['score'] * 0.25 +
-                result['momentum']['score'] * 0.35
-            )
-            
-            # Institutional threshold: prefer quality (slightly relaxed)
-            if inst_score >= 60:
-                picks.append({
-                    'symbol': symbol,
-                    'score': round(inst_score, 2),
-                    'quality_score': result['quality_score'],
-                    'recommendation': 'BUY' if inst_score >= 70 else 'WEAK BUY',
-                    'perspective': 'Institutional',
-                    'fundamentals_grade': result['fundamentals']['grade'],
-                    'risk_level': result['risk']['risk_level'],
-                    'current_price': result['current_price']
-                })
-        
-        picks.sort(key=lambda x: x['score'], reverse=True)
+        picks = self._perspective_picks('institutional', quality_results, lambda r: {
+            'fundamentals_grade': r['fundamentals']['grade'],
+            'risk_level': r['risk']['risk_level'],
+        })
         print(f"   Institutional Consensus: {len(picks)} picks (focus: stability + quality)")
         return picks
     
@@ -1022,32 +1496,12 @@ class FixedUltimateStrategyAnalyzer:
         Hedge Fund Alpha Perspective
         Focus: Momentum + Growth + Performance
         
-        Weight: Momentum 50%, Fundamentals 30%, Risk 20%
+        Weight: Momentum 50%, Fundamentals 30%, Risk 20% (pass >= 55, BUY >= 65)
         """
-        picks = []
-        
-        for symbol, result in quality_results.items():
-            # Hedge fund scoring: prioritize momentum and growth
-            hf_score = (
-                result['momentum']['score'] * 0.50 +
-                result['fundamentals']['score'] * 0.30 +
-                result['risk']['score'] * 0.20
-            )
-            
-            # Hedge fund threshold: relaxed slightly (60→55) to enable 5/5 agreement
-            if hf_score >= 55:
-                picks.append({
-                    'symbol': symbol,
-                    'score': round(hf_score, 2),
-                    'quality_score': result['quality_score'],
-                    'recommendation': 'BUY' if hf_score >= 65 else 'WEAK BUY',
-                    'perspective': 'Hedge Fund',
-                    'momentum_grade': result['momentum']['grade'],
-                    'trend': result['momentum'].get('price_trend', 'Unknown'),
-                    'current_price': result['current_price']
-                })
-        
-        picks.sort(key=lambda x: x['score'], reverse=True)
+        picks = self._perspective_picks('hedge_fund', quality_results, lambda r: {
+            'momentum_grade': r['momentum']['grade'],
+            'trend': r['momentum'].get('price_trend', 'Unknown'),
+        })
         print(f"   Hedge Fund Alpha: {len(picks)} picks (focus: momentum + growth)")
         return picks
     
@@ -1056,32 +1510,12 @@ class FixedUltimateStrategyAnalyzer:
         Quant Value Hunter Perspective
         Focus: Value + Fundamentals + Quality
         
-        Weight: Fundamentals 70%, Momentum 20%, Risk 10%
+        Weight: Fundamentals 70%, Momentum 20%, Risk 10% (pass >= 60, BUY >= 70)
         """
-        picks = []
-        
-        for symbol, result in quality_results.items():
-            # Value scoring: prioritize fundamentals and valuation
-            value_score = (
-                result['fundamentals']['score'] * 0.70 +
-                result['momentum']['score'] * 0.20 +
-                result['risk']['score'] * 0.10
-            )
-            
-            # Value threshold: prefer quality fundamentals (slightly relaxed)
-            if value_score >= 60:
-                picks.append({
-                    'symbol': symbol,
-                    'score': round(value_score, 2),
-                    'quality_score': result['quality_score'],
-                    'recommendation': 'BUY' if value_score >= 70 else 'WEAK BUY',
-                    'perspective': 'Quant Value',
-                    'fundamentals_grade': result['fundamentals']['grade'],
-                    'pe_ratio': result['fundamentals'].get('pe_ratio'),
-                    'current_price': result['current_price']
-                })
-        
-        picks.sort(key=lambda x: x['score'], reverse=True)
+        picks = self._perspective_picks('quant_value', quality_results, lambda r: {
+            'fundamentals_grade': r['fundamentals']['grade'],
+            'pe_ratio': r['fundamentals'].get('pe_ratio'),
+        })
         print(f"   Quant Value Hunter: {len(picks)} picks (focus: value + fundamentals)")
         return picks
     
@@ -1090,32 +1524,12 @@ class FixedUltimateStrategyAnalyzer:
         Risk-Managed Core Perspective
         Focus: Safety + Low Risk + Defensive
         
-        Weight: Risk 50%, Fundamentals 40%, Momentum 10%
+        Weight: Risk 50%, Fundamentals 40%, Momentum 10% (pass >= 58, BUY >= 75)
         """
-        picks = []
-        
-        for symbol, result in quality_results.items():
-            # Risk-managed scoring: prioritize safety
-            risk_score = (
-                result['risk']['score'] * 0.50 +
-                result['fundamentals']['score'] * 0.40 +
-                result['momentum']['score'] * 0.10
-            )
-            
-            # Risk-managed threshold: relaxed (65→58) to enable 5/5 agreement
-            if risk_score >= 58:
-                picks.append({
-                    'symbol': symbol,
-                    'score': round(risk_score, 2),
-                    'quality_score': result['quality_score'],
-                    'recommendation': 'BUY' if risk_score >= 75 else 'WEAK BUY',
-                    'perspective': 'Risk-Managed',
-                    'risk_level': result['risk']['risk_level'],
-                    'beta': result['risk'].get('beta'),
-                    'current_price': result['current_price']
-                })
-        
-        picks.sort(key=lambda x: x['score'], reverse=True)
+        picks = self._perspective_picks('risk_managed', quality_results, lambda r: {
+            'risk_level': r['risk']['risk_level'],
+            'beta': r['risk'].get('beta'),
+        })
         print(f"   Risk-Managed Core: {len(picks)} picks (focus: safety + low risk)")
         return picks
     
@@ -1124,49 +1538,24 @@ class FixedUltimateStrategyAnalyzer:
         Perspective 5: Investment Bank Level
         Focus: Analyst consensus, strong fundamentals, and earnings quality.
         The "Wall Street" view.
-        """
-        picks = []
-        
-        for symbol, result in quality_results.items():
-            if not result.get('success'):
-                continue
-                
-            # Investment Bank Criteria (Analyst focus)
-            # 1. Strong Fundamental Score (Quality)
-            # 2. High Analyst Rating/Coverage (Wall Street Banking)
-            # TUNED: Relaxed thresholds to enable 5/5 agreement on quality stocks
-            
-            fund_score = result['fundamentals']['score']
-            # Use sentiment score as a proxy for analyst consensus/coverage
-            analyst_score = result['sentiment']['score'] 
-            
-            if (fund_score >= 60 and analyst_score >= 50) or (fund_score >= 70):
-                
-                # Calculate composite score for this strategy
-                ib_score = (fund_score * 0.5) + (analyst_score * 0.5)
-                
-                picks.append({
-                    'symbol': symbol,
-                    'score': round(ib_score, 2),
-                    'quality_score': result['quality_score'],
-                    'recommendation': 'BUY' if ib_score >= 65 else 'WEAK BUY',
-                    'perspective': 'Investment Bank',
-                    'fundamentals_grade': result['fundamentals']['grade'],
-                    'analyst_rating': result['sentiment'].get('analyst_rating', 'N/A'),
-                    'current_price': result['current_price']
-                })
         
-        # Sort by score
-        picks.sort(key=lambda x: x['score'], reverse=True)
+        Passes on (fundamentals >= 60 and sentiment >= 50) or fundamentals >= 70;
+        score is the fundamentals/sentiment average (BUY >= 65).
+        """
+        picks = self._perspective_picks('investment_bank', quality_results, lambda r: {
+            'fundamentals_grade': r['fundamentals']['grade'],
+            'analyst_rating': r['sentiment'].get('analyst_rating', 'N/A'),
+        })
         print(f"   🏦 Investment Bank: {len(picks)} picks (focus: analyst consensus + fundamentals)")
         return picks
 
-    def _find_consensus(self, strategy_results: Dict, market_analysis: Dict = None) -> List[Dict]:
+    def _find_consensus(self, quality_results: Dict, market_analysis: Dict = None) -> List[Dict]:
         """
         Find stocks where multiple strategies agree
         
         Args:
-            strategy_results: Dict of strategy picks
+            quality_results: Quality analysis results (symbol -> result); the
+                five perspectives are evaluated on them via the consensus table
             market_analysis: Market context for ML enhancement
         
         Returns consensus picks with agreement counts (2/5, 3/5, 4/5, 5/5)
@@ -1178,133 +1567,63 @@ class FixedUltimateStrategyAnalyzer:
         print("🎯 Finding Consensus Picks (Multi-Strategy Agreement)")
         print(f"{'='*80}")
         
-        # Collect all picks by symbol
-        symbol_map = defaultdict(list)
-        
-        for s in strategy_results.get('institutional', []):
-            symbol_map[s['symbol']].append({'name': 'institutional', 'score': s['score'], 'data': self.base_results.get(s['symbol'], {})})
-        for s in strategy_results.get('hedge_fund', []):
-            symbol_map[s['symbol']].append({'name': 'hedge_fund', 'score': s['score'], 'data': self.base_results.get(s['symbol'], {})})
-        for s in strategy_results.get('quant_value', []):
-            symbol_map[s['symbol']].append({'name': 'quant_value', 'score': s['score'], 'data': self.base_results.get(s['symbol'], {})})
-        for s in strategy_results.get('risk_managed', []):
-            symbol_map[s['symbol']].append({'name': 'risk_managed', 'score': s['score'], 'data': self.base_results.get(s['symbol'], {})})
-        for s in strategy_results.get('investment_bank', []):
-            symbol_map[s['symbol']].append({'name': 'investment_bank', 'score': s['score'], 'data': self.base_results.get(s['symbol'], {})})
-        
-        # Build consensus list
+        # Agreement, consensus score and tier for every symbol come from the
+        # vectorized pass/fail matrix (row sums + tier lookup)
+        table = self._get_consensus_table(quality_results)
+        in_consensus = self.consensus_engine.ranked(table)
+        perspective_names = self.consensus_engine.names
+        
+        # Build consensus list (at least 2 strategies agree, 2/5), already ranked
+        # by agreement count, then score
         consensus_picks = []
-        for symbol, strategies in symbol_map.items():
-            count = len(strategies)
+        for symbol, row in in_consensus.iterrows():
+            count = int(row['strategies_agreeing'])
+            base_data = quality_results.get(symbol)
+            if base_data is None:
+                continue
             
-            # Require at least 2 strategies to agree (2/5)
-            if count >= 2:
-                # Calculate consensus score (average of strategy scores)
-                avg_score = np.mean([s['score'] for s in strategies])
-                
-                # Determine primary reasons
-                reasons = set()
-                for s in strategies:
-                    if s['name'] == 'institutional': reasons.add("Institutional Quality")
-                    if s['name'] == 'hedge_fund': reasons.add("Hedge Fund Momentum")
-                    if s['name'] == 'quant_value': reasons.add("Deep Value")
-                    if s['name'] == 'risk_managed': reasons.add("Low Risk")
-                    if s['name'] == 'investment_bank': reasons.add("Wall St Consensus")
-                    
-                # Get base data from one of the results
-                base_data = strategies[0]['data']
-                
-                # Flatten nested data structure for Excel compatibility
-                fundamentals = base_data.get('fundamentals', {})
-                momentum = base_data.get('momentum', {})
-                risk = base_data.get('risk', {})
-                technical = base_data.get('technical', {})
-                sentiment = base_data.get('sentiment', {})
-                
-                consensus_picks.append({
-                    'symbol': symbol,
-                    'strategies_agreeing': count,
-                    'agreeing_perspectives': [s['name'] for s in strategies],
-                    'consensus_score': round(avg_score, 2),
-                    'quality_score': base_data.get('quality_score', 0),
-                    'recommendation': self._consensus_recommendation(count, avg_score, base_data.get('quality_score', 0)).get('recommendation'),
-                    'confidence': self._consensus_recommendation(count, avg_score, base_data.get('quality_score', 0)).get('confidence'),
-                    'sector': base_data.get('sector', 'Unknown'),
-                    
-                    # Flattened fundamentals for Excel
-                    'pe_ratio': fundamentals.get('pe_ratio'),
-                    'revenue_growth': fundamentals.get('revenue_growth'),
-                    'profit_margin': fundamentals.get('profit_margin'),
-                    'roe': fundamentals.get('roe'),
-                    'debt_equity': fundamentals.get('debt_equity'),
-                    'fundamentals_score': fundamentals.get('score'),
-                    'fundamentals_grade': fundamentals.get('grade'),
-                    
-                    # Flattened momentum for Excel
-                    'rsi_14': momentum.get('rsi'),
-                    'price_trend': momentum.get('price_trend', 'neutral'),
-                    'relative_strength': momentum.get('relative_strength'),
-                    'volume_trend': momentum.get('volume_trend'),
-                    'momentum_score': momentum.get('score'),
-                    'momentum_grade': momentum.get('grade'),
-                    'ma_50': momentum.get('ma_50'),
-                    'ma_200': momentum.get('ma_200'),
-                    'volume_ratio': momentum.get('volume_ratio'),
-                    
-                    # Flattened risk metrics for Excel
-                    'beta': risk.get('beta', 1),
-                    'volatility': risk.get('volatility'),
-                    'sharpe_ratio': risk.get('sharpe_ratio'),
-                    'max_drawdown': risk.get('max_drawdown'),
-                    'var_95': risk.get('var_95'),
-                    'risk_score': risk.get('score'),
-                    'risk_grade': risk.get('grade'),
-                    'risk_level': risk.get('risk_level', 'Unknown'),
-                    
-                    # Flattened technical indicators for Excel
-                    'macd': technical.get('macd'),
-                    'macd_signal': technical.get('macd_signal'),
-                    'macd_hist': technical.get('macd_hist'),
-                    'bollinger_position': technical.get('bollinger_position'),
-                    'support_level': technical.get('support'),
-                    'resistance_level': technical.get('resistance'),
-                    'technical_score': technical.get('score'),
-                    'technical_grade': technical.get('grade'),
-                    'bollinger_upper': technical.get('bollinger_upper'),
-                    'bollinger_lower': technical.get('bollinger_lower'),
-                    'volume_sma': technical.get('volume_sma'),
-                    
-                    # Flattened sentiment for Excel
-                    'sentiment_score': sentiment.get('score'),
-                    'sentiment_grade': sentiment.get('grade'),
-                    'target_upside': sentiment.get('target_upside'),
-                    'institutional_ownership': sentiment.get('institutional_ownership'),
-                    'analyst_rating': sentiment.get('analyst_rating'),
-                    
-                    # Keep nested data for backward compatibility
-                    'fundamentals': fundamentals,
-                    'momentum': momentum,
-                    'risk': risk,
-                    'technical': technical,
-                    'sentiment': sentiment,
-                    
-                    'current_price': base_data.get('current_price', 0),
-                    'tier': f"{count}/5"
-                })
-        
-        # Sort by agreement count, then score
-        consensus_picks.sort(key=lambda x: (x['strategies_agreeing'], x['consensus_score']), reverse=True)
+            # Flat metrics + component dicts (dict view for ML, export and UI)
+            pick = as_record(base_data).flat(defaults=PICK_DEFAULTS)
+            pick.update({
+                'strategies_agreeing': count,
+                'agreeing_perspectives': [n for n in perspective_names if row[f'{n}_pass']],
+                'consensus_score': float(row['consensus_score']),
+                'quality_score': base_data.get('quality_score', 0),
+                'recommendation': str(row['recommendation']),
+                'confidence': float(row['confidence']),
+                'current_price': base_data.get('current_price', 0),
+                'tier': f"{count}/5"
+            })
+            consensus_picks.append(pick)
         
     # ML Enhancement: Add ML predictions to consensus picks
         ml_ready = bool(self.ml_predictor and ML_AVAILABLE and getattr(self.ml_predictor, 'is_trained', False))
         if ml_ready:
             print(f"\n🤖 Enhancing {len(consensus_picks)} consensus picks with ML predictions...")
+            # Add market context to picks for ML feature extraction
             for pick in consensus_picks:
+                pick['market_context'] = market_analysis
+            # One feature matrix for all picks: the distilled surrogate scores the
+            # bulk, the full ensemble re-scores the tiers that become final picks
+            try:
+                ml_results = self.ml_predictor.predict_batch(consensus_picks, fast=True)
+                final_idx = [i for i, (pick, res) in enumerate(zip(consensus_picks, ml_results))
+                             if res is not None and res.get('predictor') == 'surrogate'
+                             and pick['strategies_agreeing'] >= 3]
+                if final_idx:
+                    full = self.ml_predictor.predict_batch([consensus_picks[i] for i in final_idx])
+                    for i, res in zip(final_idx, full):
+                        if res is not None:
+                            ml_results[i] = res
+                    print(f"   Surrogate scored {len(consensus_picks)} picks, "
+                          f"full ensemble re-scored {len(final_idx)} top-tier picks")
+            except Exception as e:
+                print(f"   ⚠️ Batched ML prediction failed: {e}")
+                ml_results = [None] * len(consensus_picks)
+            for pick, ml_result in zip(consensus_picks, ml_results):
                 try:
-                    # Add market context to pick for ML feature extraction
-                    pick['market_context'] = market_analysis
-                    
-                    ml_result = self.ml_predictor.predict(pick)
+                    if ml_result is None:
+                        raise ValueError("no ML prediction")
                     pick['ml_expected_return'] = ml_result['expected_return']
                     pick['ml_probability'] = ml_result['probability']
                     pick['ml_confidence'] = ml_result['confidence']
@@ -1339,6 +1658,13 @@ class FixedUltimateStrategyAnalyzer:
                 ),
                 reverse=True
             )
+            # SHAP drivers only for the tiers that are displayed / sent to AI review,
+            # computed in one batch call with the cached explainer
+            explain_picks = [p for p in consensus_picks
+                             if p.get('ml_probability') is not None and p['strategies_agreeing'] >= 3]
+            if explain_picks:
+                for pick, drivers in zip(explain_picks, self.ml_predictor.explain_batch(explain_picks)):
+                    pick['ml_feature_importance'] = drivers
             print(f"✅ ML enhancement complete - picks re-ranked by ML probability")
         elif self.ml_predictor and ML_AVAILABLE:
             print("⚠️ ML enhancement skipped (no trained real models loaded)")
@@ -1440,74 +1766,15 @@ class FixedUltimateStrategyAnalyzer:
     def _consensus_recommendation(self, agreement: int, avg_score: float, quality_score: Optional[float] = None) -> Dict:
         """Determine recommendation based on agreement, consensus strength, and underlying quality."""
         quality_score = quality_score or 0.0
-
-        if agreement == 5:
-            if avg_score >= 80 and quality_score >= 78:
-                return {
-                    'recommendation': 'ULTIMATE BUY',
-                    'confidence': 0.98,
-                    'risk_level': 'Lowest',
-                    'action': 'Buy Aggressively'
-                }
-            else:
-                return {
-                    'recommendation': 'STRONG BUY',
-                    'confidence': 0.92,
-                    'risk_level': 'Low',
-                    'action': 'Buy'
-                }
-        elif agreement == 4:
-            if avg_score >= 75 and quality_score >= 70:
-                return {
-                    'recommendation': 'STRONG BUY',
-                    'confidence': 0.90,
-                    'risk_level': 'Low',
-                    'action': 'Buy'
-                }
-            else:
-                return {
-                    'recommendation': 'BUY',
-                    'confidence': 0.85,
-                    'risk_level': 'Low-Medium',
-                    'action': 'Buy'
-                }
-        elif agreement == 3:
-            if avg_score >= 70 and quality_score >= 65:
-                return {
-                    'recommendation': 'BUY',
-                    'confidence': 0.80,
-                    'risk_level': 'Medium',
-                    'action': 'Accumulate'
-                }
-            else:
-                return {
-                    'recommendation': 'WEAK BUY',
-                    'confidence': 0.70,
-                    'risk_level': 'Medium-High',
-                    'action': 'Accumulate'
-                }
-        elif agreement == 2:
-            if avg_score >= 65 and quality_score >= 60:
-                return {
-                    'recommendation': 'WEAK BUY',
-                    'confidence': 0.65,
-                    'risk_level': 'High',
-                    'action': 'Watch / Speculate'
-                }
-            else:
-                return {
-                    'recommendation': 'HOLD',
-                    'confidence': 0.55,
-                    'risk_level': 'Very High',
-                    'action': 'Watch'
-                }
-        else: # 1 agreement or less (should be filtered out by _find_consensus)
-            return {
-                'recommendation': 'HOLD',
-                'confidence': 0.50,
-                'risk_level': 'Very High',
-                'action': 'Watch'
-            }
+        tier = self.consensus_engine.consensus_tiers(
+            np.array([agreement]), np.array([avg_score], dtype=float), np.array([quality_score], dtype=float)
+        ).iloc[0]
+        return {
+            'recommendation': tier['recommendation'],
+            'confidence': float(tier['confidence']),
+            'risk_level': tier['risk_level'],
+            'action': tier['action']
+        }
     
     def _apply_sector_diversification(self, consensus_picks: List[Dict], max_sector_pct: float = 0.35) -> List[Dict]:
         """
@@ -2012,78 +2279,9 @@ Respond strictly as a JSON object with keys: `market_overview`, `top_picks`, `po
         
         # CRITICAL FIX: Include ALL analyzed stocks, not just consensus
 
-        # Prepare complete analysis for Excel export
-        all_analyzed = []
-        for symbol, quality_data in self.base_results.items():
-            # Flatten data structure for Excel
-            fundamentals = quality_data.get('fundamentals', {})
-            momentum = quality_data.get('momentum', {})
-            risk = quality_data.get('risk', {})
-            technical = quality_data.get('technical', {})
-            sentiment = quality_data.get('sentiment', {})
-            
-            all_analyzed.append({
-                'symbol': symbol,
-                'sector': quality_data.get('sector', 'Unknown'),
-                'quality_score': quality_data.get('quality_score'),
-                'current_price': quality_data.get('current_price'),
-                
-                # Fundamentals - flattened
-                'pe_ratio': fundamentals.get('pe_ratio'),
-                'revenue_growth': fundamentals.get('revenue_growth'),
-                'profit_margin': fundamentals.get('profit_margin'),
-                'roe': fundamentals.get('roe'),
-                'debt_equity': fundamentals.get('debt_equity'),
-                'fundamentals_score': fundamentals.get('score'),
-                'fundamentals_grade': fundamentals.get('grade', 'N/A'),
-                
-                # Momentum - flattened
-                'rsi_14': momentum.get('rsi'),
-                'price_trend': momentum.get('price_trend', 'N/A'),
-                'volume_trend': momentum.get('volume_trend', 'N/A'),
-                'momentum_score': momentum.get('score'),
-                'momentum_grade': momentum.get('grade', 'N/A'),
-                'ma_50': momentum.get('ma_50'),
-                'ma_200': momentum.get('ma_200'),
-                'volume_ratio': momentum.get('volume_ratio'),
-                
-                # Risk - flattened
-                'beta': risk.get('beta'),
-                'volatility': risk.get('volatility'),
-                'sharpe_ratio': risk.get('sharpe_ratio'),
-                'max_drawdown': risk.get('max_drawdown'),
-                'var_95': risk.get('var_95'),
-                'risk_score': risk.get('score'),
-                'risk_grade': risk.get('grade', 'N/A'),
-                'risk_level': risk.get('risk_level', 'N/A'),
-                
-                # Technical - flattened
-                'macd': technical.get('macd'),
-                'macd_signal': technical.get('macd_signal'),
-                'macd_hist': technical.get('macd_hist'),
-                'bollinger_position': technical.get('bollinger_position'),
-                'bollinger_upper': technical.get('bollinger_upper'),
-                'bollinger_lower': technical.get('bollinger_lower'),
-                'support_level': technical.get('support'),
-                'resistance_level': technical.get('resistance'),
-                'volume_sma': technical.get('volume_sma'),
-                'technical_score': technical.get('score'),
-                'technical_grade': technical.get('grade', 'N/A'),
-                
-                # Sentiment - flattened
-                'sentiment_score': sentiment.get('score'),
-                'sentiment_grade': sentiment.get('grade', 'N/A'),
-                'target_upside': sentiment.get('target_upside'),
-                'institutional_ownership': sentiment.get('institutional_ownership'),
-                'analyst_rating': sentiment.get('analyst_rating'),
-                
-                # Keep nested dicts for backward compatibility
-                'fundamentals': fundamentals,
-                'momentum': momentum,
-                'risk': risk,
-                'technical': technical,
-                'sentiment': sentiment
-            })
+        # Complete analysis for Excel export: the records themselves (no per-stock
+        # copies); export reads flat fields such as rsi_14 / support_level directly
+        all_analyzed = [as_record(r) for r in self.base_results.values()]
         
         return {
             'consensus_recommendations': consensus,
@@ -2172,7 +2370,7 @@ Respond strictly as a JSON object with keys: `market_overview`, `top_picks`, `po
                 
                 # Export all analyzed stocks to CSV as backup
                 if results.get('all_analyzed_stocks'):
-                    df = pd.DataFrame(results['all_analyzed_stocks'])
+                    df = results_frame(results['all_analyzed_stocks'])
                     filename = f"ultimate_strategy_all_stocks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
                     df.to_csv(filename, index=False)
                     print(f"📊 Backup export to: {filename}")
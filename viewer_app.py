@@ -12,9 +12,11 @@ import json
 import os
 from datetime import datetime
 from pathlib import Path
-import pandas as pd
+from lazy_imports import lazy_module
 import sqlite3
 
+pd = lazy_module('pandas')  # only needed once a run's tables are rendered
+
 # ─── Page Config ──────────────────────────────────────────────────────────────
 st.set_page_config(
     page_title="SmartTrade AI — Ultimate Strategy Results",
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Volume Profile (Volume-at-Price) Kernel
+Weighted price histograms shared by the fetcher, analyzer and enhanced signals
+
+Each bar's volume is spread uniformly over its High-Low range and added to
+fixed price bins in one matrix operation (no per-bin masking):
+- Point of Control (POC): the price bin with the most volume
+- Value Area (VAH/VAL): bins around the POC holding 70% of the volume
+- High/Low Volume Nodes (HVN/LVN): local peaks/troughs of the profile
+
+volume_profile_batch() evaluates many symbols and lookback windows at once
+over an aligned price panel (see price_panel.build_price_panel).
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+
+DEFAULT_BINS = 20
+VALUE_AREA_PCT = 0.70
+
+
+def _profile_matrix(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                    volume: np.ndarray, bins: int):
+    """
+    Volume-at-price histograms for T x S arrays (NaN rows are ignored).
+
+    Returns:
+        (hist S x bins, edges S x bins+1)
+    """
+    valid = ~(np.isnan(high) | np.isnan(low) | np.isnan(close) | np.isnan(volume))
+    high, low = np.where(valid, np.fmax(high, low), np.nan), np.where(valid, np.fmin(high, low), np.nan)
+    volume = np.where(valid, volume, 0.0)
+
+    price_min = np.where(valid, low, np.inf).min(axis=0)
+    price_max = np.where(valid, high, -np.inf).max(axis=0)
+    flat = ~(price_max > price_min)
+    price_max = np.where(flat, price_min + 1e-9, price_max)
+    price_min = np.where(np.isfinite(price_min), price_min, 0.0)
+    price_max = np.where(np.isfinite(price_max), price_max, 1e-9)
+    steps = np.linspace(0.0, 1.0, bins + 1)
+    edges = price_min[:, None] + (price_max - price_min)[:, None] * steps[None, :]
+
+    # Fraction of each bar's range inside each bin: diff of the bin edges
+    # clipped to [low, high] (T x S x bins+1 -> T x S x bins)
+    lo = np.where(valid, low, 0.0)[:, :, None]
+    hi = np.where(valid, high, 0.0)[:, :, None]
+    clipped = np.clip(edges[None, :, :], lo, hi)
+    bar_range = (hi - lo)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share = np.diff(clipped, axis=2) / bar_range
+    hist = np.einsum('ts,tsb->sb', volume, np.where(bar_range > 0, share, 0.0))
+
+    # Zero-range bars (High == Low) put all their volume in their close's bin
+    point = valid & ~(high > low)
+    if point.any():
+        width = (edges[:, -1] - edges[:, 0]) / bins
+        idx = np.floor((np.where(point, close, edges[:, 0]) - edges[None, :, 0]) / width[None, :])
+        idx = np.clip(np.nan_to_num(idx), 0, bins - 1).astype(int)
+        for s in np.flatnonzero(point.any(axis=0)):
+            hist[s] += np.bincount(idx[point[:, s], s], weights=volume[point[:, s], s], minlength=bins)
+
+    return hist, edges
+
+
+def _profile_levels(hist: np.ndarray, edges: np.ndarray,
+                    value_area_pct: float = VALUE_AREA_PCT) -> Dict[str, np.ndarray]:
+    """POC, value area and volume nodes for S x bins histograms."""
+    n_sym, bins = hist.shape
+    rows = np.arange(n_sym)
+    centers = (edges[:, :-1] + edges[:, 1:]) / 2
+    total = hist.sum(axis=1)
+
+    poc_idx = hist.argmax(axis=1)
+    lo = poc_idx.copy()
+    hi = poc_idx.copy()
+    covered = hist[rows, poc_idx]
+    target = total * value_area_pct
+    # Grow the value area one bin at a time toward the heavier neighbour
+    for _ in range(bins - 1):
+        need = covered < target
+        if not need.any():
+            break
+        up = np.where(hi + 1 < bins, hist[rows, np.minimum(hi + 1, bins - 1)], -1.0)
+        down = np.where(lo - 1 >= 0, hist[rows, np.maximum(lo - 1, 0)], -1.0)
+        go_up = need & (up >= down) & (up >= 0)
+        go_down = need & ~go_up & (down >= 0)
+        covered = covered + np.where(go_up, up, 0.0) + np.where(go_down, down, 0.0)
+        hi = hi + go_up
+        lo = lo - go_down
+
+    # Nodes: local peaks above / troughs below the average bin volume
+    left = np.concatenate([np.full((n_sym, 1), -np.inf), hist[:, :-1]], axis=1)
+    right = np.concatenate([hist[:, 1:], np.full((n_sym, 1), -np.inf)], axis=1)
+    mean_bin = hist.mean(axis=1, keepdims=True)
+    hvn = (hist >= left) & (hist >= right) & (hist > mean_bin)
+    left_lv = np.concatenate([np.full((n_sym, 1), np.inf), hist[:, :-1]], axis=1)
+    right_lv = np.concatenate([hist[:, 1:], np.full((n_sym, 1), np.inf)], axis=1)
+    lvn = (hist <= left_lv) & (hist <= right_lv) & (hist < mean_bin)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        poc_share = np.where(total > 0, hist[rows, poc_idx] / total, np.nan)
+
+    return {
+        'poc': centers[rows, poc_idx],
+        'vah': edges[rows, hi + 1],
+        'val': edges[rows, lo],
+        'poc_volume_pct': poc_share,
+        'hvn': hvn,
+        'lvn': lvn,
+        'centers': centers,
+        'has_volume': total > 0,
+    }
+
+
+def volume_profile(df: pd.DataFrame, bins: int = DEFAULT_BINS,
+                   value_area_pct: float = VALUE_AREA_PCT,
+                   lookback: Optional[int] = None) -> Dict:
+    """
+    Volume profile of one OHLCV history.
+
+    Args:
+        df: DataFrame with High, Low, Close, Volume
+        bins: Number of price bins between the window's low and high
+        value_area_pct: Share of volume inside the value area
+        lookback: Optional number of trailing bars to profile
+
+    Returns:
+        dict with poc, vah, val, poc_volume_pct, hvn/lvn (bin-center prices),
+        profile (volume per bin) and bin_edges. Empty dict without volume.
+    """
+    if df is None or df.empty:
+        return {}
+    if lookback:
+        df = df.tail(lookback)
+
+    def column(name):
+        return df[name].to_numpy(dtype=float)[:, None]
+
+    hist, edges = _profile_matrix(column('High'), column('Low'), column('Close'), column('Volume'), bins)
+    levels = _profile_levels(hist, edges, value_area_pct)
+    if not levels['has_volume'][0]:
+        return {}
+
+    centers = levels['centers'][0]
+    return {
+        'poc': float(levels['poc'][0]),
+        'vah': float(levels['vah'][0]),
+        'val': float(levels['val'][0]),
+        'poc_volume_pct': float(levels['poc_volume_pct'][0]),
+        'hvn': [float(p) for p in centers[levels['hvn'][0]]],
+        'lvn': [float(p) for p in centers[levels['lvn'][0]]],
+        'profile': hist[0],
+        'bin_edges': edges[0],
+    }
+
+
+def volume_profile_batch(panel: Dict[str, pd.DataFrame], lookbacks: Sequence[int] = (20,),
+                         bins: int = DEFAULT_BINS,
+                         value_area_pct: float = VALUE_AREA_PCT) -> pd.DataFrame:
+    """
+    Volume profiles for every symbol of a panel and every lookback window.
+
+    Args:
+        panel: field -> DataFrame (dates x symbols) with High, Low, Close, Volume
+        lookbacks: Trailing windows in bars (each symbol's own trading days)
+
+    Returns:
+        DataFrame indexed by (lookback, symbol) with poc, vah, val,
+        poc_volume_pct, hvn, lvn (lists of prices). Symbols without volume
+        in a window are left out.
+    """
+    from price_panel import align_right
+
+    data = align_right(panel, ('High', 'Low', 'Close', 'Volume'))
+    symbols = list(data['Close'].columns)
+    tables = []
+    for lookback in lookbacks:
+        window = {f: data[f].to_numpy()[-lookback:] for f in data}
+        hist, edges = _profile_matrix(window['High'], window['Low'], window['Close'], window['Volume'], bins)
+        levels = _profile_levels(hist, edges, value_area_pct)
+        centers = levels['centers']
+        table = pd.DataFrame({
+            'poc': levels['poc'],
+            'vah': levels['vah'],
+            'val': levels['val'],
+            'poc_volume_pct': levels['poc_volume_pct'],
+            'hvn': [list(centers[i][levels['hvn'][i]]) for i in range(len(symbols))],
+            'lvn': [list(centers[i][levels['lvn'][i]]) for i in range(len(symbols))],
+        }, index=pd.MultiIndex.from_product([[lookback], symbols], names=['lookback', 'symbol']))
+        tables.append(table[levels['has_volume']])
+    if not tables:
+        return pd.DataFrame()
+    return pd.concat(tables)